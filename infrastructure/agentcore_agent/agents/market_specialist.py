@@ -94,8 +94,8 @@ def find_comparable_properties(
     """
     Find comparable properties using professional appraisal methodology.
 
-    Uses: Price Match (40%) + Feature Match (40%) + Time-Decay (20%)
-    Returns: comps with similarity_score, feature_match, time_weight, distance_meters.
+    Uses: nearest neighbours on standardized value, size, rooms, age, lot, location and features.
+    Returns: comps with similarity_score (feature-vector nearest neighbours), vector_distance, distance_meters.
     """
     payload = {
         'tool': 'find_comparable_properties',
@@ -133,11 +133,15 @@ def calculate_absorption_rate(
     city: str,
     property_type: str = None,
     min_price: float = None,
-    max_price: float = None
+    max_price: float = None,
+    timeframe_days: int = 365
 ) -> dict:
     """
     Calculate market absorption rate and inventory metrics.
 
+    Args:
+        timeframe_days: Sales window in days (30-730)
+
     Returns: absorption rate, inventory count, sales velocity, market classification.
     """
     payload = {
@@ -146,7 +150,8 @@ def calculate_absorption_rate(
             'city': city,
             'property_type': property_type,
             'min_price': min_price,
-            'max_price': max_price
+            'max_price': max_price,
+            'timeframe_days': timeframe_days
         }
     }
 
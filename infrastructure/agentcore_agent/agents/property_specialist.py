@@ -9,7 +9,6 @@ import uuid
 from copy import deepcopy
 from datetime import datetime
 import boto3
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from strands import Agent, tool
 import structlog
 
@@ -87,65 +86,6 @@ def get_latest_analysis_summary() -> dict:
     return deepcopy(_analysis_tracker)
 
 
-def _normalize_owner_name(owner_name: str | None) -> str:
-    """Return an uppercase alphanumeric signature for the owner."""
-    if not owner_name or not isinstance(owner_name, str):
-        return ''
-    return ''.join(ch for ch in owner_name.upper() if ch.isalnum())
-
-
-def _apply_owner_cap(properties: list, per_owner_limit: int, max_results: int | None = None) -> tuple[list, dict]:
-    """Limit number of properties per owner and dedupe by parcel and coordinates."""
-    per_owner_limit = max(1, int(per_owner_limit or 1))
-    max_results = max_results or len(properties or [])
-
-    owner_counts: dict[str, int] = {}
-    parcel_seen: set[str] = set()
-    coord_seen: set[tuple[float, float]] = set()
-    trimmed: list = []
-    filtered_stats = {'removed': 0}
-
-    for prop in properties or []:
-        if not isinstance(prop, dict):
-            continue
-
-        parcel_raw = (prop.get('parcel_id') or '').strip()
-        parcel_key = parcel_raw.upper()
-        if parcel_key and parcel_key in parcel_seen:
-            filtered_stats['removed'] += 1
-            continue
-
-        lat = prop.get('latitude')
-        lon = prop.get('longitude')
-        try:
-            coord_key = (round(float(lat), 6), round(float(lon), 6))
-        except (TypeError, ValueError):
-            coord_key = None
-
-        if coord_key and coord_key in coord_seen:
-            filtered_stats['removed'] += 1
-            continue
-
-        owner_key = _normalize_owner_name(prop.get('owner_name'))
-        if owner_key:
-            owner_limit = owner_counts.get(owner_key, 0)
-            if owner_limit >= per_owner_limit:
-                filtered_stats['removed'] += 1
-                continue
-            owner_counts[owner_key] = owner_limit + 1
-
-        if parcel_key:
-            parcel_seen.add(parcel_key)
-        if coord_key:
-            coord_seen.add(coord_key)
-
-        trimmed.append(prop)
-        if len(trimmed) >= max_results:
-            break
-
-    return trimmed, filtered_stats
-
-
 def _determine_default_order(property_type: str | None, requested_order: str | None = None) -> str | None:
     """Pick a diversified ordering strategy when caller does not specify one."""
     if requested_order:
@@ -206,17 +146,22 @@ def search_properties(
     min_assessed: float = None,
     max_assessed: float = None,
     limit: int = 100,
-    order_by: str = None
+    order_by: str = None,
+    profile: str = None,
+    fields: list = None
 ) -> dict:
     """
     Search properties with 42 advanced filters.
 
     Supports: location, price, size, physical features, building quality,
     owner intelligence, tax/exemptions, sales history filters.
+
+    profile limits the returned fields: "summary" (13), "valuation", "physical",
+    "owner", "location" or "full" (default, 37); fields adds explicit field names.
     """
     parameters = {
         k: v for k, v in locals().items()
-        if v is not None and k not in ['payload', 'response', 'result', 'parameters', 'data', 'trimmed', 'stats']
+        if v is not None and k not in ['payload', 'response', 'result', 'parameters', 'data']
     }
 
     if 'per_owner_limit' not in parameters:
@@ -240,26 +185,15 @@ def search_properties(
     result = json.loads(response['Payload'].read())
     data = json.loads(result['body'])
 
-    properties = data.get('properties', [])
-    limit_value = parameters.get('limit') or 100
-    try:
-        per_owner_limit = int(parameters.get('per_owner_limit', 2))
-    except (TypeError, ValueError):
-        per_owner_limit = 2
-
-    trimmed, stats = _apply_owner_cap(properties, per_owner_limit, max_results=int(limit_value))
-
-    if stats.get('removed'):
+    # Per-owner cap and parcel/coordinate dedupe are applied by the Lambda (in SQL)
+    if data.get('owner_cap_removed'):
         logger.info(
-            "Applied per-owner cap to property search results",
-            removed=stats['removed'],
-            per_owner_limit=per_owner_limit,
-            returned=len(trimmed),
+            "Per-owner cap applied to property search results",
+            removed=data['owner_cap_removed'],
+            per_owner_limit=parameters['per_owner_limit'],
+            returned=data.get('count', 0),
         )
 
-    data['properties'] = trimmed
-    data['count'] = len(trimmed)
-
     try:
         property_type_label = parameters.get('property_type') or 'ALL'
         _record_search_result(
@@ -282,96 +216,99 @@ def search_all_property_types(
     max_sqft: int = None,
     min_lot_acres: float = None,
     max_lot_acres: float = None,
-    limit: int = 100
+    limit: int = 100,
+    profile: str = None
 ) -> dict:
     """
     Search ALL 6 property types in PARALLEL (10x faster than 6 sequential calls).
 
-    Makes 6 concurrent Lambda invocations for complete market coverage:
+    Sends one batched Lambda invocation (6 search_properties items, run concurrently
+    inside the Lambda) for complete market coverage:
     - CONDO, SINGLE FAMILY, MOBILE HOME, VACANT, TOWNHOME, Other types (null)
 
     Returns combined results grouped by property type with total counts.
 
     **USE THIS TOOL FIRST** for property discovery instead of making 6 separate
     search_properties calls. Completes in ~2 minutes instead of ~12 minutes.
+
+    profile (e.g. "summary") limits the fields returned for every property type.
     """
     logger.info("search_all_property_types invoked", city=city, max_price=max_price)
 
     property_types = ["CONDO", "SINGLE FAMILY", "MOBILE HOME", "VACANT", "TOWNHOME", None]
 
-    def search_single_type(prop_type):
-        """Helper to search one property type"""
-        try:
-            parameters = {
-                'city': city,
-                'min_price': min_price,
-                'max_price': max_price,
-                'property_type': prop_type,
-                'min_sqft': min_sqft,
-                'max_sqft': max_sqft,
-                'min_lot_acres': min_lot_acres,
-                'max_lot_acres': max_lot_acres,
-                'limit': limit
-            }
-            parameters = {k: v for k, v in parameters.items() if v is not None}
-
-            order_choice = _determine_default_order(prop_type, parameters.get('order_by'))
-            if order_choice:
-                parameters['order_by'] = order_choice
-
-            parameters.setdefault('per_owner_limit', 2)
-
-            payload = {
-                'tool': 'search_properties',
-                'parameters': parameters
-            }
-
-            response = lambda_client.invoke(
-                FunctionName=INTELLIGENCE_FUNCTION_ARN,
-                InvocationType='RequestResponse',
-                Payload=json.dumps(payload)
+    def build_parameters(prop_type):
+        """Search parameters for one property type"""
+        parameters = {
+            'city': city,
+            'min_price': min_price,
+            'max_price': max_price,
+            'property_type': prop_type,
+            'min_sqft': min_sqft,
+            'max_sqft': max_sqft,
+            'min_lot_acres': min_lot_acres,
+            'max_lot_acres': max_lot_acres,
+            'limit': limit,
+            'profile': profile
+        }
+        parameters = {k: v for k, v in parameters.items() if v is not None}
+
+        order_choice = _determine_default_order(prop_type, parameters.get('order_by'))
+        if order_choice:
+            parameters['order_by'] = order_choice
+
+        parameters.setdefault('per_owner_limit', 2)
+        return parameters
+
+    def summarize_type(prop_type, parameters, item):
+        """Turn one batch item into the per-type result"""
+        if not item.get('success'):
+            logger.error(f"Error searching {prop_type}: {item.get('error')}")
+            return {'property_type': prop_type or 'OTHER', 'count': 0, 'properties': [], 'error': item.get('error')}
+
+        data = item.get('result') or {}
+        properties = data.get('properties', [])
+
+        if data.get('owner_cap_removed'):
+            logger.info(
+                "Per-owner cap applied in search_all_property_types",
+                property_type=prop_type or 'OTHER',
+                removed=data['owner_cap_removed'],
+                per_owner_limit=parameters.get('per_owner_limit', 2),
+                returned=len(properties),
             )
 
-            result = json.loads(response['Payload'].read())
-            data = json.loads(result['body'])
-
-            properties = data.get('properties', [])
-            per_owner_limit = parameters.get('per_owner_limit', 2)
-            trimmed, stats = _apply_owner_cap(properties, per_owner_limit, max_results=limit)
-
-            if stats.get('removed'):
-                logger.info(
-                    "Applied per-owner cap in search_all_property_types",
-                    property_type=prop_type or 'OTHER',
-                    removed=stats['removed'],
-                    per_owner_limit=per_owner_limit,
-                    returned=len(trimmed),
-                )
-
-            data['properties'] = trimmed
-            data['count'] = len(trimmed)
-
-            return {
-                'property_type': prop_type or 'OTHER',
-                'count': data.get('count', 0),
-                'properties': data.get('properties', [])
-            }
-        except Exception as e:
-            logger.error(f"Error searching {prop_type}: {e}")
-            return {'property_type': prop_type or 'OTHER', 'count': 0, 'properties': [], 'error': str(e)}
-
-    # Execute all 6 searches in PARALLEL
-    results_by_type = []
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        future_to_type = {executor.submit(search_single_type, pt): pt for pt in property_types}
-
-        for future in as_completed(future_to_type):
-            try:
-                results_by_type.append(future.result())
-            except Exception as e:
-                prop_type = future_to_type[future]
-                logger.error(f"Failed {prop_type}: {e}")
-                results_by_type.append({'property_type': prop_type or 'OTHER', 'count': 0, 'properties': []})
+        return {
+            'property_type': prop_type or 'OTHER',
+            'count': len(properties),
+            'properties': properties
+        }
+
+    # All 6 searches in ONE Lambda invocation (batch form, run concurrently inside the Lambda)
+    parameters_by_type = [build_parameters(pt) for pt in property_types]
+    payload = {
+        'tools': [{'tool': 'search_properties', 'parameters': parameters} for parameters in parameters_by_type]
+    }
+
+    try:
+        response = lambda_client.invoke(
+            FunctionName=INTELLIGENCE_FUNCTION_ARN,
+            InvocationType='RequestResponse',
+            Payload=json.dumps(payload)
+        )
+        result = json.loads(response['Payload'].read())
+        batch = json.loads(result['body'])
+        items = batch.get('results') or []
+        if len(items) != len(property_types):
+            raise ValueError(batch.get('error') or f"Expected {len(property_types)} batch results, got {len(items)}")
+    except Exception as e:
+        logger.error(f"search_all_property_types batch invoke failed: {e}")
+        items = [{'success': False, 'error': str(e)} for _ in property_types]
+
+    results_by_type = [
+        summarize_type(pt, parameters, item)
+        for pt, parameters, item in zip(property_types, parameters_by_type, items)
+    ]
 
     # Sort by property type for consistent output
     results_by_type.sort(key=lambda x: x['property_type'])
@@ -400,20 +337,27 @@ def search_all_property_types(
 def get_property_details(
     parcel_id: str = None,
     property_id: str = None,
-    address: str = None
+    address: str = None,
+    profile: str = None,
+    fields: list = None
 ) -> dict:
     """
     Get complete property details with ALL 80+ database fields.
 
     Returns: building features, neighborhood, owner, tax, financial data,
     JSONB fields (sales_history, building_details, permit_history).
+
+    profile limits the returned fields: "summary" (~23), "valuation", "physical",
+    "history" or "full" (default, incl. raw_data); fields adds explicit field names.
     """
     payload = {
         'tool': 'get_property_details',
         'parameters': {
             'parcel_id': parcel_id,
             'property_id': property_id,
-            'address': address
+            'address': address,
+            'profile': profile,
+            'fields': fields
         }
     }
 
@@ -432,12 +376,16 @@ def cluster_properties(
     city: str,
     radius_meters: float = 500,
     min_cluster_size: int = 3,
-    property_type: str = None
+    property_type: str = None,
+    cell_id: str = None
 ) -> dict:
     """
-    Find geographic clusters of properties using DBSCAN.
+    Find geographic clusters of properties on a square grid (125 m - 4 km cells).
 
-    Returns: clusters with centroids, property counts, purity scores.
+    radius_meters is snapped to the nearest cell size. Pass a returned cluster's
+    cell_id to zoom into it (its finer sub-cells).
+
+    Returns: clusters with centers, cell ids, property counts, purity scores.
     """
     payload = {
         'tool': 'cluster_properties',
@@ -445,7 +393,8 @@ def cluster_properties(
             'city': city,
             'radius_meters': radius_meters,
             'min_cluster_size': min_cluster_size,
-            'property_type': property_type
+            'property_type': property_type,
+            'cell_id': cell_id
         }
     }
 
@@ -499,11 +448,17 @@ def analyze_location_intelligence(
     lat: float = None,
     lon: float = None,
     radius_meters: float = 500,
-    limit: int = 50
+    limit: int = 50,
+    mode: str = 'radius',
+    k: int = None,
+    property_type: str = None
 ) -> dict:
     """
     Analyze nearby properties and spatial context.
 
+    mode='radius' returns everything within radius_meters; mode='knn' returns the k
+    nearest parcels (radius_meters acts as a cap), optionally filtered by property_type.
+
     Returns: nearby properties with distances, property mix, spatial patterns.
     """
     payload = {
@@ -514,7 +469,10 @@ def analyze_location_intelligence(
             'lat': lat,
             'lon': lon,
             'radius_meters': radius_meters,
-            'limit': limit
+            'limit': limit,
+            'mode': mode,
+            'k': k,
+            'property_type': property_type
         }
     }
 
@@ -89,7 +89,8 @@ def search_ordinances(
         'parameters': {
             'query': query,
             'market': f"{city.lower().replace(' ', '_')}_fl" if city else None,
-            'max_results': max_results
+            'max_results': max_results,
+            'mode': 'hybrid'  # Zoning codes / section numbers match exactly
         }
     }
 
@@ -11,7 +11,7 @@ Uses Strands Agents framework with AgentCore runtime.
 
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 import boto3
 from strands import Agent, tool
@@ -41,7 +41,9 @@ def search_properties(
     property_type: str = None,
     min_sqft: int = None,
     max_sqft: int = None,
-    limit: int = 20
+    limit: int = 20,
+    profile: str = None,
+    fields: List[str] = None
 ) -> Dict[str, Any]:
     """
     Search for properties based on criteria.
@@ -54,6 +56,9 @@ def search_properties(
         min_sqft: Minimum square footage
         max_sqft: Maximum square footage
         limit: Maximum results to return
+        profile: Fields to return - "summary", "valuation", "physical", "owner",
+                 "location" or "full" (default, all 37 fields)
+        fields: Extra field names to return (only these when no profile is given)
 
     Returns:
         List of matching properties with details
@@ -67,7 +72,9 @@ def search_properties(
             'property_type': property_type,
             'min_sqft': min_sqft,
             'max_sqft': max_sqft,
-            'limit': limit
+            'limit': limit,
+            'profile': profile,
+            'fields': fields
         }
     }
 
@@ -370,7 +377,9 @@ def find_comparable_properties(
 def get_property_details(
     parcel_id: str = None,
     property_id: str = None,
-    address: str = None
+    address: str = None,
+    profile: str = None,
+    fields: List[str] = None
 ) -> Dict[str, Any]:
     """
     Get COMPLETE property details with ALL 80+ database fields.
@@ -387,16 +396,21 @@ def get_property_details(
         parcel_id: Parcel ID to lookup (preferred)
         property_id: Property ID
         address: Partial address match
+        profile: Fields to return - "summary" (~23 fields), "valuation", "physical",
+                 "history" or "full" (default, all 80+ fields incl. raw_data)
+        fields: Extra field names to return (only these when no profile is given)
 
     Returns:
-        Complete property record with 80+ fields
+        Property record with the profile's fields
     """
     payload = {
         'tool': 'get_property_details',
         'parameters': {
             'parcel_id': parcel_id,
             'property_id': property_id,
-            'address': address
+            'address': address,
+            'profile': profile,
+            'fields': fields
         }
     }
 
@@ -652,9 +666,11 @@ find_comparable_properties: ENHANCED - Professional appraisal methodology:
   - Sale qualification filtering (qualified sales only)
   - Distance-based scoring
 
-get_property_details: NEW - Returns ALL 80+ database fields in one call:
+get_property_details: Returns up to 80+ database fields in one call:
   - Complete building features, neighborhood, owner, tax, financial data
   - JSONB fields: sales_history, building_details, permit_history
+  - profile="summary" / "valuation" / "physical" / "history" returns only that slice;
+    use "full" only when raw JSONB history is needed (search_properties takes profile too)
 
 check_permit_history: ENHANCED - Joins permits + entities for contractor/owner names
 
@@ -11,6 +11,9 @@ Clean architecture with custom RAG (no Bedrock KB, no S3 bucket):
 """
 
 import os
+import shutil
+from pathlib import Path
+
 from aws_cdk import App, Environment, Tags
 
 from lib.dominion_aurora_stack import DominionAuroraStack
@@ -24,6 +27,14 @@ region = os.environ.get("CDK_DEFAULT_REGION", "us-east-1")
 
 env = Environment(account=account, region=region)
 
+# The Lambda shared layer packages src/utils/parcel_ids.py (the canonical copy, also used by
+# the loaders); copy it in before the layer asset is built
+_ROOT = Path(__file__).resolve().parent.parent
+shutil.copy2(
+    _ROOT / "src" / "utils" / "parcel_ids.py",
+    _ROOT / "infrastructure" / "lambda" / "shared_layer" / "python" / "parcel_ids.py",
+)
+
 app = App()
 
 # Stack 1: Aurora Serverless v2 Database with scale-to-zero
@@ -1,7 +1,7 @@
 """
 Intelligence Lambda Function Handler
 
-Handles 9 tools:
+Handles 10 tools:
 1. search_properties - Search properties by criteria (enhanced with 40+ filters)
 2. find_entities - Find property owners/entities (uses entities table)
 3. analyze_market_trends - Market analysis with absorption rates
@@ -10,29 +10,53 @@ Handles 9 tools:
 6. analyze_location_intelligence - Location-based analysis
 7. check_permit_history - Permit history lookup (joins permits + entities)
 8. find_comparable_properties - Find comps (actual sale prices)
-9. get_property_details - Get ALL property data (80+ fields)
+9. get_property_details - Property data by projection profile (up to 80+ fields)
+10. calculate_absorption_rate - Absorption / inventory metrics, optionally per price band
+
+Invocation: a single {"tool", "parameters"} event, or a batch {"tools": [...]} that runs
+several tools in one invocation on a bounded thread pool (see lambda_handler).
 
 Uses RDS Data API for serverless database access (no VPC needed).
-Self-contained - no external module dependencies.
+Result decoding (data_api_decoder) and parcel ID canonicalization (parcel_ids, copied in from
+src/utils at synth time) come from the shared layer; everything else is self-contained.
 """
 
+import base64
 import json
+import math
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from typing import Dict, Any, List, Tuple
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
-# Initialize AWS clients
-rds_data = boto3.client('rds-data')
+from data_api_decoder import JSON_RECORDS_FORMAT, decode_response
+from parcel_ids import canonical_parcel_id
 
 # Environment variables
 CLUSTER_ARN = os.environ['CLUSTER_ARN']
 SECRET_ARN = os.environ['SECRET_ARN']
 DATABASE_NAME = os.environ['DATABASE_NAME']
 
+# Batch invocations ({"tools": [...]}) run on a bounded pool
+MAX_BATCH_WORKERS = int(os.environ.get('MAX_BATCH_WORKERS', '6'))
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '20'))
+
+# Initialize AWS clients (one client shared by all batch workers - boto3 clients are thread-safe,
+# the pool just needs enough connections for every worker)
+rds_data = boto3.client('rds-data', config=Config(max_pool_connections=max(10, MAX_BATCH_WORKERS)))
+
+
+def execute_sql(sql: str, parameters: List[Dict] = None, format_json: bool = True) -> Dict:
+    """
+    Execute SQL via RDS Data API.
 
-def execute_sql(sql: str, parameters: List[Dict] = None) -> Dict:
-    """Execute SQL via RDS Data API"""
+    By default asks for formatRecordsAs='JSON' so the whole result set is decoded with one
+    json.loads; pass format_json=False to get the classic typed records back.
+    """
     try:
         params = {
             'resourceArn': CLUSTER_ARN,
@@ -41,6 +65,8 @@ def execute_sql(sql: str, parameters: List[Dict] = None) -> Dict:
             'sql': sql,
             'includeResultMetadata': True,
         }
+        if format_json:
+            params['formatRecordsAs'] = JSON_RECORDS_FORMAT
         if parameters:
             params['parameters'] = parameters
 
@@ -52,115 +78,325 @@ def execute_sql(sql: str, parameters: List[Dict] = None) -> Dict:
 
 
 def format_rds_response(response: Dict) -> List[Dict]:
-    """Convert RDS Data API response to list of dictionaries"""
-    if 'records' not in response or not response['records']:
-        return []
-
-    column_names = [col['name'] for col in response.get('columnMetadata', [])]
-    results = []
-
-    for record in response['records']:
-        row = {}
-        for i, col_name in enumerate(column_names):
-            if i < len(record):
-                # Extract value from RDS Data API format
-                value_dict = record[i]
-                if 'stringValue' in value_dict:
-                    row[col_name] = value_dict['stringValue']
-                elif 'longValue' in value_dict:
-                    row[col_name] = value_dict['longValue']
-                elif 'doubleValue' in value_dict:
-                    row[col_name] = value_dict['doubleValue']
-                elif 'booleanValue' in value_dict:
-                    row[col_name] = value_dict['booleanValue']
-                elif 'arrayValue' in value_dict:
-                    # Handle arrays (ARRAY_AGG returns arrayValue)
-                    array_val = value_dict['arrayValue']
-                    if 'stringValues' in array_val:
-                        row[col_name] = array_val['stringValues']
-                    elif 'longValues' in array_val:
-                        row[col_name] = array_val['longValues']
-                    elif 'doubleValues' in array_val:
-                        row[col_name] = array_val['doubleValues']
-                    else:
-                        row[col_name] = []
-                elif 'isNull' in value_dict and value_dict['isNull']:
-                    row[col_name] = None
-                else:
-                    row[col_name] = None
-        results.append(row)
+    """Convert RDS Data API response to list of dictionaries (shared columnar decoder)"""
+    return decode_response(response)
 
-    return results
 
+def _sql_param(name: str, value: Any, value_key: str) -> Dict:
+    """Data API parameter that binds SQL NULL when value is None (pair with CAST(:name AS type) in SQL)."""
+    if value is None:
+        return {'name': name, 'value': {'isNull': True}}
+    return {'name': name, 'value': {value_key: value}}
 
-def _normalize_owner_name(owner_name: Any) -> str:
-    """Return an uppercase alphanumeric signature for the owner name."""
-    if not owner_name or not isinstance(owner_name, str):
-        return ''
-    return ''.join(ch for ch in owner_name.upper() if ch.isalnum())
 
+# =============================================================================
+# KEYSET PAGINATION
+# =============================================================================
+# List tools page with opaque cursors instead of OFFSET. A sort key is a list of
+# (non-NULL SQL expression, SQL type) pairs ending in a unique tie-breaker (parcel_id, id);
+# rows are ordered by every expression DESC, the page query selects each expression as
+# TEXT (cursor_k0, cursor_k1, ...) and the next page continues with
+# (k0, k1, ...) < (cursor values). Values round-trip as text so numerics stay exact.
 
-def _apply_owner_limit(properties: List[Dict], per_owner_limit: int, limit: int) -> Tuple[List[Dict], Dict[str, Any]]:
-    """Restrict the number of properties per owner and dedupe parcels/coordinates."""
-    per_owner_limit = max(1, int(per_owner_limit or 1))
-    limit = max(1, int(limit or 1))
+def _encode_cursor(scope: str, keys: List[Any]) -> str:
+    """Opaque cursor for the row with these sort-key values."""
+    payload = json.dumps({'s': scope, 'k': [None if k is None else str(k) for k in keys]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
 
-    owner_counts: Dict[str, int] = {}
-    parcel_seen: set[str] = set()
-    coord_seen: set[tuple[float, float]] = set()
-    filtered: List[Dict] = []
-    removed = 0
 
-    for prop in properties or []:
-        if not isinstance(prop, dict):
-            continue
+def _decode_cursor(cursor: str, scope: str, key_count: int) -> List[str]:
+    """Sort-key values from a cursor; ValueError if it is malformed or from another query."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        keys = payload['k']
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError('Invalid cursor') from e
 
-        parcel_raw = (prop.get('parcel_id') or '').strip()
-        parcel_key = parcel_raw.upper()
-        if parcel_key and parcel_key in parcel_seen:
-            removed += 1
-            continue
+    if payload.get('s') != scope or len(keys) != key_count or any(k is None for k in keys):
+        raise ValueError('Cursor does not match this query (order_by or tool changed) - start again without cursor')
+    return keys
 
-        lat = prop.get('latitude')
-        lon = prop.get('longitude')
-        try:
-            coord_key = (round(float(lat), 6), round(float(lon), 6))
-        except (TypeError, ValueError):
-            coord_key = None
 
-        if coord_key and coord_key in coord_seen:
-            removed += 1
-            continue
+def _cursor_columns(sort_keys: List[Tuple[str, str]]) -> str:
+    """SELECT list entries exposing the sort key of each row (as text)."""
+    return ", ".join(f"CAST({expr} AS TEXT) as cursor_k{i}" for i, (expr, _) in enumerate(sort_keys))
+
+
+def _cursor_order(sort_keys: List[Tuple[str, str]]) -> str:
+    """ORDER BY matching the keyset comparison (every key DESC)."""
+    return ", ".join(f"{expr} DESC" for expr, _ in sort_keys)
+
+
+def _cursor_predicate(sort_keys: List[Tuple[str, str]], values: List[str], sql_params: List[Dict]) -> str:
+    """WHERE clause resuming after the cursor row; binds the cursor values into sql_params."""
+    placeholders = []
+    for i, ((_, sql_type), value) in enumerate(zip(sort_keys, values)):
+        sql_params.append({'name': f'cursor_{i}', 'value': {'stringValue': value}})
+        placeholders.append(f"CAST(:cursor_{i} AS {sql_type})")
+    columns = ", ".join(expr for expr, _ in sort_keys)
+    return f"({columns}) < ({', '.join(placeholders)})"
+
+
+def _pop_cursor_keys(row: Dict, key_count: int) -> List[Any]:
+    """Remove the cursor_k* columns from a result row and return their values."""
+    return [row.pop(f'cursor_k{i}', None) for i in range(key_count)]
+
+
+# =============================================================================
+# FIELD PROJECTIONS
+# =============================================================================
+# Property tools take `profile` (a named field set) and/or `fields` (explicit field names,
+# added to the profile) and build their SELECT list from it, so unused columns and JSONB
+# documents never leave the database. A catalog maps each output field to its SQL
+# expression; derived JSONB fields (counts, most recent entries) are extracted server-side.
+# Each response reports the projection, its payload size and the query time.
+
+def _resolve_projection(
+    catalog: Dict[str, str],
+    profiles: Dict[str, List[str]],
+    profile: Any,
+    fields: Any,
+    required: Tuple[str, ...] = ()
+) -> Tuple[str, List[str]]:
+    """
+    (profile name, field names in catalog order) for a profile / explicit field list.
+
+    `fields` may be a list or a comma-separated string; with fields and no profile only those
+    fields (plus `required`) are returned. ValueError on an unknown profile or field.
+    """
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    requested = [str(f).strip() for f in (fields or []) if str(f).strip()]
+
+    if profile:
+        profile = str(profile).strip().lower()
+    else:
+        profile = 'custom' if requested else 'full'
+
+    if profile == 'custom':
+        selected = set()
+    elif profile in profiles:
+        selected = set(profiles[profile])
+    else:
+        raise ValueError(f"Unknown profile: {profile} (options: {', '.join(sorted(profiles))})")
+
+    unknown = [f for f in requested if f not in catalog]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(catalog)})")
+
+    selected.update(requested)
+    selected.update(required)
+    return profile, [name for name in catalog if name in selected]
 
-        owner_key = _normalize_owner_name(prop.get('owner_name'))
-        if owner_key:
-            count = owner_counts.get(owner_key, 0)
-            if count >= per_owner_limit:
-                removed += 1
-                continue
-            owner_counts[owner_key] = count + 1
-
-        if parcel_key:
-            parcel_seen.add(parcel_key)
-        if coord_key:
-            coord_seen.add(coord_key)
-
-        filtered.append(prop)
-        if len(filtered) >= limit:
-            break
 
-    metrics = {
-        'removed': removed,
-        'unique_owners': len(owner_counts),
+def _projection_columns(catalog: Dict[str, str], names: List[str]) -> str:
+    """SELECT list for the projected fields."""
+    return ",\n                   ".join(
+        name if catalog[name] == name else f"{catalog[name]} as {name}" for name in names
+    )
+
+
+def _projection_stats(profile: str, names: List[str], rows: List[Dict], query_ms: float) -> Dict:
+    """Projection summary returned with the rows (payload size is the JSON-encoded rows)."""
+    return {
+        'profile': profile,
+        'field_count': len(names),
+        'payload_bytes': len(json.dumps(rows, default=str).encode('utf-8')),
+        'query_ms': round(query_ms, 1)
     }
 
-    return filtered, metrics
+
+def _jsonb_head(column: str, count: int) -> str:
+    """First `count` entries of a JSONB array column ('[]' when absent or not an array)."""
+    return (f"CASE WHEN jsonb_typeof({column}) = 'array' "
+            f"THEN jsonb_path_query_array({column}, '$[0 to {count - 1}]') ELSE '[]'::jsonb END")
+
+
+def _jsonb_length(column: str) -> str:
+    """Entries in a JSONB array column (0 when absent or not an array)."""
+    return f"CASE WHEN jsonb_typeof({column}) = 'array' THEN jsonb_array_length({column}) ELSE 0 END"
+
+
+# search_properties output fields (catalog order is the column order of every profile)
+SEARCH_FIELDS = {
+    'property_id': 'property_id',
+    'parcel_id': 'parcel_id',
+    'address': 'site_address',
+    'city': 'city',
+    'property_type': 'property_type',
+    'zoning': 'land_zoning_desc',
+    'land_use': 'land_use_desc',
+    'lot_size': 'lot_size_acres',
+    'building_area': 'square_feet',
+    'year_built': 'year_built',
+    'bedrooms': 'bedrooms',
+    'bathrooms': 'bathrooms',
+    'stories': 'stories',
+    'assessed_value': 'assessed_value',
+    'market_value': 'market_value',
+    'taxable_value': 'taxable_value',
+    'land_value': 'land_value',
+    'improvement_value': 'improvement_value',
+    'owner_name': 'owner_name',
+    'owner_state': 'owner_state',
+    'owner_city': 'owner_city',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'last_sale_date': 'last_sale_date',
+    'last_sale_price': 'last_sale_price',
+    'sale_qualified': 'sale_qualified',
+    'has_pool': 'has_pool',
+    'has_garage': 'has_garage',
+    'has_porch': 'has_porch',
+    'has_fence': 'has_fence',
+    'has_shed': 'has_shed',
+    'building_condition': 'building_condition',
+    'building_quality': 'building_quality',
+    'neighborhood_desc': 'neighborhood_desc',
+    'subdivision_desc': 'subdivision_desc',
+    'exemption_types_list': 'exemption_types_list',
+    'total_exemption_amount': 'total_exemption_amount',
+}
+
+SEARCH_PROFILES = {
+    'summary': ['parcel_id', 'address', 'city', 'property_type', 'lot_size', 'building_area',
+                'year_built', 'bedrooms', 'bathrooms', 'market_value', 'owner_name',
+                'last_sale_date', 'last_sale_price'],
+    'valuation': ['parcel_id', 'address', 'city', 'property_type', 'assessed_value', 'market_value',
+                  'taxable_value', 'land_value', 'improvement_value', 'last_sale_date',
+                  'last_sale_price', 'sale_qualified', 'exemption_types_list', 'total_exemption_amount'],
+    'physical': ['parcel_id', 'address', 'city', 'property_type', 'zoning', 'land_use', 'lot_size',
+                 'building_area', 'year_built', 'bedrooms', 'bathrooms', 'stories', 'has_pool',
+                 'has_garage', 'has_porch', 'has_fence', 'has_shed', 'building_condition',
+                 'building_quality'],
+    'owner': ['parcel_id', 'address', 'city', 'property_type', 'market_value', 'owner_name',
+              'owner_state', 'owner_city', 'last_sale_date', 'last_sale_price'],
+    'location': ['parcel_id', 'address', 'city', 'property_type', 'zoning', 'land_use', 'latitude',
+                 'longitude', 'neighborhood_desc', 'subdivision_desc'],
+    'full': list(SEARCH_FIELDS),
+}
+
+# get_property_details output fields
+DETAIL_FIELDS = {
+    # IDs
+    'parcel_id': 'parcel_id', 'property_id': 'property_id',
+    'market_id': 'market_id', 'snapshot_id': 'snapshot_id',
+    # Basic info
+    'site_address': 'site_address', 'city': 'city', 'owner_name': 'owner_name',
+    'mailing_address': 'mailing_address', 'property_type': 'property_type', 'use_code': 'use_code',
+    'land_use_desc': 'land_use_desc', 'land_zoning_desc': 'land_zoning_desc',
+    # Physical characteristics
+    'year_built': 'year_built', 'effective_year_built': 'effective_year_built',
+    'square_feet': 'square_feet', 'bedrooms': 'bedrooms', 'bathrooms': 'bathrooms', 'stories': 'stories',
+    'lot_size_acres': 'lot_size_acres', 'land_sqft': 'land_sqft', 'land_type': 'land_type',
+    # Building details
+    'has_garage': 'has_garage', 'has_porch': 'has_porch', 'has_pool': 'has_pool',
+    'has_fence': 'has_fence', 'has_shed': 'has_shed',
+    'roof_type': 'roof_type', 'wall_type': 'wall_type', 'exterior_type': 'exterior_type',
+    'heat_type': 'heat_type', 'ac_type': 'ac_type',
+    'building_quality': 'building_quality', 'building_condition': 'building_condition',
+    'improvement_type': 'improvement_type', 'improvement_desc': 'improvement_desc',
+    'total_improvement_sqft': 'total_improvement_sqft', 'total_improvement_count': 'total_improvement_count',
+    'improvement_types_list': 'improvement_types_list',
+    'oldest_improvement_year': 'oldest_improvement_year', 'newest_improvement_year': 'newest_improvement_year',
+    # Financial
+    'assessed_value': 'assessed_value', 'market_value': 'market_value', 'taxable_value': 'taxable_value',
+    'land_value': 'land_value', 'improvement_value': 'improvement_value',
+    'last_sale_price': 'last_sale_price', 'last_sale_date': 'last_sale_date',
+    'sale_qualified': 'sale_qualified', 'sale_type_vac_imp': 'sale_type_vac_imp',
+    'sale_book': 'sale_book', 'sale_page': 'sale_page',
+    # Tax/Exemptions
+    'exemptions': 'exemptions', 'total_exemption_amount': 'total_exemption_amount',
+    'exemption_types_list': 'exemption_types_list', 'exemption_count': 'exemption_count',
+    'most_recent_exemption_year': 'most_recent_exemption_year',
+    # Location
+    'latitude': 'latitude', 'longitude': 'longitude',
+    'neighborhood_code': 'neighborhood_code', 'neighborhood_desc': 'neighborhood_desc',
+    'subdivision_code': 'subdivision_code', 'subdivision_desc': 'subdivision_desc',
+    'section': 'section', 'township': 'township', 'range_value': 'range_value',
+    'legal_description': 'legal_description',
+    # Owner details
+    'owner_city': 'owner_city', 'owner_state': 'owner_state', 'owner_zip': 'owner_zip',
+    # Permit count (summary)
+    'total_permits': 'total_permits',
+    # Valuation
+    'valuation_year': 'valuation_year',
+    # JSONB extracts, server-side (qPublic lists sales and permits newest first)
+    'sales_count': _jsonb_length('sales_history'),
+    'recent_sales': _jsonb_head('sales_history', 3),
+    'permit_count': _jsonb_length('permit_history'),
+    'recent_permits': _jsonb_head('permit_history', 5),
+    'latest_trim_notice': _jsonb_head('trim_notice', 1),
+    # JSONB fields with historical data
+    'sales_history': 'sales_history',
+    'building_details': 'building_details',
+    'permit_history': 'permit_history',
+    'trim_notice': 'trim_notice',
+    'raw_data': 'raw_data',
+    # Metadata
+    'qpublic_enriched_at': 'qpublic_enriched_at', 'qpublic_enrichment_status': 'qpublic_enrichment_status',
+    'created_at': 'created_at', 'updated_at': 'updated_at',
+}
+
+DETAIL_JSON_FIELDS = ('exemptions', 'recent_sales', 'recent_permits', 'latest_trim_notice',
+                      'sales_history', 'building_details', 'permit_history', 'trim_notice', 'raw_data')
+
+DETAIL_PROFILES = {
+    'summary': ['parcel_id', 'property_id', 'site_address', 'city', 'owner_name', 'property_type',
+                'land_use_desc', 'land_zoning_desc', 'year_built', 'square_feet', 'bedrooms',
+                'bathrooms', 'lot_size_acres', 'market_value', 'assessed_value', 'last_sale_price',
+                'last_sale_date', 'latitude', 'longitude', 'neighborhood_desc', 'total_permits',
+                'sales_count', 'qpublic_enriched_at'],
+    'valuation': ['parcel_id', 'property_id', 'site_address', 'city', 'property_type',
+                  'assessed_value', 'market_value', 'taxable_value', 'land_value', 'improvement_value',
+                  'valuation_year', 'last_sale_price', 'last_sale_date', 'sale_qualified',
+                  'sale_type_vac_imp', 'exemptions', 'total_exemption_amount', 'exemption_types_list',
+                  'exemption_count', 'most_recent_exemption_year', 'sales_count', 'recent_sales',
+                  'latest_trim_notice'],
+    'physical': ['parcel_id', 'property_id', 'site_address', 'city', 'property_type', 'use_code',
+                 'land_use_desc', 'land_zoning_desc', 'year_built', 'effective_year_built',
+                 'square_feet', 'bedrooms', 'bathrooms', 'stories', 'lot_size_acres', 'land_sqft',
+                 'land_type', 'has_garage', 'has_porch', 'has_pool', 'has_fence', 'has_shed',
+                 'roof_type', 'wall_type', 'exterior_type', 'heat_type', 'ac_type',
+                 'building_quality', 'building_condition', 'improvement_type', 'improvement_desc',
+                 'total_improvement_sqft', 'total_improvement_count', 'improvement_types_list',
+                 'oldest_improvement_year', 'newest_improvement_year', 'building_details'],
+    'history': ['parcel_id', 'property_id', 'site_address', 'city', 'owner_name',
+                'last_sale_price', 'last_sale_date', 'total_permits', 'sales_count', 'permit_count',
+                'sales_history', 'permit_history', 'trim_notice', 'qpublic_enriched_at'],
+    # Every stored column (the derived extracts would only repeat the JSONB documents)
+    'full': [name for name in DETAIL_FIELDS
+             if name not in ('sales_count', 'recent_sales', 'permit_count', 'recent_permits',
+                             'latest_trim_notice')],
+}
 
 
 # =============================================================================
 # TOOL IMPLEMENTATIONS
 # =============================================================================
 
+# search_properties order_by options as keyset sort keys (NULLs sort last via sentinels;
+# parcel_id is appended as the tie-breaker). 'random' has no stable order, so no cursor.
+SEARCH_SORT_KEYS = {
+    'market_value': [("COALESCE(market_value, -1)", 'NUMERIC')],
+    'market_value_recent': [("COALESCE(market_value, -1)", 'NUMERIC'),
+                            ("COALESCE(last_sale_date, DATE '0001-01-01')", 'DATE')],
+    'last_sale_date': [("COALESCE(last_sale_date, DATE '0001-01-01')", 'DATE')],
+    'last_sale_recent': [("COALESCE(last_sale_date, DATE '0001-01-01')", 'DATE'),
+                         ("COALESCE(market_value, -1)", 'NUMERIC')],
+    'year_built': [("COALESCE(year_built, -1)", 'INTEGER')],
+    'year_built_recent': [("COALESCE(year_built, -1)", 'INTEGER'),
+                          ("COALESCE(last_sale_date, DATE '0001-01-01')", 'DATE')],
+    'lot_size_acres': [("COALESCE(lot_size_acres, -1)", 'NUMERIC')],
+    'acreage_then_value': [("COALESCE(lot_size_acres, -1)", 'NUMERIC'),
+                           ("COALESCE(market_value, -1)", 'NUMERIC')],
+}
+
+# Cursor pages of search_properties window only the first position + (limit + 1) * factor
+# matches in sort order; the factor grows (x4) when diversification leaves the page short
+SEARCH_SCAN_FACTOR = 4
+
 def search_properties(params: Dict) -> Dict:
     """
     Search properties by criteria with COMPREHENSIVE FILTERS.
@@ -227,6 +463,17 @@ def search_properties(params: Dict) -> Dict:
     - limit: int (default: 20)
     - per_owner_limit: int (default: 2) - maximum properties returned per owner entity
     - order_by: str (default: "market_value_recent", options: "market_value", "market_value_recent", "last_sale_date", "last_sale_recent", "year_built", "year_built_recent", "lot_size_acres", "acreage_then_value", "random")
+    - cursor: str (optional) - next_cursor from the previous page (same filters and order_by)
+    - profile: str (default: "full") - returned fields: "summary" (13), "valuation", "physical",
+      "owner", "location", "full" (all 37)
+    - fields: list[str] (optional) - extra fields to return (only these when no profile is given)
+
+    Returns next_cursor (None on the last page, and always None for order_by="random"),
+    and projection: {profile, field_count, payload_bytes, query_ms}.
+    Parcel/coordinate dedupe and the per-owner cap run in SQL over every match sorted up to
+    the end of the page, so every page has exactly `limit` rows (while enough diverse
+    matches exist). total_before_owner_cap and owner_cap_removed are counted on the first
+    page only (None on cursor pages).
     """
     # Extract all parameters
     city = params.get('city')
@@ -290,6 +537,16 @@ def search_properties(params: Dict) -> Dict:
 
     order_by_raw = params.get('order_by') or 'market_value_recent'
     order_by = str(order_by_raw).strip().lower()
+    if order_by != 'random' and order_by not in SEARCH_SORT_KEYS:
+        order_by = 'market_value_recent'
+    cursor = params.get('cursor')
+
+    try:
+        profile, field_names = _resolve_projection(
+            SEARCH_FIELDS, SEARCH_PROFILES, params.get('profile'), params.get('fields'), required=('parcel_id',)
+        )
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
 
     # Build dynamic WHERE clause
     where_clauses = []
@@ -441,8 +698,9 @@ def search_properties(params: Dict) -> Dict:
             sql_params.append({'name': 'owner_state', 'value': {'stringValue': owner_state}})
 
     if owner_name:
-        where_clauses.append("UPPER(owner_name) LIKE UPPER(:owner_name)")
-        sql_params.append({'name': 'owner_name', 'value': {'stringValue': f'%{owner_name}%'}})
+        # Trigram-indexed partial match on the normalized owner key (migration 014)
+        where_clauses.append("owner_key LIKE '%' || normalize_owner_key(:owner_name) || '%'")
+        sql_params.append({'name': 'owner_name', 'value': {'stringValue': owner_name}})
 
     # Tax/Exemption filters
     if has_homestead is not None:
@@ -476,69 +734,157 @@ def search_properties(params: Dict) -> Dict:
         where_clauses.append("sale_qualified = :sale_qualified")
         sql_params.append({'name': 'sale_qualified', 'value': {'stringValue': sale_qualified}})
 
-    # Construct SQL with expanded field list
-    sql = """
-        SELECT property_id, parcel_id, site_address as address, city,
-               property_type, land_zoning_desc as zoning, land_use_desc as land_use,
-               lot_size_acres as lot_size, square_feet as building_area,
-               year_built, bedrooms, bathrooms, stories,
-               assessed_value, market_value, taxable_value,
-               land_value, improvement_value,
-               owner_name, owner_state, owner_city,
-               latitude, longitude,
-               last_sale_date, last_sale_price, sale_qualified,
-               has_pool, has_garage, has_porch, has_fence, has_shed,
-               building_condition, building_quality,
-               neighborhood_desc, subdivision_desc,
-               exemption_types_list, total_exemption_amount
-        FROM bulk_property_records
+    # Sort keys (+ parcel_id tie-breaker) are materialised as sort_k0.. in the matches CTE so the
+    # diversification windows, the keyset comparison and the final ORDER BY all share them
+    if order_by == 'random':
+        sort_keys = [("RANDOM()", 'DOUBLE PRECISION')]
+    else:
+        sort_keys = SEARCH_SORT_KEYS[order_by] + [("parcel_id", 'TEXT')]
+    ranked_keys = [(f"sort_k{i}", sql_type) for i, (_, sql_type) in enumerate(sort_keys)]
+    sort_columns = ",\n                   ".join(f"{expr} as sort_k{i}" for i, (expr, _) in enumerate(sort_keys))
+    window_order = _cursor_order(ranked_keys)
+
+    # Keyset pagination (random order has no stable position to resume from). The cursor
+    # carries the last row's sort keys plus its position in the match order.
+    cursor_scope = f'search_properties:{order_by}'
+    cursor_where = ""
+    cursor_position = 0
+    if cursor and order_by != 'random':
+        try:
+            cursor_values = _decode_cursor(cursor, cursor_scope, len(ranked_keys) + 1)
+            cursor_position = int(cursor_values.pop())
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        cursor_where = "WHERE " + _cursor_predicate(ranked_keys, cursor_values, sql_params)
+
+    sql_params.append({'name': 'per_owner_limit', 'value': {'longValue': max(1, per_owner_limit)}})
+    sql_params.append({'name': 'fetch_limit', 'value': {'longValue': max(limit, 1) + 1}})
+
+    # The first page windows the whole match set (it also reports the totals); cursor pages
+    # only the matches sorted up to :scan_limit
+    first_page = not cursor_where
+    diversified_total_column = ", COUNT(*) OVER () as diversified_total" if first_page else ""
+    scan_clause = "" if first_page else f"ORDER BY {window_order}\n            LIMIT :scan_limit"
+
+    # Diversification runs in SQL, in sort order: 1. one row per parcel, 2. one row per
+    # coordinate (6 dp), 3. at most per_owner_limit rows per owner_key (blank owners are
+    # not capped). Whether a row survives depends only on the rows sorted before it, so
+    # windowing a prefix of the match order gives the same answer as windowing all of it:
+    # a cursor page scans the matches up to a little past its own end, applies the cursor
+    # to the diversified rows, and the cap still holds across pages.
+    # Only the projected fields are selected; the windows read the helper columns.
+    sql = f"""
+        WITH matches AS (
+            SELECT {_projection_columns(SEARCH_FIELDS, field_names)},
+                   ROUND(latitude::numeric, 6) as coord_lat,
+                   ROUND(longitude::numeric, 6) as coord_lon,
+                   owner_key,
+                   {sort_columns}
+            FROM current_bulk_properties
+            WHERE {' AND '.join(where_clauses) or 'TRUE'}
+            {scan_clause}
+        ),
+        parcel_deduped AS (
+            SELECT *
+            FROM (
+                SELECT m.*,
+                       ROW_NUMBER() OVER (PARTITION BY parcel_id ORDER BY {window_order}) as parcel_rank,
+                       ROW_NUMBER() OVER (ORDER BY {window_order}) as match_position
+                FROM matches m
+            ) ranked
+            WHERE parcel_rank = 1
+        ),
+        coord_deduped AS (
+            SELECT *
+            FROM (
+                SELECT p.*, ROW_NUMBER() OVER (
+                    PARTITION BY coord_lat, coord_lon
+                    ORDER BY {window_order}
+                ) as coord_rank
+                FROM parcel_deduped p
+            ) ranked
+            WHERE coord_rank = 1 OR coord_lat IS NULL OR coord_lon IS NULL
+        ),
+        diversified AS (
+            SELECT d.*{diversified_total_column}
+            FROM (
+                SELECT c.*, ROW_NUMBER() OVER (PARTITION BY owner_key ORDER BY {window_order}) as owner_rank
+                FROM coord_deduped c
+            ) d
+            WHERE d.owner_key = '' OR d.owner_rank <= :per_owner_limit
+        ),
+        page AS (
+            SELECT diversified.*,
+                   {_cursor_columns(ranked_keys)}
+            FROM diversified
+            {cursor_where}
+            ORDER BY {window_order}
+            LIMIT :fetch_limit
+        )
+        -- The scan count comes back even when the page is empty
+        SELECT page.*, scan.scanned
+        FROM (SELECT COUNT(*) as scanned FROM matches) scan
+        LEFT JOIN page ON TRUE
+        ORDER BY {window_order}
     """
 
-    # CRITICAL: Exclude properties with NULL or empty parcel_id (prevents get_property_details failures)
-    where_clauses.append("parcel_id IS NOT NULL AND TRIM(parcel_id) != ''")
-
-    if where_clauses:
-        sql += " WHERE " + " AND ".join(where_clauses)
-
-    # Order by
-    valid_orders = {
-        'market_value': 'market_value DESC NULLS LAST',
-        'market_value_recent': 'market_value DESC NULLS LAST, last_sale_date DESC NULLS LAST',
-        'last_sale_date': 'last_sale_date DESC NULLS LAST',
-        'last_sale_recent': 'last_sale_date DESC NULLS LAST, market_value DESC NULLS LAST',
-        'year_built': 'year_built DESC NULLS LAST',
-        'year_built_recent': 'year_built DESC NULLS LAST, last_sale_date DESC NULLS LAST',
-        'lot_size_acres': 'lot_size_acres DESC NULLS LAST',
-        'acreage_then_value': 'lot_size_acres DESC NULLS LAST, market_value DESC NULLS LAST',
-        'random': 'RANDOM()'
-    }
-
-    order_clause = valid_orders.get(order_by, valid_orders['market_value_recent'])
-    fetch_limit = min(max(limit, 1) * 3, 500)
-    sql += f" ORDER BY {order_clause} LIMIT {fetch_limit}"
-
-    response = execute_sql(sql, sql_params if sql_params else None)
-    properties = format_rds_response(response)
-    filtered_properties, owner_metrics = _apply_owner_limit(properties, per_owner_limit, limit)
-
-    if owner_metrics.get('removed'):
+    query_start = time.perf_counter()
+    scan_factor = SEARCH_SCAN_FACTOR
+    while True:
+        scan_limit = cursor_position + (max(limit, 1) + 1) * scan_factor
+        attempt_params = sql_params + [{'name': 'scan_limit', 'value': {'longValue': scan_limit}}]
+        rows = format_rds_response(execute_sql(sql, attempt_params))
+        scanned = int(rows[0].get('scanned') or 0) if rows else 0
+        properties = [row for row in rows if row.get('parcel_id') is not None]
+        # Short page with the scan cut off: diversification dropped too many, scan further
+        if first_page or len(properties) > limit or scanned < scan_limit:
+            break
+        scan_factor *= 4
+    query_ms = (time.perf_counter() - query_start) * 1000
+
+    match_total, owner_cap_removed = None, None
+    if first_page:
+        match_total = scanned
+        diversified_total = int(properties[0].get('diversified_total') or 0) if properties else 0
+        owner_cap_removed = match_total - diversified_total
+    row_keys = []
+    for prop in properties:
+        row_keys.append(_pop_cursor_keys(prop, len(ranked_keys)) + [prop.pop('match_position', None)])
+        for helper_column in ('coord_lat', 'coord_lon', 'owner_key', 'parcel_rank',
+                              'coord_rank', 'owner_rank', 'diversified_total', 'scanned'):
+            prop.pop(helper_column, None)
+        for i in range(len(ranked_keys)):
+            prop.pop(f'sort_k{i}', None)
+
+    next_cursor = None
+    if len(properties) > limit:
+        properties = properties[:limit]
+        if order_by != 'random':
+            next_cursor = _encode_cursor(cursor_scope, row_keys[limit - 1])
+
+    if owner_cap_removed:
         print(
             "[search_properties] Applied per-owner cap",
             {
-                'removed': owner_metrics['removed'],
+                'removed': owner_cap_removed,
                 'per_owner_limit': per_owner_limit,
-                'returned': len(filtered_properties),
-                'total_before_cap': len(properties)
+                'returned': len(properties),
+                'total_before_cap': match_total
             }
         )
 
+    projection = _projection_stats(profile, field_names, properties, query_ms)
+    print("[search_properties] Projection", projection)
+
     return {
         'success': True,
-        'count': len(filtered_properties),
-        'properties': filtered_properties,
+        'count': len(properties),
+        'properties': properties,
         'filters_applied': len(where_clauses),
-        'owner_cap_removed': owner_metrics.get('removed', 0),
-        'total_before_owner_cap': len(properties),
+        'owner_cap_removed': owner_cap_removed,
+        'total_before_owner_cap': match_total,
+        'next_cursor': next_cursor,
+        'projection': projection,
         'note': 'Enhanced search with 40+ filters plus per-owner diversification and recency-aware ordering'
     }
 
@@ -550,12 +896,14 @@ def find_entities(params: Dict) -> Dict:
     NOW USES entities TABLE FOR ACCURATE DATA:
     - Eliminates duplicates (523 unique entities vs 620 raw owner names)
     - Includes entity_type (llc, corp, individual, government)
-    - Joins via canonical_name for better matching
+    - Joins on the indexed owner key (bulk_property_records.owner_key = entities.entity_key)
 
     This tool has TWO MODES:
 
     MODE 1: DISCOVERY (no entity_name provided)
     - Returns list of entities with property counts
+    - Reads owner_portfolio_rollups (per-city / per-type grains, refreshed incrementally
+      after each property snapshot), so it is one indexed read
     - Used for: Finding all developers/investors in market
 
     MODE 2: DEEP DIVE (entity_name provided)
@@ -569,7 +917,12 @@ def find_entities(params: Dict) -> Dict:
     - min_properties: int (default: 2) - Minimum properties to qualify (discovery mode)
     - property_type: str (optional) - Filter by property type
     - entity_type: str (optional) - Filter by entity type (llc, corp, individual, government)
-    - limit: int (default: 20)
+    - limit: int (default: 20) - Entities per page (discovery mode)
+    - page_size: int (default: 200) - Properties per page (deep dive mode)
+    - cursor: str (optional) - next_cursor from the previous page
+
+    Both modes return next_cursor (None on the last page). In deep dive mode the portfolio
+    analytics are computed in SQL over the whole portfolio and returned with the first page.
 
     Returns (Discovery Mode):
         {
@@ -579,10 +932,15 @@ def find_entities(params: Dict) -> Dict:
                     "entity_name": str,
                     "entity_type": str,  # NEW: llc, corp, individual, government
                     "entity_id": str,    # NEW: UUID for deep dive queries
+                    "market_id": str,
                     "property_count": int,
                     "total_portfolio_value": float,
                     "avg_property_value": float,
                     "property_types": [str] - Top 3 property types
+                    "property_type_breakdown": {type: count},
+                    "city_breakdown": {city: count},
+                    "acquisition_recency": {first/last_acquisition, days_since_last_acquisition,
+                                            acquisitions_this_year, _last_year, _last_5_years}
                 }
             ]
         }
@@ -608,6 +966,7 @@ def find_entities(params: Dict) -> Dict:
     property_type = params.get('property_type')
     entity_type_filter = params.get('entity_type')
     limit = params.get('limit', 20)
+    cursor = params.get('cursor')
 
     # Type coercion: handle float inputs for min_properties
     try:
@@ -621,10 +980,11 @@ def find_entities(params: Dict) -> Dict:
     if entity_name:
         # First, find the entity in the entities table
         sql_lookup = """
-            SELECT id, name, canonical_name, entity_type
+            SELECT id, name, canonical_name, entity_key, entity_type
             FROM entities
-            WHERE UPPER(canonical_name) = UPPER(:entity_name)
+            WHERE entity_key = normalize_owner_key(:entity_name)
                OR UPPER(name) = UPPER(:entity_name)
+            ORDER BY (entity_key = normalize_owner_key(:entity_name)) DESC
             LIMIT 1
         """
         lookup_params = [{'name': 'entity_name', 'value': {'stringValue': entity_name}}]
@@ -643,11 +1003,24 @@ def find_entities(params: Dict) -> Dict:
         entity_record = entity_records[0]
         entity_id = entity_record.get('id')
         canonical_name = entity_record.get('canonical_name')
+        entity_key = entity_record.get('entity_key') or ''
         entity_type_val = entity_record.get('entity_type')
 
-        # Now get properties using canonical_name
-        where_clauses = ["UPPER(bp.owner_name) = UPPER(:canonical_name)", "bp.market_value > 0"]
-        sql_params = [{'name': 'canonical_name', 'value': {'stringValue': canonical_name}}]
+        if not entity_key:
+            return {
+                'success': False,
+                'error': f'Entity has no matchable name: {entity_name}',
+                'note': 'The entity name has no letters or digits to match property owners on'
+            }
+
+        try:
+            page_size = max(1, int(params.get('page_size', 200) or 200))
+        except (TypeError, ValueError):
+            page_size = 200
+
+        # Now get properties by owner key (btree index on bulk_property_records.owner_key)
+        where_clauses = ["bp.owner_key = :entity_key", "bp.market_value > 0"]
+        sql_params = [{'name': 'entity_key', 'value': {'stringValue': entity_key}}]
 
         if city:
             where_clauses.append("UPPER(bp.city) = UPPER(:city)")
@@ -657,6 +1030,21 @@ def find_entities(params: Dict) -> Dict:
             where_clauses.append("bp.property_type = :property_type")
             sql_params.append({'name': 'property_type', 'value': {'stringValue': property_type}})
 
+        portfolio_where = " WHERE " + " AND ".join(where_clauses)
+        portfolio_params = list(sql_params)
+
+        # Page through the portfolio: most recent acquisitions first, parcel_id as tie-breaker
+        sort_keys = [("COALESCE(bp.last_sale_date, DATE '0001-01-01')", 'DATE'),
+                     ("COALESCE(bp.parcel_id, '')", 'TEXT')]
+        cursor_scope = f'find_entities:{entity_id}'
+        if cursor:
+            try:
+                cursor_values = _decode_cursor(cursor, cursor_scope, len(sort_keys))
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}
+            where_clauses.append(_cursor_predicate(sort_keys, cursor_values, sql_params))
+
+        sql_params.append({'name': 'fetch_limit', 'value': {'longValue': page_size + 1}})
         where_clause = " WHERE " + " AND ".join(where_clauses)
 
         sql = f"""
@@ -676,14 +1064,41 @@ def find_entities(params: Dict) -> Dict:
                 bp.bathrooms,
                 bp.latitude,
                 bp.longitude,
-                bp.land_zoning_desc as zoning
-            FROM bulk_property_records bp
+                bp.land_zoning_desc as zoning,
+                {_cursor_columns(sort_keys)}
+            FROM current_bulk_properties bp
             {where_clause}
-            ORDER BY bp.last_sale_date DESC NULLS LAST
+            ORDER BY {_cursor_order(sort_keys)}
+            LIMIT :fetch_limit
         """
 
         response = execute_sql(sql, sql_params)
         properties = format_rds_response(response)
+        row_keys = [_pop_cursor_keys(p, len(sort_keys)) for p in properties]
+
+        next_cursor = None
+        if len(properties) > page_size:
+            properties = properties[:page_size]
+            next_cursor = _encode_cursor(cursor_scope, row_keys[page_size - 1])
+
+        entity_fields = {
+            'entity_id': entity_id,
+            'entity_name': entity_record.get('name'),
+            'canonical_name': canonical_name,
+            'entity_type': entity_type_val,
+        }
+
+        if cursor:
+            # Follow-up page: analytics were returned with the first page
+            return {
+                'success': True,
+                'mode': 'deep_dive',
+                **entity_fields,
+                'count': len(properties),
+                'properties': properties,
+                'next_cursor': next_cursor,
+                'note': 'Portfolio analytics are returned with the first page (no cursor)'
+            }
 
         if not properties:
             return {
@@ -693,82 +1108,80 @@ def find_entities(params: Dict) -> Dict:
                 'entity_type': entity_type_val
             }
 
-        # Calculate portfolio analytics
-        property_count = len(properties)
-        total_value = sum(float(p.get('market_value', 0) or 0) for p in properties)
-
-        # Property type breakdown
-        type_breakdown = {}
-        for p in properties:
-            ptype = p.get('property_type', 'UNKNOWN')
-            type_breakdown[ptype] = type_breakdown.get(ptype, 0) + 1
-
-        # Acquisition timeline analysis
-        acquisitions_by_year = {}
-        acquisitions_by_month = {}
-        first_acquisition = None
-        last_acquisition = None
-        properties_with_sale_dates = 0
-
-        for p in properties:
-            sale_date = p.get('last_sale_date')
-            if sale_date:
-                properties_with_sale_dates += 1
-                date_str = str(sale_date)
-
-                # Extract year and month
-                if len(date_str) >= 10:  # YYYY-MM-DD format
-                    year = date_str[:4]
-                    month = date_str[:7]  # YYYY-MM
-                    acquisitions_by_year[year] = acquisitions_by_year.get(year, 0) + 1
-                    acquisitions_by_month[month] = acquisitions_by_month.get(month, 0) + 1
-
-                    if not first_acquisition or sale_date < first_acquisition:
-                        first_acquisition = sale_date
-                    if not last_acquisition or sale_date > last_acquisition:
-                        last_acquisition = sale_date
-
-        # Geographic concentration
-        geo_concentration = {}
-        for p in properties:
-            city_name = p.get('city', 'UNKNOWN')
-            geo_concentration[city_name] = geo_concentration.get(city_name, 0) + 1
-
-        # Zoning concentration
-        zoning_concentration = {}
-        for p in properties:
-            zoning = p.get('zoning', 'UNKNOWN')
-            if zoning:
-                zoning_concentration[zoning] = zoning_concentration.get(zoning, 0) + 1
-
-        # Price range analysis
-        prices = [float(p.get('market_value', 0) or 0) for p in properties if p.get('market_value')]
-        min_price = min(prices) if prices else 0
-        max_price = max(prices) if prices else 0
+        # Portfolio analytics over the WHOLE portfolio, aggregated in SQL (not just this page)
+        sql_summary = f"""
+            WITH portfolio AS (
+                SELECT bp.property_type, bp.city, bp.land_zoning_desc as zoning,
+                       bp.market_value, bp.last_sale_date
+                FROM current_bulk_properties bp
+                {portfolio_where}
+            )
+            SELECT
+                COUNT(*) as property_count,
+                COALESCE(SUM(market_value), 0) as total_value,
+                COALESCE(MIN(market_value), 0) as min_property_value,
+                COALESCE(MAX(market_value), 0) as max_property_value,
+                COUNT(last_sale_date) as properties_with_dates,
+                MIN(last_sale_date) as first_acquisition,
+                MAX(last_sale_date) as last_acquisition,
+                (SELECT json_object_agg(k, n) FROM (
+                    SELECT COALESCE(property_type, 'UNKNOWN') as k, COUNT(*) as n FROM portfolio GROUP BY 1
+                ) t) as property_type_breakdown,
+                (SELECT json_object_agg(k, n) FROM (
+                    SELECT COALESCE(city, 'UNKNOWN') as k, COUNT(*) as n FROM portfolio GROUP BY 1
+                ) t) as geographic_concentration,
+                (SELECT json_object_agg(k, n) FROM (
+                    SELECT zoning as k, COUNT(*) as n FROM portfolio WHERE zoning IS NOT NULL AND zoning != '' GROUP BY 1
+                ) t) as zoning_concentration,
+                (SELECT json_object_agg(k, n) FROM (
+                    SELECT TO_CHAR(last_sale_date, 'YYYY') as k, COUNT(*) as n FROM portfolio
+                    WHERE last_sale_date IS NOT NULL GROUP BY 1
+                ) t) as acquisitions_by_year,
+                (SELECT json_object_agg(k, n) FROM (
+                    SELECT TO_CHAR(last_sale_date, 'YYYY-MM') as k, COUNT(*) as n FROM portfolio
+                    WHERE last_sale_date IS NOT NULL GROUP BY 1
+                ) t) as acquisitions_by_month
+            FROM portfolio
+        """
+
+        summary = format_rds_response(execute_sql(sql_summary, portfolio_params))[0]
+
+        def counts(value) -> Dict:
+            # json_object_agg arrives as a JSON string (or NULL when there are no rows)
+            if isinstance(value, str):
+                value = json.loads(value)
+            return value or {}
+
+        property_count = int(summary.get('property_count') or 0)
+        total_value = float(summary.get('total_value') or 0)
+        min_price = float(summary.get('min_property_value') or 0)
+        max_price = float(summary.get('max_property_value') or 0)
+        type_breakdown = counts(summary.get('property_type_breakdown'))
+        first_acquisition = summary.get('first_acquisition')
+        last_acquisition = summary.get('last_acquisition')
 
         return {
             'success': True,
             'mode': 'deep_dive',
-            'entity_id': entity_id,
-            'entity_name': entity_record.get('name'),
-            'canonical_name': canonical_name,
-            'entity_type': entity_type_val,
+            **entity_fields,
             'property_count': property_count,
             'total_value': total_value,
             'avg_property_value': total_value / property_count if property_count > 0 else 0,
             'min_property_value': min_price,
             'max_property_value': max_price,
-            'properties': properties,  # FULL property list
+            'count': len(properties),
+            'properties': properties,  # First page of the portfolio (see next_cursor)
+            'next_cursor': next_cursor,
             'acquisition_timeline': {
                 'first_acquisition': str(first_acquisition) if first_acquisition else None,
                 'last_acquisition': str(last_acquisition) if last_acquisition else None,
-                'properties_with_dates': properties_with_sale_dates,
-                'acquisitions_by_year': dict(sorted(acquisitions_by_year.items())),
-                'acquisitions_by_month': dict(sorted(acquisitions_by_month.items())[-12:])  # Last 12 months
+                'properties_with_dates': int(summary.get('properties_with_dates') or 0),
+                'acquisitions_by_year': dict(sorted(counts(summary.get('acquisitions_by_year')).items())),
+                'acquisitions_by_month': dict(sorted(counts(summary.get('acquisitions_by_month')).items())[-12:])  # Last 12 months
             },
             'property_type_breakdown': dict(sorted(type_breakdown.items(), key=lambda x: x[1], reverse=True)),
-            'geographic_concentration': dict(sorted(geo_concentration.items(), key=lambda x: x[1], reverse=True)),
-            'zoning_concentration': dict(sorted(zoning_concentration.items(), key=lambda x: x[1], reverse=True)),
+            'geographic_concentration': dict(sorted(counts(summary.get('geographic_concentration')).items(), key=lambda x: x[1], reverse=True)),
+            'zoning_concentration': dict(sorted(counts(summary.get('zoning_concentration')).items(), key=lambda x: x[1], reverse=True)),
             'portfolio_pattern_summary': f"{property_count} properties, " +
                                          f"${total_value:,.0f} total value, " +
                                          f"dominant type: {max(type_breakdown, key=type_breakdown.get) if type_breakdown else 'N/A'}, " +
@@ -776,66 +1189,447 @@ def find_entities(params: Dict) -> Dict:
         }
 
     # =========================================================================
-    # MODE 1: DISCOVERY - Find entities with multiple properties using entities table
+    # MODE 1: DISCOVERY - Portfolio owners from owner_portfolio_rollups (migration 015)
     # =========================================================================
-
-    # Build WHERE clause for property filtering
-    property_where = []
-    sql_params = []
-
-    if city:
-        property_where.append("UPPER(bp.city) = UPPER(:city)")
-        sql_params.append({'name': 'city', 'value': {'stringValue': city}})
-
-    if property_type:
-        property_where.append("bp.property_type = :property_type")
-        sql_params.append({'name': 'property_type', 'value': {'stringValue': property_type}})
-
-    property_where_clause = " AND " + " AND ".join(property_where) if property_where else ""
+    # One indexed read of the (city, property_type) grain; '' is the all-cities / all-types row
+    sql_params = [
+        {'name': 'city', 'value': {'stringValue': city or ''}},
+        {'name': 'property_type', 'value': {'stringValue': property_type or ''}}
+    ]
 
     # Entity type filter
     entity_type_where = ""
     if entity_type_filter:
-        entity_type_where = " AND LOWER(e.entity_type) = LOWER(:entity_type)"
+        entity_type_where = "WHERE LOWER(entity_type) = LOWER(:entity_type)"
         sql_params.append({'name': 'entity_type', 'value': {'stringValue': entity_type_filter}})
 
-    # Use entities table for accurate, de-duplicated results
-    # OPTIMIZED: Simplified query for fast discovery
+    # Keyset over (property_count, total value, entity_id, market_id)
+    sort_keys = [("property_count", 'BIGINT'), ("total_portfolio_value", 'NUMERIC'),
+                 ("entity_id", 'UUID'), ("market_id", 'UUID')]
+    cursor_scope = 'find_entities:discovery'
+    cursor_where = ""
+    if cursor:
+        try:
+            cursor_values = _decode_cursor(cursor, cursor_scope, len(sort_keys))
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        cursor_where = "WHERE " + _cursor_predicate(sort_keys, cursor_values, sql_params)
+
     sql = f"""
-        SELECT
-            e.id as entity_id,
-            e.name as entity_name,
-            e.entity_type,
-            COUNT(*) as property_count,
-            SUM(bp.market_value) as total_portfolio_value,
-            AVG(bp.market_value) as avg_property_value
-        FROM entities e
-        JOIN bulk_property_records bp ON UPPER(bp.owner_name) = UPPER(e.canonical_name)
-        WHERE bp.market_value > 0
-          {property_where_clause}
-          {entity_type_where}
-        GROUP BY e.id, e.name, e.entity_type
-        HAVING COUNT(*) >= :min_properties
-        ORDER BY COUNT(*) DESC, SUM(bp.market_value) DESC
-        LIMIT :limit
+        WITH portfolios AS (
+            SELECT
+                e.id as entity_id,
+                e.name as entity_name,
+                e.entity_type,
+                r.market_id,
+                r.property_count,
+                r.total_value as total_portfolio_value,
+                ROUND(r.total_value / r.property_count, 2) as avg_property_value,
+                r.total_lot_size_acres,
+                r.type_breakdown,
+                r.city_breakdown,
+                r.first_acquisition,
+                r.last_acquisition,
+                r.acquisitions_by_year
+            FROM owner_portfolio_rollups r
+            -- Several entities can share a key (name variants); one row per owner key
+            JOIN (
+                SELECT DISTINCT ON (entity_key) id, name, entity_type, entity_key
+                FROM entities
+                {entity_type_where}
+                ORDER BY entity_key, id
+            ) e ON e.entity_key = r.owner_key
+            WHERE r.city = UPPER(TRIM(:city))
+              AND r.property_type = TRIM(:property_type)
+              AND r.property_count >= :min_properties
+        )
+        SELECT portfolios.*,
+               {_cursor_columns(sort_keys)}
+        FROM portfolios
+        {cursor_where}
+        ORDER BY {_cursor_order(sort_keys)}
+        LIMIT :fetch_limit
     """
 
     sql_params.append({'name': 'min_properties', 'value': {'longValue': min_properties}})
-    sql_params.append({'name': 'limit', 'value': {'longValue': limit}})
+    sql_params.append({'name': 'fetch_limit', 'value': {'longValue': int(limit) + 1}})
 
-    response = execute_sql(sql, sql_params if sql_params else None)
-    entities = format_rds_response(response)
+    response = execute_sql(sql, sql_params)
+    entities = _decode_json_columns(format_rds_response(response),
+                                    ('type_breakdown', 'city_breakdown', 'acquisitions_by_year'))
+    row_keys = [_pop_cursor_keys(e, len(sort_keys)) for e in entities]
+
+    next_cursor = None
+    if len(entities) > int(limit):
+        entities = entities[:int(limit)]
+        next_cursor = _encode_cursor(cursor_scope, row_keys[int(limit) - 1])
+
+    this_year = date.today().year
+    for entity in entities:
+        type_breakdown = entity.pop('type_breakdown', None) or {}
+        city_breakdown = entity.pop('city_breakdown', None) or {}
+        by_year = {int(year): count for year, count in (entity.pop('acquisitions_by_year', None) or {}).items()}
+        first_acquisition = entity.pop('first_acquisition', None)
+        last_acquisition = entity.pop('last_acquisition', None)
+
+        entity['property_types'] = [pt for pt, _ in sorted(type_breakdown.items(), key=lambda x: x[1], reverse=True)[:3]]
+        entity['property_type_breakdown'] = dict(sorted(type_breakdown.items(), key=lambda x: x[1], reverse=True))
+        entity['city_breakdown'] = dict(sorted(city_breakdown.items(), key=lambda x: x[1], reverse=True))
+        entity['acquisition_recency'] = {
+            'first_acquisition': first_acquisition,
+            'last_acquisition': last_acquisition,
+            'days_since_last_acquisition': (date.today() - date.fromisoformat(str(last_acquisition)[:10])).days if last_acquisition else None,
+            'acquisitions_this_year': by_year.get(this_year, 0),
+            'acquisitions_last_year': by_year.get(this_year - 1, 0),
+            'acquisitions_last_5_years': sum(c for y, c in by_year.items() if y > this_year - 5)
+        }
 
     return {
         'success': True,
         'mode': 'discovery',
         'entity_count': len(entities),
         'entities': entities,
-        'data_quality': 'Using entities table (523 unique entities, eliminates duplicates)',
+        'next_cursor': next_cursor,
+        'data_quality': 'owner_portfolio_rollups: current property snapshot per market, owners matched to entities by owner_key',
         'note': 'Use entity_name from results for deep dive analysis with full property list and property_types breakdown'
     }
 
 
+# Market trend tools read the monthly cube built by refresh_market_stats_monthly() (migration 011)
+# instead of scanning bulk_property_records. Price sketches are log-scale histograms with
+# PRICE_SKETCH_BUCKETS buckets between 10^PRICE_SKETCH_MIN_EXP and 10^PRICE_SKETCH_MAX_EXP dollars,
+# plus underflow (index 0) and overflow (last index) buckets - keep in sync with
+# market_stats_price_bucket().
+PRICE_SKETCH_MIN_EXP = 3.0
+PRICE_SKETCH_MAX_EXP = 8.0
+PRICE_SKETCH_BUCKETS = 250
+
+MARKET_CUBE_SQL = """
+    WITH latest AS (
+        SELECT MAX(month) as month
+        FROM market_stats_monthly
+        WHERE city = UPPER(TRIM(:city)) AND inventory_as_of IS NOT NULL
+    )
+    SELECT s.property_type, s.month,
+           (s.inventory_as_of IS NOT NULL AND s.month = latest.month) as is_inventory,
+           s.inventory_as_of, s.inventory_count, s.inventory_value_sum,
+           s.inventory_value_min, s.inventory_value_max, s.inventory_value_sketch,
+           s.lot_size_sum, s.lot_size_count,
+           s.sales_count, s.sales_priced_count, s.sales_price_sum, s.sales_price_sketch
+    FROM market_stats_monthly s
+    CROSS JOIN latest
+    WHERE s.city = UPPER(TRIM(:city))
+      AND (s.month >= CAST(:first_month AS DATE) OR s.month = latest.month)
+      {property_type_filter}
+"""
+
+
+def _sketch_bounds(bucket: int) -> Tuple[float, float]:
+    """Price range covered by a sketch bucket (underflow starts at 0, overflow is open-ended)."""
+    step = (PRICE_SKETCH_MAX_EXP - PRICE_SKETCH_MIN_EXP) / PRICE_SKETCH_BUCKETS
+    if bucket <= 0:
+        return 0.0, 10 ** PRICE_SKETCH_MIN_EXP
+    if bucket > PRICE_SKETCH_BUCKETS:
+        return 10 ** PRICE_SKETCH_MAX_EXP, 10 ** PRICE_SKETCH_MAX_EXP
+    return 10 ** (PRICE_SKETCH_MIN_EXP + (bucket - 1) * step), 10 ** (PRICE_SKETCH_MIN_EXP + bucket * step)
+
+
+def _add_sketch(total: List[float], sketch: Any, weight: float = 1.0) -> None:
+    """Add a stored sketch (list, or '{1,2,..}' text) into a running total, scaled by weight."""
+    if isinstance(sketch, str):
+        sketch = [int(n) for n in sketch.strip('{}').split(',') if n]
+    for bucket, n in enumerate(sketch or []):
+        if n:
+            total[bucket] += n * weight
+
+
+def _sketch_quantile(sketch: List[float], q: float, floor: float = None, ceiling: float = None) -> float:
+    """Interpolated quantile of a merged sketch (geometric within a bucket); None when empty."""
+    total = sum(sketch)
+    if total <= 0:
+        return None
+
+    target = q * total
+    running = 0.0
+    for bucket, n in enumerate(sketch):
+        if n <= 0:
+            continue
+        if running + n >= target:
+            low, high = _sketch_bounds(bucket)
+            if floor is not None:
+                low = min(max(low, floor), high)
+            if ceiling is not None:
+                high = max(min(high, ceiling), low)
+            fraction = (target - running) / n
+            if low > 0:
+                return low * (high / low) ** fraction
+            return low + (high - low) * fraction
+        running += n
+    return ceiling
+
+
+def _sketch_count_between(sketch: List[float], min_price: float = None, max_price: float = None) -> float:
+    """Number of sketch entries priced within [min_price, max_price] (partial buckets interpolated)."""
+    if min_price is None and max_price is None:
+        return sum(sketch)
+
+    count = 0.0
+    for bucket, n in enumerate(sketch):
+        if n <= 0:
+            continue
+        low, high = _sketch_bounds(bucket)
+        band_low = max(low, min_price) if min_price is not None else low
+        band_high = min(high, max_price) if max_price is not None else high
+        if high <= low:
+            # Overflow bucket is a single point
+            inside = (min_price is None or low >= min_price) and (max_price is None or low <= max_price)
+            count += n if inside else 0
+        elif band_high > band_low:
+            if low > 0:
+                count += n * (math.log(band_high / band_low) / math.log(high / low))
+            else:
+                count += n * (band_high - band_low) / (high - low)
+    return count
+
+
+def _month_weight(month: date, window_start: date) -> float:
+    """Share of a month's sales that fall inside a window starting at window_start."""
+    next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if month >= window_start:
+        return 1.0
+    if next_month <= window_start:
+        return 0.0
+    return (next_month - window_start).days / (next_month - month).days
+
+
+def _load_market_cube(
+    city: str,
+    property_type: str,
+    timeframe_days: int,
+    min_price: float = None,
+    max_price: float = None
+) -> Tuple[Dict[str, Dict], Any]:
+    """
+    Inventory and windowed sales per property type from market_stats_monthly.
+
+    Sales windows are answered at day granularity from monthly rows: the month the window
+    starts in contributes the fraction of its days inside the window. With a price band,
+    inventory and sales are counted from the value/sale price sketches.
+
+    Returns ({property_type: stats}, inventory_as_of).
+    """
+    today = date.today()
+    full_start = today - timedelta(days=timeframe_days)
+    half_start = today - timedelta(days=timeframe_days // 2)
+
+    sql_params = [
+        {'name': 'city', 'value': {'stringValue': city}},
+        {'name': 'first_month', 'value': {'stringValue': full_start.replace(day=1).isoformat()}}
+    ]
+    property_type_filter = ""
+    if property_type:
+        property_type_filter = "AND s.property_type = :property_type"
+        sql_params.append({'name': 'property_type', 'value': {'stringValue': property_type}})
+
+    rows = format_rds_response(execute_sql(MARKET_CUBE_SQL.format(property_type_filter=property_type_filter), sql_params))
+
+    price_band = min_price is not None or max_price is not None
+    sketch_size = PRICE_SKETCH_BUCKETS + 2
+    stats = {}
+    inventory_as_of = None
+
+    for row in rows:
+        pt = row.get('property_type')
+        entry = stats.setdefault(pt, {
+            'inventory_count': 0.0, 'value_sum': 0.0, 'value_min': None, 'value_max': None,
+            'lot_size_sum': 0.0, 'lot_size_count': 0,
+            'sales_full': 0.0, 'sales_half': 0.0, 'priced_full': 0.0, 'price_sum_full': 0.0,
+            'value_sketch': [0.0] * sketch_size, 'sale_sketch_full': [0.0] * sketch_size,
+            'sale_sketch_half': [0.0] * sketch_size
+        })
+
+        if row.get('is_inventory'):
+            inventory_as_of = row.get('inventory_as_of')
+            _add_sketch(entry['value_sketch'], row.get('inventory_value_sketch'))
+            entry['inventory_count'] = float(row.get('inventory_count') or 0)
+            entry['value_sum'] = float(row.get('inventory_value_sum') or 0)
+            entry['value_min'] = float(row['inventory_value_min']) if row.get('inventory_value_min') is not None else None
+            entry['value_max'] = float(row['inventory_value_max']) if row.get('inventory_value_max') is not None else None
+            entry['lot_size_sum'] = float(row.get('lot_size_sum') or 0)
+            entry['lot_size_count'] = int(row.get('lot_size_count') or 0)
+
+        month = row.get('month')
+        month = month if isinstance(month, date) else date.fromisoformat(str(month)[:10])
+        weight_full = _month_weight(month, full_start)
+        weight_half = _month_weight(month, half_start)
+        if weight_full <= 0:
+            continue
+
+        _add_sketch(entry['sale_sketch_full'], row.get('sales_price_sketch'), weight_full)
+        _add_sketch(entry['sale_sketch_half'], row.get('sales_price_sketch'), weight_half)
+        entry['sales_full'] += float(row.get('sales_count') or 0) * weight_full
+        entry['sales_half'] += float(row.get('sales_count') or 0) * weight_half
+        entry['priced_full'] += float(row.get('sales_priced_count') or 0) * weight_full
+        entry['price_sum_full'] += float(row.get('sales_price_sum') or 0) * weight_full
+
+    if price_band:
+        # Band counts come from the sketches; unpriced sales cannot be placed in a band
+        for entry in stats.values():
+            entry['inventory_count'] = _sketch_count_between(entry['value_sketch'], min_price, max_price)
+            entry['sales_full'] = _sketch_count_between(entry['sale_sketch_full'], min_price, max_price)
+            entry['sales_half'] = _sketch_count_between(entry['sale_sketch_half'], min_price, max_price)
+
+    # Types with neither current inventory nor sales in the window carry nothing
+    stats = {pt: s for pt, s in stats.items() if s['inventory_count'] >= 0.5 or s['sales_full'] >= 0.5}
+    return stats, inventory_as_of
+
+
+def _absorption_metrics(inventory: float, sales_full: float, sales_half: float, timeframe_days: int) -> Dict:
+    """Annualized absorption, months of inventory, market classification and trend direction."""
+    half_period_days = timeframe_days // 2
+
+    # Absorption rate (annualized percentage)
+    # Full period rate (annualized if not already a year)
+    annualization_factor = 365 / timeframe_days
+    absorption_rate_full = (sales_full / inventory * 100 * annualization_factor) if inventory > 0 else 0
+
+    # Half period rate (annualized)
+    absorption_rate_half = (sales_half / inventory * 100 * annualization_factor * 2) if inventory > 0 else 0
+
+    # Months of inventory (at current half-period pace)
+    monthly_sales = sales_half / (half_period_days / 30) if sales_half > 0 else 0
+    months_of_inventory = (inventory / monthly_sales) if monthly_sales > 0 else float('inf')
+
+    # Market classification (using annualized full period rate)
+    if absorption_rate_full < 15:
+        market_type = "Buyer's Market"
+    elif absorption_rate_full <= 20:
+        market_type = "Neutral Market"
+    else:
+        market_type = "Seller's Market"
+
+    # Trend direction (half period vs full period, both annualized)
+    if abs(absorption_rate_half - absorption_rate_full) < 2:
+        trend_direction = "Stable"
+    elif absorption_rate_half > absorption_rate_full:
+        trend_direction = "Accelerating"
+    else:
+        trend_direction = "Decelerating"
+
+    return {
+        'absorption_rate_full_period': round(absorption_rate_full, 1),
+        'absorption_rate_half_period': round(absorption_rate_half, 1),
+        'monthly_sales_velocity': round(monthly_sales, 1),
+        'months_of_inventory': round(months_of_inventory, 1) if months_of_inventory != float('inf') else None,
+        'market_type': market_type,
+        'trend_direction': trend_direction
+    }
+
+
+def _timeframe_days(value: Any) -> int:
+    """Window length in days, clamped to the 30-730 days the cube covers."""
+    try:
+        timeframe_days = int(float(value))
+    except (ValueError, TypeError):
+        timeframe_days = 365
+    return min(max(timeframe_days, 30), 730)
+
+
+# Multi-period sales trends read property_sales (migration 021): every recorded sale, not
+# just each parcel's last one. Each period is compared with the equally long period before
+# it, so one range scan on idx_property_sales_city_date covers 2 x the longest period.
+SALES_PERIOD_MONTHS = (12, 6, 3, 1)
+
+
+def _sales_periods_sql(property_type_filter: str) -> str:
+    """Per property type (plus a city total row) sales count / avg / median for every period."""
+    columns = []
+    for months in SALES_PERIOD_MONTHS:
+        windows = (
+            ('', f"sale_date > CURRENT_DATE - INTERVAL '{months} months'"),
+            ('prior_', f"sale_date > CURRENT_DATE - INTERVAL '{2 * months} months' "
+                       f"AND sale_date <= CURRENT_DATE - INTERVAL '{months} months'")
+        )
+        for prefix, window in windows:
+            columns.append(f"COUNT(*) FILTER (WHERE {window}) as {prefix}sales_{months}m")
+            columns.append(f"(AVG(sale_price) FILTER (WHERE {window} AND sale_price > 0))::float8 as {prefix}avg_price_{months}m")
+            columns.append(
+                f"PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sale_price) "
+                f"FILTER (WHERE {window} AND sale_price > 0) as {prefix}median_price_{months}m"
+            )
+
+    return f"""
+        SELECT property_type, GROUPING(property_type) = 1 as is_total,
+               {', '.join(columns)}
+        FROM property_sales
+        WHERE city = UPPER(TRIM(:city))
+          AND sale_date > CURRENT_DATE - INTERVAL '{2 * max(SALES_PERIOD_MONTHS)} months'
+          AND sale_date <= CURRENT_DATE
+          {property_type_filter}
+        GROUP BY GROUPING SETS ((property_type), ())
+    """
+
+
+def _pct_change(current: Any, prior: Any) -> Any:
+    """Percent change, None when there is no prior value to compare with."""
+    if current is None or not prior:
+        return None
+    return round((float(current) - float(prior)) / float(prior) * 100, 1)
+
+
+def _load_sales_periods(city: str, property_type: str) -> Dict[Any, Dict]:
+    """
+    Sales periods per property type ({None: city total}) from property_sales.
+
+    Each period reports sales count, average and median sale price, the same for the prior
+    period of equal length and the change between them. momentum compares the 3-month and
+    12-month monthly sales pace: ACCELERATING / DECELERATING beyond +-10%, STAGNANT when
+    nothing sold in the last 3 months.
+    """
+    sql_params = [{'name': 'city', 'value': {'stringValue': city}}]
+    property_type_filter = ""
+    if property_type:
+        property_type_filter = "AND property_type = :property_type"
+        sql_params.append({'name': 'property_type', 'value': {'stringValue': property_type}})
+
+    rows = format_rds_response(execute_sql(_sales_periods_sql(property_type_filter), sql_params))
+
+    results = {}
+    for row in rows:
+        periods = []
+        for months in SALES_PERIOD_MONTHS:
+            count = int(row.get(f'sales_{months}m') or 0)
+            prior_count = int(row.get(f'prior_sales_{months}m') or 0)
+            avg_price = row.get(f'avg_price_{months}m')
+            median_price = row.get(f'median_price_{months}m')
+            prior_median = row.get(f'prior_median_price_{months}m')
+            periods.append({
+                'period': f'{months}m',
+                'sales_count': count,
+                'avg_sale_price': round(float(avg_price), 2) if avg_price is not None else None,
+                'median_sale_price': round(float(median_price), 2) if median_price is not None else None,
+                'prior_sales_count': prior_count,
+                'prior_median_sale_price': round(float(prior_median), 2) if prior_median is not None else None,
+                'sales_count_change_pct': _pct_change(count, prior_count),
+                'median_price_change_pct': _pct_change(median_price, prior_median)
+            })
+
+        pace = {p['period']: p['sales_count'] / int(p['period'][:-1]) for p in periods}
+        if not pace['3m']:
+            momentum = 'STAGNANT'
+        elif not pace['12m'] or pace['3m'] > pace['12m'] * 1.1:
+            momentum = 'ACCELERATING'
+        elif pace['3m'] < pace['12m'] * 0.9:
+            momentum = 'DECELERATING'
+        else:
+            momentum = 'STABLE'
+
+        key = None if row.get('is_total') else row.get('property_type')
+        results[key] = {'periods': periods, 'momentum': momentum}
+
+    return results
+
+
 def analyze_market_trends(params: Dict) -> Dict:
     """
     Analyze market trends with absorption rates, supply/demand analysis, and actionable insights.
@@ -846,118 +1640,79 @@ def analyze_market_trends(params: Dict) -> Dict:
     - Market Classification: Buyer's (<15%), Neutral (15-20%), Seller's (>20%)
     - Trend Direction: Accelerating, Stable, or Decelerating sales
 
+    Answered from the market_stats_monthly cube (refreshed with each property snapshot);
+    medians/quartiles are interpolated from its price sketches. 12m / 6m / 3m / 1m sales
+    periods (each vs. the period before it) come from property_sales.
+
     Parameters:
     - city: str (required)
     - property_type: str (optional)
-    - timeframe_days: int (default: 365) - Days to look back for trend analysis
+    - timeframe_days: int (default: 365, 30-730) - Days to look back for trend analysis
+    - time_period_months: int (optional) - Same window in months (used when timeframe_days is absent)
     """
     city = params.get('city')
     property_type = params.get('property_type')
-    timeframe_days = params.get('timeframe_days', 365)
-
-    # Type coercion: handle string/float inputs
-    try:
-        timeframe_days = int(float(timeframe_days))
-    except (ValueError, TypeError):
-        timeframe_days = 365
+    timeframe_days = params.get('timeframe_days')
+    if timeframe_days is None and params.get('time_period_months') is not None:
+        try:
+            timeframe_days = int(float(params['time_period_months']) * 30.4)
+        except (ValueError, TypeError):
+            timeframe_days = None
+    timeframe_days = _timeframe_days(timeframe_days if timeframe_days is not None else 365)
 
     if not city:
         return {'success': False, 'error': 'city parameter is required'}
 
-    # Validate timeframe
-    if timeframe_days < 30:
-        timeframe_days = 30  # Minimum 30 days
-    elif timeframe_days > 730:
-        timeframe_days = 730  # Maximum 2 years
-
-    sql_params = [{'name': 'city', 'value': {'stringValue': city}}]
-
-    where_clause = "WHERE UPPER(city) = UPPER(:city) AND market_value > 0"
-    if property_type:
-        where_clause += " AND property_type = :property_type"
-        sql_params.append({'name': 'property_type', 'value': {'stringValue': property_type}})
-
-    # Calculate half-period for comparison (for trend direction)
-    half_period_days = timeframe_days // 2
-
-    # Comprehensive query with absorption metrics
-    sql = f"""
-        SELECT
-            property_type,
-            COUNT(*) as inventory_count,
-
-            -- Price metrics
-            AVG(market_value) as avg_price,
-            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY market_value) as median_price,
-            MIN(market_value) as min_price,
-            MAX(market_value) as max_price,
-            PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY market_value) as price_p25,
-            PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY market_value) as price_p75,
-
-            -- Sales metrics for absorption rate (using timeframe_days parameter)
-            COUNT(CASE WHEN last_sale_date >= CURRENT_DATE - INTERVAL '{half_period_days} days' THEN 1 END) as sales_half_period,
-            COUNT(CASE WHEN last_sale_date >= CURRENT_DATE - INTERVAL '{timeframe_days} days' THEN 1 END) as sales_full_period,
-            AVG(CASE WHEN last_sale_date >= CURRENT_DATE - INTERVAL '{timeframe_days} days' THEN last_sale_price END) as avg_sale_price_period,
-
-            -- Other metrics
-            AVG(lot_size_acres) as avg_lot_size,
-            SUM(market_value) as total_market_value
-
-        FROM bulk_property_records
-        {where_clause}
-        GROUP BY property_type
-        ORDER BY inventory_count DESC
-    """
+    cube, inventory_as_of = _load_market_cube(city, property_type, timeframe_days)
+    sales_periods = _load_sales_periods(city, property_type)
+
+    trends = []
+    for pt, entry in cube.items():
+        inventory = int(round(entry['inventory_count']))
+        sales_full = int(round(entry['sales_full']))
+        sales_half = int(round(entry['sales_half']))
+        floor, ceiling = entry['value_min'], entry['value_max']
+        median_price = _sketch_quantile(entry['value_sketch'], 0.5, floor, ceiling)
+        price_p25 = _sketch_quantile(entry['value_sketch'], 0.25, floor, ceiling)
+        price_p75 = _sketch_quantile(entry['value_sketch'], 0.75, floor, ceiling)
+        median_sale = _sketch_quantile(entry['sale_sketch_full'], 0.5)
+
+        trend = {
+            'property_type': pt,
+            'inventory_count': inventory,
+
+            # Price metrics
+            'avg_price': entry['value_sum'] / entry['inventory_count'] if entry['inventory_count'] else None,
+            'median_price': round(median_price, 2) if median_price is not None else None,
+            'min_price': floor,
+            'max_price': ceiling,
+            'price_p25': round(price_p25, 2) if price_p25 is not None else None,
+            'price_p75': round(price_p75, 2) if price_p75 is not None else None,
+
+            # Sales metrics for absorption rate (using timeframe_days parameter)
+            'sales_half_period': sales_half,
+            'sales_full_period': sales_full,
+            'avg_sale_price_period': entry['price_sum_full'] / entry['priced_full'] if entry['priced_full'] >= 0.5 else None,
+            'median_sale_price_period': round(median_sale, 2) if median_sale is not None else None,
+
+            # Other metrics
+            'avg_lot_size': entry['lot_size_sum'] / entry['lot_size_count'] if entry['lot_size_count'] else None,
+            'total_market_value': entry['value_sum'],
+        }
+        trend.update(_absorption_metrics(inventory, sales_full, sales_half, timeframe_days))
+        trend.pop('monthly_sales_velocity')
+        trend['timeframe_days'] = timeframe_days
+        if pt in sales_periods:
+            trend['sales_periods'] = sales_periods[pt]['periods']
+            trend['sales_momentum'] = sales_periods[pt]['momentum']
+        trends.append(trend)
 
-    response = execute_sql(sql, sql_params)
-    trends = format_rds_response(response)
+    trends.sort(key=lambda t: t['inventory_count'], reverse=True)
 
     # Calculate market-level aggregates
-    total_inventory = sum(int(t.get('inventory_count', 0) or 0) for t in trends)
-    total_value = sum(float(t.get('total_market_value', 0) or 0) for t in trends)
-    total_sales_period = sum(int(t.get('sales_full_period', 0) or 0) for t in trends)
-
-    # Enhance each trend with absorption metrics
-    for trend in trends:
-        inventory = int(trend.get('inventory_count', 0) or 0)
-        sales_half = int(trend.get('sales_half_period', 0) or 0)
-        sales_full = int(trend.get('sales_full_period', 0) or 0)
-
-        # Absorption rate (annualized percentage)
-        # Full period rate (annualized if not already a year)
-        annualization_factor = 365 / timeframe_days
-        absorption_rate_full = (sales_full / inventory * 100 * annualization_factor) if inventory > 0 else 0
-
-        # Half period rate (annualized)
-        absorption_rate_half = (sales_half / inventory * 100 * annualization_factor * 2) if inventory > 0 else 0
-
-        # Months of inventory (at current half-period pace)
-        monthly_sales = sales_half / (half_period_days / 30) if sales_half > 0 else 0
-        months_of_inventory = (inventory / monthly_sales) if monthly_sales > 0 else float('inf')
-
-        # Market classification (using annualized full period rate)
-        if absorption_rate_full < 15:
-            market_type = "Buyer's Market"
-        elif absorption_rate_full <= 20:
-            market_type = "Neutral Market"
-        else:
-            market_type = "Seller's Market"
-
-        # Trend direction (half period vs full period, both annualized)
-        if abs(absorption_rate_half - absorption_rate_full) < 2:
-            trend_direction = "Stable"
-        elif absorption_rate_half > absorption_rate_full:
-            trend_direction = "Accelerating"
-        else:
-            trend_direction = "Decelerating"
-
-        # Add absorption metrics to trend
-        trend['absorption_rate_full_period'] = round(absorption_rate_full, 1)
-        trend['absorption_rate_half_period'] = round(absorption_rate_half, 1)
-        trend['months_of_inventory'] = round(months_of_inventory, 1) if months_of_inventory != float('inf') else None
-        trend['market_type'] = market_type
-        trend['trend_direction'] = trend_direction
-        trend['timeframe_days'] = timeframe_days
+    total_inventory = sum(t['inventory_count'] for t in trends)
+    total_value = sum(t['total_market_value'] for t in trends)
+    total_sales_period = sum(t['sales_full_period'] for t in trends)
 
     # Generate professional insights
     insights = []
@@ -989,7 +1744,7 @@ def analyze_market_trends(params: Dict) -> Dict:
             pt = trend.get('property_type')
             median = float(trend.get('median_price', 0) or 0)
             avg = float(trend.get('avg_price', 0) or 0)
-            avg_sale = float(trend.get('avg_sale_price_12m', 0) or 0)
+            avg_sale = float(trend.get('avg_sale_price_period', 0) or 0)
 
             # Price spread analysis
             if avg > 0 and median > 0:
@@ -1031,6 +1786,7 @@ def analyze_market_trends(params: Dict) -> Dict:
                 top_value = min(value_plays, key=lambda x: float(x.get('avg_price', 0) or 0))
                 recommendations.append(f"💰 Value Play: {top_value.get('property_type')} at ${float(top_value.get('avg_price', 0) or 0):,.0f} avg in buyer's market")
 
+
     return {
         'success': True,
         'city': city,
@@ -1042,270 +1798,452 @@ def analyze_market_trends(params: Dict) -> Dict:
             'total_sales_period': total_sales_period,
             'property_types': len(trends)
         },
+        'sales_periods': sales_periods.get(None, {}).get('periods', []),
+        'sales_momentum': sales_periods.get(None, {}).get('momentum'),
         'trends': trends,
         'insights': insights,
         'recommendations': recommendations,
+        'inventory_as_of': inventory_as_of,
+        'data_source': 'market_stats_monthly (refreshed with each property appraiser snapshot), property_sales (sales periods)',
         'methodology': f'Professional absorption rate analysis over {timeframe_days} days: <15% buyer\'s market, 15-20% neutral, >20% seller\'s market (annualized)'
     }
 
 
-def cluster_properties(params: Dict) -> Dict:
+def calculate_absorption_rate(params: Dict) -> Dict:
     """
-    Grid-based property clustering using ST_SnapToGrid (RDS Data API compatible).
-
-    Instead of complex algorithms (DBSCAN, K-means), this uses efficient grid aggregation:
-    - Snaps all properties to a grid (e.g., 500m cells)
-    - Groups properties by grid cell
-    - Aggregates statistics for each cell
-
-    This approach:
-    - No window functions (RDS Data API compatible)
-    - No self-joins (fast on large datasets)
-    - Efficient spatial aggregation
-    - Easy to visualize (regular grid)
+    Calculate market absorption rate and inventory metrics, optionally for a price band.
 
     Parameters:
     - city: str (required)
-    - grid_size_meters: float (default: 500) - Grid cell size in meters
-    - min_cluster_size: int (default: 3) - Minimum properties per cluster
+    - property_type: str (optional)
+    - min_price: float (optional) - Lower bound of the price band (market value / sale price)
+    - max_price: float (optional) - Upper bound of the price band
+    - timeframe_days: int (default: 365, 30-730) - Sales window
+
+    Returns: absorption rate, inventory count, sales velocity, market classification
+    (overall and per property type), answered from the market_stats_monthly cube.
     """
     city = params.get('city')
-    grid_size_meters = params.get('grid_size_meters', params.get('cluster_distance_meters', 500))
-    min_cluster_size = params.get('min_cluster_size', 3)
+    property_type = params.get('property_type')
+    timeframe_days = _timeframe_days(params.get('timeframe_days', 365))
 
     if not city:
         return {'success': False, 'error': 'city parameter is required'}
 
-    # Grid-based clustering:
-    # 1. Convert meters to degrees (approximate at this latitude: ~111km per degree)
-    # 2. Snap all points to grid
-    # 3. Group by grid cell
-    # 4. Aggregate properties in each cell
-
-    # For latitude ~30° (Gainesville), 1 degree ≈ 111km = 111,000m
-    grid_size_degrees = grid_size_meters / 111000.0
-
-    sql = """
-        WITH gridded_properties AS (
-            SELECT
-                parcel_id,
-                property_type,
-                market_value,
-                ST_SnapToGrid(
-                    ST_SetSRID(ST_MakePoint(longitude, latitude), 4326),
-                    :grid_size,
-                    :grid_size
-                ) as grid_cell,
-                latitude,
-                longitude
-            FROM bulk_property_records
-            WHERE UPPER(city) = UPPER(:city)
-              AND latitude IS NOT NULL
-              AND longitude IS NOT NULL
-              AND property_type IS NOT NULL
-              AND market_value > 0
-        ),
-        property_type_counts AS (
-            SELECT
-                grid_cell,
-                property_type,
-                COUNT(*) as type_count,
-                AVG(market_value) as type_avg_value
-            FROM gridded_properties
-            GROUP BY grid_cell, property_type
-        ),
-        dominant_types AS (
-            SELECT DISTINCT ON (grid_cell)
-                grid_cell,
-                property_type as dominant_type,
-                type_count as dominant_count,
-                type_avg_value as dominant_avg_value
-            FROM property_type_counts
-            ORDER BY grid_cell, type_count DESC
-        ),
-        grid_clusters AS (
-            SELECT
-                gp.grid_cell,
-                ST_X(gp.grid_cell) as grid_center_lon,
-                ST_Y(gp.grid_cell) as grid_center_lat,
-                COUNT(*) as property_count,
-                ROUND(AVG(gp.market_value)::numeric, 2) as avg_market_value,
-                SUM(gp.market_value) as total_value,
-                MIN(gp.latitude) as min_lat,
-                MAX(gp.latitude) as max_lat,
-                MIN(gp.longitude) as min_lon,
-                MAX(gp.longitude) as max_lon,
-                -- Aggregate property IDs
-                ARRAY_AGG(gp.parcel_id) as property_ids,
-                -- Get top 3 property types with counts
-                (
-                    SELECT json_agg(json_build_object('type', property_type, 'count', type_count, 'avg_value', ROUND(type_avg_value::numeric, 2)))
-                    FROM (
-                        SELECT property_type, type_count, type_avg_value
-                        FROM property_type_counts ptc
-                        WHERE ptc.grid_cell = gp.grid_cell
-                        ORDER BY type_count DESC
-                        LIMIT 3
-                    ) top_types
-                ) as top_property_types,
-                dt.dominant_type,
-                dt.dominant_count,
-                dt.dominant_avg_value
-            FROM gridded_properties gp
-            JOIN dominant_types dt ON gp.grid_cell = dt.grid_cell
-            GROUP BY gp.grid_cell, dt.dominant_type, dt.dominant_count, dt.dominant_avg_value
-            HAVING COUNT(*) >= :min_size
-        ),
-        cluster_analysis AS (
-            SELECT
-                grid_center_lon as center_lon,
-                grid_center_lat as center_lat,
-                property_count,
-                avg_market_value,
-                total_value,
-                property_ids,
-                top_property_types,
-                dominant_type,
-                -- Cluster purity: what % is the dominant type?
-                ROUND((dominant_count::float / property_count * 100)::numeric, 1) as cluster_purity_pct,
-                -- Cluster classification
-                CASE
-                    WHEN dominant_type IN ('SINGLE FAMILY', 'CONDOMINIUM', 'MOBILE HOME', 'MULTIFAMILY', 'MFR <10 UNITS')
-                        AND (dominant_count::float / property_count) > 0.7 THEN 'Residential Neighborhood'
-                    WHEN dominant_type IN ('OFFICE 1 STORY', 'PROF OFFICES', 'OFF MULTISTORY', 'STORES', 'WAREH/DIST TERM')
-                        AND (dominant_count::float / property_count) > 0.6 THEN 'Commercial District'
-                    WHEN dominant_type = 'VACANT' AND (dominant_count::float / property_count) > 0.5 THEN 'Development Opportunity Zone'
-                    WHEN (dominant_count::float / property_count) < 0.4 THEN 'Mixed-Use Area'
-                    ELSE 'Specialized Zone'
-                END as cluster_type,
-                -- Value density ($ per property)
-                ROUND((total_value / property_count)::numeric, 2) as value_per_property,
-                -- Calculate actual cluster diameter from bounds
-                ROUND(
-                    ST_Distance(
-                        ST_SetSRID(ST_MakePoint(min_lon, min_lat), 4326)::geography,
-                        ST_SetSRID(ST_MakePoint(max_lon, max_lat), 4326)::geography
-                    )::numeric,
-                    2
-                ) as cluster_diameter_meters
-            FROM grid_clusters
-            ORDER BY property_count DESC, total_value DESC
-            LIMIT 20
-        )
-        SELECT * FROM cluster_analysis
-    """
+    try:
+        min_price = float(params['min_price']) if params.get('min_price') is not None else None
+        max_price = float(params['max_price']) if params.get('max_price') is not None else None
+    except (ValueError, TypeError):
+        return {'success': False, 'error': 'min_price and max_price must be numbers'}
 
-    sql_params = [
-        {'name': 'city', 'value': {'stringValue': city}},
-        {'name': 'grid_size', 'value': {'doubleValue': grid_size_degrees}},
-        {'name': 'min_size', 'value': {'longValue': min_cluster_size}}
-    ]
+    if min_price is not None and max_price is not None and min_price > max_price:
+        return {'success': False, 'error': 'min_price must not exceed max_price'}
 
-    try:
-        response = execute_sql(sql, sql_params)
-        clusters = format_rds_response(response)
+    cube, inventory_as_of = _load_market_cube(city, property_type, timeframe_days, min_price, max_price)
 
-        return {
-            'success': True,
-            'city': city,
-            'cluster_count': len(clusters),
-            'clusters': clusters,
-            'parameters': {
-                'grid_size_meters': grid_size_meters,
-                'min_cluster_size': min_cluster_size
-            },
-            'method': 'Grid_Based_Clustering',
-            'description': f'Properties grouped into {grid_size_meters}m grid cells. Each cluster represents a dense area with {min_cluster_size}+ properties.',
-            'use_cases': [
-                'Identify high-density development areas',
-                'Find hotspots for market analysis',
-                'Detect concentrated investment zones',
-                'Map property distribution patterns'
-            ]
-        }
-    except Exception as e:
+    if not cube:
         return {
             'success': False,
-            'error': str(e),
-            'city': city,
-            'note': 'Grid clustering failed. Try increasing grid_size_meters or reducing dataset size.'
+            'error': f'No market statistics for {city}' + (f' ({property_type})' if property_type else ''),
+            'note': 'Check the city name; market_stats_monthly is refreshed after each property appraiser sync'
         }
 
+    by_property_type = []
+    for pt, entry in cube.items():
+        inventory = int(round(entry['inventory_count']))
+        sales_full = int(round(entry['sales_full']))
+        sales_half = int(round(entry['sales_half']))
+        by_property_type.append({
+            'property_type': pt,
+            'inventory_count': inventory,
+            'sales_count': sales_full,
+            'sales_half_period': sales_half,
+            **_absorption_metrics(inventory, sales_full, sales_half, timeframe_days)
+        })
+    by_property_type.sort(key=lambda t: t['inventory_count'], reverse=True)
+
+    inventory = sum(t['inventory_count'] for t in by_property_type)
+    sales_full = sum(t['sales_count'] for t in by_property_type)
+    sales_half = sum(t['sales_half_period'] for t in by_property_type)
+    overall = _absorption_metrics(inventory, sales_full, sales_half, timeframe_days)
 
-def find_assemblage_opportunities(params: Dict) -> Dict:
-    """
-    Find REAL assemblage opportunities using professional methodology.
-
-    ENHANCED: Now includes entity intelligence, financial metrics, and development potential.
-
-    Detects ownership patterns where single entities own multiple adjacent parcels.
-    This is how institutional developers (D.R. Horton, Lennar, etc.) assemble land.
+    return {
+        'success': True,
+        'city': city,
+        'property_type': property_type,
+        'price_band': {'min_price': min_price, 'max_price': max_price},
+        'timeframe_days': timeframe_days,
+        'inventory_count': inventory,
+        'sales_count': sales_full,
+        'sales_half_period': sales_half,
+        'absorption_rate': overall['absorption_rate_full_period'],
+        'absorption_rate_half_period': overall['absorption_rate_half_period'],
+        'monthly_sales_velocity': overall['monthly_sales_velocity'],
+        'months_of_inventory': overall['months_of_inventory'],
+        'market_type': overall['market_type'],
+        'trend_direction': overall['trend_direction'],
+        'by_property_type': by_property_type,
+        'inventory_as_of': inventory_as_of,
+        'data_source': 'market_stats_monthly (refreshed with each property appraiser snapshot)',
+        'methodology': f'Sales over {timeframe_days} days / current inventory, annualized: <15% buyer\'s market, 15-20% neutral, >20% seller\'s market' +
+                       ('; price band counts interpolated from log-scale price sketches' if min_price is not None or max_price is not None else '')
+    }
+
+
+# cluster_properties reads property_grid_rollups (migration 012): square cells of
+# GRID_BASE_METERS * 2^level for levels 0..GRID_MAX_LEVEL, nested so a level-k cell (x, y)
+# contains the level-j cells (x', y') with x' >> (k - j) == x and y' >> (k - j) == y.
+GRID_BASE_METERS = 125
+GRID_MAX_LEVEL = 5
+
+
+def _grid_level(grid_size_meters: float) -> int:
+    """Rollup level whose cell size is closest (in log terms) to the requested size."""
+    if grid_size_meters <= 0:
+        return 0
+    return min(max(int(round(math.log2(grid_size_meters / GRID_BASE_METERS))), 0), GRID_MAX_LEVEL)
+
+
+def _parse_cell_id(cell_id: str) -> Tuple[int, int, int]:
+    """(level, x, y) from a 'level:x:y' cell id; ValueError if malformed."""
+    level, x, y = (int(part) for part in str(cell_id).split(':'))
+    if not 0 <= level <= GRID_MAX_LEVEL:
+        raise ValueError(f'cell_id level must be 0-{GRID_MAX_LEVEL}')
+    return level, x, y
+
+
+def cluster_properties(params: Dict) -> Dict:
+    """
+    Grid-based property clustering from precomputed spatial rollups.
+
+    Parcels are assigned to square cells (125 m, 250 m, ... 4 km) when a property snapshot is
+    loaded, and every cell's statistics (count, value, bounds, property type mix) are rolled
+    up per resolution. A call is a single indexed read of the closest resolution:
+    - Picks the level nearest to grid_size_meters (reported as cell_size_meters)
+    - Returns the densest cells with purity and cluster classification
+    - cell_id zooms into one cell: its sub-cells at a finer level
 
     Parameters:
     - city: str (required)
-    - max_distance_meters: float (default: 200) - Max distance between parcels to consider clustered
-    - min_parcels: int (default: 2) - Minimum parcels entity must own to qualify
-
-    Returns:
-        {
-            "assemblages": [
-                {
-                    "owner_name": str,
-                    "entity_type": str,  # NEW: LLC, Corp, Individual, Government
-                    "parcel_count": int,
-                    "total_assemblage_value": float,  # NEW: Sum of all property values
-                    "total_lot_size_acres": float,    # NEW: Total land area
-                    "property_types": [...],          # NEW: Breakdown of property types
-                    "cluster_diameter_meters": float,
-                    "opportunity_score": int (0-100),
-                    "gap_parcels": [...]
-                }
-            ]
-        }
+    - grid_size_meters: float (default: 500) - Grid cell size in meters (snapped to 125 * 2^n);
+      cluster_distance_meters / radius_meters are accepted as aliases
+    - min_cluster_size: int (default: 3) - Minimum properties per cluster
+    - cell_id: str (optional) - 'level:x:y' of a returned cluster to zoom into
+    - limit: int (default: 20) - Maximum clusters returned
     """
     city = params.get('city')
-    max_distance_meters = params.get('max_distance_meters', 200)
-    min_parcels = params.get('min_parcels', 2)
+    size_given = any(params.get(key) is not None for key in ('grid_size_meters', 'cluster_distance_meters', 'radius_meters'))
+    grid_size_meters = params.get('grid_size_meters') or params.get('cluster_distance_meters') or params.get('radius_meters') or 500
+    min_cluster_size = params.get('min_cluster_size', 3)
+    cell_id = params.get('cell_id')
+    limit = params.get('limit', 20)
+
+    try:
+        grid_size_meters = float(grid_size_meters)
+        min_cluster_size = int(float(min_cluster_size))
+        limit = int(float(limit))
+    except (ValueError, TypeError):
+        return {'success': False, 'error': 'grid_size_meters, min_cluster_size and limit must be numbers'}
 
     if not city:
         return {'success': False, 'error': 'city parameter is required'}
 
+    level = _grid_level(grid_size_meters)
+    sql_params = [
+        {'name': 'city', 'value': {'stringValue': city}},
+        {'name': 'min_size', 'value': {'longValue': min_cluster_size}},
+        {'name': 'limit', 'value': {'longValue': max(1, limit)}}
+    ]
+
+    zoom_where = ""
+    if cell_id:
+        try:
+            parent_level, parent_x, parent_y = _parse_cell_id(cell_id)
+        except ValueError as e:
+            return {'success': False, 'error': f'Invalid cell_id: {e}'}
+        if parent_level == 0:
+            return {'success': False, 'error': 'cell_id is already at the finest resolution (125 m)'}
+
+        # Zooming: requested size unless it is not finer than the parent, else one level down
+        if not size_given or level >= parent_level:
+            level = parent_level - 1
+        zoom_where = """
+          AND (cell_x >> CAST(:zoom_shift AS INTEGER)) = :parent_x
+          AND (cell_y >> CAST(:zoom_shift AS INTEGER)) = :parent_y"""
+        sql_params.extend([
+            {'name': 'zoom_shift', 'value': {'longValue': parent_level - level}},
+            {'name': 'parent_x', 'value': {'longValue': parent_x}},
+            {'name': 'parent_y', 'value': {'longValue': parent_y}}
+        ])
+
+    sql_params.append({'name': 'level', 'value': {'longValue': level}})
+
+    sql = f"""
+        SELECT
+            resolution_level || ':' || cell_x || ':' || cell_y as cell_id,
+            cell_size_meters,
+            center_lon,
+            center_lat,
+            property_count,
+            ROUND(value_sum / property_count, 2) as avg_market_value,
+            value_sum as total_value,
+            sample_parcel_ids as property_ids,
+            type_counts,
+            dominant_type,
+            -- Cluster purity: what % is the dominant type?
+            ROUND((dominant_count::float / property_count * 100)::numeric, 1) as cluster_purity_pct,
+            -- Cluster classification
+            CASE
+                WHEN dominant_type IN ('SINGLE FAMILY', 'CONDOMINIUM', 'MOBILE HOME', 'MULTIFAMILY', 'MFR <10 UNITS')
+                    AND (dominant_count::float / property_count) > 0.7 THEN 'Residential Neighborhood'
+                WHEN dominant_type IN ('OFFICE 1 STORY', 'PROF OFFICES', 'OFF MULTISTORY', 'STORES', 'WAREH/DIST TERM')
+                    AND (dominant_count::float / property_count) > 0.6 THEN 'Commercial District'
+                WHEN dominant_type = 'VACANT' AND (dominant_count::float / property_count) > 0.5 THEN 'Development Opportunity Zone'
+                WHEN (dominant_count::float / property_count) < 0.4 THEN 'Mixed-Use Area'
+                ELSE 'Specialized Zone'
+            END as cluster_type,
+            -- Value density ($ per property)
+            ROUND((value_sum / property_count)::numeric, 2) as value_per_property,
+            -- Actual cluster diameter from the parcels' bounds
+            ROUND(
+                ST_Distance(
+                    ST_SetSRID(ST_MakePoint(min_lon, min_lat), 4326)::geography,
+                    ST_SetSRID(ST_MakePoint(max_lon, max_lat), 4326)::geography
+                )::numeric,
+                2
+            ) as cluster_diameter_meters
+        FROM property_grid_rollups
+        WHERE city = UPPER(TRIM(:city))
+          AND resolution_level = :level
+          AND property_count >= :min_size{zoom_where}
+        ORDER BY property_count DESC, value_sum DESC
+        LIMIT :limit
+    """
+
+    try:
+        response = execute_sql(sql, sql_params)
+        clusters = format_rds_response(response)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'city': city,
+            'note': 'Grid clustering failed. Try a different grid_size_meters or min_cluster_size.'
+        }
+
+    for cluster in clusters:
+        # Top 3 property types with counts from the cell's type histogram
+        type_counts = cluster.pop('type_counts', None) or {}
+        if isinstance(type_counts, str):
+            type_counts = json.loads(type_counts)
+        top_types = sorted(type_counts.items(), key=lambda item: item[1]['count'], reverse=True)[:3]
+        cluster['top_property_types'] = [
+            {'type': pt, 'count': stats['count'], 'avg_value': round(float(stats['value_sum']) / stats['count'], 2)}
+            for pt, stats in top_types
+        ]
+        cluster['property_ids_truncated'] = int(cluster.get('property_count') or 0) > len(cluster.get('property_ids') or [])
+
+    cell_size_meters = GRID_BASE_METERS * (2 ** level)
+
+    return {
+        'success': True,
+        'city': city,
+        'cluster_count': len(clusters),
+        'clusters': clusters,
+        'parameters': {
+            'grid_size_meters': grid_size_meters,
+            'cell_size_meters': cell_size_meters,
+            'resolution_level': level,
+            'min_cluster_size': min_cluster_size,
+            'cell_id': cell_id
+        },
+        'method': 'Grid_Based_Clustering',
+        'description': f'Properties grouped into {cell_size_meters}m grid cells. Each cluster represents a dense area with {min_cluster_size}+ properties.',
+        'zoom': 'Pass a cluster cell_id to break it into finer cells (property_ids lists up to 25 highest-value parcels per cell)',
+        'use_cases': [
+            'Identify high-density development areas',
+            'Find hotspots for market analysis',
+            'Detect concentrated investment zones',
+            'Map property distribution patterns'
+        ]
+    }
+
+
+# Contiguous holdings from the parcel adjacency graph (migration 013): same-owner connected
+# components of touching parcels, and their gap parcels - other owners' parcels touching the
+# component, those touching several member parcels (infill) first. Pure index lookups.
+CONTIGUOUS_ASSEMBLAGE_SQL = """
+    WITH members AS (
+        SELECT c.market_id, c.component_id, c.owner_key, c.owner_name, c.property_snapshot_id,
+               bp.parcel_id, bp.market_value, bp.lot_size_acres,
+               COALESCE(bp.property_type, 'UNKNOWN') as property_type
+        FROM parcel_owner_components c
+        JOIN current_bulk_properties bp
+          ON bp.market_id = c.market_id
+         AND bp.parcel_id = c.parcel_id
+        WHERE c.city = UPPER(TRIM(:city))
+          AND c.component_size >= :min_parcels
+    ),
+    type_totals AS (
+        SELECT component_id, property_type, COUNT(*) as count, SUM(market_value) as total_value
+        FROM members
+        GROUP BY component_id, property_type
+    ),
+    components AS (
+        SELECT market_id, component_id, property_snapshot_id,
+               MIN(owner_key) as owner_key,
+               MIN(owner_name) as owner_name,
+               COUNT(*) as parcel_count,
+               ARRAY_AGG(parcel_id ORDER BY parcel_id) as property_ids,
+               SUM(market_value) as total_assemblage_value,
+               SUM(lot_size_acres) as total_lot_size_acres
+        FROM members
+        GROUP BY market_id, component_id, property_snapshot_id
+    ),
+    top_assemblages AS (
+        SELECT c.*,
+               (
+                   SELECT json_agg(json_build_object('property_type', t.property_type, 'count', t.count, 'total_value', t.total_value)
+                                   ORDER BY t.count DESC)
+                   FROM type_totals t
+                   WHERE t.component_id = c.component_id
+               ) as property_types,
+               CASE
+                   WHEN c.parcel_count >= 5 THEN 95
+                   WHEN c.parcel_count >= 4 THEN 80
+                   WHEN c.parcel_count >= 3 THEN 65
+                   ELSE 50
+               END as opportunity_score
+        FROM components c
+        ORDER BY opportunity_score DESC, c.total_lot_size_acres DESC NULLS LAST, c.parcel_count DESC
+        LIMIT 20
+    )
+    SELECT
+        ta.owner_name,
+        ent.entity_type,
+        ta.component_id,
+        ta.parcel_count,
+        ta.total_assemblage_value,
+        ta.total_lot_size_acres,
+        ta.property_types,
+        ta.property_ids,
+        ta.opportunity_score,
+        COALESCE(gaps.gap_parcels, '[]'::json) as gap_parcels
+    FROM top_assemblages ta
+    LEFT JOIN LATERAL (
+        SELECT MAX(e.entity_type) as entity_type
+        FROM entities e
+        WHERE e.entity_key = ta.owner_key
+    ) ent ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'parcel_id', n.neighbor_parcel_id,
+                   'address', p.site_address,
+                   'gap_owner', p.owner_name,
+                   'market_value', p.market_value,
+                   'lot_size_acres', p.lot_size_acres,
+                   'touching_parcels', n.touching_parcels,
+                   'shared_boundary_meters', n.shared_boundary_meters,
+                   'is_infill', n.touching_parcels >= 2
+               ) ORDER BY n.touching_parcels DESC, n.shared_boundary_meters DESC) as gap_parcels
+        FROM (
+            SELECT a.neighbor_parcel_id,
+                   COUNT(DISTINCT a.parcel_id) as touching_parcels,
+                   SUM(a.shared_boundary_meters) as shared_boundary_meters
+            FROM parcel_adjacency a
+            WHERE a.market_id = ta.market_id
+              AND a.parcel_id = ANY(ta.property_ids)
+              AND a.relation IN ('shared_edge', 'corner')
+              AND NOT (a.neighbor_parcel_id = ANY(ta.property_ids))
+            GROUP BY a.neighbor_parcel_id
+            ORDER BY touching_parcels DESC, shared_boundary_meters DESC
+            LIMIT :gaps_per_assemblage
+        ) n
+        LEFT JOIN current_bulk_properties p
+          ON p.market_id = ta.market_id
+         AND p.parcel_id = n.neighbor_parcel_id
+    ) gaps ON TRUE
+    ORDER BY ta.opportunity_score DESC, ta.total_lot_size_acres DESC NULLS LAST, ta.parcel_count DESC
+"""
+
+ASSEMBLAGE_METHODS = {
+    'adjacency': {
+        'methodology': 'Contiguous assemblage detection: same-owner connected components of the parcel adjacency graph (GIS polygons) + entity intelligence + financial metrics + touching gap parcels',
+        'scoring_criteria': {
+            95: '5+ contiguous parcels (prime assemblage)',
+            80: '4 contiguous parcels (strong assemblage)',
+            65: '3 contiguous parcels (moderate assemblage)',
+            50: '2 contiguous parcels (emerging pattern)'
+        }
+    },
+    'proximity': {
+        'methodology': 'Professional assemblage detection: ownership patterns + geographic clustering + entity intelligence + financial metrics + gap identification',
+        'scoring_criteria': {
+            95: '5+ parcels within 100m (prime assemblage)',
+            80: '4+ parcels within 200m (strong assemblage)',
+            65: '3+ parcels within 300m (moderate assemblage)',
+            50: '2+ parcels within 500m (emerging pattern)',
+            30: 'Other configurations'
+        }
+    }
+}
+
+
+def _decode_json_columns(rows: List[Dict], columns: Tuple[str, ...]) -> List[Dict]:
+    """json_agg / json_build_object columns arrive as JSON strings"""
+    for row in rows:
+        for column in columns:
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+    return rows
+
+
+def _find_contiguous_assemblages(city: str, min_parcels: int) -> List[Dict]:
+    """Top 20 same-owner contiguous holdings in a city, with their gap parcels."""
+    sql_params = [
+        {'name': 'city', 'value': {'stringValue': city}},
+        {'name': 'min_parcels', 'value': {'longValue': max(2, min_parcels)}},
+        {'name': 'gaps_per_assemblage', 'value': {'longValue': 5}}
+    ]
+    response = execute_sql(CONTIGUOUS_ASSEMBLAGE_SQL, sql_params)
+    return _decode_json_columns(format_rds_response(response), ('gap_parcels', 'property_types'))
+
+
+def _find_proximity_assemblages(city: str, max_distance_meters: float, min_parcels: int) -> List[Dict]:
+    """Top 20 owners whose parcels lie within max_distance_meters, with nearby gap parcels."""
     # Step 1: Find entities with multiple properties in geographic clusters
     # ENHANCED: Now includes entity_type, financial metrics, and property type breakdown
     sql_entities = """
         WITH entity_portfolios AS (
             SELECT
-                bp.owner_name,
+                bp.owner_key,
+                MIN(bp.owner_name) as owner_name,
                 COUNT(*) as parcel_count,
                 ARRAY_AGG(bp.parcel_id) as property_ids,
-                ST_Collect(ST_SetSRID(ST_MakePoint(bp.longitude, bp.latitude), 4326)) as geom_collection,
+                ST_Collect(bp.geog::geometry) as geom_collection,
+                ST_Centroid(ST_Collect(bp.geog::geometry))::geography as centroid,
                 -- NEW: Financial and development metrics
                 SUM(bp.market_value) as total_assemblage_value,
                 SUM(bp.lot_size_acres) as total_lot_size_acres,
                 -- NEW: Property type breakdown
-                json_agg(json_build_object('type', bp.property_type, 'value', bp.market_value, 'acres', bp.lot_size_acres)) as properties_detail,
-                -- NEW: Entity intelligence
-                MAX(e.entity_type) as entity_type  -- Use MAX to pick any non-null value
-            FROM bulk_property_records bp
-            LEFT JOIN entities e ON e.canonical_name = UPPER(TRIM(bp.owner_name))
+                json_agg(json_build_object('type', bp.property_type, 'value', bp.market_value, 'acres', bp.lot_size_acres)) as properties_detail
+            FROM current_bulk_properties bp
             WHERE UPPER(bp.city) = UPPER(:city)
-              AND bp.latitude IS NOT NULL
-              AND bp.longitude IS NOT NULL
-              AND bp.owner_name IS NOT NULL
-              AND bp.owner_name != 'UNKNOWN'
-              AND bp.owner_name != ''
-            GROUP BY bp.owner_name
+              AND bp.geog IS NOT NULL
+              AND bp.owner_key NOT IN ('', 'UNKNOWN')
+            GROUP BY bp.owner_key
             HAVING COUNT(*) >= :min_parcels
         ),
         assemblage_candidates AS (
             SELECT
+                ep.owner_key,
                 ep.owner_name,
                 ep.parcel_count,
                 ep.property_ids,
                 ep.total_assemblage_value,
                 ep.total_lot_size_acres,
                 ep.properties_detail,
-                ep.entity_type,
+                ep.centroid,
                 -- Use ST_Length on ST_LongestLine for geometry collections (more compatible than ST_MaxDistance)
                 ST_Length(ST_LongestLine(ep.geom_collection, ep.geom_collection)::geography) as cluster_diameter_meters
             FROM entity_portfolios ep
@@ -1313,13 +2251,14 @@ def find_assemblage_opportunities(params: Dict) -> Dict:
         ),
         property_type_summary AS (
             SELECT
+                ac.owner_key,
                 ac.owner_name,
                 ac.parcel_count,
                 ac.property_ids,
                 ac.total_assemblage_value,
                 ac.total_lot_size_acres,
-                ac.entity_type,
                 ac.cluster_diameter_meters,
+                ac.centroid,
                 -- Aggregate property types with counts
                 (
                     SELECT json_agg(json_build_object('property_type', property_type, 'count', count, 'total_value', total_value))
@@ -1330,112 +2269,158 @@ def find_assemblage_opportunities(params: Dict) -> Dict:
                             SUM((pd->>'value')::numeric) as total_value
                         FROM assemblage_candidates ac2
                         CROSS JOIN json_array_elements(ac2.properties_detail) pd
-                        WHERE ac2.owner_name = ac.owner_name
+                        WHERE ac2.owner_key = ac.owner_key
                         GROUP BY (pd->>'type')::text
                         ORDER BY count DESC
                     ) pt_summary
                 ) as property_types
             FROM assemblage_candidates ac
+        ),
+        top_assemblages AS (
+            SELECT
+                owner_key,
+                owner_name,
+                parcel_count,
+                total_assemblage_value,
+                total_lot_size_acres,
+                property_types,
+                property_ids,
+                cluster_diameter_meters,
+                centroid,
+                CASE
+                    WHEN parcel_count >= 5 AND cluster_diameter_meters < 100 THEN 95
+                    WHEN parcel_count >= 4 AND cluster_diameter_meters < 200 THEN 80
+                    WHEN parcel_count >= 3 AND cluster_diameter_meters < 300 THEN 65
+                    WHEN parcel_count >= 2 AND cluster_diameter_meters < 500 THEN 50
+                    ELSE 30
+                END as opportunity_score
+            FROM property_type_summary
+            ORDER BY opportunity_score DESC, parcel_count DESC
+            LIMIT 20
         )
+        -- Step 2: gap parcels (other owners' parcels nearest each assemblage's centroid),
+        -- one indexed KNN probe per assemblage via LATERAL
         SELECT
-            owner_name,
-            entity_type,
-            parcel_count,
-            total_assemblage_value,
-            total_lot_size_acres,
-            property_types,
-            property_ids,
-            cluster_diameter_meters,
-            CASE
-                WHEN parcel_count >= 5 AND cluster_diameter_meters < 100 THEN 95
-                WHEN parcel_count >= 4 AND cluster_diameter_meters < 200 THEN 80
-                WHEN parcel_count >= 3 AND cluster_diameter_meters < 300 THEN 65
-                WHEN parcel_count >= 2 AND cluster_diameter_meters < 500 THEN 50
-                ELSE 30
-            END as opportunity_score
-        FROM property_type_summary
-        ORDER BY opportunity_score DESC, parcel_count DESC
-        LIMIT 20
+            ta.owner_name,
+            ent.entity_type,
+            ta.parcel_count,
+            ta.total_assemblage_value,
+            ta.total_lot_size_acres,
+            ta.property_types,
+            ta.property_ids,
+            ta.cluster_diameter_meters,
+            ta.opportunity_score,
+            COALESCE(gaps.gap_parcels, '[]'::json) as gap_parcels
+        FROM top_assemblages ta
+        LEFT JOIN LATERAL (
+            SELECT MAX(e.entity_type) as entity_type
+            FROM entities e
+            WHERE e.entity_key = ta.owner_key
+        ) ent ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT json_agg(json_build_object(
+                       'parcel_id', g.parcel_id,
+                       'address', g.site_address,
+                       'gap_owner', g.owner_name,
+                       'market_value', g.market_value,
+                       'lot_size_acres', g.lot_size_acres,
+                       'distance_to_cluster_meters', g.distance_to_cluster_meters
+                   ) ORDER BY g.distance_to_cluster_meters) as gap_parcels
+            FROM (
+                SELECT
+                    p.parcel_id,
+                    p.site_address,
+                    p.owner_name,
+                    p.market_value,
+                    p.lot_size_acres,
+                    ROUND(ST_Distance(p.geog, ta.centroid)::numeric, 2) as distance_to_cluster_meters
+                FROM current_bulk_properties p
+                WHERE UPPER(p.city) = UPPER(:city)
+                  AND p.owner_key != ta.owner_key
+                  AND ST_DWithin(p.geog, ta.centroid, :gap_distance)
+                ORDER BY p.geog <-> ta.centroid
+                LIMIT :gaps_per_assemblage
+            ) g
+        ) gaps ON TRUE
+        ORDER BY ta.opportunity_score DESC, ta.parcel_count DESC
     """
 
     sql_params = [
         {'name': 'city', 'value': {'stringValue': city}},
         {'name': 'max_distance', 'value': {'doubleValue': float(max_distance_meters)}},
-        {'name': 'min_parcels', 'value': {'longValue': min_parcels}}
+        {'name': 'min_parcels', 'value': {'longValue': min_parcels}},
+        {'name': 'gap_distance', 'value': {'doubleValue': float(max_distance_meters) * 1.5}},  # Slightly wider search for gaps
+        {'name': 'gaps_per_assemblage', 'value': {'longValue': 5}}
     ]
 
     response = execute_sql(sql_entities, sql_params)
     assemblages = format_rds_response(response)
 
-    # Step 2: For top assemblages, find gap parcels (properties between their holdings)
-    for i, assemblage in enumerate(assemblages[:5]):  # Only top 5 to save time
-        owner_name = assemblage.get('owner_name')
+    return _decode_json_columns(assemblages, ('gap_parcels', 'property_types'))
 
-        sql_gaps = """
-            WITH owned_properties AS (
-                SELECT
-                    ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography as geom
-                FROM bulk_property_records
-                WHERE owner_name = :owner_name
-                  AND city = :city
-                  AND latitude IS NOT NULL
-                  AND longitude IS NOT NULL
-            ),
-            owned_centroid AS (
-                SELECT ST_Centroid(ST_Collect(geom)) as centroid
-                FROM owned_properties
-            )
-            SELECT
-                p.parcel_id,
-                p.site_address as address,
-                p.owner_name as gap_owner,
-                p.market_value,
-                p.lot_size_acres,
-                ROUND(ST_Distance(
-                    ST_SetSRID(ST_MakePoint(p.longitude, p.latitude), 4326)::geography,
-                    oc.centroid
-                )::numeric, 2) as distance_to_cluster_meters
-            FROM bulk_property_records p
-            CROSS JOIN owned_centroid oc
-            WHERE UPPER(p.city) = UPPER(:city)
-              AND p.owner_name != :owner_name
-              AND p.latitude IS NOT NULL
-              AND p.longitude IS NOT NULL
-              AND ST_DWithin(
-                  ST_SetSRID(ST_MakePoint(p.longitude, p.latitude), 4326)::geography,
-                  oc.centroid,
-                  :max_distance
-              )
-            ORDER BY distance_to_cluster_meters
-            LIMIT 5
-        """
 
-        gap_params = [
-            {'name': 'owner_name', 'value': {'stringValue': owner_name}},
-            {'name': 'city', 'value': {'stringValue': city}},
-            {'name': 'max_distance', 'value': {'doubleValue': float(max_distance_meters) * 1.5}}  # Slightly wider search for gaps
-        ]
+def find_assemblage_opportunities(params: Dict) -> Dict:
+    """
+    Find REAL assemblage opportunities using professional methodology.
 
-        try:
-            gap_response = execute_sql(sql_gaps, gap_params)
-            assemblages[i]['gap_parcels'] = format_rds_response(gap_response)
-        except Exception as e:
-            print(f"Gap parcel search failed for {owner_name}: {e}")
-            assemblages[i]['gap_parcels'] = []
+    ENHANCED: Now includes entity intelligence, financial metrics, and development potential.
+
+    Detects ownership patterns where single entities own multiple adjacent parcels.
+    This is how institutional developers (D.R. Horton, Lennar, etc.) assemble land.
+
+    Parameters:
+    - city: str (required)
+    - max_distance_meters: float (default: 200) - Max distance between parcels to consider clustered
+    - min_parcels: int (default: 2) - Minimum parcels entity must own to qualify
+    - method: str (default: 'auto') - 'adjacency' (contiguous parcels from the parcel adjacency
+      graph), 'proximity' (parcels within max_distance_meters of each other), or 'auto'
+      (adjacency, falling back to proximity when the graph has nothing for the city)
+
+    Returns:
+        {
+            "assemblages": [
+                {
+                    "owner_name": str,
+                    "entity_type": str,  # NEW: LLC, Corp, Individual, Government
+                    "parcel_count": int,
+                    "total_assemblage_value": float,  # NEW: Sum of all property values
+                    "total_lot_size_acres": float,    # NEW: Total land area
+                    "property_types": [...],          # NEW: Breakdown of property types
+                    "cluster_diameter_meters": float,  # proximity only
+                    "component_id": str,               # adjacency only
+                    "opportunity_score": int (0-100),
+                    "gap_parcels": [...]
+                }
+            ]
+        }
+    """
+    city = params.get('city')
+    max_distance_meters = params.get('max_distance_meters', 200)
+    min_parcels = params.get('min_parcels', 2)
+    method = params.get('method') or 'auto'
+
+    if not city:
+        return {'success': False, 'error': 'city parameter is required'}
+
+    if method not in ('auto', 'adjacency', 'proximity'):
+        return {'success': False, 'error': "method must be 'auto', 'adjacency' or 'proximity'"}
+
+    method_used = 'proximity'
+    if method in ('auto', 'adjacency'):
+        assemblages = _find_contiguous_assemblages(city, int(min_parcels))
+        if assemblages or method == 'adjacency':
+            method_used = 'adjacency'
+
+    if method_used == 'proximity':
+        assemblages = _find_proximity_assemblages(city, float(max_distance_meters), int(min_parcels))
 
     return {
         'success': True,
         'city': city,
         'assemblages_found': len(assemblages),
         'assemblages': assemblages,
-        'methodology': 'Professional assemblage detection: ownership patterns + geographic clustering + entity intelligence + financial metrics + gap identification',
-        'scoring_criteria': {
-            95: '5+ parcels within 100m (prime assemblage)',
-            80: '4+ parcels within 200m (strong assemblage)',
-            65: '3+ parcels within 300m (moderate assemblage)',
-            50: '2+ parcels within 500m (emerging pattern)',
-            30: 'Other configurations'
-        },
+        'method': method_used,
+        **ASSEMBLAGE_METHODS[method_used],
         'enhancements': {
             'entity_type': 'Identifies LLC/Corp (institutional) vs Individual/Government',
             'total_assemblage_value': 'Sum of all property values (acquisition cost estimate)',
@@ -1447,7 +2432,7 @@ def find_assemblage_opportunities(params: Dict) -> Dict:
             'Estimate total acquisition cost via total_assemblage_value',
             'Calculate development potential via total_lot_size_acres',
             'Distinguish developer assemblages (LLC/Corp) from inherited properties (Individual)',
-            'Find gap parcels for acquisition strategy',
+            'Find gap parcels for acquisition strategy (is_infill: touches 2+ owned parcels)',
             'Detect land banking patterns',
             'Wholesale opportunities to large developers'
         ]
@@ -1462,24 +2447,39 @@ def analyze_location_intelligence(params: Dict) -> Dict:
     - parcel_id: str (optional) - If provided, looks up coordinates for this property
     - latitude: float (optional) - Direct coordinates (required if no parcel_id)
     - longitude: float (optional) - Direct coordinates (required if no parcel_id)
-    - radius_meters: int (default: 1000)
+    - radius_meters: int (default: 1000) - Search radius ('radius' mode) / optional max radius ('knn' mode)
     - limit: int (default: 20)
+    - mode: str (default: 'radius') - 'radius' (everything within radius, sorted by distance)
+            or 'knn' (k nearest parcels via index-ordered <-> search; latency independent of density)
+    - k: int (optional) - Number of neighbours in 'knn' mode (defaults to limit)
+    - property_type: str (optional) - Only return parcels of this property type
     """
     parcel_id = params.get('parcel_id')
     latitude = params.get('latitude')
     longitude = params.get('longitude')
-    radius_meters = params.get('radius_meters', 1000)
+    mode = (params.get('mode') or 'radius').lower()
+    property_type = params.get('property_type')
     limit = params.get('limit', 20)
 
+    if mode not in ('radius', 'knn'):
+        return {'success': False, 'error': f"Invalid mode: {mode}. Use 'radius' or 'knn'"}
+
+    if mode == 'knn':
+        # Radius is only a cap in KNN mode - unbounded unless explicitly given
+        radius_meters = params.get('radius_meters')
+        limit = int(params.get('k') or limit)
+    else:
+        radius_meters = params.get('radius_meters', 1000)
+
     # If parcel_id provided, look up coordinates first
     if parcel_id and (latitude is None or longitude is None):
         sql_lookup = """
             SELECT latitude, longitude, site_address, city
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE parcel_id = :parcel_id
             LIMIT 1
         """
-        lookup_params = [{'name': 'parcel_id', 'value': {'stringValue': str(parcel_id)}}]
+        lookup_params = [_sql_param('parcel_id', canonical_parcel_id(parcel_id), 'stringValue')]
 
         try:
             response = execute_sql(sql_lookup, lookup_params)
@@ -1517,31 +2517,55 @@ def analyze_location_intelligence(params: Dict) -> Dict:
             'example': 'parcel_id="12345" OR latitude=29.6516 + longitude=-82.3248'
         }
 
-    # Using ST_DWithin with geography for accurate distance
-    sql = """
-        SELECT property_id, site_address as address, city, property_type, market_value,
-               latitude, longitude,
-               ST_Distance(
-                   ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography,
-                   ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography
-               ) as distance_meters
-        FROM bulk_property_records
-        WHERE ST_DWithin(
-            ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography,
-            ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography,
-            :radius
-        )
-        ORDER BY distance_meters
-        LIMIT :limit
-    """
-
     sql_params = [
         {'name': 'latitude', 'value': {'doubleValue': float(latitude)}},
         {'name': 'longitude', 'value': {'doubleValue': float(longitude)}},
-        {'name': 'radius', 'value': {'doubleValue': float(radius_meters)}},
         {'name': 'limit', 'value': {'longValue': limit}}
     ]
 
+    where_clauses = []
+    if property_type:
+        where_clauses.append("UPPER(property_type) = UPPER(:property_type)")
+        sql_params.append({'name': 'property_type', 'value': {'stringValue': property_type}})
+
+    if mode == 'knn':
+        # Index-ordered nearest neighbours: ORDER BY geog <-> point walks the GiST index
+        # and stops after k rows, so dense tracts don't mean sorting thousands of matches.
+        # The point is written inline (not via a CTE) so the planner sees a constant.
+        where_clauses.append("geog IS NOT NULL")
+        if radius_meters is not None:
+            where_clauses.append(
+                "ST_DWithin(geog, ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography, :radius)"
+            )
+            sql_params.append({'name': 'radius', 'value': {'doubleValue': float(radius_meters)}})
+
+        sql = f"""
+            SELECT property_id, site_address as address, city, property_type, market_value,
+                   latitude, longitude,
+                   ST_Distance(geog, ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography) as distance_meters
+            FROM current_bulk_properties
+            WHERE {' AND '.join(where_clauses)}
+            ORDER BY geog <-> ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography
+            LIMIT :limit
+        """
+    else:
+        # ST_DWithin on the stored geog column (GiST indexed) - accurate meters, no per-row point build
+        where_clauses.append("ST_DWithin(bp.geog, center.geog, :radius)")
+        sql_params.append({'name': 'radius', 'value': {'doubleValue': float(radius_meters)}})
+
+        sql = f"""
+            WITH center AS (
+                SELECT ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography as geog
+            )
+            SELECT property_id, site_address as address, city, property_type, market_value,
+                   latitude, longitude,
+                   ST_Distance(bp.geog, center.geog) as distance_meters
+            FROM current_bulk_properties bp, center
+            WHERE {' AND '.join(where_clauses)}
+            ORDER BY distance_meters
+            LIMIT :limit
+        """
+
     response = execute_sql(sql, sql_params)
     properties = format_rds_response(response)
 
@@ -1549,6 +2573,7 @@ def analyze_location_intelligence(params: Dict) -> Dict:
         'success': True,
         'latitude': latitude,
         'longitude': longitude,
+        'mode': mode,
         'radius_meters': radius_meters,
         'count': len(properties),
         'properties': properties
@@ -1567,7 +2592,8 @@ def check_permit_history(params: Dict) -> Dict:
     Parameters:
     - property_id: str (optional) - property_id from bulk_property_records
     - parcel_id: str (optional) - parcel_id to look up
-    - limit: int (default: 20)
+    - limit: int (default: 20) - Permits per page
+    - cursor: str (optional) - next_cursor from the previous page
 
     Returns:
         {
@@ -1575,6 +2601,8 @@ def check_permit_history(params: Dict) -> Dict:
             "parcel_id": str,
             "property_address": str,
             "count": int,
+            "next_cursor": str | None,  # None on the last page
+            "summary": dict | None,     # All of the parcel's permits; first page only
             "permits": [
                 {
                     "permit_id": str,
@@ -1594,7 +2622,8 @@ def check_permit_history(params: Dict) -> Dict:
     """
     property_id_input = params.get('property_id')
     parcel_id_input = params.get('parcel_id')
-    limit = params.get('limit', 20)
+    limit = int(params.get('limit', 20) or 20)
+    cursor = params.get('cursor')
 
     if not property_id_input and not parcel_id_input:
         return {
@@ -1607,7 +2636,7 @@ def check_permit_history(params: Dict) -> Dict:
     if property_id_input:
         lookup_sql = """
             SELECT parcel_id, site_address as property_address
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE property_id::text = :property_id
             LIMIT 1
         """
@@ -1616,11 +2645,11 @@ def check_permit_history(params: Dict) -> Dict:
         # Try by parcel_id
         lookup_sql = """
             SELECT parcel_id, site_address as property_address
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE parcel_id = :parcel_id
             LIMIT 1
         """
-        lookup_params = [{'name': 'parcel_id', 'value': {'stringValue': str(parcel_id_input)}}]
+        lookup_params = [_sql_param('parcel_id', canonical_parcel_id(parcel_id_input), 'stringValue')]
 
     try:
         lookup_response = execute_sql(lookup_sql, lookup_params)
@@ -1646,7 +2675,44 @@ def check_permit_history(params: Dict) -> Dict:
 
     # Step 2: Query permits with entity name resolution
     # Match via parcel_id since permits.parcel_id == bulk_property_records.parcel_id
-    sql = """
+    sql_params = [
+        {'name': 'parcel_id', 'value': {'stringValue': str(parcel_id)}},
+        {'name': 'fetch_limit', 'value': {'longValue': limit + 1}}
+    ]
+
+    # Keyset: newest applications first, permit id as tie-breaker
+    sort_keys = [("COALESCE(p.application_date, DATE '0001-01-01')", 'DATE'), ("p.id", 'UUID')]
+    cursor_scope = f'check_permit_history:{parcel_id}'
+    cursor_where = ""
+    if cursor:
+        try:
+            cursor_values = _decode_cursor(cursor, cursor_scope, len(sort_keys))
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        cursor_where = "AND " + _cursor_predicate(sort_keys, cursor_values, sql_params)
+
+    # The summary covers every permit of the parcel, not just this page, so it is only
+    # computed (as an InitPlan, in the same round trip) on the first page
+    summary_column = "" if cursor else """
+            (
+                SELECT jsonb_build_object(
+                    'total_permits', COALESCE(SUM(t.permit_count), 0),
+                    'total_project_value', COALESCE(SUM(t.project_value), 0),
+                    'permit_types', COALESCE(jsonb_object_agg(t.permit_type, t.permit_count), '{}'::jsonb),
+                    'has_active_permits', COALESCE(BOOL_OR(t.has_active), FALSE)
+                )
+                FROM (
+                    SELECT COALESCE(permit_type, 'UNKNOWN') as permit_type,
+                           COUNT(*) as permit_count,
+                           SUM(project_value) as project_value,
+                           BOOL_OR(status IN ('ISSUED', 'IN PROGRESS', 'PENDING')) as has_active
+                    FROM permits
+                    WHERE parcel_id = :parcel_id
+                    GROUP BY 1
+                ) t
+            ) as permit_summary,"""
+
+    sql = f"""
         SELECT
             p.id as permit_id,
             p.permit_number,
@@ -1663,30 +2729,38 @@ def check_permit_history(params: Dict) -> Dict:
             -- Resolve entity names
             contractor.name as contractor_name,
             owner.name as owner_name,
-            applicant.name as applicant_name
+            applicant.name as applicant_name,{summary_column}
+            {_cursor_columns(sort_keys)}
         FROM permits p
         LEFT JOIN entities contractor ON p.contractor_entity_id = contractor.id
         LEFT JOIN entities owner ON p.owner_entity_id = owner.id
         LEFT JOIN entities applicant ON p.applicant_entity_id = applicant.id
         WHERE p.parcel_id = :parcel_id
-        ORDER BY p.application_date DESC NULLS LAST
-        LIMIT :limit
+          {cursor_where}
+        ORDER BY {_cursor_order(sort_keys)}
+        LIMIT :fetch_limit
     """
 
-    sql_params = [
-        {'name': 'parcel_id', 'value': {'stringValue': str(parcel_id)}},
-        {'name': 'limit', 'value': {'longValue': limit}}
-    ]
-
     response = execute_sql(sql, sql_params)
-    permits = format_rds_response(response)
-
-    # Calculate summary stats
-    total_project_value = sum(float(p.get('project_value', 0) or 0) for p in permits)
-    permit_types = {}
+    permits = _decode_json_columns(format_rds_response(response), ('permit_summary',))
+    row_keys = [_pop_cursor_keys(p, len(sort_keys)) for p in permits]
+
+    summary = None
+    if not cursor:
+        summary = permits[0].get('permit_summary') if permits else None
+        summary = summary or {
+            'total_permits': 0,
+            'total_project_value': 0,
+            'permit_types': {},
+            'has_active_permits': False
+        }
     for p in permits:
-        ptype = p.get('permit_type', 'UNKNOWN')
-        permit_types[ptype] = permit_types.get(ptype, 0) + 1
+        p.pop('permit_summary', None)
+
+    next_cursor = None
+    if len(permits) > limit:
+        permits = permits[:limit]
+        next_cursor = _encode_cursor(cursor_scope, row_keys[limit - 1])
 
     return {
         'success': True,
@@ -1694,33 +2768,224 @@ def check_permit_history(params: Dict) -> Dict:
         'property_address': property_address,
         'count': len(permits),
         'permits': permits,
-        'summary': {
-            'total_permits': len(permits),
-            'total_project_value': total_project_value,
-            'permit_types': permit_types,
-            'has_active_permits': any(p.get('status') in ['ISSUED', 'IN PROGRESS', 'PENDING'] for p in permits)
-        },
+        'next_cursor': next_cursor,
+        'summary': summary,
         'note': 'Permit data queried via parcel_id with full entity name resolution',
         'data_source': 'permits table joined with bulk_property_records and entities'
     }
 
 
+# Comparable search tiers, in priority order. The first sales tier with >= MIN_COMPS rows wins;
+# the market-value tier is the last resort and is returned even when short.
+MIN_COMPS = 3
+
+COMP_TIERS = {
+    1: {
+        'data_source': 'recent_sales_12m',
+        'note': 'Using qualified sale prices from last 12 months, ranked by feature-vector similarity',
+        'methodology': {
+            'similarity': 'Nearest neighbours on standardized value, size, beds/baths, year, lot, location, pool/garage and neighbourhood',
+            'filters': 'Same city and property type, qualified sale within 12 months, sale price within 30% of target'
+        }
+    },
+    2: {
+        'data_source': 'recent_sales_24m',
+        'note': 'Using qualified sale prices from last 24 months (expanded search)',
+        'methodology': {
+            'similarity': 'Nearest neighbours on standardized value, size, beds/baths, year, lot, location, pool/garage and neighbourhood',
+            'filters': 'Same city and property type, qualified sale within 24 months, sale price within 30% of target'
+        }
+    },
+    3: {
+        'data_source': 'market_values',
+        'note': 'Using assessed market values (insufficient recent sales data). These are directional only, not appraisal-grade.',
+        'warning': 'For professional appraisals, actual sale prices required',
+        'methodology': {
+            'similarity': 'Nearest neighbours on standardized value, size, beds/baths, year, lot, location, pool/garage and neighbourhood',
+            'filters': 'Same city and property type, market value within 30% of target'
+        }
+    }
+}
+
+# One tier: HNSW nearest-neighbour scan over bulk_property_records.feature_vector (migration 016)
+# with the tier's sale-window / price-band filters. The cursor condition is split so tiers other
+# than the pinned one are skipped outright (one-time filter). The scan runs with a relaxed-order
+# iterative scan (hnsw_settings), so it is cut to :candidate_limit rows in a MATERIALIZED CTE and
+# re-sorted by exact distance before the page (:fetch_limit) is taken. The cursor comparison is
+# exact per row, so no comp repeats across pages.
+COMPARABLE_TIER_SQL = """
+    ann_{tier} AS MATERIALIZED (
+        SELECT
+            bp.parcel_id,
+            bp.site_address as property_address,
+            {sale_price} as sale_price,
+            {sale_date} as last_sale_date,
+            bp.market_value as assessed_value,
+            bp.bedrooms,
+            bp.bathrooms,
+            bp.has_pool,
+            bp.has_garage,
+            bp.building_condition,
+            bp.neighborhood_desc,
+            bp.lot_size_acres,
+            bp.year_built,
+            {sale_qualified} as sale_qualified,
+            ST_Distance(bp.geog, c.geog) as distance_meters,
+            COALESCE(UPPER(bp.neighborhood_desc) = UPPER(c.neighborhood_desc), FALSE) as neighborhood_match,
+            '{comp_type}' as comp_type,
+            bp.feature_vector <-> (SELECT vec FROM query_vector) as vector_distance
+        FROM current_bulk_properties bp
+        CROSS JOIN criteria c
+        WHERE bp.feature_vector IS NOT NULL
+          AND UPPER(bp.city) = UPPER(c.city)
+          AND bp.property_type = c.property_type
+          AND bp.parcel_id IS DISTINCT FROM c.subject_parcel_id
+          AND (c.bedrooms IS NULL OR bp.bedrooms = c.bedrooms)
+          AND (c.bathrooms IS NULL OR (bp.bathrooms >= c.bathrooms - 0.5 AND bp.bathrooms <= c.bathrooms + 0.5))
+          AND {tier_filter}
+          AND (CAST(:cursor_tier AS INTEGER) IS NULL OR CAST(:cursor_tier AS INTEGER) = {tier})
+          AND (CAST(:cursor_tier AS INTEGER) IS NULL
+               OR (bp.feature_vector <-> (SELECT vec FROM query_vector), bp.parcel_id) >
+                  (CAST(:cursor_0 AS DOUBLE PRECISION), CAST(:cursor_1 AS TEXT)))
+        ORDER BY bp.feature_vector <-> (SELECT vec FROM query_vector)
+        LIMIT :candidate_limit
+    ),"""
+
+COMPARABLE_TIER_PAGE_SQL = """
+        SELECT {tier} as tier, n.*
+        FROM (
+            SELECT *
+            FROM ann_{tier}
+            ORDER BY vector_distance, parcel_id
+            LIMIT :fetch_limit
+        ) n"""
+
+# Rows each tier's ANN scan hands over for the exact re-sort (at least the page size)
+COMP_ANN_CANDIDATES = 40
+
+SALE_TIER_FILTER = """bp.last_sale_price > 0
+              AND bp.last_sale_date >= CURRENT_DATE - INTERVAL '{months} months'
+              AND bp.last_sale_price BETWEEN c.target_value * 0.7 AND c.target_value * 1.3
+              AND (bp.sale_qualified = 'Q' OR bp.sale_qualified IS NULL)"""
+
+# One round trip: subject lookup + query vector (CTEs) + all three tiers, each an ANN scan cut
+# to :fetch_limit. The query vector is built with the market's stored scaling
+# (property_feature_vector), so criteria-only searches land in the same space as parcels, and
+# every comp tool reports property_similarity_score() of the same distance.
+# Paging: a cursor pins the tier and resumes after (vector_distance, parcel_id) within it.
+# HNSW settings are transaction-local (set_config(..., true)); query_vector reads hnsw_settings,
+# so they are in place before any tier's index scan starts (the vector is its scan key).
+COMPARABLES_SQL = """
+    WITH hnsw_settings AS (
+        SELECT set_config('hnsw.ef_search', '200', true) as ef_search,
+               (SELECT set_config(name, 'relaxed_order', true)
+                FROM pg_settings
+                WHERE name = 'hnsw.iterative_scan') as iterative_scan
+    ),
+    subject AS (
+        SELECT parcel_id, market_id, city, property_type, market_value, square_feet, bedrooms, bathrooms,
+               year_built, lot_size_acres, has_pool, has_garage, building_condition, neighborhood_desc, geog
+        FROM current_bulk_properties
+        WHERE parcel_id = CAST(:parcel_id AS TEXT)
+        ORDER BY (feature_vector IS NULL), updated_at DESC NULLS LAST
+        LIMIT 1
+    ),
+    criteria AS (
+        SELECT
+            s.parcel_id IS NOT NULL as subject_found,
+            s.parcel_id as subject_parcel_id,
+            s.market_id,
+            COALESCE(CAST(:city AS TEXT), s.city) as city,
+            COALESCE(CAST(:property_type AS TEXT), s.property_type) as property_type,
+            COALESCE(CAST(:target_value AS NUMERIC), s.market_value) as target_value,
+            s.square_feet,
+            COALESCE(CAST(:bedrooms AS INTEGER), s.bedrooms) as bedrooms,
+            COALESCE(CAST(:bathrooms AS NUMERIC), s.bathrooms) as bathrooms,
+            s.year_built,
+            s.lot_size_acres,
+            COALESCE(CAST(:has_pool AS BOOLEAN), s.has_pool) as has_pool,
+            COALESCE(CAST(:has_garage AS BOOLEAN), s.has_garage) as has_garage,
+            COALESCE(CAST(:building_condition AS TEXT), s.building_condition) as building_condition,
+            COALESCE(CAST(:neighborhood_desc AS TEXT), s.neighborhood_desc) as neighborhood_desc,
+            COALESCE(
+                ST_SetSRID(ST_MakePoint(CAST(:lon AS DOUBLE PRECISION), CAST(:lat AS DOUBLE PRECISION)), 4326)::geography,
+                s.geog
+            ) as geog
+        FROM (SELECT 1) one
+        LEFT JOIN subject s ON TRUE
+    ),
+    query_vector AS (
+        SELECT property_feature_vector(
+                   fs, c.target_value, c.square_feet, c.bedrooms, c.bathrooms, c.year_built,
+                   c.lot_size_acres, ST_Y(c.geog::geometry), ST_X(c.geog::geometry),
+                   c.has_pool, c.has_garage, c.neighborhood_desc
+               ) as vec
+        FROM criteria c
+        CROSS JOIN hnsw_settings
+        JOIN property_feature_scaling fs
+          ON fs.market_id = c.market_id
+          OR (c.market_id IS NULL AND UPPER(TRIM(c.city)) = ANY(fs.cities))
+        LIMIT 1
+    ),""" + "".join(
+    COMPARABLE_TIER_SQL.format(
+        tier=tier,
+        comp_type=comp_type,
+        sale_price='bp.last_sale_price' if comp_type == 'RECENT_SALE' else '0',
+        sale_date='bp.last_sale_date' if comp_type == 'RECENT_SALE' else 'NULL::date',
+        sale_qualified='bp.sale_qualified' if comp_type == 'RECENT_SALE' else 'NULL::text',
+        tier_filter=tier_filter
+    )
+    for tier, comp_type, tier_filter in (
+        (1, 'RECENT_SALE', SALE_TIER_FILTER.format(months=12)),
+        (2, 'RECENT_SALE', SALE_TIER_FILTER.format(months=24)),
+        (3, 'MARKET_VALUE', 'bp.market_value BETWEEN c.target_value * 0.7 AND c.target_value * 1.3')
+    )
+) + """
+    tiered AS (""" + "\n        UNION ALL".join(
+    COMPARABLE_TIER_PAGE_SQL.format(tier=tier) for tier in (1, 2, 3)
+) + """
+    ),
+    ranked AS (
+        SELECT t.*,
+               property_similarity_score(vector_distance) as similarity_score,
+               CAST(vector_distance AS TEXT) as cursor_k0,
+               COALESCE(parcel_id, '') as cursor_k1
+        FROM tiered t
+        WHERE (SELECT vec FROM query_vector) IS NOT NULL
+    )
+    SELECT
+        c.subject_found as criteria_subject_found,
+        (SELECT vec FROM query_vector) IS NOT NULL as criteria_vectors_ready,
+        c.city as criteria_city,
+        c.property_type as criteria_property_type,
+        c.target_value as criteria_target_value,
+        c.bedrooms as criteria_bedrooms,
+        c.bathrooms as criteria_bathrooms,
+        c.has_pool as criteria_has_pool,
+        c.has_garage as criteria_has_garage,
+        c.building_condition as criteria_building_condition,
+        c.neighborhood_desc as criteria_neighborhood,
+        r.*
+    FROM criteria c
+    LEFT JOIN ranked r ON TRUE
+    ORDER BY r.tier, r.vector_distance, r.parcel_id
+"""
+
+
 def find_comparable_properties(params: Dict) -> Dict:
     """
     Find comparable properties (comps) using PROFESSIONAL APPRAISAL METHODOLOGY.
 
-    MASSIVE ENHANCEMENT:
-    - Building features matching (pool, garage, condition, quality)
-    - Neighborhood matching with bonus scoring
-    - Time-decay weighting (recent sales weighted higher)
+    Comps are nearest neighbours in feature-vector space (pgvector HNSW index, migration 016):
+    - Standardized value, size, beds/baths, year built, lot size, location,
+      pool/garage and neighbourhood in one vector per parcel
     - Sale qualification filtering (qualified sales only)
-    - Distance-based scoring (closer properties score higher)
-    - Multi-factor similarity algorithm
+    - Similarity score (0-100) from the vector distance - the same score every comp tool reports
 
-    Strategy (in priority order):
-    1. Try recent QUALIFIED sales (12 months) with full feature matching
-    2. If insufficient, expand to 24 months
-    3. If still insufficient, use market values as fallback
+    Strategy (in priority order, all tiers come back from ONE ranked query):
+    1. Recent QUALIFIED sales (12 months) with full feature matching
+    2. If fewer than 3, qualified sales from the last 24 months
+    3. If still fewer than 3, market values as fallback
 
     Parameters:
     - parcel_id: str (optional) - Auto-looks up all property details
@@ -1736,6 +3001,7 @@ def find_comparable_properties(params: Dict) -> Dict:
     - latitude: float (optional) - For distance scoring
     - longitude: float (optional) - For distance scoring
     - limit: int (default: 10)
+    - cursor: str (optional) - next_cursor from the previous page (stays in the same tier)
 
     Returns:
         {
@@ -1746,14 +3012,15 @@ def find_comparable_properties(params: Dict) -> Dict:
                     "sale_price": float,
                     "last_sale_date": str,
                     "similarity_score": float (0-100),
+                    "vector_distance": float,
                     "comp_type": "RECENT_SALE" | "MARKET_VALUE",
-                    "feature_match": float (0-100),
                     "neighborhood_match": bool,
-                    "time_weight": float (0-100),
                     "distance_meters": float (if coords provided)
                 }
             ],
             "data_source": str,
+            "tier_counts": {data_source: int} - candidates found in every tier (this page),
+            "next_cursor": str | None,
             "criteria": {...}
         }
     """
@@ -1771,274 +3038,118 @@ def find_comparable_properties(params: Dict) -> Dict:
     longitude = params.get('longitude')
     limit = params.get('limit', 10)
 
-    # If parcel_id provided, look up ALL property details
-    if parcel_id:
-        sql_lookup = """
-            SELECT city, property_type, market_value, bedrooms, bathrooms,
-                   has_pool, has_garage, building_condition, building_quality,
-                   neighborhood_desc, subdivision_desc,
-                   latitude, longitude,
-                   site_address
-            FROM bulk_property_records
-            WHERE parcel_id = :parcel_id
-            LIMIT 1
-        """
-        lookup_params = [{'name': 'parcel_id', 'value': {'stringValue': str(parcel_id)}}]
-
+    limit = int(limit or 10)
+    cursor = params.get('cursor')
+    cursor_values = [None, None, None]
+    if cursor:
         try:
-            response = execute_sql(sql_lookup, lookup_params)
-            results = format_rds_response(response)
-
-            if not results:
-                return {
-                    'success': False,
-                    'error': f'Property not found: {parcel_id}',
-                    'note': 'Check parcel_id or provide property details manually'
-                }
-
-            prop = results[0]
-            # Use looked-up values if not provided by caller
-            city = city or prop.get('city')
-            property_type = property_type or prop.get('property_type')
-            target_value = target_value or prop.get('market_value')
-            bedrooms = bedrooms or prop.get('bedrooms')
-            bathrooms = bathrooms or prop.get('bathrooms')
-            has_pool = has_pool if has_pool is not None else prop.get('has_pool')
-            has_garage = has_garage if has_garage is not None else prop.get('has_garage')
-            building_condition = building_condition or prop.get('building_condition')
-            neighborhood_desc = neighborhood_desc or prop.get('neighborhood_desc')
-            latitude = latitude or prop.get('latitude')
-            longitude = longitude or prop.get('longitude')
-
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'Failed to lookup property: {str(e)}'
-            }
-
-    if not city or not property_type or target_value is None:
+            cursor_values = _decode_cursor(cursor, 'find_comparable_properties', 3)
+            if int(cursor_values[0]) not in COMP_TIERS:
+                raise ValueError('Invalid cursor')
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
+    # Without a parcel_id the caller must supply the core criteria up front
+    if not parcel_id and (not city or not property_type or target_value is None):
         return {
             'success': False,
             'error': 'Must provide parcel_id OR (city + property_type + target_value)',
             'example': 'parcel_id="12345" OR city="Gainesville" + property_type="SINGLE FAMILY" + target_value=200000'
         }
 
-    # Build comprehensive WHERE clause
-    where_clauses = ["UPPER(city) = UPPER(:city)", "property_type = :property_type", "market_value > 0"]
+    # Caller-supplied values win; anything left NULL is filled from the subject parcel in SQL
     sql_params = [
-        {'name': 'city', 'value': {'stringValue': city}},
-        {'name': 'property_type', 'value': {'stringValue': property_type}},
-        {'name': 'target_value', 'value': {'doubleValue': float(target_value)}},
-        {'name': 'limit', 'value': {'longValue': limit}}
+        _sql_param('parcel_id', canonical_parcel_id(parcel_id), 'stringValue'),
+        _sql_param('city', city, 'stringValue'),
+        _sql_param('property_type', property_type, 'stringValue'),
+        _sql_param('target_value', float(target_value) if target_value is not None else None, 'doubleValue'),
+        _sql_param('bedrooms', int(bedrooms) if bedrooms is not None else None, 'longValue'),
+        _sql_param('bathrooms', float(bathrooms) if bathrooms is not None else None, 'doubleValue'),
+        _sql_param('has_pool', bool(has_pool) if has_pool is not None else None, 'booleanValue'),
+        _sql_param('has_garage', bool(has_garage) if has_garage is not None else None, 'booleanValue'),
+        _sql_param('building_condition', building_condition or None, 'stringValue'),
+        _sql_param('neighborhood_desc', neighborhood_desc or None, 'stringValue'),
+        _sql_param('lat', float(latitude) if latitude and longitude else None, 'doubleValue'),
+        _sql_param('lon', float(longitude) if latitude and longitude else None, 'doubleValue'),
+        _sql_param('cursor_tier', int(cursor_values[0]) if cursor else None, 'longValue'),
+        _sql_param('cursor_0', cursor_values[1], 'stringValue'),
+        _sql_param('cursor_1', cursor_values[2], 'stringValue'),
+        {'name': 'fetch_limit', 'value': {'longValue': limit + 1}},
+        {'name': 'candidate_limit', 'value': {'longValue': max(limit + 1, COMP_ANN_CANDIDATES)}}
     ]
 
-    # Basic filters
-    if bedrooms:
-        where_clauses.append("bedrooms = :bedrooms")
-        sql_params.append({'name': 'bedrooms', 'value': {'longValue': int(bedrooms)}})
-
-    if bathrooms:
-        where_clauses.append("bathrooms >= :bathrooms - 0.5 AND bathrooms <= :bathrooms + 0.5")
-        sql_params.append({'name': 'bathrooms', 'value': {'doubleValue': float(bathrooms)}})
-
-    # Building feature matching components (for score calculation)
-    pool_match = f"CASE WHEN has_pool = {bool(has_pool)} THEN 10 ELSE 0 END" if has_pool is not None else "0"
-    garage_match = f"CASE WHEN has_garage = {bool(has_garage)} THEN 10 ELSE 0 END" if has_garage is not None else "0"
-    condition_match = f"CASE WHEN UPPER(building_condition) = UPPER('{building_condition}') THEN 15 ELSE 0 END" if building_condition else "0"
-    neighborhood_match = f"CASE WHEN UPPER(neighborhood_desc) = UPPER('{neighborhood_desc}') THEN 20 ELSE 0 END" if neighborhood_desc else "0"
-
-    # Distance component (if coordinates provided)
-    if latitude and longitude:
-        sql_params.extend([
-            {'name': 'lat', 'value': {'doubleValue': float(latitude)}},
-            {'name': 'lon', 'value': {'doubleValue': float(longitude)}}
-        ])
-        distance_calc = """
-            ST_Distance(
-                ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography,
-                ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
-            )
-        """
-        distance_score = f"CASE WHEN {distance_calc} < 1000 THEN 15 WHEN {distance_calc} < 3000 THEN 10 WHEN {distance_calc} < 5000 THEN 5 ELSE 0 END"
-        distance_select = f"{distance_calc} as distance_meters,"
-    else:
-        distance_score = "0"
-        distance_select = ""
-
-    # Strategy 1: Try recent QUALIFIED sales (12 months)
-    sql_sales = f"""
-        SELECT
-            parcel_id,
-            site_address as property_address,
-            last_sale_price as sale_price,
-            last_sale_date,
-            market_value as assessed_value,
-            bedrooms,
-            bathrooms,
-            has_pool,
-            has_garage,
-            building_condition,
-            neighborhood_desc,
-            lot_size_acres,
-            year_built,
-            sale_qualified,
-            {distance_select}
-            'RECENT_SALE' as comp_type,
-            -- Time-decay weight (more recent = higher score)
-            CASE
-                WHEN last_sale_date >= CURRENT_DATE - INTERVAL '6 months' THEN 100
-                WHEN last_sale_date >= CURRENT_DATE - INTERVAL '9 months' THEN 95
-                WHEN last_sale_date >= CURRENT_DATE - INTERVAL '12 months' THEN 90
-                ELSE 80
-            END as time_weight,
-            -- Feature matching score (0-100)
-            (
-                {pool_match} +
-                {garage_match} +
-                {condition_match} +
-                {neighborhood_match} +
-                {distance_score}
-            ) as feature_match,
-            -- Overall similarity score (price match + feature match + time decay)
-            (
-                (100 - (ABS(last_sale_price - :target_value) / :target_value * 50)) * 0.4 +
-                ({pool_match} + {garage_match} + {condition_match} + {neighborhood_match} + {distance_score}) * 0.4 +
-                CASE
-                    WHEN last_sale_date >= CURRENT_DATE - INTERVAL '6 months' THEN 100
-                    WHEN last_sale_date >= CURRENT_DATE - INTERVAL '9 months' THEN 95
-                    WHEN last_sale_date >= CURRENT_DATE - INTERVAL '12 months' THEN 90
-                    ELSE 80
-                END * 0.2 +
-                {f"ABS(bedrooms - {bedrooms}) * -5" if bedrooms else "0"} +
-                {f"ABS(bathrooms - {bathrooms}) * -10" if bathrooms else "0"}
-            ) as similarity_score
-        FROM bulk_property_records
-        WHERE {' AND '.join(where_clauses)}
-          AND last_sale_price > 0
-          AND last_sale_date >= CURRENT_DATE - INTERVAL '12 months'
-          AND last_sale_price BETWEEN :target_value * 0.7 AND :target_value * 1.3
-          AND (sale_qualified = 'Q' OR sale_qualified IS NULL)  -- Qualified sales only
-        ORDER BY similarity_score DESC, last_sale_date DESC
-        LIMIT :limit
-    """
-
     try:
-        response = execute_sql(sql_sales, sql_params)
-        comparables = format_rds_response(response)
-
-        # If we got good results, return them
-        if len(comparables) >= 3:
-            return {
-                'success': True,
-                'count': len(comparables),
-                'comparables': comparables,
-                'data_source': 'recent_sales_12m',
-                'note': 'Using qualified sale prices from last 12 months with feature matching',
-                'methodology': {
-                    'price_weight': '40%',
-                    'feature_match': '40% (pool, garage, condition, neighborhood, distance)',
-                    'time_decay': '20% (recent sales weighted higher)'
-                },
-                'criteria': {
-                    'city': city,
-                    'property_type': property_type,
-                    'target_value': target_value,
-                    'bedrooms': bedrooms,
-                    'bathrooms': bathrooms,
-                    'has_pool': has_pool,
-                    'has_garage': has_garage,
-                    'building_condition': building_condition,
-                    'neighborhood': neighborhood_desc
-                }
-            }
-
-        # Strategy 2: Expand to 24 months if needed
-        if len(comparables) < 3:
-            sql_sales_24m = sql_sales.replace("INTERVAL '12 months'", "INTERVAL '24 months'")
-            # Adjust time weights for 24mo
-            sql_sales_24m = sql_sales_24m.replace("WHEN last_sale_date >= CURRENT_DATE - INTERVAL '12 months' THEN 90", "WHEN last_sale_date >= CURRENT_DATE - INTERVAL '18 months' THEN 85")
-            sql_sales_24m = sql_sales_24m.replace("ELSE 80", "ELSE 75")
-
-            response = execute_sql(sql_sales_24m, sql_params)
-            comparables_24m = format_rds_response(response)
-
-            if len(comparables_24m) >= 3:
-                return {
-                    'success': True,
-                    'count': len(comparables_24m),
-                    'comparables': comparables_24m,
-                    'data_source': 'recent_sales_24m',
-                    'note': 'Using qualified sale prices from last 24 months (expanded search)',
-                    'methodology': {
-                        'price_weight': '40%',
-                        'feature_match': '40%',
-                        'time_decay': '20% (older sales, slightly lower weight)'
-                    },
-                    'criteria': {
-                        'city': city,
-                        'property_type': property_type,
-                        'target_value': target_value
-                    }
-                }
+        response = execute_sql(COMPARABLES_SQL, sql_params)
+        rows = format_rds_response(response)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'note': 'Comp search failed. Try adjusting criteria.'
+        }
 
-        # Strategy 3: Fallback to market values (last resort)
-        sql_market = f"""
-            SELECT
-                parcel_id,
-                site_address as property_address,
-                0 as sale_price,
-                NULL as last_sale_date,
-                market_value as assessed_value,
-                bedrooms,
-                bathrooms,
-                has_pool,
-                has_garage,
-                building_condition,
-                neighborhood_desc,
-                lot_size_acres,
-                year_built,
-                {distance_select}
-                'MARKET_VALUE' as comp_type,
-                100 as time_weight,  -- Not time-sensitive for market values
-                ({pool_match} + {garage_match} + {condition_match} + {neighborhood_match} + {distance_score}) as feature_match,
-                (
-                    (100 - (ABS(market_value - :target_value) / :target_value * 50)) * 0.6 +
-                    ({pool_match} + {garage_match} + {condition_match} + {neighborhood_match} + {distance_score}) * 0.4
-                ) as similarity_score
-            FROM bulk_property_records
-            WHERE {' AND '.join(where_clauses)}
-              AND market_value BETWEEN :target_value * 0.7 AND :target_value * 1.3
-            ORDER BY similarity_score DESC
-            LIMIT :limit
-        """
+    # Every row carries the resolved criteria; comp columns are NULL when nothing matched
+    criteria = {
+        key[len('criteria_'):]: value
+        for key, value in (rows[0] if rows else {}).items()
+        if key.startswith('criteria_')
+    }
+    subject_found = criteria.pop('subject_found', False)
+    vectors_ready = criteria.pop('vectors_ready', False)
 
-        response = execute_sql(sql_market, sql_params)
-        comparables_market = format_rds_response(response)
+    if parcel_id and not subject_found:
+        return {
+            'success': False,
+            'error': f'Property not found: {parcel_id}',
+            'note': 'Check parcel_id or provide property details manually'
+        }
 
+    if not criteria.get('city') or not criteria.get('property_type') or criteria.get('target_value') is None:
         return {
-            'success': True,
-            'count': len(comparables_market),
-            'comparables': comparables_market,
-            'data_source': 'market_values',
-            'note': 'Using assessed market values (insufficient recent sales data). These are directional only, not appraisal-grade.',
-            'warning': 'For professional appraisals, actual sale prices required',
-            'methodology': {
-                'price_weight': '60%',
-                'feature_match': '40%'
-            },
-            'criteria': {
-                'city': city,
-                'property_type': property_type,
-                'target_value': target_value
-            }
+            'success': False,
+            'error': 'Must provide parcel_id OR (city + property_type + target_value)',
+            'example': 'parcel_id="12345" OR city="Gainesville" + property_type="SINGLE FAMILY" + target_value=200000'
         }
 
-    except Exception as e:
+    if not vectors_ready:
         return {
             'success': False,
-            'error': str(e),
-            'note': 'Comp search failed. Try adjusting criteria.'
+            'error': f"No comp feature vectors for {criteria.get('city')}",
+            'note': 'Feature vectors are built after each property appraiser sync (refresh_property_feature_vectors)'
         }
+
+    tiers = {tier: [] for tier in COMP_TIERS}
+    tier_keys = {tier: [] for tier in COMP_TIERS}
+    for row in rows:
+        tier = row.pop('tier', None)
+        if tier is None:
+            continue
+        tier_keys[tier].append(_pop_cursor_keys(row, 2))
+        tiers[tier].append({key: value for key, value in row.items() if not key.startswith('criteria_')})
+
+    # Best tier with enough comps (market values are the last resort); a cursor pins its tier
+    if cursor:
+        chosen = int(cursor_values[0])
+    else:
+        chosen = next((tier for tier in (1, 2) if len(tiers[tier]) >= MIN_COMPS), 3)
+    comparables = tiers[chosen]
+
+    next_cursor = None
+    if len(comparables) > limit:
+        comparables = comparables[:limit]
+        next_cursor = _encode_cursor('find_comparable_properties', [chosen] + tier_keys[chosen][limit - 1])
+
+    return {
+        'success': True,
+        'count': len(comparables),
+        'comparables': comparables,
+        **COMP_TIERS[chosen],
+        'tier_counts': {COMP_TIERS[tier]['data_source']: min(len(tiers[tier]), limit) for tier in COMP_TIERS},
+        'next_cursor': next_cursor,
+        'criteria': criteria
+    }
+
+
 def get_property_details(params: Dict) -> Dict:
     """
     Get COMPLETE property details including ALL database fields.
@@ -2051,8 +3162,16 @@ def get_property_details(params: Dict) -> Dict:
     - parcel_id: str (optional)
     - property_id: str (optional)
     - address: str (optional) - Partial match on site_address
-
-    Returns: Complete property record with all fields
+    - profile: str (default: "full") - returned fields:
+        "summary"   identity, size, value, last sale, location, sales_count (~23 fields)
+        "valuation" values, exemptions, recent_sales (3 newest), latest_trim_notice
+        "physical"  building characteristics, improvements, building_details
+        "history"   sales_history, permit_history, trim_notice (+ counts)
+        "full"      every stored column, including raw_data
+    - fields: list[str] (optional) - extra fields to return (only these when no profile is given)
+
+    Returns: Property record with the projected fields, and projection:
+    {profile, field_count, payload_bytes, query_ms}
     """
     parcel_id = params.get('parcel_id')
     property_id = params.get('property_id')
@@ -2064,14 +3183,21 @@ def get_property_details(params: Dict) -> Dict:
             'error': 'Must provide parcel_id, property_id, or address'
         }
 
+    try:
+        profile, field_names = _resolve_projection(
+            DETAIL_FIELDS, DETAIL_PROFILES, params.get('profile'), params.get('fields'), required=('parcel_id',)
+        )
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+
     # Build WHERE clause
     where_clauses = []
     sql_params = []
 
     if parcel_id:
-        # Trim whitespace for robust matching (fixes 70% failure rate issue)
-        where_clauses.append("TRIM(parcel_id) = TRIM(:parcel_id)")
-        sql_params.append({'name': 'parcel_id', 'value': {'stringValue': str(parcel_id).strip()}})
+        # Stored parcel IDs are canonical (migration 017): indexed equality on the canonical input
+        where_clauses.append("parcel_id = :parcel_id")
+        sql_params.append(_sql_param('parcel_id', canonical_parcel_id(parcel_id), 'stringValue'))
 
     if property_id:
         where_clauses.append("property_id::text = :property_id")
@@ -2083,73 +3209,19 @@ def get_property_details(params: Dict) -> Dict:
 
     where_clause = " WHERE " + " AND ".join(where_clauses)
 
-    # Return ALL fields (80+ columns)
+    # Only the projected columns / JSONB extracts are read and serialized
     sql = f"""
-        SELECT
-            -- IDs
-            parcel_id, property_id, market_id, snapshot_id,
-
-            -- Basic info
-            site_address, city, owner_name, mailing_address,
-            property_type, use_code, land_use_desc, land_zoning_desc,
-
-            -- Physical characteristics
-            year_built, effective_year_built, square_feet, bedrooms, bathrooms, stories,
-            lot_size_acres, land_sqft, land_type,
-
-            -- Building details
-            has_garage, has_porch, has_pool, has_fence, has_shed,
-            roof_type, wall_type, exterior_type, heat_type, ac_type,
-            building_quality, building_condition,
-            improvement_type, improvement_desc,
-            total_improvement_sqft, total_improvement_count, improvement_types_list,
-            oldest_improvement_year, newest_improvement_year,
-
-            -- Financial
-            assessed_value, market_value, taxable_value,
-            land_value, improvement_value,
-            last_sale_price, last_sale_date,
-            sale_qualified, sale_type_vac_imp, sale_book, sale_page,
-
-            -- Tax/Exemptions
-            exemptions, total_exemption_amount, exemption_types_list, exemption_count,
-            most_recent_exemption_year,
-
-            -- Location
-            latitude, longitude,
-            neighborhood_code, neighborhood_desc,
-            subdivision_code, subdivision_desc,
-            section, township, range_value,
-            legal_description,
-
-            -- Owner details
-            owner_city, owner_state, owner_zip,
-
-            -- Permit count (summary)
-            total_permits,
-
-            -- Valuation
-            valuation_year,
-
-            -- JSONB fields with historical data
-            sales_history,
-            building_details,
-            permit_history,
-            trim_notice,
-            raw_data,
-
-            -- Metadata
-            qpublic_enriched_at, qpublic_enrichment_status,
-            created_at, updated_at
-
-        FROM bulk_property_records
+        SELECT {_projection_columns(DETAIL_FIELDS, field_names)}
+        FROM current_bulk_properties
         {where_clause}
         LIMIT 1
     """
 
     try:
+        query_start = time.perf_counter()
         response = execute_sql(sql, sql_params)
         properties = format_rds_response(response)
+        query_ms = (time.perf_counter() - query_start) * 1000
 
         if not properties:
             return {
@@ -2158,30 +3230,24 @@ def get_property_details(params: Dict) -> Dict:
                 'note': 'No property matches the provided criteria'
             }
 
-        property_data = properties[0]
+        # JSONB fields arrive as JSON strings
+        property_data = _decode_json_columns(properties, DETAIL_JSON_FIELDS)[0]
 
-        # Parse JSONB fields for better readability
-        jsonb_fields = ['sales_history', 'building_details', 'permit_history', 'trim_notice', 'raw_data', 'exemptions']
-        for field in jsonb_fields:
-            if field in property_data and property_data[field]:
-                try:
-                    import json
-                    if isinstance(property_data[field], str):
-                        property_data[field] = json.loads(property_data[field])
-                except:
-                    pass  # Keep as string if parse fails
+        projection = _projection_stats(profile, field_names, properties, query_ms)
+        print("[get_property_details] Projection", projection)
 
         return {
             'success': True,
             'property': property_data,
+            'projection': projection,
             'data_quality': {
                 'total_fields': len(property_data),
                 'populated_fields': sum(1 for v in property_data.values() if v is not None),
-                'has_sales_history': bool(property_data.get('sales_history')),
+                'has_sales_history': bool(property_data.get('sales_history') or property_data.get('sales_count')),
                 'has_building_details': bool(property_data.get('building_details')),
                 'qpublic_enriched': bool(property_data.get('qpublic_enriched_at'))
             },
-            'note': 'Complete property record with all 80+ database fields'
+            'note': f'Property record ({profile} profile, {len(field_names)} fields)'
         }
 
     except Exception as e:
@@ -2195,19 +3261,118 @@ def get_property_details(params: Dict) -> Dict:
 # LAMBDA HANDLER
 # =============================================================================
 
+TOOL_FUNCTIONS = {
+    'search_properties': search_properties,
+    'find_entities': find_entities,
+    'analyze_market_trends': analyze_market_trends,
+    'calculate_absorption_rate': calculate_absorption_rate,
+    'cluster_properties': cluster_properties,
+    'find_assemblage_opportunities': find_assemblage_opportunities,
+    'analyze_location_intelligence': analyze_location_intelligence,
+    'check_permit_history': check_permit_history,
+    'find_comparable_properties': find_comparable_properties,
+    'get_property_details': get_property_details,  # Profile-projected property data (up to 80+ fields)
+}
+
+
+def _run_batch_item(index: int, item: Any) -> Dict:
+    """Run one entry of a batch invocation; errors are captured per item, never raised."""
+    start = time.perf_counter()
+    tool_name = item.get('tool') if isinstance(item, dict) else None
+    entry = {'index': index, 'tool': tool_name}
+
+    try:
+        if not tool_name:
+            raise ValueError('Missing tool name')
+        if tool_name not in TOOL_FUNCTIONS:
+            raise ValueError(f'Unknown tool: {tool_name}')
+
+        result = TOOL_FUNCTIONS[tool_name](item.get('parameters') or {})
+        entry['result'] = result
+        # Tools report their own failures as {'success': False, 'error': ...} rather than raising
+        if isinstance(result, dict):
+            entry['success'] = bool(result.get('success', True))
+            if result.get('error'):
+                entry['error'] = result['error']
+        else:
+            entry['success'] = True
+    except Exception as e:
+        print(f"Batch item {index} ({tool_name}) failed: {str(e)}")
+        entry['success'] = False
+        entry['error'] = str(e)
+
+    entry['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return entry
+
+
+def run_batch(items: List[Dict]) -> Dict:
+    """
+    Run several tools in one invocation.
+
+    Items execute concurrently on a bounded thread pool that shares the module's Data API
+    client; results come back in request order with per-item success/error and timing.
+    """
+    start = time.perf_counter()
+    workers = max(1, min(MAX_BATCH_WORKERS, len(items)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_run_batch_item, range(len(items)), items))
+
+    return {
+        'success': all(entry['success'] for entry in results),
+        'count': len(results),
+        'failed': sum(1 for entry in results if not entry['success']),
+        'workers': workers,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+        'results': results
+    }
+
+
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
     Lambda handler for intelligence tools.
 
-    Event format:
+    Event format (single tool):
     {
         "tool": "search_properties",
         "parameters": {...}
     }
+
+    Event format (batch - one invocation, items run concurrently, results in order):
+    {
+        "tools": [
+            {"tool": "search_properties", "parameters": {...}},
+            {"tool": "find_entities", "parameters": {...}}
+        ]
+    }
+    Batch body: {"success", "count", "failed", "workers", "duration_ms",
+                 "results": [{"index", "tool", "success", "result" | "error", "duration_ms"}]}
     """
     try:
         print(f"Intelligence function invoked: {json.dumps(event)}")
 
+        if 'tools' in event:
+            items = event.get('tools')
+            if not isinstance(items, list) or not items:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'tools must be a non-empty list of {tool, parameters}'})
+                }
+            if len(items) > MAX_BATCH_SIZE:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': f'Too many tools in batch: {len(items)} (max {MAX_BATCH_SIZE})'})
+                }
+
+            result = run_batch(items)
+
+            print(f"Batch executed: {result['count']} tools, {result['failed']} failed, {result['duration_ms']} ms")
+
+            return {
+                'statusCode': 200,
+                'body': json.dumps(result, default=str)
+            }
+
         tool_name = event.get('tool')
         parameters = event.get('parameters', {})
 
@@ -2217,27 +3382,14 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
                 'body': json.dumps({'error': 'Missing tool name'})
             }
 
-        # Route to appropriate tool function
-        tool_functions = {
-            'search_properties': search_properties,
-            'find_entities': find_entities,
-            'analyze_market_trends': analyze_market_trends,
-            'cluster_properties': cluster_properties,
-            'find_assemblage_opportunities': find_assemblage_opportunities,
-            'analyze_location_intelligence': analyze_location_intelligence,
-            'check_permit_history': check_permit_history,
-            'find_comparable_properties': find_comparable_properties,
-            'get_property_details': get_property_details,  # NEW: Returns ALL property data (80+ fields)
-        }
-
-        if tool_name not in tool_functions:
+        if tool_name not in TOOL_FUNCTIONS:
             return {
                 'statusCode': 400,
                 'body': json.dumps({'error': f'Unknown tool: {tool_name}'})
             }
 
         # Execute tool
-        result = tool_functions[tool_name](parameters)
+        result = TOOL_FUNCTIONS[tool_name](parameters)
 
         print(f"Tool executed successfully: {tool_name}")
 
@@ -6,15 +6,24 @@ Handles 1 tool:
 
 Uses pgvector DIRECTLY with BAAI/bge-large-en-v1.5 embeddings (1024-dim).
 Embeddings stored in Aurora: ordinance_embeddings table.
+
+Query embeddings are cached in two levels (in-container LRU, then the
+query_embeddings_cache table) so repeated questions skip Bedrock.
 """
 
+import hashlib
 import json
 import os
+import random
+import re
 import time
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import boto3
 from botocore.exceptions import ClientError
 
+from data_api_decoder import JSON_RECORDS_FORMAT, decode_response
+
 # Initialize AWS clients
 bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
 rds_data = boto3.client('rds-data', region_name='us-east-1')
@@ -31,6 +40,108 @@ EMBEDDING_DIMENSIONS = 1024
 # Simple in-memory cache to detect loops (Lambda container reuse)
 query_history = {}
 
+# Query embedding cache: level 1 is an LRU in the container, level 2 the
+# query_embeddings_cache table (migration 022) shared by all containers.
+# A persistent hit only writes the row (last_used_at, hit_count) when it was last touched
+# over an hour ago; against a 90-day TTL that is precise enough. Rows unused for
+# QUERY_EMBEDDING_CACHE_TTL_DAYS are evicted by a sample of the writes
+# (QUERY_EMBEDDING_CACHE_EVICT_PROBABILITY), not by every miss.
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get('QUERY_EMBEDDING_CACHE_SIZE', '256'))
+QUERY_EMBEDDING_CACHE_TTL_DAYS = int(os.environ.get('QUERY_EMBEDDING_CACHE_TTL_DAYS', '90'))
+QUERY_EMBEDDING_CACHE_EVICT_PROBABILITY = float(os.environ.get('QUERY_EMBEDDING_CACHE_EVICT_PROBABILITY', '0.05'))
+embedding_cache = OrderedDict()
+embedding_cache_stats = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0}
+
+# Nearest-neighbour search. The query vector is one bound parameter, cast once in the CTE
+# and referenced from both the projection and the ORDER BY, so the statement text is the
+# same for every request and pgvector parses the vector a single time. The CTE is inlined
+# by the planner, so the ORDER BY still drives the HNSW index. {where} is empty or
+# jurisdiction_filter().
+ORDINANCE_SEARCH_SQL = """
+    WITH query_vector AS (
+        SELECT CAST(:query_embedding AS vector) AS embedding
+    )
+    SELECT
+        o.chunk_text as content,
+        o.city,
+        o.ordinance_file,
+        o.chunk_number,
+        1 - (o.embedding <=> q.embedding) as similarity_score
+    FROM ordinance_embeddings o
+    CROSS JOIN query_vector q
+    {where}
+    ORDER BY o.embedding <=> q.embedding
+    LIMIT :max_results
+"""
+
+# Hybrid search (migration 024): the top :candidates chunks of the vector search and of
+# the full-text search on chunk_tsv, fused with reciprocal rank fusion in one statement.
+# Lexical terms are ORed (ts_rank_cd favours chunks matching more of them), so exact
+# tokens like "RSF-1" or "30-4.21" surface even when the embedding misses them. The
+# query vector CTE is NOT MATERIALIZED: it is referenced more than once, and a
+# materialized CTE would keep the ANN ORDER BY off the HNSW index.
+SEARCH_MODES = ('vector', 'hybrid')
+HYBRID_CANDIDATES = 40      # per retrieval; hnsw.ef_search default
+RRF_K = 60
+
+ORDINANCE_HYBRID_SEARCH_SQL = """
+    WITH query_vector AS NOT MATERIALIZED (
+        SELECT CAST(:query_embedding AS vector) AS embedding
+    ),
+    query_terms AS (
+        SELECT string_agg(quote_literal(lexeme), ' | ')::tsquery AS tsq
+        FROM unnest(tsvector_to_array(to_tsvector('english', :query_text))) AS lexeme
+    ),
+    ann AS (
+        SELECT id, distance, ROW_NUMBER() OVER (ORDER BY distance) AS ann_rank
+        FROM (
+            SELECT o.id, o.embedding <=> q.embedding AS distance
+            FROM ordinance_embeddings o
+            CROSS JOIN query_vector q
+            {where}
+            ORDER BY o.embedding <=> q.embedding
+            LIMIT :candidates
+        ) nearest
+    ),
+    lexical AS (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC, id) AS lexical_rank
+        FROM (
+            SELECT o.id, ts_rank_cd(o.chunk_tsv, t.tsq) AS rank
+            FROM ordinance_embeddings o
+            CROSS JOIN query_terms t
+            WHERE o.chunk_tsv @@ t.tsq
+            {and_where}
+            ORDER BY rank DESC
+            LIMIT :candidates
+        ) matches
+    ),
+    fused AS (
+        SELECT
+            COALESCE(a.id, l.id) AS id,
+            a.distance,
+            a.ann_rank,
+            l.lexical_rank,
+            (COALESCE(1.0 / (:rrf_k + a.ann_rank), 0) + COALESCE(1.0 / (:rrf_k + l.lexical_rank), 0))::float8 AS rrf_score
+        FROM ann a
+        FULL OUTER JOIN lexical l ON l.id = a.id
+        ORDER BY rrf_score DESC
+        LIMIT :max_results
+    )
+    SELECT
+        o.chunk_text as content,
+        o.city,
+        o.ordinance_file,
+        o.chunk_number,
+        1 - COALESCE(f.distance, o.embedding <=> q.embedding) as similarity_score,
+        f.rrf_score,
+        f.ann_rank,
+        f.lexical_rank
+    FROM fused f
+    JOIN ordinance_embeddings o ON o.id = f.id
+    CROSS JOIN query_vector q
+    ORDER BY f.rrf_score DESC
+"""
+
 
 def generate_embedding(text: str) -> List[float]:
     """
@@ -76,6 +187,185 @@ def generate_embedding(text: str) -> List[float]:
         raise
 
 
+# Ordinance jurisdictions (migration 023). Names resolve through the SQL
+# resolve_ordinance_jurisdiction() (the rule OrdinanceRAG uses too); results, misses
+# included, are cached per container and dropped with the registry every
+# JURISDICTION_CACHE_TTL_SECONDS, so newly loaded cities show up without a reload per miss.
+JURISDICTION_CACHE_TTL_SECONDS = int(os.environ.get('JURISDICTION_CACHE_TTL_SECONDS', '300'))
+ordinance_jurisdictions = {}
+resolved_jurisdictions = {}
+jurisdiction_cache_state = {'loaded_at': None}
+JURISDICTION_ID_PATTERN = re.compile(r'^[a-z0-9_]+$')
+
+
+def load_jurisdictions() -> Dict[str, str]:
+    """Refresh the jurisdiction registry (jurisdiction_id -> city) and drop resolved names."""
+    response = execute_sql("""
+        SELECT jurisdiction_id, city
+        FROM ordinance_jurisdictions
+        ORDER BY city
+    """)
+    ordinance_jurisdictions.clear()
+    resolved_jurisdictions.clear()
+    for row in format_rds_response(response):
+        if JURISDICTION_ID_PATTERN.match(row['jurisdiction_id']):
+            ordinance_jurisdictions[row['jurisdiction_id']] = row['city']
+    jurisdiction_cache_state['loaded_at'] = time.monotonic()
+    print(f"Loaded {len(ordinance_jurisdictions)} ordinance jurisdictions")
+    return ordinance_jurisdictions
+
+
+def resolve_jurisdiction(name: str) -> Optional[str]:
+    """
+    Canonical jurisdiction_id for a user-supplied city/market name, or None.
+
+    'Gainesville', 'City of Gainesville', 'gainesville_fl' -> 'gainesville_fl';
+    'Alachua (city)' -> 'alachua_fl'; 'Alachua County' -> 'alachua_county_fl'.
+    """
+    loaded_at = jurisdiction_cache_state['loaded_at']
+    if loaded_at is None or time.monotonic() - loaded_at > JURISDICTION_CACHE_TTL_SECONDS:
+        load_jurisdictions()
+
+    key = ' '.join(name.split()).lower()
+    if key not in resolved_jurisdictions:
+        response = execute_sql(
+            "SELECT resolve_ordinance_jurisdiction(:name) as jurisdiction_id",
+            [{'name': 'name', 'value': {'stringValue': name}}]
+        )
+        rows = format_rds_response(response)
+        jurisdiction_id = rows[0].get('jurisdiction_id') if rows else None
+        if jurisdiction_id and not JURISDICTION_ID_PATTERN.match(jurisdiction_id):
+            jurisdiction_id = None
+        resolved_jurisdictions[key] = jurisdiction_id
+
+    return resolved_jurisdictions[key]
+
+
+def jurisdiction_filter(jurisdiction_id: str, keyword: str = 'WHERE') -> str:
+    """
+    WHERE (or AND) clause for one jurisdiction.
+
+    The id is a literal, not a parameter, so the planner can match it to the partial
+    HNSW index of that jurisdiction. Only registry ids (checked against
+    JURISDICTION_ID_PATTERN) reach this point.
+    """
+    if not JURISDICTION_ID_PATTERN.match(jurisdiction_id):
+        raise ValueError(f"Invalid jurisdiction id: {jurisdiction_id}")
+    return f"{keyword} o.jurisdiction_id = '{jurisdiction_id}'"
+
+
+def vector_literal(embedding: List[float]) -> str:
+    """pgvector text form of an embedding, for binding as a parameter."""
+    return '[' + ','.join(map(str, embedding)) + ']'
+
+
+def normalize_query(text: str) -> str:
+    """Cache form of a query: lowercase, whitespace collapsed, trailing punctuation dropped."""
+    return re.sub(r'\s+', ' ', text).strip().lower().rstrip('?.!').strip()
+
+
+def embedding_cache_key(text: str) -> str:
+    """Cache key for a query: normalized text + embedding model and dimensions."""
+    key = f"{EMBEDDING_MODEL_ID}:{EMBEDDING_DIMENSIONS}:{normalize_query(text)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _load_cached_embedding(cache_key: str) -> Optional[List[float]]:
+    """Level-2 lookup; touches the row at most once an hour. None on a miss or when the table is unavailable."""
+    try:
+        response = execute_sql("""
+            WITH hit AS (
+                SELECT content_hash, embedding
+                FROM query_embeddings_cache
+                WHERE content_hash = :content_hash
+            ),
+            touched AS (
+                UPDATE query_embeddings_cache c
+                SET hit_count = c.hit_count + 1,
+                    last_used_at = NOW()
+                FROM hit
+                WHERE c.content_hash = hit.content_hash
+                  AND c.last_used_at < NOW() - INTERVAL '1 hour'
+            )
+            SELECT embedding::text as embedding
+            FROM hit
+        """, [{'name': 'content_hash', 'value': {'stringValue': cache_key}}])
+        rows = format_rds_response(response)
+    except Exception as e:
+        print(f"Embedding cache lookup failed: {str(e)}")
+        return None
+
+    if not rows or not rows[0].get('embedding'):
+        return None
+    return json.loads(rows[0]['embedding'])
+
+
+def _store_cached_embedding(cache_key: str, text: str, embedding: List[float]) -> None:
+    """Level-2 write (a sample of writes also evicts rows unused for the TTL); failures only cost the cache."""
+    evict = ""
+    if random.random() < QUERY_EMBEDDING_CACHE_EVICT_PROBABILITY:
+        evict = f"""
+            WITH evicted AS (
+                DELETE FROM query_embeddings_cache
+                WHERE last_used_at < NOW() - INTERVAL '{QUERY_EMBEDDING_CACHE_TTL_DAYS} days'
+            )"""
+    try:
+        execute_sql(f"""{evict}
+            INSERT INTO query_embeddings_cache (content_hash, embedding, model_version, content_preview)
+            VALUES (:content_hash, CAST(:embedding AS vector), :model_version, :content_preview)
+            ON CONFLICT (content_hash) DO UPDATE SET last_used_at = NOW()
+        """, [
+            {'name': 'content_hash', 'value': {'stringValue': cache_key}},
+            {'name': 'embedding', 'value': {'stringValue': vector_literal(embedding)}},
+            {'name': 'model_version', 'value': {'stringValue': EMBEDDING_MODEL_ID}},
+            {'name': 'content_preview', 'value': {'stringValue': normalize_query(text)[:200]}}
+        ])
+    except Exception as e:
+        print(f"Embedding cache write failed: {str(e)}")
+
+
+def get_query_embedding(text: str) -> Tuple[List[float], str]:
+    """
+    Embedding for a search query through the two cache levels.
+
+    Returns (embedding, level) with level 'memory', 'persistent' or 'miss' (Bedrock call).
+    """
+    cache_key = embedding_cache_key(text)
+
+    embedding = embedding_cache.get(cache_key)
+    if embedding is not None:
+        embedding_cache.move_to_end(cache_key)
+        embedding_cache_stats['memory_hits'] += 1
+        return embedding, 'memory'
+
+    level = 'persistent'
+    embedding = _load_cached_embedding(cache_key)
+    if embedding is not None:
+        embedding_cache_stats['persistent_hits'] += 1
+    else:
+        level = 'miss'
+        embedding = generate_embedding(text)
+        embedding_cache_stats['misses'] += 1
+        _store_cached_embedding(cache_key, text, embedding)
+
+    embedding_cache[cache_key] = embedding
+    while len(embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+        embedding_cache.popitem(last=False)
+
+    return embedding, level
+
+
+def embedding_cache_metadata(level: str) -> Dict[str, Any]:
+    """Cache level of this request plus the container's hit/miss counters."""
+    return {
+        'level': level,
+        'memory_hits': embedding_cache_stats['memory_hits'],
+        'persistent_hits': embedding_cache_stats['persistent_hits'],
+        'misses': embedding_cache_stats['misses'],
+        'memory_entries': len(embedding_cache)
+    }
+
+
 def execute_sql(sql: str, params: List[Dict] = None) -> Dict:
     """Execute SQL using RDS Data API."""
     try:
@@ -91,6 +381,8 @@ def execute_sql(sql: str, params: List[Dict] = None) -> Dict:
 
         # CRITICAL: Must include result metadata to get column names
         kwargs['includeResultMetadata'] = True
+        # Whole result set as one JSON string - decoded with a single json.loads
+        kwargs['formatRecordsAs'] = JSON_RECORDS_FORMAT
         response = rds_data.execute_statement(**kwargs)
         return response
 
@@ -100,41 +392,8 @@ def execute_sql(sql: str, params: List[Dict] = None) -> Dict:
 
 
 def format_rds_response(response: Dict) -> List[Dict]:
-    """Convert RDS Data API response to list of dicts."""
-    if 'records' not in response:
-        return []
-
-    records = response['records']
-    column_metadata = response.get('columnMetadata', [])
-
-    # Get column names
-    columns = [col.get('label', col.get('name', f'col_{i}'))
-               for i, col in enumerate(column_metadata)]
-
-    # Convert to list of dicts
-    results = []
-    for record in records:
-        row = {}
-        for i, field in enumerate(record):
-            col_name = columns[i] if i < len(columns) else f'col_{i}'
-
-            # Extract value from RDS Data API format
-            if 'stringValue' in field:
-                row[col_name] = field['stringValue']
-            elif 'longValue' in field:
-                row[col_name] = field['longValue']
-            elif 'doubleValue' in field:
-                row[col_name] = field['doubleValue']
-            elif 'booleanValue' in field:
-                row[col_name] = field['booleanValue']
-            elif 'isNull' in field:
-                row[col_name] = None
-            else:
-                row[col_name] = str(field)
-
-        results.append(row)
-
-    return results
+    """Convert RDS Data API response to list of dicts (shared columnar decoder)."""
+    return decode_response(response)
 
 
 def search_ordinances(params: Dict) -> Dict[str, Any]:
@@ -146,8 +405,11 @@ def search_ordinances(params: Dict) -> Dict[str, Any]:
 
     Parameters:
     - query: str (required) - Search query
-    - jurisdiction: str (optional) - Filter by city (e.g., "Gainesville")
+    - jurisdiction: str (optional) - Filter by city (e.g., "Gainesville", "Alachua County")
+    - market: str (optional) - Same filter as a market code (e.g., "gainesville_fl")
     - max_results: int (default: 5) - Maximum results to return
+    - mode: str (default: "vector") - "vector" (cosine similarity) or "hybrid" (cosine +
+      full-text, reciprocal rank fusion - for exact tokens like "RSF-1" or "30-4.21")
 
     Returns:
         {
@@ -159,22 +421,29 @@ def search_ordinances(params: Dict) -> Dict[str, Any]:
                     "ordinance_file": str,    # Source PDF filename
                     "chunk_number": int,      # Position in document
                     "similarity_score": float # 0-1 (higher = more relevant)
+                    # hybrid only: "rrf_score", "matched_by" (["vector", "lexical"])
                 }
             ],
             "count": int,
-            "method": "pgvector_cosine_similarity"
+            "jurisdiction_id": str | None,    # Canonical id the filter resolved to
+            "method": "pgvector_cosine_similarity" | "hybrid_rrf",
+            "embedding_cache": {"level": "memory" | "persistent" | "miss", <hit/miss counters>}
         }
     """
     query = params.get('query')
-    jurisdiction = params.get('jurisdiction')  # User-facing param name
+    jurisdiction = params.get('jurisdiction') or params.get('market')  # User-facing param names
     max_results = params.get('max_results', 5)
+    mode = params.get('mode') or 'vector'
 
     if not query:
         return {'success': False, 'error': 'query parameter is required'}
 
+    if mode not in SEARCH_MODES:
+        return {'success': False, 'error': f"Unknown mode: {mode}", 'expected': list(SEARCH_MODES)}
+
     # CRITICAL: Detect infinite loops - if same query called repeatedly, stop it
     current_time = time.time()
-    query_key = f"{query}:{jurisdiction}"
+    query_key = f"{query}:{jurisdiction}:{mode}"
 
     if query_key in query_history:
         last_time, count = query_history[query_key]
@@ -212,49 +481,41 @@ def search_ordinances(params: Dict) -> Dict[str, Any]:
         }
 
     try:
-        print(f"Searching ordinances (pgvector): query='{query}', jurisdiction={jurisdiction}, max_results={max_results}")
+        print(f"Searching ordinances ({mode}): query='{query}', jurisdiction={jurisdiction}, max_results={max_results}")
 
-        # Step 1: Generate embedding for query
-        query_embedding = generate_embedding(query)
+        # Step 1: Embedding for the query (LRU -> query_embeddings_cache -> Bedrock)
+        query_embedding, cache_level = get_query_embedding(query)
 
-        # Step 2: Build pgvector similarity search SQL
-        # Convert embedding list to PostgreSQL array format for vector type
-        embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+        # Step 2: pgvector similarity search, query vector bound as a parameter
+        sql_params = [
+            {'name': 'query_embedding', 'value': {'stringValue': vector_literal(query_embedding)}},
+            {'name': 'max_results', 'value': {'longValue': max_results}}
+        ]
 
+        jurisdiction_id = None
         if jurisdiction:
-            # Filter by city (case-insensitive)
-            sql = f"""
-                SELECT
-                    chunk_text as content,
-                    city,
-                    ordinance_file,
-                    chunk_number,
-                    1 - (embedding <=> '{embedding_str}'::vector) as similarity_score
-                FROM ordinance_embeddings
-                WHERE LOWER(city) LIKE LOWER(:city)
-                ORDER BY embedding <=> '{embedding_str}'::vector
-                LIMIT :max_results
-            """
-            sql_params = [
-                {'name': 'city', 'value': {'stringValue': f'%{jurisdiction}%'}},
-                {'name': 'max_results', 'value': {'longValue': max_results}}
-            ]
+            # Resolve to a canonical id up front: the search then runs on that
+            # jurisdiction's own HNSW index and returns max_results chunks from it
+            jurisdiction_id = resolve_jurisdiction(jurisdiction)
+            if not jurisdiction_id:
+                return {
+                    'success': False,
+                    'error': f"Unknown jurisdiction: {jurisdiction}",
+                    'available_jurisdictions': sorted(ordinance_jurisdictions.values())
+                }
+
+        where = jurisdiction_filter(jurisdiction_id) if jurisdiction_id else ''
+        if mode == 'hybrid':
+            # Vector + full-text candidates fused in the same round trip
+            and_where = jurisdiction_filter(jurisdiction_id, 'AND') if jurisdiction_id else ''
+            sql = ORDINANCE_HYBRID_SEARCH_SQL.format(where=where, and_where=and_where)
+            sql_params.extend([
+                {'name': 'query_text', 'value': {'stringValue': query}},
+                {'name': 'candidates', 'value': {'longValue': max(HYBRID_CANDIDATES, max_results)}},
+                {'name': 'rrf_k', 'value': {'longValue': RRF_K}}
+            ])
         else:
-            # Search all cities
-            sql = f"""
-                SELECT
-                    chunk_text as content,
-                    city,
-                    ordinance_file,
-                    chunk_number,
-                    1 - (embedding <=> '{embedding_str}'::vector) as similarity_score
-                FROM ordinance_embeddings
-                ORDER BY embedding <=> '{embedding_str}'::vector
-                LIMIT :max_results
-            """
-            sql_params = [
-                {'name': 'max_results', 'value': {'longValue': max_results}}
-            ]
+            sql = ORDINANCE_SEARCH_SQL.format(where=where)
 
         # Step 3: Execute query
         print(f"Executing pgvector search...")
@@ -273,13 +534,17 @@ def search_ordinances(params: Dict) -> Dict[str, Any]:
             if not content or similarity == 0.0:
                 continue
 
-            formatted_results.append({
+            result = {
                 'content': content,
                 'city': r.get('city', ''),
                 'ordinance_file': r.get('ordinance_file', ''),
                 'chunk_number': r.get('chunk_number', 0),
                 'similarity_score': round(similarity, 3)
-            })
+            }
+            if mode == 'hybrid':
+                result['rrf_score'] = round(float(r.get('rrf_score') or 0.0), 5)
+                result['matched_by'] = [name for name, rank in (('vector', r.get('ann_rank')), ('lexical', r.get('lexical_rank'))) if rank]
+            formatted_results.append(result)
 
         print(f"Filtered to {len(formatted_results)} valid results (removed empty/zero-similarity)")
 
@@ -287,10 +552,12 @@ def search_ordinances(params: Dict) -> Dict[str, Any]:
             'success': True,
             'query': query,
             'jurisdiction': jurisdiction,
+            'jurisdiction_id': jurisdiction_id,
             'count': len(formatted_results),
             'results': formatted_results,
-            'method': 'pgvector_cosine_similarity',
-            'index': 'HNSW',
+            'method': 'hybrid_rrf' if mode == 'hybrid' else 'pgvector_cosine_similarity',
+            'index': f'HNSW ({jurisdiction_id})' if jurisdiction_id else 'HNSW',
+            'embedding_cache': embedding_cache_metadata(cache_level),
             'note': 'Empty content and zero-similarity results filtered out' if len(results) != len(formatted_results) else None
         }
 
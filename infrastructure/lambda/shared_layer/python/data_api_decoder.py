@@ -0,0 +1,197 @@
+"""
+RDS Data API Result Decoder
+
+Shared by the Intelligence and RAG Lambdas (packaged in the shared layer).
+
+Two decode paths:
+1. formattedRecords (formatRecordsAs='JSON'): one json.loads for the whole result set,
+   then typed coercion only for the columns that need it (numeric/date).
+2. records (classic typed cells): decoded column-at-a-time. Each column gets its
+   value key (stringValue/longValue/...) compiled once from columnMetadata and is
+   pulled out in one pass over the column, instead of walking a chain of
+   `if 'stringValue' in value` checks per cell.
+
+Typed handling:
+- int2/int4/int8/serial       -> int   (longValue)
+- float4/float8               -> float (doubleValue)
+- numeric/decimal/money       -> float (Data API sends these as stringValue)
+- bool                        -> bool  (booleanValue)
+- date                        -> datetime.date
+- arrays (ARRAY_AGG, _text..) -> list
+- everything else             -> str   (stringValue)
+"""
+
+import json
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# Pass to execute_statement(formatRecordsAs=...) to get a single JSON payload back
+JSON_RECORDS_FORMAT = 'JSON'
+
+INTEGER_TYPES = {'int2', 'int4', 'int8', 'serial', 'serial4', 'serial8', 'bigserial', 'oid'}
+FLOAT_TYPES = {'float4', 'float8'}
+NUMERIC_TYPES = {'numeric', 'decimal', 'money'}
+BOOLEAN_TYPES = {'bool', 'boolean'}
+DATE_TYPES = {'date'}
+
+STRING_VALUE = 'stringValue'
+LONG_VALUE = 'longValue'
+DOUBLE_VALUE = 'doubleValue'
+BOOLEAN_VALUE = 'booleanValue'
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Coerce a numeric/decimal/money value (string or number) to float; None if unparseable."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    # money is rendered with the locale's symbol and grouping ("$1,234.56", "-$5.00")
+    if isinstance(value, str):
+        try:
+            return float(value.replace('$', '').replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+
+def _to_date(value: Any) -> Any:
+    """Coerce an ISO date string to datetime.date (leave anything else untouched)."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return value
+
+
+def _floats(values: List) -> List:
+    return [_to_float(v) for v in values]
+
+
+def _dates(values: List) -> List:
+    try:
+        return [None if v is None else date.fromisoformat(v) for v in values]
+    except (TypeError, ValueError):
+        # Timestamps or odd formats in a date column - fall back to per-value coercion
+        return [_to_date(v) for v in values]
+
+
+def _decode_array(field: Dict) -> Optional[List]:
+    array_val = field.get('arrayValue')
+    if array_val is None:
+        return None
+    for key in ('stringValues', 'longValues', 'doubleValues', 'booleanValues'):
+        if key in array_val:
+            return array_val[key]
+    if 'arrayValues' in array_val:
+        return [_decode_array({'arrayValue': nested}) for nested in array_val['arrayValues']]
+    return []
+
+
+def _decode_any(field: Dict) -> Any:
+    """Fallback for columns whose type we don't recognise."""
+    if 'stringValue' in field:
+        return field['stringValue']
+    if 'longValue' in field:
+        return field['longValue']
+    if 'doubleValue' in field:
+        return field['doubleValue']
+    if 'booleanValue' in field:
+        return field['booleanValue']
+    if 'arrayValue' in field:
+        return _decode_array(field)
+    return None
+
+
+def _type_name(column: Dict) -> str:
+    return (column.get('typeName') or '').lower()
+
+
+def _column_name(column: Dict, index: int) -> str:
+    return column.get('label') or column.get('name') or f'col_{index}'
+
+
+# (value key or cell decoder function, optional whole-column converter)
+ColumnDecoder = Tuple[Union[str, Callable[[Dict], Any]], Optional[Callable[[List], List]]]
+
+
+def compile_column_decoders(column_metadata: List[Dict]) -> List[ColumnDecoder]:
+    """
+    Build one (extractor, column converter) pair per column from columnMetadata.
+
+    The extractor is either the typed-cell key holding the value (e.g. 'longValue') or,
+    for arrays/unknown types, a function over the cell. The optional converter is applied
+    to the whole column afterwards (numeric strings -> float, ISO strings -> date).
+    """
+    decoders = []
+    for column in column_metadata:
+        type_name = _type_name(column)
+        if type_name.startswith('_'):
+            decoders.append((_decode_array, None))
+        elif type_name in INTEGER_TYPES:
+            decoders.append((LONG_VALUE, None))
+        elif type_name in FLOAT_TYPES:
+            decoders.append((DOUBLE_VALUE, None))
+        elif type_name in NUMERIC_TYPES:
+            decoders.append((STRING_VALUE, _floats))
+        elif type_name in BOOLEAN_TYPES:
+            decoders.append((BOOLEAN_VALUE, None))
+        elif type_name in DATE_TYPES:
+            decoders.append((STRING_VALUE, _dates))
+        elif type_name:
+            decoders.append((STRING_VALUE, None))
+        else:
+            decoders.append((_decode_any, None))
+    return decoders
+
+
+def _json_coercers(column_metadata: List[Dict]) -> List[tuple]:
+    """Columns that still need typing after JSON decoding (numeric arrives as a string)."""
+    coercers = []
+    for i, column in enumerate(column_metadata):
+        type_name = _type_name(column)
+        if type_name in NUMERIC_TYPES:
+            coercers.append((_column_name(column, i), _to_float))
+        elif type_name in DATE_TYPES:
+            coercers.append((_column_name(column, i), _to_date))
+    return coercers
+
+
+def decode_response(response: Dict) -> List[Dict]:
+    """Convert an execute_statement response (JSON or typed records) to a list of dicts."""
+    column_metadata = response.get('columnMetadata') or []
+
+    formatted = response.get('formattedRecords')
+    if formatted:
+        rows = json.loads(formatted)
+        for name, coerce in _json_coercers(column_metadata):
+            for row in rows:
+                value = row.get(name)
+                if value is not None:
+                    row[name] = coerce(value)
+        return rows
+
+    records = response.get('records')
+    if not records:
+        return []
+
+    if column_metadata:
+        names = [_column_name(column, i) for i, column in enumerate(column_metadata)]
+        decoders = compile_column_decoders(column_metadata)
+    else:
+        # No metadata requested - positional names, generic decoding
+        names = [f'col_{i}' for i in range(len(records[0]))]
+        decoders = [(_decode_any, None)] * len(names)
+
+    columns = []
+    for index, (extract, convert) in enumerate(decoders):
+        if isinstance(extract, str):
+            values = [record[index].get(extract) for record in records]
+        else:
+            values = [extract(record[index]) for record in records]
+        columns.append(convert(values) if convert else values)
+
+    return [dict(zip(names, row)) for row in zip(*columns)]
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: RDS Data API result decoding (rows/sec)
+
+Compares the old per-cell `if 'stringValue' in value_dict` chain against the shared
+columnar decoder (infrastructure/lambda/shared_layer/python/data_api_decoder.py),
+for both typed records and formatRecordsAs='JSON' responses.
+
+The typed fixture is a search_properties response shape (37 columns, values anonymised);
+its records are repeated to the requested row count. The fixture has no formattedRecords,
+so unless --json-fixture points at a recorded formatRecordsAs='JSON' response the JSON
+variant is synthesised from the typed records, and its numbers are only indicative. When
+botocore is installed the end-to-end numbers also include boto3's parsing of the HTTP body.
+
+Usage:
+    python scripts/benchmark_data_api_decoder.py
+    python scripts/benchmark_data_api_decoder.py --rows 500 --repeat 20
+    python scripts/benchmark_data_api_decoder.py --json-fixture recorded_json_response.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / 'infrastructure' / 'lambda' / 'shared_layer' / 'python'))
+
+from data_api_decoder import decode_response  # noqa: E402
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'data_api_search_properties.json'
+
+
+def legacy_format_rds_response(response):
+    """The pre-decoder implementation from the intelligence Lambda (baseline)."""
+    if 'records' not in response or not response['records']:
+        return []
+
+    column_names = [col['name'] for col in response.get('columnMetadata', [])]
+    results = []
+
+    for record in response['records']:
+        row = {}
+        for i, col_name in enumerate(column_names):
+            if i < len(record):
+                value_dict = record[i]
+                if 'stringValue' in value_dict:
+                    row[col_name] = value_dict['stringValue']
+                elif 'longValue' in value_dict:
+                    row[col_name] = value_dict['longValue']
+                elif 'doubleValue' in value_dict:
+                    row[col_name] = value_dict['doubleValue']
+                elif 'booleanValue' in value_dict:
+                    row[col_name] = value_dict['booleanValue']
+                elif 'arrayValue' in value_dict:
+                    array_val = value_dict['arrayValue']
+                    if 'stringValues' in array_val:
+                        row[col_name] = array_val['stringValues']
+                    elif 'longValues' in array_val:
+                        row[col_name] = array_val['longValues']
+                    elif 'doubleValues' in array_val:
+                        row[col_name] = array_val['doubleValues']
+                    else:
+                        row[col_name] = []
+                elif 'isNull' in value_dict and value_dict['isNull']:
+                    row[col_name] = None
+                else:
+                    row[col_name] = None
+        results.append(row)
+
+    return results
+
+
+def load_fixture(rows: int, json_fixture: Path = None):
+    """
+    Build typed + JSON responses with `rows` records. The JSON response comes from
+    json_fixture (a recorded formatRecordsAs='JSON' response) when given, otherwise it is
+    synthesised from the typed records. Returns (typed, formatted, json_recorded).
+    """
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    recorded = fixture['records']
+    records = [recorded[i % len(recorded)] for i in range(rows)]
+    typed = {'columnMetadata': fixture['columnMetadata'], 'records': records}
+
+    if json_fixture:
+        with open(json_fixture, 'r', encoding='utf-8') as f:
+            recorded_json = json.load(f)
+        recorded_rows = json.loads(recorded_json['formattedRecords'])
+        json_rows = [recorded_rows[i % len(recorded_rows)] for i in range(rows)]
+        formatted = {'columnMetadata': recorded_json['columnMetadata'], 'formattedRecords': json.dumps(json_rows)}
+        return typed, formatted, True
+
+    # Synthesised: the same rows as one string (not a recorded response)
+    json_rows = legacy_format_rds_response(typed)
+    formatted = {'columnMetadata': fixture['columnMetadata'], 'formattedRecords': json.dumps(json_rows)}
+
+    return typed, formatted, False
+
+
+def make_wire_parser():
+    """
+    Return a function that parses a raw ExecuteStatement HTTP body the way boto3 does,
+    or None if botocore isn't installed. This is where typed records are expensive.
+    """
+    try:
+        import botocore.session
+        from botocore.parsers import create_parser
+    except ImportError:
+        return None
+
+    service_model = botocore.session.get_session().get_service_model('rds-data')
+    output_shape = service_model.operation_model('ExecuteStatement').output_shape
+    parser = create_parser(service_model.metadata['protocol'])
+
+    def parse(body: bytes):
+        return parser.parse({'status_code': 200, 'headers': {}, 'body': body}, output_shape)
+
+    return parse
+
+
+def bench(label, fn, rows, repeat, rounds=5):
+    """Best-of-`rounds` timing of `repeat` calls to fn()."""
+    fn()  # warm up
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    rows_per_sec = rows / best
+    print(f"  {label:<46} {rows_per_sec:>12,.0f} rows/sec  ({best * 1000:.2f} ms/response)")
+    return rows_per_sec
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Data API result decoding')
+    parser.add_argument('--rows', type=int, default=500, help='Rows per response (default: 500)')
+    parser.add_argument('--repeat', type=int, default=50, help='Responses decoded per round (default: 50)')
+    parser.add_argument('--json-fixture', type=Path,
+                        help="Recorded execute_statement(formatRecordsAs='JSON') response to use for the JSON path")
+    args = parser.parse_args()
+
+    typed, formatted, json_recorded = load_fixture(args.rows, args.json_fixture)
+    columns = len(typed['columnMetadata'])
+
+    print("=" * 80)
+    print(f"DATA API DECODER BENCHMARK: {args.rows} rows x {columns} columns")
+    print("=" * 80)
+    if not json_recorded:
+        print("JSON path: synthesised from the typed fixture (pass --json-fixture for a recorded response)")
+
+    print("\nDecode only (already-parsed response dict):")
+    before = bench('legacy per-cell chain (records)',
+                   lambda: legacy_format_rds_response(typed), args.rows, args.repeat)
+    after_typed = bench('columnar decoder (records)',
+                        lambda: decode_response(typed), args.rows, args.repeat)
+    after_json = bench("columnar decoder (formatRecordsAs='JSON')",
+                       lambda: decode_response(formatted), args.rows, args.repeat)
+    print(f"  records path: {after_typed / before:.2f}x   JSON path: {after_json / before:.2f}x")
+
+    wire_parse = make_wire_parser()
+    if wire_parse is None:
+        print("\nbotocore not installed - skipping end-to-end (wire parse + decode) numbers")
+        return
+
+    typed_body = json.dumps(typed).encode()
+    json_body = json.dumps(formatted).encode()
+
+    print(f"\nEnd to end: botocore parse of the HTTP body + decode "
+          f"(body {len(typed_body) / 1024:.0f} KB typed, {len(json_body) / 1024:.0f} KB JSON):")
+    before = bench('before: typed records + legacy chain',
+                   lambda: legacy_format_rds_response(wire_parse(typed_body)), args.rows, args.repeat)
+    after_typed = bench('after: typed records + columnar decoder',
+                        lambda: decode_response(wire_parse(typed_body)), args.rows, args.repeat)
+    after_json = bench("after: formatRecordsAs='JSON' + decoder",
+                       lambda: decode_response(wire_parse(json_body)), args.rows, args.repeat)
+    print(f"  records path: {after_typed / before:.2f}x   JSON path: {after_json / before:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: payload size and response time per field projection profile
+
+Invokes the deployed intelligence Lambda with every profile of get_property_details and
+search_properties (see FIELD PROJECTIONS in infrastructure/lambda/intelligence/handler.py)
+and reports, per profile:
+  - fields returned
+  - payload bytes of the returned rows (as measured by the Lambda) and of the whole
+    response body the agent receives
+  - query_ms (Data API round trip inside the Lambda) and end-to-end invoke time
+
+Usage:
+    python scripts/benchmark_property_projections.py --parcel-id 06043-001-000 --city Gainesville
+    python scripts/benchmark_property_projections.py --parcel-id 06043-001-000 --limit 100 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+import boto3
+
+DETAIL_PROFILES = ['summary', 'valuation', 'physical', 'history', 'full']
+SEARCH_PROFILES = ['summary', 'valuation', 'physical', 'owner', 'location', 'full']
+
+
+def invoke(client, function_name: str, tool: str, parameters: dict):
+    """Invoke one tool; returns (parsed body, body size in bytes, end-to-end ms)."""
+    start = time.perf_counter()
+    response = client.invoke(
+        FunctionName=function_name,
+        InvocationType='RequestResponse',
+        Payload=json.dumps({'tool': tool, 'parameters': parameters})
+    )
+    result = json.loads(response['Payload'].read())
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    body = result.get('body') or '{}'
+    return json.loads(body), len(body.encode('utf-8')), elapsed_ms
+
+
+def bench_tool(client, function_name: str, tool: str, base_parameters: dict, profiles, repeat: int):
+    """Print one row per profile (median of `repeat` invocations)."""
+    print(f"\n{tool} ({json.dumps(base_parameters)})")
+    print(f"  {'profile':<10} {'fields':>6} {'rows KB':>9} {'body KB':>9} {'query ms':>9} {'invoke ms':>10}")
+
+    for profile in profiles:
+        samples = []
+        for _ in range(repeat):
+            data, body_bytes, elapsed_ms = invoke(client, function_name, tool, dict(base_parameters, profile=profile))
+            if not data.get('success'):
+                print(f"  {profile:<10} failed: {data.get('error')}")
+                break
+            samples.append((data['projection'], body_bytes, elapsed_ms))
+
+        if not samples:
+            continue
+
+        projection = samples[-1][0]
+        body_bytes = samples[-1][1]
+        query_ms = statistics.median(s[0]['query_ms'] for s in samples)
+        invoke_ms = statistics.median(s[2] for s in samples)
+
+        print(f"  {profile:<10} {projection['field_count']:>6} {projection['payload_bytes'] / 1024:>9.1f} "
+              f"{body_bytes / 1024:>9.1f} {query_ms:>9.1f} {invoke_ms:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Payload size / latency per projection profile')
+    parser.add_argument('--function', default=os.environ.get('INTELLIGENCE_FUNCTION_ARN'),
+                        help='Intelligence Lambda name or ARN (default: $INTELLIGENCE_FUNCTION_ARN)')
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--parcel-id', help='Parcel for get_property_details')
+    parser.add_argument('--city', default='Gainesville', help='City for search_properties (default: Gainesville)')
+    parser.add_argument('--limit', type=int, default=50, help='search_properties page size (default: 50)')
+    parser.add_argument('--repeat', type=int, default=3, help='Invocations per profile (default: 3)')
+    args = parser.parse_args()
+
+    if not args.function:
+        parser.error('--function or INTELLIGENCE_FUNCTION_ARN is required')
+
+    client = boto3.client('lambda', region_name=args.region)
+
+    print("=" * 80)
+    print("FIELD PROJECTION BENCHMARK")
+    print("=" * 80)
+
+    if args.parcel_id:
+        bench_tool(client, args.function, 'get_property_details', {'parcel_id': args.parcel_id},
+                   DETAIL_PROFILES, args.repeat)
+    else:
+        print("\n--parcel-id not given - skipping get_property_details")
+
+    bench_tool(client, args.function, 'search_properties', {'city': args.city, 'limit': args.limit},
+               SEARCH_PROFILES, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inlined vs bound query vectors in the ordinance search
+
+search_ordinances used to paste the 1024-float query vector into the SQL text twice, so
+every request was a unique ~40 KB statement that Postgres parsed and planned from scratch
+(and pgvector parsed the literal twice). It now binds the vector as one parameter,
+referenced through a CTE (ORDINANCE_SEARCH_SQL in infrastructure/lambda/rag/handler.py).
+
+Runs both forms through the RDS Data API, the way the Lambda does, and reports per form:
+  - statement text bytes and parameter bytes sent
+  - planning time (EXPLAIN SUMMARY, server side)
+  - EXPLAIN round trip minus planning (network + parse/analyze, incl. the vector input)
+  - search round trip
+  - fewest rows any search returned (filtered searches should always return max_results)
+  - the index the plan uses (a jurisdiction's own partial HNSW index when filtered)
+
+Query vectors are random unit vectors (a fresh one per repetition, like distinct user
+questions); planning and parsing do not depend on their content.
+
+Usage:
+    python scripts/benchmark_vector_binding.py --cluster-arn arn:... --secret-arn arn:...
+    python scripts/benchmark_vector_binding.py --cluster-arn arn:... --secret-arn arn:... --jurisdiction Gainesville --repeat 20
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import boto3
+
+LAMBDA_DIR = Path(__file__).parent.parent / 'infrastructure' / 'lambda'
+sys.path.insert(0, str(LAMBDA_DIR / 'shared_layer' / 'python'))
+sys.path.insert(0, str(LAMBDA_DIR / 'rag'))
+
+# The statement search_ordinances sent before the vector was bound (and before
+# jurisdiction ids, migration 023)
+INLINED_SEARCH_SQL = """
+    SELECT
+        chunk_text as content,
+        city,
+        ordinance_file,
+        chunk_number,
+        1 - (embedding <=> '{embedding}'::vector) as similarity_score
+    FROM ordinance_embeddings
+    {where}
+    ORDER BY embedding <=> '{embedding}'::vector
+    LIMIT :max_results
+"""
+
+
+def random_embedding(dimensions: int):
+    """Random unit vector."""
+    values = [random.gauss(0, 1) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in values))
+    return [v / norm for v in values]
+
+
+def build(handler, form: str, embedding, jurisdiction, max_results: int):
+    """(sql, Data API parameters) for one form of the search."""
+    params = [{'name': 'max_results', 'value': {'longValue': max_results}}]
+
+    if form == 'inlined':
+        where = ''
+        if jurisdiction:
+            where = 'WHERE LOWER(city) LIKE LOWER(:city)'
+            params.append({'name': 'city', 'value': {'stringValue': f'%{jurisdiction}%'}})
+        return INLINED_SEARCH_SQL.format(embedding=handler.vector_literal(embedding), where=where), params
+
+    where = handler.jurisdiction_filter(handler.resolve_jurisdiction(jurisdiction)) if jurisdiction else ''
+    params.append({'name': 'query_embedding', 'value': {'stringValue': handler.vector_literal(embedding)}})
+    return handler.ORDINANCE_SEARCH_SQL.format(where=where), params
+
+
+def plan_nodes(plan: dict):
+    """Node types of a JSON plan, depth first."""
+    yield plan.get('Node Type'), plan.get('Index Name')
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inlined vs bound query vector: statement size and parse/plan time')
+    parser.add_argument('--cluster-arn', default=os.environ.get('CLUSTER_ARN'))
+    parser.add_argument('--secret-arn', default=os.environ.get('SECRET_ARN'))
+    parser.add_argument('--database', default=os.environ.get('DATABASE_NAME', 'dominion_db'))
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--jurisdiction', help='City filter, as the agent passes it (default: none)')
+    parser.add_argument('--max-results', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=10, help='Searches per form (default: 10)')
+    args = parser.parse_args()
+
+    if not args.cluster_arn or not args.secret_arn:
+        parser.error('--cluster-arn and --secret-arn (or $CLUSTER_ARN / $SECRET_ARN) are required')
+
+    # The handler reads its connection settings at import
+    os.environ.update(CLUSTER_ARN=args.cluster_arn, SECRET_ARN=args.secret_arn, DATABASE_NAME=args.database)
+    import handler
+
+    if args.jurisdiction and not handler.resolve_jurisdiction(args.jurisdiction):
+        parser.error(f"unknown jurisdiction {args.jurisdiction!r} (known: {', '.join(handler.ordinance_jurisdictions)})")
+
+    client = boto3.client('rds-data', region_name=args.region)
+
+    def execute(sql, params):
+        start = time.perf_counter()
+        response = client.execute_statement(
+            resourceArn=args.cluster_arn,
+            secretArn=args.secret_arn,
+            database=args.database,
+            sql=sql,
+            parameters=params,
+            formatRecordsAs='JSON'
+        )
+        return json.loads(response.get('formattedRecords') or '[]'), (time.perf_counter() - start) * 1000
+
+    print(f"ordinance search, jurisdiction={args.jurisdiction}, max_results={args.max_results}, repeat={args.repeat}")
+    print(f"  {'form':<8} {'sql KB':>7} {'params KB':>10} {'plan ms':>8} {'parse+net ms':>13} "
+          f"{'search ms':>10} {'rows':>5}  index")
+
+    for form in ('inlined', 'bound'):
+        samples = []
+        index = None
+        for _ in range(args.repeat):
+            sql, params = build(handler, form, random_embedding(handler.EMBEDDING_DIMENSIONS),
+                                args.jurisdiction, args.max_results)
+
+            records, explain_ms = execute('EXPLAIN (SUMMARY, FORMAT JSON) ' + sql, params)
+            explain = records[0]['QUERY PLAN']
+            explain = (json.loads(explain) if isinstance(explain, str) else explain)[0]
+            planning_ms = explain['Planning Time']
+            index = next((name for node, name in plan_nodes(explain['Plan']) if name), None)
+
+            rows, search_ms = execute(sql, params)
+            samples.append((len(sql.encode('utf-8')), len(json.dumps(params).encode('utf-8')),
+                            planning_ms, explain_ms - planning_ms, search_ms, len(rows)))
+
+        sql_bytes, param_bytes = samples[-1][0], samples[-1][1]
+        print(f"  {form:<8} {sql_bytes / 1024:>7.1f} {param_bytes / 1024:>10.1f} "
+              f"{statistics.median(s[2] for s in samples):>8.2f} "
+              f"{statistics.median(s[3] for s in samples):>13.1f} "
+              f"{statistics.median(s[4] for s in samples):>10.1f} {min(s[5] for s in samples):>5}  "
+              f"{index or 'none (seq scan)'}")
+
+
+if __name__ == '__main__':
+    main()
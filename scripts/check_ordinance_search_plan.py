@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Plan check: OrdinanceRAG.search must be driven by an HNSW index
+
+EXPLAINs the search SQL (build_search_sql / build_hybrid_search_sql in
+src/services/ordinance_rag.py) against the database for every shape OrdinanceRAG.search
+can send - vector and hybrid mode, unfiltered and per jurisdiction, with and without a
+min_relevance threshold - and fails if any plan scans ordinance_embeddings sequentially
+or orders without an HNSW index. Run after migrations
+and after loading embeddings; exits 1 on a regression.
+
+Usage:
+    python scripts/check_ordinance_search_plan.py
+    python scripts/check_ordinance_search_plan.py --jurisdiction gainesville_fl --top-k 10
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.services.ordinance_rag import HYBRID_CANDIDATES, RRF_K, build_hybrid_search_sql, build_search_sql
+
+EMBEDDING_DIMENSIONS = 1024  # BAAI/bge-large-en-v1.5
+
+
+def random_embedding() -> str:
+    """Random unit vector in pgvector text form (plans do not depend on its content)"""
+    values = [random.gauss(0, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+    norm = math.sqrt(sum(v * v for v in values))
+    return '[' + ','.join(str(v / norm) for v in values) + ']'
+
+
+def plan_nodes(plan: dict):
+    """Every node of a JSON plan, depth first"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def check_plan(plan: dict) -> Tuple[List[str], List[str]]:
+    """(problems, HNSW indexes used) for one plan; no problems when it is index driven"""
+    nodes = list(plan_nodes(plan))
+    problems = [
+        f"{node['Node Type']} on {node['Relation Name']}"
+        for node in nodes
+        if node['Node Type'] in ('Seq Scan', 'Parallel Seq Scan') and node.get('Relation Name') == 'ordinance_embeddings'
+    ]
+
+    hnsw_indexes = [
+        node['Index Name'] for node in nodes
+        if node['Node Type'] == 'Index Scan' and node.get('Index Name', '').startswith('idx_ordinance_embedding_hnsw')
+    ]
+    if not hnsw_indexes:
+        problems.append('no HNSW index scan')
+
+    return problems, hnsw_indexes
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Assert OrdinanceRAG.search uses the HNSW indexes')
+    parser.add_argument('--state', default='FL')
+    parser.add_argument('--jurisdiction', action='append',
+                        help='Jurisdiction id to check (repeatable; default: every registered jurisdiction)')
+    parser.add_argument('--top-k', type=int, default=5)
+    args = parser.parse_args()
+
+    from src.config import settings
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+
+    failures = 0
+    try:
+        async with engine.connect() as conn:
+            jurisdictions = args.jurisdiction
+            if not jurisdictions:
+                result = await conn.execute(text("""
+                    SELECT jurisdiction_id FROM ordinance_jurisdictions WHERE state = :state ORDER BY jurisdiction_id
+                """), {'state': args.state})
+                jurisdictions = [row[0] for row in result]
+
+            cases = [(mode, jurisdiction_id, min_relevance)
+                     for mode in ('vector', 'hybrid')
+                     for jurisdiction_id in [None] + jurisdictions
+                     for min_relevance in (False, True)]
+
+            for mode, jurisdiction_id, min_relevance in cases:
+                params = {'query_embedding': random_embedding(), 'state': args.state, 'top_k': args.top_k}
+                if min_relevance:
+                    params['min_relevance'] = 0.5
+
+                if mode == 'hybrid':
+                    params.update({
+                        'query_text': 'RSF-1 front setback section 30-4.21',
+                        'candidates': max(HYBRID_CANDIDATES, args.top_k),
+                        'rrf_k': RRF_K
+                    })
+                    sql = build_hybrid_search_sql(jurisdiction_id, min_relevance)
+                else:
+                    sql = build_search_sql(jurisdiction_id, min_relevance)
+
+                result = await conn.execute(text('EXPLAIN (FORMAT JSON) ' + sql), params)
+                explain = result.scalar()
+                explain = json.loads(explain) if isinstance(explain, str) else explain
+
+                problems, hnsw_indexes = check_plan(explain[0]['Plan'])
+                label = f"{mode} {jurisdiction_id or '(all)'}{' + min_relevance' if min_relevance else ''}"
+                if problems:
+                    failures += 1
+                    print(f"  [FAIL] {label:40s} {'; '.join(problems)}")
+                else:
+                    print(f"  [OK]   {label:40s} {', '.join(hnsw_indexes)}")
+    finally:
+        await engine.dispose()
+
+    if failures:
+        print(f"\n{failures} of {len(cases)} search plans do not use an HNSW index")
+        sys.exit(1)
+    print(f"\nAll {len(cases)} search plans are HNSW index scans")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -191,9 +191,10 @@ async def enrich_qpublic_batch(limit: int = 100, headless: bool = False, paralle
 
     # Get properties that need enrichment (missing coordinates)
     async with db_manager.get_session() as session:
-        # Find properties without qPublic enrichment
+        # Find current-snapshot properties without qPublic enrichment
         result = await session.execute(
             select(BulkPropertyRecord.parcel_id)
+            .where(BulkPropertyRecord.is_current.is_(True))
             .where(BulkPropertyRecord.qpublic_enriched_at.is_(None))
             .limit(limit)
         )
@@ -32,6 +32,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database.connection import db_manager
 from src.database.models import BulkPropertyRecord, BulkDataSnapshot, Market
+from src.utils.parcel_ids import canonical_parcel_id
+from src.services.derived_refresh import DerivedTableRefresher
 from sqlalchemy import select, update, text
 from sqlalchemy.dialects.postgresql import insert
 
@@ -209,6 +211,9 @@ def map_csv_row_to_db_record(row: pd.Series, market_id: str, snapshot_id: Option
         elif db_col in ['last_sale_date']:
             record[db_col] = clean_value(value, 'date')
 
+    # Canonical form is enforced by a CHECK constraint (migration 017)
+    record['parcel_id'] = canonical_parcel_id(record.get('parcel_id'))
+
     return record
 
 
@@ -355,7 +360,7 @@ async def load_cama_data(
                     insert_sql = f"""
                         INSERT INTO bulk_property_records ({col_str})
                         VALUES ({placeholders})
-                        ON CONFLICT (parcel_id, market_id, snapshot_id)
+                        ON CONFLICT (parcel_id, market_id, snapshot_id, is_current)
                         DO UPDATE SET {update_clause}
                     """
 
@@ -372,6 +377,51 @@ async def load_cama_data(
             print(f"  [OK] Processed {len(batch_records)} records")
 
         if not dry_run:
+            # Rows were loaded into the cold partition; make this snapshot the market's
+            # current one (hot partition) in the same commit as its completion. The whole
+            # CSV is the market, so current parcels missing from it are logged as removed
+            # and retired (not with --limit, which loads only part of the file).
+            await session.execute(
+                update(BulkDataSnapshot)
+                .where(BulkDataSnapshot.id == snapshot_id)
+                .values(status='completed', records_inserted=inserted,
+                        processing_completed_at=datetime.utcnow())
+            )
+
+            result = await session.execute(
+                text("""
+                    SELECT rows_promoted, rows_retired
+                    FROM swap_current_property_snapshot(:snapshot_id, p_full_snapshot => :full_snapshot)
+                """),
+                {'snapshot_id': snapshot_id, 'full_snapshot': not limit}
+            )
+            rows_promoted, rows_retired = result.one()
+            print(f"\n[OK] Snapshot is current: {rows_promoted:,} rows promoted, {rows_retired:,} retired")
+
+            # The CSV only carries each parcel's last sale; Sales.txt history comes with the
+            # bulk sync (BulkDataManager, migration 021)
+            result = await session.execute(text("""
+                INSERT INTO property_sales (
+                    market_id, parcel_id, sale_date, sale_price, sale_qualified, sale_type_vac_imp,
+                    sale_book, sale_page, city, property_type, source, snapshot_id
+                )
+                SELECT market_id, parcel_id, last_sale_date, last_sale_price, sale_qualified,
+                       sale_type_vac_imp, COALESCE(TRIM(sale_book), ''), COALESCE(TRIM(sale_page), ''),
+                       NULLIF(UPPER(TRIM(city)), ''), COALESCE(NULLIF(TRIM(property_type), ''), 'UNKNOWN'),
+                       'last_sale', snapshot_id
+                FROM bulk_property_records
+                WHERE market_id = :market_id
+                  AND snapshot_id = :snapshot_id
+                  AND last_sale_date IS NOT NULL
+                ON CONFLICT (market_id, parcel_id, sale_date, sale_book, sale_page) DO NOTHING
+            """), {'market_id': market_id, 'snapshot_id': snapshot_id})
+            print(f"[OK] {result.rowcount:,} new sales recorded")
+
+            refreshed = await DerivedTableRefresher().refresh_after_snapshot(session, market_id, snapshot_id)
+            for table_name, stats in refreshed.items():
+                print(f"  [OK] {table_name}: {stats['rows_written'] or 0:,} rows in {stats['duration_ms']:,} ms"
+                      + (f" (FAILED: {stats['error']})" if stats['error'] else ""))
+
             await session.commit()
             print("\n[OK] Database commit successful")
         else:
@@ -42,10 +42,12 @@ async def create_ordinance_embeddings_table(engine):
                 ordinance_file TEXT NOT NULL,
                 city TEXT NOT NULL,
                 state TEXT NOT NULL DEFAULT 'FL',
+                jurisdiction_id TEXT,  -- canonical_jurisdiction_id(city, state), migration 023
 
                 -- Chunk info
                 chunk_number INTEGER NOT NULL,
                 chunk_text TEXT NOT NULL,
+                chunk_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED,  -- migration 024
                 chunk_chars INTEGER,
                 chunk_words INTEGER,
 
@@ -77,6 +79,22 @@ async def create_ordinance_embeddings_table(engine):
             ON ordinance_embeddings(city)
         """))
 
+        # Tables created before migration 023
+        await conn.execute(text("""
+            ALTER TABLE ordinance_embeddings ADD COLUMN IF NOT EXISTS jurisdiction_id TEXT
+        """))
+
+        await conn.execute(text("""
+            ALTER TABLE ordinance_embeddings
+            ADD COLUMN IF NOT EXISTS chunk_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED
+        """))
+
+        await conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_ordinance_jurisdiction_id
+            ON ordinance_embeddings(jurisdiction_id)
+        """))
+
         await conn.execute(text("""
             CREATE INDEX IF NOT EXISTS idx_ordinance_state
             ON ordinance_embeddings(state)
@@ -87,7 +105,16 @@ async def create_ordinance_embeddings_table(engine):
             ON ordinance_embeddings(content_hash)
         """))
 
-        # Create vector index for similarity search (HNSW for fast approximate search)
+        # Full-text index for the lexical half of hybrid search
+        await conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_ordinance_chunk_tsv
+            ON ordinance_embeddings
+            USING gin (chunk_tsv)
+        """))
+
+        # Create vector index for similarity search (HNSW for fast approximate search).
+        # Unfiltered searches only - each jurisdiction gets a partial HNSW index from
+        # sync_ordinance_jurisdictions() after the load
         await conn.execute(text("""
             CREATE INDEX IF NOT EXISTS idx_ordinance_embedding_hnsw
             ON ordinance_embeddings
@@ -147,17 +174,18 @@ async def insert_embeddings_batch(
             # Raw SQL for upsert (use CAST for type conversion)
             sql = text("""
                 INSERT INTO ordinance_embeddings (
-                    ordinance_file, city, state, chunk_number, chunk_text,
+                    ordinance_file, city, state, jurisdiction_id, chunk_number, chunk_text,
                     chunk_chars, chunk_words, embedding, content_hash,
                     file_modified_timestamp, scraped_date, metadata, updated_at
                 )
                 VALUES (
-                    :ordinance_file, :city, :state, :chunk_number, :chunk_text,
+                    :ordinance_file, :city, :state, canonical_jurisdiction_id(:city, :state), :chunk_number, :chunk_text,
                     :chunk_chars, :chunk_words, CAST(:embedding AS vector), :content_hash,
                     :file_modified_timestamp, :scraped_date, CAST(:metadata AS jsonb), NOW()
                 )
                 ON CONFLICT (ordinance_file, chunk_number)
                 DO UPDATE SET
+                    jurisdiction_id = EXCLUDED.jurisdiction_id,
                     chunk_text = EXCLUDED.chunk_text,
                     chunk_chars = EXCLUDED.chunk_chars,
                     chunk_words = EXCLUDED.chunk_words,
@@ -199,6 +227,24 @@ async def insert_embeddings_batch(
     return {'inserted': inserted, 'updated': 0}
 
 
+async def sync_jurisdictions(session: AsyncSession) -> Dict[str, int]:
+    """
+    Register loaded jurisdictions and build their partial HNSW indexes (migration 023)
+    """
+    result = await session.execute(text("""
+        SELECT jurisdictions, indexes_created, indexes_dropped
+        FROM sync_ordinance_jurisdictions()
+    """))
+    row = result.one()
+    await session.commit()
+
+    return {
+        'jurisdictions': row.jurisdictions,
+        'indexes_created': row.indexes_created,
+        'indexes_dropped': row.indexes_dropped
+    }
+
+
 async def verify_embeddings(session: AsyncSession) -> Dict[str, Any]:
     """Verify embeddings were loaded correctly"""
 
@@ -208,9 +254,9 @@ async def verify_embeddings(session: AsyncSession) -> Dict[str, Any]:
     )
     total_count = result.scalar()
 
-    # Count by city
+    # Count by jurisdiction
     result = await session.execute(
-        text("SELECT city, COUNT(*) FROM ordinance_embeddings GROUP BY city ORDER BY COUNT(*) DESC")
+        text("SELECT jurisdiction_id, COUNT(*) FROM ordinance_embeddings GROUP BY jurisdiction_id ORDER BY COUNT(*) DESC")
     )
     city_counts = {row[0]: row[1] for row in result}
 
@@ -279,12 +325,19 @@ async def main():
             )
             print(f"   [OK] Inserted/Updated {result['inserted']} chunks")
 
-        # Step 4: Verify
-        print("\n4. Verifying embeddings...")
+        # Step 4: Jurisdiction ids and per-jurisdiction HNSW indexes
+        print("\n4. Syncing jurisdictions...")
+        async with async_session() as session:
+            sync = await sync_jurisdictions(session)
+            print(f"   [OK] {sync['jurisdictions']} jurisdictions, "
+                  f"{sync['indexes_created']} partial HNSW indexes created, {sync['indexes_dropped']} dropped")
+
+        # Step 5: Verify
+        print("\n5. Verifying embeddings...")
         async with async_session() as session:
             verification = await verify_embeddings(session)
             print(f"   [OK] Total chunks in database: {verification['total_chunks']}")
-            print(f"\n   Chunks by city:")
+            print(f"\n   Chunks by jurisdiction:")
             for city, count in verification['cities'].items():
                 print(f"      {city:25s}: {count:4d} chunks")
             print(f"\n   Vector indexes: {', '.join(verification['vector_indexes'])}")
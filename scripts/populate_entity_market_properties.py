@@ -4,10 +4,10 @@ Populate entity_market_properties table
 This script aggregates entity ownership data from bulk_property_records
 to populate the entity_market_properties table used by EntityAnalyzer.
 
-Run this after:
-1. Running migration 009_add_entity_market_properties.sql
-2. Loading property data (bulk_data_sync.py)
-3. Whenever entity-property relationships change significantly
+Property syncs and ingestion batches keep the table up to date for the owners they
+change (src/services/derived_refresh.py, migration 020). Run this for a full rebuild:
+1. After running migrations 009 / 020
+2. After bulk entity changes made outside the ingestion pipeline
 """
 
 import asyncio
@@ -17,6 +17,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database.connection import db_manager
+from src.services.derived_refresh import DerivedTableRefresher
 from sqlalchemy import text
 import structlog
 
@@ -76,58 +77,32 @@ async def populate_entity_market_properties():
 
         await session.commit()
         print("   [OK] Table created/verified")
-        # First, clear existing data
-        print("\n1. Clearing existing entity_market_properties data...")
-        await session.execute(text("DELETE FROM entity_market_properties"))
-        await session.commit()
-        print("   [OK] Cleared")
+
+        result = await session.execute(text("SELECT id, market_name FROM markets ORDER BY market_name"))
+        markets = result.fetchall()
+        print(f"\n1. Rebuilding {len(markets)} market(s)")
 
         # Get current count
         result = await session.execute(text("""
             SELECT COUNT(*)
-            FROM bulk_property_records bpr
-            JOIN entities e ON e.name = bpr.owner_name
+            FROM current_bulk_properties bpr
+            JOIN entities e ON e.entity_key = bpr.owner_key
         """))
         total_props = result.scalar()
         print(f"\n2. Found {total_props:,} properties with matched entities")
 
-        # Aggregate entity ownership by market
+        # Aggregate entity ownership by market (refresh_entity_market_properties, migration 020)
         print("\n3. Aggregating entity ownership by market...")
-        print("   (This links properties to entities via owner_name match)")
-
-        query = text("""
-            INSERT INTO entity_market_properties (
-                entity_id,
-                market_id,
-                total_properties,
-                total_value,
-                property_ids,
-                first_activity_date,
-                last_activity_date
-            )
-            SELECT
-                e.id as entity_id,
-                bpr.market_id,
-                COUNT(*)::INTEGER as total_properties,
-                SUM(bpr.market_value)::DECIMAL(15,2) as total_value,
-                ARRAY_AGG(bpr.id) as property_ids,
-                MIN(bpr.last_sale_date) as first_activity_date,
-                MAX(bpr.last_sale_date) as last_activity_date
-            FROM bulk_property_records bpr
-            JOIN entities e ON e.name = bpr.owner_name
-            WHERE bpr.market_id IS NOT NULL
-            GROUP BY e.id, bpr.market_id
-            ON CONFLICT (entity_id, market_id)
-            DO UPDATE SET
-                total_properties = EXCLUDED.total_properties,
-                total_value = EXCLUDED.total_value,
-                property_ids = EXCLUDED.property_ids,
-                first_activity_date = EXCLUDED.first_activity_date,
-                last_activity_date = EXCLUDED.last_activity_date,
-                updated_at = NOW()
-        """)
-
-        result = await session.execute(query)
+        print("   (This links properties to entities via owner_key = entity_key match)")
+
+        refresher = DerivedTableRefresher()
+        for market_id, market_name in markets:
+            refreshed = await refresher.rebuild(session, str(market_id), ['entity_market_properties'])
+            stats = refreshed['entity_market_properties']
+            if stats['error']:
+                print(f"   [ERROR] {market_name}: {stats['error']}")
+            else:
+                print(f"   - {market_name}: {stats['rows_written']:,} rows in {stats['duration_ms']:,} ms")
         await session.commit()
 
         print("   [OK] Aggregation complete")
@@ -219,7 +194,7 @@ async def populate_entity_market_properties():
 
                     # Check if they own properties
                     result2 = await session.execute(text("""
-                        SELECT COUNT(*) FROM bulk_property_records
+                        SELECT COUNT(*) FROM current_bulk_properties
                         WHERE owner_entity_id = :entity_id
                     """), {'entity_id': str(r[0])})
                     prop_count = result2.scalar()
@@ -26,6 +26,7 @@ sys.path.insert(0, project_root)
 
 from src.database.connection import db_manager
 from src.database.models import Entity
+from src.services.derived_refresh import DerivedTableRefresher
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -118,7 +119,7 @@ class EntityResolutionRunner:
                     MAX(mailing_address) as sample_address,
                     MAX(city) as sample_city,
                     STRING_AGG(DISTINCT parcel_id, ',') as sample_parcels
-                FROM bulk_property_records
+                FROM current_bulk_properties
                 WHERE market_id = :market_id
                   AND owner_name IS NOT NULL
                   AND TRIM(owner_name) != ''
@@ -241,44 +242,16 @@ class EntityResolutionRunner:
             return 'unknown'
 
     async def _populate_entity_market_properties(self, market_id: str):
-        """Populate entity_market_properties table with aggregated data"""
+        """Rebuild the market's entity_market_properties (owner_key = entity_key, migration 020)"""
         async with db_manager.get_session() as session:
-            # For each entity with properties in this market, calculate stats
-            query = text("""
-                INSERT INTO entity_market_properties (
-                    entity_id,
-                    market_id,
-                    total_properties,
-                    total_value,
-                    property_ids,
-                    first_activity_date,
-                    last_activity_date
-                )
-                SELECT
-                    e.id as entity_id,
-                    :market_id as market_id,
-                    COUNT(DISTINCT bp.id) as total_properties,
-                    SUM(COALESCE(bp.market_value, 0)) as total_value,
-                    ARRAY_AGG(DISTINCT bp.id) as property_ids,
-                    MIN(bp.last_sale_date) as first_activity_date,
-                    MAX(bp.last_sale_date) as last_activity_date
-                FROM entities e
-                JOIN bulk_property_records bp ON bp.owner_name = e.name
-                WHERE bp.market_id = :market_id
-                GROUP BY e.id
-                ON CONFLICT (entity_id, market_id)
-                DO UPDATE SET
-                    total_properties = EXCLUDED.total_properties,
-                    total_value = EXCLUDED.total_value,
-                    property_ids = EXCLUDED.property_ids,
-                    first_activity_date = EXCLUDED.first_activity_date,
-                    last_activity_date = EXCLUDED.last_activity_date,
-                    updated_at = NOW()
-            """)
-
-            result = await session.execute(query, {'market_id': market_id})
+            refreshed = await DerivedTableRefresher().rebuild(session, market_id, ['entity_market_properties'])
             await session.commit()
 
+            stats = refreshed['entity_market_properties']
+            if stats['error']:
+                self.stats['errors'] += 1
+                print(f"  ERROR: {stats['error']}")
+
             # Get count of records created
             count_result = await session.execute(
                 text("SELECT COUNT(*) FROM entity_market_properties WHERE market_id = :market_id"),
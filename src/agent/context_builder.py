@@ -19,6 +19,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import structlog
 
+from ..utils.parcel_ids import canonical_parcel_id
+
 logger = structlog.get_logger(__name__)
 
 
@@ -115,9 +117,11 @@ class ContextBuilder:
         )
 
         # 9. Analyze geographic clustering if owner has multiple recent purchases
+        # (parcel adjacency graph when available, house-number heuristic otherwise)
         if len(context['owner_activity']) >= 4:
-            context['geographic_analysis'] = self._analyze_geographic_clustering(
-                context['owner_portfolio']
+            context['geographic_analysis'] = (
+                await self._analyze_parcel_adjacency(context['owner_portfolio'])
+                or self._analyze_geographic_clustering(context['owner_portfolio'])
             )
         else:
             context['geographic_analysis'] = None
@@ -176,7 +180,7 @@ class ContextBuilder:
                     building_details,
                     trim_notice,
                     total_permits
-                FROM bulk_property_records
+                FROM current_bulk_properties
                 WHERE LOWER(site_address) LIKE LOWER(:address)
                 LIMIT 1
             """)
@@ -216,11 +220,11 @@ class ContextBuilder:
                     building_details,
                     trim_notice,
                     total_permits
-                FROM bulk_property_records
+                FROM current_bulk_properties
                 WHERE parcel_id = :parcel_id
                 LIMIT 1
             """)
-            result = await self.session.execute(query, {'parcel_id': parcel_id})
+            result = await self.session.execute(query, {'parcel_id': canonical_parcel_id(parcel_id)})
         else:
             return None
 
@@ -245,8 +249,8 @@ class ContextBuilder:
                 square_feet,
                 lot_size_acres,
                 use_code
-            FROM bulk_property_records
-            WHERE owner_name = :owner_name
+            FROM current_bulk_properties
+            WHERE owner_key = normalize_owner_key(:owner_name)
             ORDER BY last_sale_date DESC NULLS LAST
         """)
 
@@ -258,24 +262,34 @@ class ContextBuilder:
         owner_name: str,
         days: int = 180
     ) -> List[Dict[str, Any]]:
-        """Get recent acquisitions/dispositions"""
+        """Get recent acquisitions/dispositions from the snapshot change log (migration 019)"""
 
         query = text("""
+            WITH owner AS (
+                SELECT normalize_owner_key(:owner_name) as owner_key
+            )
             SELECT
-                parcel_id,
-                site_address,
-                property_type,
-                market_value,
-                last_sale_date,
-                last_sale_price,
-                use_code
-            FROM bulk_property_records
-            WHERE owner_name = :owner_name
-            AND last_sale_date >= CURRENT_DATE - INTERVAL '180 days'
-            ORDER BY last_sale_date DESC
+                c.parcel_id,
+                CASE WHEN c.owner_key_after = owner.owner_key THEN 'acquired' ELSE 'disposed' END as activity,
+                c.changed_at,
+                COALESCE(bp.site_address, c.old_values->>'site_address') as site_address,
+                COALESCE(bp.property_type, c.old_values->>'property_type') as property_type,
+                bp.market_value,
+                bp.last_sale_date,
+                bp.last_sale_price,
+                bp.use_code
+            FROM owner
+            JOIN property_change_log c
+              ON (c.owner_key_after = owner.owner_key OR c.owner_key_before = owner.owner_key)
+            LEFT JOIN current_bulk_properties bp
+              ON bp.market_id = c.market_id
+             AND bp.parcel_id = c.parcel_id
+            WHERE c.owner_key_before IS DISTINCT FROM c.owner_key_after
+              AND c.changed_at >= NOW() - make_interval(days => :days)
+            ORDER BY c.changed_at DESC
         """)
 
-        result = await self.session.execute(query, {'owner_name': owner_name})
+        result = await self.session.execute(query, {'owner_name': owner_name, 'days': days})
         return [dict(row._mapping) for row in result]
 
     async def _get_neighborhood_context(
@@ -302,7 +316,7 @@ class ContextBuilder:
                 PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY market_value) as median_value,
                 AVG(square_feet) as avg_sqft,
                 COUNT(CASE WHEN last_sale_date >= CURRENT_DATE - INTERVAL '180 days' THEN 1 END) as recent_sales
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE latitude::float BETWEEN :min_lat AND :max_lat
             AND longitude::float BETWEEN :min_lon AND :max_lon
             AND market_value > 0
@@ -503,6 +517,85 @@ class ContextBuilder:
             logger.warning("news_query_failed", error=str(e))
             return []
 
+    async def _analyze_parcel_adjacency(self, portfolio: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Contiguous holdings in portfolio from the parcel adjacency graph.
+
+        Uses parcel_owner_components (same-owner parcels whose polygons touch) and
+        parcel_adjacency for gap parcels - neighbours of a cluster owned by someone else.
+        Returns None when the graph has no clusters for these parcels.
+        """
+        addresses = {p.get('parcel_id'): p.get('site_address') for p in portfolio if p.get('parcel_id')}
+        if not addresses:
+            return None
+
+        query = text("""
+            WITH owned AS (
+                SELECT market_id, component_id, parcel_id
+                FROM parcel_owner_components
+                WHERE parcel_id = ANY(:parcel_ids)
+            ),
+            gaps AS (
+                SELECT o.component_id, a.neighbor_parcel_id, COUNT(DISTINCT a.parcel_id) as touching_parcels
+                FROM owned o
+                JOIN parcel_adjacency a ON a.market_id = o.market_id AND a.parcel_id = o.parcel_id
+                WHERE a.relation IN ('shared_edge', 'corner')
+                  AND NOT EXISTS (
+                      SELECT 1 FROM owned o2
+                      WHERE o2.component_id = o.component_id AND o2.parcel_id = a.neighbor_parcel_id
+                  )
+                GROUP BY o.component_id, a.neighbor_parcel_id
+            )
+            SELECT
+                o.component_id,
+                ARRAY_AGG(o.parcel_id ORDER BY o.parcel_id) as parcel_ids,
+                (
+                    SELECT json_agg(json_build_object('parcel_id', g.neighbor_parcel_id, 'touching_parcels', g.touching_parcels)
+                                    ORDER BY g.touching_parcels DESC)
+                    FROM gaps g
+                    WHERE g.component_id = o.component_id
+                ) as gap_parcels
+            FROM owned o
+            GROUP BY o.component_id
+        """)
+
+        try:
+            result = await self.session.execute(query, {'parcel_ids': list(addresses)})
+            rows = [dict(row._mapping) for row in result]
+        except Exception as e:
+            logger.warning("adjacency_query_failed", error=str(e))
+            return None
+
+        if not rows:
+            return None
+
+        clusters = []
+        for row in rows:
+            gap_parcels = row['gap_parcels'] or []
+            if isinstance(gap_parcels, str):
+                gap_parcels = json.loads(gap_parcels)
+
+            clusters.append({
+                'component_id': row['component_id'],
+                'parcel_count': len(row['parcel_ids']),
+                'parcel_ids': row['parcel_ids'],
+                'addresses': [addresses[pid] for pid in row['parcel_ids'] if addresses.get(pid)],
+                'gap_parcels': gap_parcels[:10],
+                'infill_parcels': [g['parcel_id'] for g in gap_parcels if g['touching_parcels'] >= 2],
+                'is_contiguous': True
+            })
+
+        # Sort by parcel count (largest clusters first)
+        clusters.sort(key=lambda x: x['parcel_count'], reverse=True)
+
+        return {
+            'method': 'parcel_adjacency',
+            'total_clusters': len(clusters),
+            'largest_cluster': clusters[0],
+            'all_clusters': clusters[:5],  # Top 5
+            'assembly_detected': any(c['parcel_count'] >= 4 for c in clusters)
+        }
+
     def _analyze_geographic_clustering(self, portfolio: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Analyze geographic clustering in portfolio.
@@ -588,6 +681,7 @@ class ContextBuilder:
         clusters.sort(key=lambda x: x['parcel_count'], reverse=True)
 
         return {
+            'method': 'street_house_numbers',
             'total_streets': len(clusters),
             'largest_cluster': clusters[0] if clusters else None,
             'all_clusters': clusters[:5],  # Top 5
@@ -804,7 +804,7 @@ class AgentTools:
             normalized = matcher.normalize_address(property_address)
             query = text("""
                 SELECT id, parcel_id, site_address
-                FROM bulk_property_records
+                FROM current_bulk_properties
                 WHERE LOWER(site_address) = LOWER(:address)
                 LIMIT 1
             """)
@@ -822,7 +822,7 @@ class AgentTools:
                 for search_query in search_queries:
                     query = text("""
                         SELECT id, parcel_id, site_address
-                        FROM bulk_property_records
+                        FROM current_bulk_properties
                         WHERE LOWER(site_address) LIKE :pattern
                         LIMIT 10
                     """)
@@ -874,7 +874,7 @@ class AgentTools:
             # Find by parcel_id
             from sqlalchemy import text
             query = text("""
-                SELECT id FROM bulk_property_records
+                SELECT id FROM current_bulk_properties
                 WHERE parcel_id = :parcel_id
                 LIMIT 1
             """)
@@ -1042,9 +1042,10 @@ class AgentTools:
         query: str,
         city: str = None,
         top_k: int = 5,
-        min_relevance: float = 0.6
+        min_relevance: float = 0.6,
+        mode: str = 'hybrid'
     ) -> Dict[str, Any]:
-        """Search municipal ordinances using RAG"""
+        """Search municipal ordinances using RAG (hybrid: zoning codes and section numbers match exactly)"""
 
         try:
             # Get RAG service
@@ -1056,7 +1057,8 @@ class AgentTools:
                 query=query,
                 city=city,
                 top_k=top_k,
-                min_relevance=min_relevance
+                min_relevance=min_relevance,
+                mode=mode
             )
 
             # Format results for agent
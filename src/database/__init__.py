@@ -26,6 +26,7 @@ from .models import (
     # AI layer
     AIInference,
     EmbeddingCache,
+    QueryEmbeddingCache,
     LLMCache,
 )
 
@@ -55,5 +56,6 @@ __all__ = [
     # AI
     'AIInference',
     'EmbeddingCache',
+    'QueryEmbeddingCache',
     'LLMCache',
 ]
\ No newline at end of file
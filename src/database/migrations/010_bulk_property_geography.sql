@@ -0,0 +1,42 @@
+-- Migration 010: Stored geography point on bulk_property_records
+--
+-- The spatial tools (location intelligence, comparable distance scoring, assemblage gap
+-- search) used to build ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+-- for every row, which made ST_DWithin unindexable (full scan of 108K+ parcels per call).
+--
+-- geog is a generated column computed from latitude/longitude, so every writer (the bulk
+-- sync, the CAMA CSV loader, qPublic enrichment) gets it without having to set it, and it
+-- is covered by a GiST index so radius searches and <-> ordering use an index scan.
+
+-- NULL for missing or out-of-range coordinates (the geography cast would reject them)
+CREATE OR REPLACE FUNCTION parcel_point_geog(p_latitude NUMERIC, p_longitude NUMERIC)
+RETURNS GEOGRAPHY AS $$
+    SELECT CASE
+        WHEN p_latitude BETWEEN -90 AND 90 AND p_longitude BETWEEN -180 AND 180
+        THEN ST_SetSRID(ST_MakePoint(p_longitude, p_latitude), 4326)::geography
+    END;
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+-- An earlier revision of this migration added geog as a plain column filled by the loaders
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'bulk_property_records'::regclass
+          AND attname = 'geog'
+          AND NOT attisdropped
+          AND attgenerated = ''
+    ) THEN
+        ALTER TABLE bulk_property_records DROP COLUMN geog;
+    END IF;
+END $$;
+
+ALTER TABLE bulk_property_records ADD COLUMN IF NOT EXISTS geog GEOGRAPHY(POINT, 4326)
+    GENERATED ALWAYS AS (parcel_point_geog(latitude, longitude)) STORED;
+
+-- Created on the partitioned parent so every market partition gets its own index
+CREATE INDEX IF NOT EXISTS idx_bulk_property_records_geog ON bulk_property_records USING GIST(geog);
+
+ANALYZE bulk_property_records;
+
+COMMENT ON COLUMN bulk_property_records.geog IS 'Parcel point as geography (lon, lat), generated from latitude/longitude - use for ST_DWithin / ST_Distance / <-> (GiST indexed)';
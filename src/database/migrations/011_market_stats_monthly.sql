@@ -0,0 +1,210 @@
+-- Migration 011: Monthly market statistics cube
+--
+-- analyze_market_trends recomputed PERCENTILE_CONT medians/quartiles and windowed sale
+-- counts over every parcel in the city on each call, and calculate_absorption_rate had no
+-- backing query at all. Both now read market_stats_monthly: one row per
+-- (market, city, property_type, month) holding
+--   * inventory   - parcel count, market value sum/min/max, lot size sum and a market value
+--                   sketch, written on the row for the month the snapshot was refreshed
+--   * sales       - count, price sum and a sale price sketch for sales closed in that month
+--
+-- Sketches are fixed log-scale histograms (see market_stats_price_bucket): 250 buckets
+-- between $1K and $100M (~4.7% wide) plus an underflow (index 0) and overflow (index 251)
+-- bucket. They add across months/property types, so any 30-730 day window is answered by
+-- summing a handful of rows, and quantiles / price-band counts are interpolated from the
+-- merged histogram (well inside the error of assessed values).
+--
+-- Refreshed by BulkDataManager after a property_appraiser snapshot completes:
+--   SELECT * FROM refresh_market_stats_monthly(:market_id, :snapshot_id);
+
+CREATE TABLE IF NOT EXISTS market_stats_monthly (
+    market_id UUID NOT NULL REFERENCES markets(id),
+    city TEXT NOT NULL,                 -- UPPER(TRIM(city))
+    property_type TEXT NOT NULL,        -- 'UNKNOWN' when missing
+    month DATE NOT NULL,                -- First day of the month
+
+    -- Inventory (only on the month a snapshot was refreshed; inventory_as_of marks those rows)
+    inventory_count INTEGER NOT NULL DEFAULT 0,
+    inventory_value_sum NUMERIC NOT NULL DEFAULT 0,
+    inventory_value_min NUMERIC,
+    inventory_value_max NUMERIC,
+    inventory_value_sketch INTEGER[],
+    lot_size_sum NUMERIC NOT NULL DEFAULT 0,
+    lot_size_count INTEGER NOT NULL DEFAULT 0,
+    inventory_as_of TIMESTAMP,
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+
+    -- Sales closed in this month
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    sales_priced_count INTEGER NOT NULL DEFAULT 0,
+    sales_price_sum NUMERIC NOT NULL DEFAULT 0,
+    sales_price_sketch INTEGER[],
+
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (market_id, city, property_type, month)
+);
+
+-- Window lookups: WHERE city = :city AND month >= :window_start
+CREATE INDEX IF NOT EXISTS idx_market_stats_monthly_city_month ON market_stats_monthly(city, month DESC);
+
+
+-- Sketch bucket for a price: 0 below $1K, 1-250 log-spaced up to $100M, 251 above
+CREATE OR REPLACE FUNCTION market_stats_price_bucket(p_price NUMERIC)
+RETURNS INTEGER AS $$
+    SELECT width_bucket(log(GREATEST(p_price, 1))::float8, 3.0, 8.0, 250);
+$$ LANGUAGE SQL IMMUTABLE;
+
+
+-- Rebuild the cube for one market from a completed property snapshot
+CREATE OR REPLACE FUNCTION refresh_market_stats_monthly(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_sales_months INTEGER DEFAULT 36
+)
+RETURNS TABLE(inventory_rows INTEGER, sales_rows INTEGER) AS $$
+DECLARE
+    v_month DATE := DATE_TRUNC('month', CURRENT_DATE)::date;
+    v_first_sales_month DATE := (DATE_TRUNC('month', CURRENT_DATE) - make_interval(months => p_sales_months))::date;
+    v_inventory_rows INTEGER := 0;
+    v_sales_rows INTEGER := 0;
+BEGIN
+    CREATE TEMP TABLE market_stats_source ON COMMIT DROP AS
+    SELECT
+        UPPER(TRIM(city)) as city,
+        COALESCE(NULLIF(TRIM(property_type), ''), 'UNKNOWN') as property_type,
+        market_value,
+        lot_size_acres,
+        DATE_TRUNC('month', last_sale_date)::date as sale_month,
+        last_sale_price
+    FROM bulk_property_records
+    WHERE market_id = p_market_id
+      AND snapshot_id = p_snapshot_id
+      AND city IS NOT NULL AND TRIM(city) != '';
+
+    -- Sales are recomputed for the whole horizon; inventory only for the current month so
+    -- earlier months keep the inventory of the snapshot that was current back then
+    UPDATE market_stats_monthly
+    SET sales_count = 0, sales_priced_count = 0, sales_price_sum = 0, sales_price_sketch = NULL
+    WHERE market_id = p_market_id;
+
+    UPDATE market_stats_monthly
+    SET inventory_count = 0, inventory_value_sum = 0, inventory_value_min = NULL,
+        inventory_value_max = NULL, inventory_value_sketch = NULL,
+        lot_size_sum = 0, lot_size_count = 0, inventory_as_of = NULL, snapshot_id = NULL
+    WHERE market_id = p_market_id AND month = v_month;
+
+    WITH groups AS (
+        SELECT city, property_type,
+               COUNT(*) as inventory_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               COALESCE(SUM(lot_size_acres), 0) as lot_size_sum,
+               COUNT(lot_size_acres) as lot_size_count
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY city, property_type
+    ),
+    buckets AS (
+        SELECT city, property_type, market_stats_price_bucket(market_value) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY 1, 2, 3
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        inventory_count, inventory_value_sum, inventory_value_min, inventory_value_max,
+        inventory_value_sketch, lot_size_sum, lot_size_count, inventory_as_of, snapshot_id,
+        refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, v_month,
+        g.inventory_count, g.value_sum, g.value_min, g.value_max,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        g.lot_size_sum, g.lot_size_count, NOW(), p_snapshot_id,
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        inventory_count = EXCLUDED.inventory_count,
+        inventory_value_sum = EXCLUDED.inventory_value_sum,
+        inventory_value_min = EXCLUDED.inventory_value_min,
+        inventory_value_max = EXCLUDED.inventory_value_max,
+        inventory_value_sketch = EXCLUDED.inventory_value_sketch,
+        lot_size_sum = EXCLUDED.lot_size_sum,
+        lot_size_count = EXCLUDED.lot_size_count,
+        inventory_as_of = EXCLUDED.inventory_as_of,
+        snapshot_id = EXCLUDED.snapshot_id,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_inventory_rows = ROW_COUNT;
+
+    WITH groups AS (
+        SELECT city, property_type, sale_month,
+               COUNT(*) as sales_count,
+               COUNT(last_sale_price) FILTER (WHERE last_sale_price > 0) as priced_count,
+               COALESCE(SUM(last_sale_price) FILTER (WHERE last_sale_price > 0), 0) as price_sum
+        FROM market_stats_source
+        WHERE market_value > 0
+          AND sale_month >= v_first_sales_month
+          AND sale_month <= v_month
+        GROUP BY city, property_type, sale_month
+    ),
+    buckets AS (
+        SELECT city, property_type, sale_month, market_stats_price_bucket(last_sale_price) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+          AND last_sale_price > 0
+          AND sale_month >= v_first_sales_month
+          AND sale_month <= v_month
+        GROUP BY 1, 2, 3, 4
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        sales_count, sales_priced_count, sales_price_sum, sales_price_sketch, refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, g.sale_month,
+        g.sales_count, g.priced_count, g.price_sum,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type
+                               AND b.sale_month = g.sale_month AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        sales_count = EXCLUDED.sales_count,
+        sales_priced_count = EXCLUDED.sales_priced_count,
+        sales_price_sum = EXCLUDED.sales_price_sum,
+        sales_price_sketch = EXCLUDED.sales_price_sketch,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_sales_rows = ROW_COUNT;
+
+    -- Rows left with neither inventory nor sales carry no information
+    DELETE FROM market_stats_monthly
+    WHERE market_id = p_market_id
+      AND inventory_as_of IS NULL
+      AND sales_count = 0;
+
+    DROP TABLE market_stats_source;
+
+    RETURN QUERY SELECT v_inventory_rows, v_sales_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON TABLE market_stats_monthly IS 'Monthly market cube per (market, city, property_type, month): inventory on refresh months, closed sales per month, log-scale price sketches - backs analyze_market_trends / calculate_absorption_rate';
+COMMENT ON COLUMN market_stats_monthly.inventory_value_sketch IS 'Market value histogram, 252 buckets: index = market_stats_price_bucket(market_value)';
+COMMENT ON COLUMN market_stats_monthly.sales_price_sketch IS 'Sale price histogram, 252 buckets: index = market_stats_price_bucket(last_sale_price)';
+
+-- Usage:
+-- SELECT * FROM refresh_market_stats_monthly('<market uuid>', '<snapshot uuid>');
@@ -0,0 +1,170 @@
+-- Migration 012: Hierarchical spatial grid cells + per-cell rollups
+--
+-- cluster_properties snapped every parcel in the city to a grid on each call (four CTEs and a
+-- correlated subquery per cell) and converted metres to degrees with a flat 111 km, so cells
+-- were ~13% narrower east-west than north-south at Gainesville's latitude.
+--
+-- Grid: parcels get an integer cell (grid_x, grid_y) of GRID_BASE_METERS (125 m) on a local
+-- equirectangular projection (longitude scaled by cos of the market's reference latitude), so
+-- cells are square on the ground. Level k cells are 125 m * 2^k and their ids are
+-- (grid_x >> k, grid_y >> k) - every cell nests exactly inside its parent.
+--
+-- property_grid_rollups holds count, value sums/min/max, bounds and a property type histogram
+-- for every cell at levels 0-5 (125 m ... 4 km). cluster_properties reads the level closest to
+-- the requested cell size and can zoom into a cell (its children at a finer level) without
+-- touching bulk_property_records.
+--
+-- Refreshed by BulkDataManager after a property_appraiser snapshot completes:
+--   SELECT * FROM refresh_property_grid(:market_id, :snapshot_id);
+
+ALTER TABLE bulk_property_records ADD COLUMN IF NOT EXISTS grid_x INTEGER;
+ALTER TABLE bulk_property_records ADD COLUMN IF NOT EXISTS grid_y INTEGER;
+
+CREATE TABLE IF NOT EXISTS property_grid_rollups (
+    market_id UUID NOT NULL REFERENCES markets(id),
+    city TEXT NOT NULL,                         -- UPPER(TRIM(city))
+    resolution_level SMALLINT NOT NULL,         -- 0 = 125 m, each level doubles the cell size
+    cell_x INTEGER NOT NULL,
+    cell_y INTEGER NOT NULL,
+    cell_size_meters NUMERIC NOT NULL,
+
+    center_lat DOUBLE PRECISION NOT NULL,
+    center_lon DOUBLE PRECISION NOT NULL,
+    min_lat DOUBLE PRECISION,
+    max_lat DOUBLE PRECISION,
+    min_lon DOUBLE PRECISION,
+    max_lon DOUBLE PRECISION,
+
+    property_count INTEGER NOT NULL,
+    value_sum NUMERIC NOT NULL,
+    value_min NUMERIC,
+    value_max NUMERIC,
+    type_counts JSONB NOT NULL DEFAULT '{}',    -- {"SINGLE FAMILY": {"count": 40, "value_sum": 9100000}, ...}
+    dominant_type TEXT,
+    dominant_count INTEGER,
+    sample_parcel_ids TEXT[],                   -- Up to 25 highest-value parcels in the cell
+
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (market_id, city, resolution_level, cell_x, cell_y)
+);
+
+-- Densest cells first for one city/level
+CREATE INDEX IF NOT EXISTS idx_property_grid_rollups_city_level
+    ON property_grid_rollups(city, resolution_level, property_count DESC);
+
+
+CREATE OR REPLACE FUNCTION refresh_property_grid(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_base_meters NUMERIC DEFAULT 125,
+    p_levels INTEGER DEFAULT 6
+)
+RETURNS TABLE(parcels_gridded INTEGER, cells_written INTEGER) AS $$
+DECLARE
+    v_ref_lat DOUBLE PRECISION;
+    v_m_per_deg_lat CONSTANT DOUBLE PRECISION := 110574.0;
+    v_m_per_deg_lon DOUBLE PRECISION;
+    v_parcels INTEGER := 0;
+    v_cells INTEGER := 0;
+BEGIN
+    -- Reference latitude for the whole market (rounded so it is stable between snapshots)
+    SELECT ROUND(AVG(latitude)::numeric, 1)
+    INTO v_ref_lat
+    FROM bulk_property_records
+    WHERE market_id = p_market_id AND snapshot_id = p_snapshot_id AND latitude IS NOT NULL;
+
+    IF v_ref_lat IS NULL THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    v_m_per_deg_lon := 111320.0 * cos(radians(v_ref_lat));
+
+    UPDATE bulk_property_records
+    SET grid_x = FLOOR(longitude * v_m_per_deg_lon / p_base_meters)::int,
+        grid_y = FLOOR(latitude * v_m_per_deg_lat / p_base_meters)::int
+    WHERE market_id = p_market_id
+      AND snapshot_id = p_snapshot_id
+      AND latitude IS NOT NULL
+      AND longitude IS NOT NULL;
+
+    GET DIAGNOSTICS v_parcels = ROW_COUNT;
+
+    DELETE FROM property_grid_rollups WHERE market_id = p_market_id;
+
+    WITH cells AS (
+        SELECT
+            UPPER(TRIM(bp.city)) as city,
+            lvl.level,
+            bp.grid_x >> lvl.level as cell_x,
+            bp.grid_y >> lvl.level as cell_y,
+            COALESCE(NULLIF(TRIM(bp.property_type), ''), 'UNKNOWN') as property_type,
+            bp.parcel_id, bp.market_value, bp.latitude, bp.longitude
+        FROM bulk_property_records bp
+        CROSS JOIN generate_series(0, p_levels - 1) AS lvl(level)
+        WHERE bp.market_id = p_market_id
+          AND bp.snapshot_id = p_snapshot_id
+          AND bp.grid_x IS NOT NULL
+          AND bp.city IS NOT NULL AND TRIM(bp.city) != ''
+          AND bp.market_value > 0
+    ),
+    type_cells AS (
+        SELECT city, level, cell_x, cell_y, property_type,
+               COUNT(*) as type_count,
+               SUM(market_value) as type_value_sum
+        FROM cells
+        GROUP BY city, level, cell_x, cell_y, property_type
+    ),
+    type_rollups AS (
+        SELECT city, level, cell_x, cell_y,
+               jsonb_object_agg(property_type, jsonb_build_object('count', type_count, 'value_sum', type_value_sum)) as type_counts,
+               (ARRAY_AGG(property_type ORDER BY type_count DESC, property_type))[1] as dominant_type,
+               MAX(type_count) as dominant_count
+        FROM type_cells
+        GROUP BY city, level, cell_x, cell_y
+    ),
+    cell_rollups AS (
+        SELECT city, level, cell_x, cell_y,
+               COUNT(*) as property_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               MIN(latitude) as min_lat, MAX(latitude) as max_lat,
+               MIN(longitude) as min_lon, MAX(longitude) as max_lon,
+               (ARRAY_AGG(parcel_id ORDER BY market_value DESC, parcel_id))[1:25] as sample_parcel_ids
+        FROM cells
+        GROUP BY city, level, cell_x, cell_y
+    )
+    INSERT INTO property_grid_rollups (
+        market_id, city, resolution_level, cell_x, cell_y, cell_size_meters,
+        center_lat, center_lon, min_lat, max_lat, min_lon, max_lon,
+        property_count, value_sum, value_min, value_max,
+        type_counts, dominant_type, dominant_count, sample_parcel_ids,
+        snapshot_id, refreshed_at
+    )
+    SELECT
+        p_market_id, c.city, c.level, c.cell_x, c.cell_y, p_base_meters * (1 << c.level),
+        (c.cell_y + 0.5) * p_base_meters * (1 << c.level) / v_m_per_deg_lat,
+        (c.cell_x + 0.5) * p_base_meters * (1 << c.level) / v_m_per_deg_lon,
+        c.min_lat, c.max_lat, c.min_lon, c.max_lon,
+        c.property_count, c.value_sum, c.value_min, c.value_max,
+        t.type_counts, t.dominant_type, t.dominant_count, c.sample_parcel_ids,
+        p_snapshot_id, NOW()
+    FROM cell_rollups c
+    JOIN type_rollups t USING (city, level, cell_x, cell_y);
+
+    GET DIAGNOSTICS v_cells = ROW_COUNT;
+
+    RETURN QUERY SELECT v_parcels, v_cells;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON COLUMN bulk_property_records.grid_x IS '125 m grid column (local equirectangular metres); level k cell = grid_x >> k';
+COMMENT ON COLUMN bulk_property_records.grid_y IS '125 m grid row; level k cell = grid_y >> k';
+COMMENT ON TABLE property_grid_rollups IS 'Per-cell rollups (count, value, bounds, type histogram) at 125 m * 2^level, levels 0-5 - backs cluster_properties';
+
+-- Usage:
+-- SELECT * FROM refresh_property_grid('<market uuid>', '<snapshot uuid>');
@@ -0,0 +1,50 @@
+-- Migration 013: Parcel adjacency graph + same-owner connected components
+--
+-- Assemblage detection used point centroids and ST_LongestLine diameters per request, and
+-- ContextBuilder guessed contiguity from house-number gaps. Both now read a graph built
+-- from the county parcel polygons (GISScraper.fetch_layer('parcels')) by
+-- ParcelAdjacencyBuilder (src/services/parcel_adjacency.py):
+--
+--   parcel_adjacency          one row per direction of every neighbouring pair
+--                             (STRtree pass over the polygons, within a 1.5 m tolerance)
+--   parcel_owner_components   connected components of same-owner parcels (union-find over
+--                             shared_edge/corner edges), rebuilt after every property snapshot
+--                             so ownership changes are picked up
+--
+-- find_assemblage_opportunities reads contiguous holdings and their true gap parcels
+-- (neighbours touching the component) with plain index lookups.
+
+CREATE TABLE IF NOT EXISTS parcel_adjacency (
+    market_id UUID NOT NULL REFERENCES markets(id),
+    parcel_id TEXT NOT NULL,
+    neighbor_parcel_id TEXT NOT NULL,
+    relation TEXT NOT NULL,                     -- 'shared_edge', 'corner', 'near'
+    shared_boundary_meters NUMERIC(10, 2) NOT NULL DEFAULT 0,
+    gap_meters NUMERIC(8, 2) NOT NULL DEFAULT 0,
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+    built_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (market_id, parcel_id, neighbor_parcel_id),
+    CONSTRAINT parcel_adjacency_relation_check CHECK (relation IN ('shared_edge', 'corner', 'near'))
+);
+
+CREATE TABLE IF NOT EXISTS parcel_owner_components (
+    market_id UUID NOT NULL REFERENCES markets(id),
+    parcel_id TEXT NOT NULL,
+    component_id TEXT NOT NULL,                 -- Smallest parcel_id in the component
+    owner_key TEXT NOT NULL,                    -- Uppercase alphanumerics of owner_name
+    owner_name TEXT NOT NULL,
+    city TEXT,                                  -- UPPER(TRIM(city)) of this parcel
+    component_size INTEGER NOT NULL,            -- Parcels in the component (only >= 2 are stored)
+    property_snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (market_id, parcel_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_parcel_owner_components_component ON parcel_owner_components(market_id, component_id);
+CREATE INDEX IF NOT EXISTS idx_parcel_owner_components_city_size ON parcel_owner_components(city, component_size DESC);
+
+COMMENT ON TABLE parcel_adjacency IS 'Parcel polygon adjacency (both directions) built with an STRtree pass over the GIS parcels layer';
+COMMENT ON COLUMN parcel_adjacency.relation IS 'shared_edge: >= 1 m of common boundary; corner: touch at a point; near: within tolerance but not touching';
+COMMENT ON TABLE parcel_owner_components IS 'Connected components of same-owner adjacent parcels (size >= 2) - contiguous assemblages';
@@ -0,0 +1,43 @@
+-- Migration 014: Persisted normalized owner / entity keys
+--
+-- Owner lookups wrapped the column in a function on every call, so none of them could use an
+-- index: UPPER(owner_name) LIKE UPPER('%x%') in search_properties, UPPER(bp.owner_name) =
+-- UPPER(:canonical_name) in find_entities, e.canonical_name = UPPER(TRIM(bp.owner_name)) in
+-- the assemblage queries - and the per-owner caps re-derived the key with regexp_replace.
+--
+-- normalize_owner_key() is the one definition of an owner key: uppercase alphanumerics only,
+-- so "SMITH, JOHN L." and "Smith John L" share a key. It is stored once when a row is written:
+--   bulk_property_records.owner_key   from owner_name
+--   entities.entity_key               from canonical_name (name when canonical_name is missing)
+--
+-- Both are generated columns, so every writer (bulk CSV load, qPublic enrichment, entity
+-- resolution) gets them without code changes. Btree indexes serve equality lookups/joins, and
+-- trigram indexes serve partial-name (LIKE '%x%') search.
+
+CREATE OR REPLACE FUNCTION normalize_owner_key(p_name TEXT)
+RETURNS TEXT AS $$
+    SELECT regexp_replace(UPPER(COALESCE(p_name, '')), '[^A-Z0-9]', '', 'g');
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+ALTER TABLE bulk_property_records
+    ADD COLUMN IF NOT EXISTS owner_key TEXT GENERATED ALWAYS AS (normalize_owner_key(owner_name)) STORED;
+
+ALTER TABLE entities
+    ADD COLUMN IF NOT EXISTS entity_key TEXT GENERATED ALWAYS AS (normalize_owner_key(COALESCE(canonical_name, name))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_bulk_property_records_owner_key ON bulk_property_records(owner_key);
+CREATE INDEX IF NOT EXISTS idx_bulk_property_records_owner_key_trgm ON bulk_property_records USING GIN(owner_key gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_entities_entity_key ON entities(entity_key);
+CREATE INDEX IF NOT EXISTS idx_entities_entity_key_trgm ON entities USING GIN(entity_key gin_trgm_ops);
+
+ANALYZE bulk_property_records;
+ANALYZE entities;
+
+COMMENT ON FUNCTION normalize_owner_key(TEXT) IS 'Owner/entity matching key: uppercase alphanumerics only';
+COMMENT ON COLUMN bulk_property_records.owner_key IS 'normalize_owner_key(owner_name) - join/filter on this, not owner_name';
+COMMENT ON COLUMN entities.entity_key IS 'normalize_owner_key(canonical_name) - matches bulk_property_records.owner_key';
+
+-- Usage:
+-- SELECT * FROM bulk_property_records WHERE owner_key = normalize_owner_key('D.R. Horton, Inc.');
+-- SELECT * FROM bulk_property_records WHERE owner_key LIKE '%' || normalize_owner_key('horton') || '%';
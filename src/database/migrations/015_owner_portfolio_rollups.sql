@@ -0,0 +1,248 @@
+-- Migration 015: Owner portfolio rollups
+--
+-- find_entities discovery mode joined entities to every bulk_property_records row (all
+-- snapshots) and re-aggregated by owner on each call. It now reads owner_portfolio_rollups:
+-- per-market portfolio statistics for every owner_key in the current property snapshot, at
+-- four grains so any city / property_type filter is a single indexed read:
+--
+--   city = '' and property_type = ''   whole portfolio
+--   city = 'GAINESVILLE', type = ''    portfolio in one city
+--   city = '', type = 'VACANT'         one property type, all cities
+--   city and type both set             one city and type
+--
+-- Every row carries a property type breakdown (rows with property_type = '') and/or a city
+-- breakdown (rows with city = ''), plus acquisition recency: first/last acquisition and
+-- acquisitions per year (absolute years, so they never go stale between refreshes).
+-- entity_market_properties (migration 009) is left as is; it is not used for discovery.
+--
+-- Incremental refresh: refresh_owner_portfolios(market, snapshot) diffs the new property
+-- snapshot against the one the rollup was last built from (owner_portfolio_refresh_state)
+-- and re-aggregates only owners with a parcel that was added, removed or changed owner, city,
+-- type, value or sale date. The first run for a market (or p_full => TRUE) rebuilds everything.
+--
+-- Refreshed by BulkDataManager after a property_appraiser snapshot completes:
+--   SELECT * FROM refresh_owner_portfolios(:market_id, :snapshot_id);
+
+CREATE TABLE IF NOT EXISTS owner_portfolio_rollups (
+    market_id UUID NOT NULL REFERENCES markets(id),
+    owner_key TEXT NOT NULL,                    -- bulk_property_records.owner_key / entities.entity_key
+    city TEXT NOT NULL DEFAULT '',              -- UPPER(TRIM(city)); '' = all cities
+    property_type TEXT NOT NULL DEFAULT '',     -- TRIM(property_type); '' = all property types
+    owner_name TEXT,                            -- One raw owner_name spelling for display
+
+    property_count INTEGER NOT NULL,
+    total_value NUMERIC NOT NULL,
+    min_value NUMERIC,
+    max_value NUMERIC,
+    total_lot_size_acres NUMERIC,
+
+    type_breakdown JSONB,                       -- {"SINGLE FAMILY": 12, ...} on property_type = '' rows
+    city_breakdown JSONB,                       -- {"GAINESVILLE": 10, ...} on city = '' rows
+
+    first_acquisition DATE,
+    last_acquisition DATE,
+    acquisitions_by_year JSONB NOT NULL DEFAULT '{}',   -- {"2023": 4, "2024": 7}
+
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (market_id, owner_key, city, property_type)
+);
+
+-- Discovery: largest portfolios first for one (city, property_type) grain
+CREATE INDEX IF NOT EXISTS idx_owner_portfolio_rollups_discovery
+    ON owner_portfolio_rollups(city, property_type, property_count DESC, total_value DESC);
+
+CREATE TABLE IF NOT EXISTS owner_portfolio_refresh_state (
+    market_id UUID PRIMARY KEY REFERENCES markets(id),
+    snapshot_id UUID NOT NULL REFERENCES bulk_data_snapshots(id),   -- Snapshot the rollup reflects
+    owners_refreshed INTEGER NOT NULL DEFAULT 0,
+    full_rebuild BOOLEAN NOT NULL DEFAULT FALSE,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+
+CREATE OR REPLACE FUNCTION refresh_owner_portfolios(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_full BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE(owners_changed INTEGER, rows_written INTEGER, rebuilt BOOLEAN) AS $$
+DECLARE
+    v_previous_snapshot_id UUID;
+    v_full BOOLEAN := p_full;
+    v_owners INTEGER := 0;
+    v_rows INTEGER := 0;
+BEGIN
+    SELECT s.snapshot_id INTO v_previous_snapshot_id
+    FROM owner_portfolio_refresh_state s
+    WHERE s.market_id = p_market_id;
+
+    IF v_previous_snapshot_id IS NULL THEN
+        v_full := TRUE;
+    ELSIF v_previous_snapshot_id = p_snapshot_id AND NOT v_full THEN
+        RETURN QUERY SELECT 0, 0, FALSE;
+        RETURN;
+    END IF;
+
+    DROP TABLE IF EXISTS owner_portfolio_changed;
+    CREATE TEMP TABLE owner_portfolio_changed (owner_key TEXT PRIMARY KEY) ON COMMIT DROP;
+
+    IF v_full THEN
+        INSERT INTO owner_portfolio_changed
+        SELECT DISTINCT bp.owner_key
+        FROM bulk_property_records bp
+        WHERE bp.market_id = p_market_id
+          AND bp.snapshot_id = p_snapshot_id
+          AND bp.owner_key NOT IN ('', 'UNKNOWN');
+
+        DELETE FROM owner_portfolio_rollups WHERE market_id = p_market_id;
+    ELSE
+        -- Snapshot delta: owners on either side of any parcel whose rollup inputs changed
+        INSERT INTO owner_portfolio_changed
+        SELECT DISTINCT k.owner_key
+        FROM (
+            SELECT cur.parcel_id, cur.owner_key, cur.city, cur.property_type,
+                   cur.market_value, cur.lot_size_acres, cur.last_sale_date
+            FROM bulk_property_records cur
+            WHERE cur.market_id = p_market_id AND cur.snapshot_id = p_snapshot_id
+        ) c
+        FULL JOIN (
+            SELECT prev.parcel_id, prev.owner_key, prev.city, prev.property_type,
+                   prev.market_value, prev.lot_size_acres, prev.last_sale_date
+            FROM bulk_property_records prev
+            WHERE prev.market_id = p_market_id AND prev.snapshot_id = v_previous_snapshot_id
+        ) p ON p.parcel_id = c.parcel_id
+        CROSS JOIN LATERAL (VALUES (c.owner_key), (p.owner_key)) AS k(owner_key)
+        WHERE (c.parcel_id IS NULL OR p.parcel_id IS NULL
+               OR (c.owner_key, c.city, c.property_type, c.market_value, c.lot_size_acres, c.last_sale_date)
+                  IS DISTINCT FROM
+                  (p.owner_key, p.city, p.property_type, p.market_value, p.lot_size_acres, p.last_sale_date))
+          AND k.owner_key NOT IN ('', 'UNKNOWN');
+
+        DELETE FROM owner_portfolio_rollups r
+        USING owner_portfolio_changed ch
+        WHERE r.market_id = p_market_id
+          AND r.owner_key = ch.owner_key;
+    END IF;
+
+    SELECT COUNT(*) INTO v_owners FROM owner_portfolio_changed;
+
+    WITH source AS (
+        SELECT
+            bp.owner_key,
+            bp.owner_name,
+            COALESCE(NULLIF(UPPER(TRIM(bp.city)), ''), 'UNKNOWN') as city,
+            COALESCE(NULLIF(TRIM(bp.property_type), ''), 'UNKNOWN') as property_type,
+            bp.market_value,
+            bp.lot_size_acres,
+            bp.last_sale_date,
+            EXTRACT(YEAR FROM bp.last_sale_date)::int as sale_year
+        FROM bulk_property_records bp
+        JOIN owner_portfolio_changed ch ON ch.owner_key = bp.owner_key
+        WHERE bp.market_id = p_market_id
+          AND bp.snapshot_id = p_snapshot_id
+          AND bp.market_value > 0
+    ),
+    year_counts AS (
+        SELECT owner_key, city, property_type, sale_year, COUNT(*) as sales
+        FROM source
+        WHERE sale_year IS NOT NULL
+        GROUP BY GROUPING SETS (
+            (owner_key, sale_year),
+            (owner_key, city, sale_year),
+            (owner_key, property_type, sale_year),
+            (owner_key, city, property_type, sale_year)
+        )
+    ),
+    year_rollups AS (
+        SELECT owner_key, COALESCE(city, '') as city, COALESCE(property_type, '') as property_type,
+               jsonb_object_agg(sale_year::text, sales) as acquisitions_by_year
+        FROM year_counts
+        GROUP BY owner_key, COALESCE(city, ''), COALESCE(property_type, '')
+    ),
+    rollups AS (
+        SELECT
+            owner_key,
+            COALESCE(city, '') as city,
+            COALESCE(property_type, '') as property_type,
+            MIN(owner_name) as owner_name,
+            COUNT(*) as property_count,
+            SUM(market_value) as total_value,
+            MIN(market_value) as min_value,
+            MAX(market_value) as max_value,
+            SUM(lot_size_acres) as total_lot_size_acres,
+            MIN(last_sale_date) as first_acquisition,
+            MAX(last_sale_date) as last_acquisition
+        FROM source
+        GROUP BY GROUPING SETS (
+            (owner_key),
+            (owner_key, city),
+            (owner_key, property_type),
+            (owner_key, city, property_type)
+        )
+    )
+    INSERT INTO owner_portfolio_rollups (
+        market_id, owner_key, city, property_type, owner_name,
+        property_count, total_value, min_value, max_value, total_lot_size_acres,
+        first_acquisition, last_acquisition, acquisitions_by_year,
+        snapshot_id, refreshed_at
+    )
+    SELECT
+        p_market_id, r.owner_key, r.city, r.property_type, r.owner_name,
+        r.property_count, r.total_value, r.min_value, r.max_value, r.total_lot_size_acres,
+        r.first_acquisition, r.last_acquisition, COALESCE(y.acquisitions_by_year, '{}'::jsonb),
+        p_snapshot_id, NOW()
+    FROM rollups r
+    LEFT JOIN year_rollups y USING (owner_key, city, property_type);
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- Breakdowns from the finer grains just written
+    UPDATE owner_portfolio_rollups r
+    SET type_breakdown = (
+            SELECT jsonb_object_agg(f.property_type, f.property_count)
+            FROM owner_portfolio_rollups f
+            WHERE f.market_id = r.market_id
+              AND f.owner_key = r.owner_key
+              AND f.city = r.city
+              AND f.property_type != ''
+        )
+    FROM owner_portfolio_changed ch
+    WHERE r.market_id = p_market_id
+      AND r.owner_key = ch.owner_key
+      AND r.property_type = '';
+
+    UPDATE owner_portfolio_rollups r
+    SET city_breakdown = (
+            SELECT jsonb_object_agg(f.city, f.property_count)
+            FROM owner_portfolio_rollups f
+            WHERE f.market_id = r.market_id
+              AND f.owner_key = r.owner_key
+              AND f.property_type = r.property_type
+              AND f.city != ''
+        )
+    FROM owner_portfolio_changed ch
+    WHERE r.market_id = p_market_id
+      AND r.owner_key = ch.owner_key
+      AND r.city = '';
+
+    INSERT INTO owner_portfolio_refresh_state (market_id, snapshot_id, owners_refreshed, full_rebuild, refreshed_at)
+    VALUES (p_market_id, p_snapshot_id, v_owners, v_full, NOW())
+    ON CONFLICT (market_id) DO UPDATE SET
+        snapshot_id = EXCLUDED.snapshot_id,
+        owners_refreshed = EXCLUDED.owners_refreshed,
+        full_rebuild = EXCLUDED.full_rebuild,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    RETURN QUERY SELECT v_owners, v_rows, v_full;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON TABLE owner_portfolio_rollups IS 'Per-owner portfolio stats by (city, property_type) grain, '''' = all - backs find_entities discovery';
+COMMENT ON TABLE owner_portfolio_refresh_state IS 'Property snapshot each market''s owner_portfolio_rollups reflect (base of the next incremental refresh)';
+
+-- Usage:
+-- SELECT * FROM refresh_owner_portfolios('<market uuid>', '<snapshot uuid>');
+-- SELECT * FROM refresh_owner_portfolios('<market uuid>', '<snapshot uuid>', TRUE);  -- full rebuild
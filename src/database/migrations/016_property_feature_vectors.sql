@@ -0,0 +1,224 @@
+-- Migration 016: Property similarity vectors (pgvector) for comparable search
+--
+-- find_comparable_properties scored every same-type parcel in the city with hand-written
+-- CASE arithmetic, and ComparableSalesAnalyzer fetched up to 1,500 nearby parcels and looked
+-- each one up again. Both now rank comps by distance between per-parcel feature vectors,
+-- served by an HNSW index:
+--
+--   dim  feature                                   scaling
+--    1   ln(market_value)                          z-score, weight 2.0
+--    2   ln(square_feet)                           z-score, weight 1.5
+--    3   bedrooms                                  z-score, weight 1.0
+--    4   bathrooms                                 z-score, weight 1.0
+--    5   year_built                                z-score, weight 1.0
+--    6   ln(lot_size_acres)                        z-score, weight 1.0
+--    7   east-west position (m)                    / 2 km,  weight 1.5
+--    8   north-south position (m)                  / 2 km,  weight 1.5
+--    9   has_pool                                  0/1,     weight 0.5
+--   10   has_garage                                0/1,     weight 0.5
+--   11   neighbourhood median ln(market_value)     z-score, weight 1.0
+--
+-- Missing inputs sit at the market mean (0). Means, standard deviations, weights and the
+-- neighbourhood medians are kept per market in property_feature_scaling, so a query vector
+-- built from ad-hoc criteria (no subject parcel) lands in the same space as stored vectors.
+-- property_similarity_score() turns a vector distance into the 0-100 score every comp tool
+-- reports.
+--
+-- Built by BulkDataManager after a property_appraiser snapshot completes:
+--   SELECT * FROM refresh_property_feature_vectors(:market_id, :snapshot_id);
+-- Only the current snapshot's parcels carry a vector (older snapshots are cleared), so the
+-- index holds one vector per parcel.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+ALTER TABLE bulk_property_records ADD COLUMN IF NOT EXISTS feature_vector vector(11);
+
+CREATE INDEX IF NOT EXISTS idx_bulk_property_records_feature_vector
+    ON bulk_property_records USING hnsw (feature_vector vector_l2_ops)
+    WITH (m = 16, ef_construction = 64);
+
+CREATE TABLE IF NOT EXISTS property_feature_scaling (
+    market_id UUID PRIMARY KEY REFERENCES markets(id),
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+    cities TEXT[] NOT NULL DEFAULT '{}',        -- UPPER(TRIM(city)) values in the market
+    reference_latitude DOUBLE PRECISION NOT NULL,
+    means DOUBLE PRECISION[] NOT NULL,          -- One entry per vector dimension
+    stddevs DOUBLE PRECISION[] NOT NULL,
+    weights DOUBLE PRECISION[] NOT NULL,
+    neighborhood_values JSONB NOT NULL DEFAULT '{}',  -- {"UPPER(TRIM(neighborhood_desc))": median ln(value)}
+    vectors_built INTEGER NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+
+-- Feature vector of one parcel (or of search criteria) in a market's scaling
+CREATE OR REPLACE FUNCTION property_feature_vector(
+    p_scaling property_feature_scaling,
+    p_market_value NUMERIC,
+    p_square_feet NUMERIC,
+    p_bedrooms NUMERIC,
+    p_bathrooms NUMERIC,
+    p_year_built NUMERIC,
+    p_lot_size_acres NUMERIC,
+    p_latitude DOUBLE PRECISION,
+    p_longitude DOUBLE PRECISION,
+    p_has_pool BOOLEAN,
+    p_has_garage BOOLEAN,
+    p_neighborhood TEXT
+)
+RETURNS vector AS $$
+    SELECT array_agg(
+               (COALESCE((raw.value - p_scaling.means[raw.dim]) / NULLIF(p_scaling.stddevs[raw.dim], 0), 0)
+                * p_scaling.weights[raw.dim])::real
+               ORDER BY raw.dim
+           )::real[]::vector
+    FROM unnest(ARRAY[
+        CASE WHEN p_market_value > 0 THEN ln(p_market_value::float8) END,
+        CASE WHEN p_square_feet > 0 THEN ln(p_square_feet::float8) END,
+        p_bedrooms::float8,
+        p_bathrooms::float8,
+        CASE WHEN p_year_built > 1800 THEN p_year_built::float8 END,
+        CASE WHEN p_lot_size_acres > 0 THEN ln(p_lot_size_acres::float8) END,
+        p_longitude * 111320.0 * cos(radians(p_scaling.reference_latitude)),
+        p_latitude * 110574.0,
+        CASE WHEN p_has_pool IS NOT NULL THEN p_has_pool::int::float8 END,
+        CASE WHEN p_has_garage IS NOT NULL THEN p_has_garage::int::float8 END,
+        (p_scaling.neighborhood_values ->> UPPER(TRIM(p_neighborhood)))::float8
+    ]::float8[]) WITH ORDINALITY AS raw(value, dim);
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+
+-- 0-100 similarity from a feature vector distance (shared by every comp tool)
+CREATE OR REPLACE FUNCTION property_similarity_score(p_distance DOUBLE PRECISION)
+RETURNS NUMERIC AS $$
+    SELECT ROUND((100 * exp(-GREATEST(p_distance, 0) / 2))::numeric, 1);
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+
+CREATE OR REPLACE FUNCTION refresh_property_feature_vectors(
+    p_market_id UUID,
+    p_snapshot_id UUID
+)
+RETURNS TABLE(vectors_written INTEGER, vectors_cleared INTEGER) AS $$
+DECLARE
+    v_written INTEGER := 0;
+    v_cleared INTEGER := 0;
+BEGIN
+    -- Per-market scaling from the snapshot
+    INSERT INTO property_feature_scaling (
+        market_id, snapshot_id, cities, reference_latitude,
+        means, stddevs, weights, neighborhood_values, refreshed_at
+    )
+    SELECT
+        p_market_id,
+        p_snapshot_id,
+        s.cities,
+        s.ref_lat,
+        ARRAY[s.value_mean, s.sqft_mean, s.beds_mean, s.baths_mean, s.year_mean, s.lot_mean,
+              s.lon_mean * 111320.0 * cos(radians(s.ref_lat)), s.lat_mean * 110574.0,
+              0, 0, s.value_mean],
+        ARRAY[s.value_sd, s.sqft_sd, s.beds_sd, s.baths_sd, s.year_sd, s.lot_sd,
+              2000, 2000, 1, 1, s.value_sd],
+        ARRAY[2.0, 1.5, 1.0, 1.0, 1.0, 1.0, 1.5, 1.5, 0.5, 0.5, 1.0]::float8[],
+        COALESCE(n.neighborhood_values, '{}'::jsonb),
+        NOW()
+    FROM (
+        SELECT
+            ARRAY_AGG(DISTINCT UPPER(TRIM(city))) FILTER (WHERE city IS NOT NULL AND TRIM(city) != '') as cities,
+            ROUND(AVG(latitude)::numeric, 1)::float8 as ref_lat,
+            AVG(ln(market_value::float8)) as value_mean,
+            STDDEV_SAMP(ln(market_value::float8)) as value_sd,
+            AVG(ln(square_feet::float8)) FILTER (WHERE square_feet > 0) as sqft_mean,
+            STDDEV_SAMP(ln(square_feet::float8)) FILTER (WHERE square_feet > 0) as sqft_sd,
+            AVG(bedrooms::float8) as beds_mean,
+            STDDEV_SAMP(bedrooms::float8) as beds_sd,
+            AVG(bathrooms::float8) as baths_mean,
+            STDDEV_SAMP(bathrooms::float8) as baths_sd,
+            AVG(year_built::float8) FILTER (WHERE year_built > 1800) as year_mean,
+            STDDEV_SAMP(year_built::float8) FILTER (WHERE year_built > 1800) as year_sd,
+            AVG(ln(lot_size_acres::float8)) FILTER (WHERE lot_size_acres > 0) as lot_mean,
+            STDDEV_SAMP(ln(lot_size_acres::float8)) FILTER (WHERE lot_size_acres > 0) as lot_sd,
+            AVG(latitude::float8) as lat_mean,
+            AVG(longitude::float8) as lon_mean
+        FROM bulk_property_records
+        WHERE market_id = p_market_id
+          AND snapshot_id = p_snapshot_id
+          AND market_value > 0
+    ) s
+    CROSS JOIN (
+        SELECT jsonb_object_agg(neighborhood, median_ln_value) as neighborhood_values
+        FROM (
+            SELECT UPPER(TRIM(neighborhood_desc)) as neighborhood,
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ln(market_value::float8)) as median_ln_value
+            FROM bulk_property_records
+            WHERE market_id = p_market_id
+              AND snapshot_id = p_snapshot_id
+              AND market_value > 0
+              AND neighborhood_desc IS NOT NULL AND TRIM(neighborhood_desc) != ''
+            GROUP BY UPPER(TRIM(neighborhood_desc))
+        ) nbhd
+    ) n
+    WHERE s.ref_lat IS NOT NULL
+    ON CONFLICT (market_id) DO UPDATE SET
+        snapshot_id = EXCLUDED.snapshot_id,
+        cities = EXCLUDED.cities,
+        reference_latitude = EXCLUDED.reference_latitude,
+        means = EXCLUDED.means,
+        stddevs = EXCLUDED.stddevs,
+        weights = EXCLUDED.weights,
+        neighborhood_values = EXCLUDED.neighborhood_values,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    UPDATE bulk_property_records bp
+    SET feature_vector = property_feature_vector(
+            s, bp.market_value, bp.square_feet, bp.bedrooms, bp.bathrooms, bp.year_built,
+            bp.lot_size_acres, bp.latitude, bp.longitude, bp.has_pool, bp.has_garage,
+            bp.neighborhood_desc
+        )
+    FROM property_feature_scaling s
+    WHERE s.market_id = p_market_id
+      AND bp.market_id = p_market_id
+      AND bp.snapshot_id = p_snapshot_id
+      AND bp.market_value > 0;
+
+    GET DIAGNOSTICS v_written = ROW_COUNT;
+
+    -- One vector per parcel: superseded snapshots drop out of the index
+    UPDATE bulk_property_records
+    SET feature_vector = NULL
+    WHERE market_id = p_market_id
+      AND snapshot_id != p_snapshot_id
+      AND feature_vector IS NOT NULL;
+
+    GET DIAGNOSTICS v_cleared = ROW_COUNT;
+
+    UPDATE property_feature_scaling
+    SET vectors_built = v_written
+    WHERE market_id = p_market_id;
+
+    RETURN QUERY SELECT v_written, v_cleared;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Filtered ANN: comp searches add city/type/sale-window filters to the index scan. They raise
+-- hnsw.ef_search and enable the pgvector >= 0.8 iterative scan per transaction
+-- (set_config(..., true)) and re-sort the relaxed-order output themselves, so no
+-- database-wide HNSW settings are needed.
+
+
+COMMENT ON COLUMN bulk_property_records.feature_vector IS 'Standardized, weighted comp features (see migration 016); current snapshot only';
+COMMENT ON TABLE property_feature_scaling IS 'Per-market feature means/stddevs/weights and neighbourhood medians behind feature_vector';
+
+-- Usage:
+-- SELECT * FROM refresh_property_feature_vectors('<market uuid>', '<snapshot uuid>');
+-- SELECT parcel_id, property_similarity_score(feature_vector <-> :query_vector)
+-- FROM bulk_property_records
+-- WHERE feature_vector IS NOT NULL
+-- ORDER BY feature_vector <-> :query_vector
+-- LIMIT 10;
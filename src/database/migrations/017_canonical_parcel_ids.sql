@@ -0,0 +1,77 @@
+-- Migration 017: Canonical parcel IDs
+--
+-- get_property_details matched with TRIM(parcel_id) = TRIM(:parcel_id) because stored IDs
+-- carried stray whitespace, which ruled out idx_bulk_property_records_parcel_id and made
+-- every lookup a sequential scan. Parcel IDs are now canonicalized once, when they are
+-- written (src/utils/parcel_ids.py: PropertyAppraiserScraper._map_fields,
+-- BulkDataManager._process_property_records, the CSV loader and the GIS parcels reader),
+-- and lookups are plain indexed equality on a canonicalized parameter.
+--
+-- canonical_parcel_id() is the SQL twin of utils.parcel_ids.canonical_parcel_id():
+-- byte-order marks dropped, surrounding whitespace stripped, internal whitespace runs
+-- collapsed to one space, uppercase; blank / placeholder values are NULL.
+--
+-- This migration backfills bulk_property_records and then enforces the form with a CHECK
+-- constraint, so a writer that skips canonicalization fails loudly instead of creating
+-- IDs that equality lookups cannot find. parcel_adjacency / parcel_owner_components are
+-- rebuilt from canonical IDs on their next build.
+
+CREATE OR REPLACE FUNCTION canonical_parcel_id(p_parcel_id TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN c.parcel_id IN ('', 'NULL', 'NONE', 'N/A', 'NAN') THEN NULL ELSE c.parcel_id END
+    FROM (
+        SELECT UPPER(btrim(regexp_replace(replace(p_parcel_id, U&'\FEFF', ''), '[[:space:]' || U&'\00A0' || ']+', ' ', 'g')))
+            as parcel_id
+    ) c;
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+
+-- Blank parcel IDs were never reachable by any lookup
+DELETE FROM bulk_property_records
+WHERE canonical_parcel_id(parcel_id) IS NULL;
+
+-- Rows that only differed by whitespace/case collapse into one per snapshot: keep the row
+-- that was already canonical, else the most recently updated
+DELETE FROM bulk_property_records bp
+USING (
+    SELECT id
+    FROM (
+        SELECT id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY market_id, snapshot_id, canonical_parcel_id(parcel_id)
+                   ORDER BY (parcel_id = canonical_parcel_id(parcel_id)) DESC, updated_at DESC NULLS LAST, id
+               ) as duplicate_rank
+        FROM bulk_property_records
+        WHERE (market_id, snapshot_id, canonical_parcel_id(parcel_id)) IN (
+            SELECT market_id, snapshot_id, canonical_parcel_id(parcel_id)
+            FROM bulk_property_records
+            WHERE parcel_id != canonical_parcel_id(parcel_id)
+        )
+    ) ranked
+    WHERE duplicate_rank > 1
+) duplicates
+WHERE bp.id = duplicates.id;
+
+UPDATE bulk_property_records
+SET parcel_id = canonical_parcel_id(parcel_id)
+WHERE parcel_id != canonical_parcel_id(parcel_id);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'bulk_property_records_parcel_id_canonical'
+    ) THEN
+        ALTER TABLE bulk_property_records
+            ADD CONSTRAINT bulk_property_records_parcel_id_canonical
+            CHECK (parcel_id = canonical_parcel_id(parcel_id)) NOT VALID;
+    END IF;
+END $$;
+
+ALTER TABLE bulk_property_records VALIDATE CONSTRAINT bulk_property_records_parcel_id_canonical;
+
+ANALYZE bulk_property_records;
+
+COMMENT ON FUNCTION canonical_parcel_id(TEXT) IS 'Parcel ID canonical form (mirrors src/utils/parcel_ids.py) - bind lookups through it';
+
+-- Usage:
+-- SELECT * FROM bulk_property_records WHERE parcel_id = canonical_parcel_id(' 06043-001-000 ');
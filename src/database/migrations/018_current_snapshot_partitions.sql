@@ -0,0 +1,205 @@
+-- Migration 018: Current-snapshot hot partitions for bulk_property_records
+--
+-- Every property_appraiser load appends a full snapshot, so bulk_property_records keeps
+-- growing while every read path only wants the newest one. Most reads did not filter by
+-- snapshot at all (and so mixed old and new values); the rest paid for the history in
+-- every scan and index.
+--
+-- Each market partition is now itself partitioned by is_current:
+--
+--   bulk_property_records                     LIST (market_id)
+--     bulk_property_records_<market>          LIST (is_current)
+--       bulk_property_records_<market>_current    FOR VALUES IN (TRUE)   -- hot: current snapshot
+--       bulk_property_records_<market>_history    FOR VALUES IN (FALSE)  -- cold: everything else
+--
+-- BulkDataManager inserts a snapshot's rows straight into the hot partition and, in the same
+-- transaction, _mark_completed calls swap_current_property_snapshot(), which retires the rows
+-- they replace. Readers see either the old or the new snapshot and never both, and rows are
+-- not written twice: moving a row between partitions (an is_current UPDATE) is a delete plus
+-- an insert that rewrites it and every index entry. Loaders that commit in batches (the CSV
+-- loader) load into the cold partition instead, and the swap promotes those rows.
+--
+-- Read paths query current_bulk_properties (WHERE is_current, pruned to the hot
+-- partitions at plan time). Refresh functions and builders that name a snapshot_id keep
+-- using bulk_property_records directly.
+--
+-- The parent's keys gain is_current (a partitioned table's unique keys must include every
+-- partition column), so writers upsert ON CONFLICT (parcel_id, market_id, snapshot_id, is_current).
+
+ALTER TABLE bulk_property_records ADD COLUMN IF NOT EXISTS is_current BOOLEAN NOT NULL DEFAULT FALSE;
+
+
+-- Hot/cold pair for one market (new markets: replaces the plain PARTITION OF in the seed)
+CREATE OR REPLACE FUNCTION create_bulk_property_partitions(p_market_id UUID, p_market_code TEXT)
+RETURNS VOID AS $$
+DECLARE
+    v_partition TEXT := 'bulk_property_records_' || p_market_code;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF bulk_property_records FOR VALUES IN (%L) PARTITION BY LIST (is_current)',
+        v_partition, p_market_id
+    );
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (TRUE)', v_partition || '_current', v_partition);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (FALSE)', v_partition || '_history', v_partition);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Restructure existing market partitions: each one becomes the cold partition of a new
+-- is_current-partitioned market partition of the same name. Its indexes are kept and
+-- attached to the new partitioned indexes rather than rebuilt.
+DO $$
+DECLARE
+    v_names TEXT[];
+    v_bounds TEXT[];
+    v_constraint RECORD;
+    i INTEGER;
+BEGIN
+    SELECT ARRAY_AGG(c.relname ORDER BY c.relname),
+           ARRAY_AGG(pg_get_expr(c.relpartbound, c.oid) ORDER BY c.relname)
+    INTO v_names, v_bounds
+    FROM pg_inherits inh
+    JOIN pg_class c ON c.oid = inh.inhrelid
+    WHERE inh.inhparent = 'bulk_property_records'::regclass
+      AND c.relkind = 'r';  -- Already restructured partitions are relkind 'p'
+
+    -- Primary key / unique key without is_current
+    FOR v_constraint IN
+        SELECT conname
+        FROM pg_constraint
+        WHERE conrelid = 'bulk_property_records'::regclass
+          AND contype IN ('p', 'u')
+          AND pg_get_constraintdef(oid) NOT LIKE '%is_current%'
+    LOOP
+        EXECUTE format('ALTER TABLE bulk_property_records DROP CONSTRAINT %I', v_constraint.conname);
+    END LOOP;
+
+    FOR i IN 1 .. COALESCE(array_length(v_names, 1), 0) LOOP
+        EXECUTE format('ALTER TABLE bulk_property_records DETACH PARTITION %I', v_names[i]);
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', v_names[i], v_names[i] || '_history');
+    END LOOP;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'bulk_property_records'::regclass AND contype = 'p'
+    ) THEN
+        ALTER TABLE bulk_property_records
+            ADD CONSTRAINT bulk_property_records_pkey PRIMARY KEY (id, market_id, is_current);
+        ALTER TABLE bulk_property_records
+            ADD CONSTRAINT bulk_property_records_parcel_snapshot_key UNIQUE (parcel_id, market_id, snapshot_id, is_current);
+    END IF;
+
+    FOR i IN 1 .. COALESCE(array_length(v_names, 1), 0) LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF bulk_property_records %s PARTITION BY LIST (is_current)',
+            v_names[i], v_bounds[i]
+        );
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (TRUE)', v_names[i] || '_current', v_names[i]);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES IN (FALSE)', v_names[i], v_names[i] || '_history');
+
+        RAISE NOTICE 'bulk_property_records partition % split into %_current / %_history', v_names[i], v_names[i], v_names[i];
+    END LOOP;
+END $$;
+
+
+-- Make a completed property snapshot its market's current one: retire the current rows of
+-- other snapshots and promote any of the snapshot's rows that were loaded cold (rows inserted
+-- straight into the hot partition are not touched). Called by BulkDataManager._mark_completed
+-- for every snapshot; snapshots that loaded no property rows (sunbiz, GIS, adjacency) are a
+-- no-op. rows_promoted counts the snapshot's current rows.
+CREATE OR REPLACE FUNCTION swap_current_property_snapshot(p_snapshot_id UUID)
+RETURNS TABLE(rows_promoted INTEGER, rows_retired INTEGER) AS $$
+DECLARE
+    v_market_id UUID;
+    v_data_source TEXT;
+    v_promoted INTEGER := 0;
+    v_retired INTEGER := 0;
+BEGIN
+    SELECT market_id, data_source
+    INTO v_market_id, v_data_source
+    FROM bulk_data_snapshots
+    WHERE id = p_snapshot_id;
+
+    IF v_market_id IS NULL OR NOT EXISTS (
+        SELECT 1 FROM bulk_property_records
+        WHERE market_id = v_market_id AND snapshot_id = p_snapshot_id
+    ) THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    -- One swap per market at a time
+    PERFORM pg_advisory_xact_lock(hashtext('swap_current_property_snapshot:' || v_market_id::text));
+
+    UPDATE bulk_property_records
+    SET is_current = FALSE
+    WHERE market_id = v_market_id
+      AND is_current
+      AND snapshot_id IS DISTINCT FROM p_snapshot_id;
+
+    GET DIAGNOSTICS v_retired = ROW_COUNT;
+
+    -- Cold-loaded rows only (CSV loader, the backfill below)
+    UPDATE bulk_property_records
+    SET is_current = TRUE
+    WHERE market_id = v_market_id
+      AND snapshot_id = p_snapshot_id
+      AND NOT is_current;
+
+    SELECT COUNT(*)::int
+    INTO v_promoted
+    FROM bulk_property_records
+    WHERE market_id = v_market_id
+      AND snapshot_id = p_snapshot_id
+      AND is_current;
+
+    UPDATE bulk_data_snapshots
+    SET is_current = (id = p_snapshot_id)
+    WHERE market_id = v_market_id
+      AND data_source = v_data_source;
+
+    RETURN QUERY SELECT v_promoted, v_retired;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Hot set = the latest completed snapshot with property rows, per market
+DO $$
+DECLARE
+    v_snapshot RECORD;
+    v_swap RECORD;
+BEGIN
+    FOR v_snapshot IN
+        SELECT DISTINCT ON (s.market_id) s.id, s.market_id
+        FROM bulk_data_snapshots s
+        WHERE s.status = 'completed'
+          AND EXISTS (
+              SELECT 1 FROM bulk_property_records bp
+              WHERE bp.market_id = s.market_id AND bp.snapshot_id = s.id
+          )
+        ORDER BY s.market_id, s.processing_completed_at DESC NULLS LAST, s.created_at DESC
+    LOOP
+        SELECT * INTO v_swap FROM swap_current_property_snapshot(v_snapshot.id);
+        RAISE NOTICE 'market %: snapshot % current (% rows)', v_snapshot.market_id, v_snapshot.id, v_swap.rows_promoted;
+    END LOOP;
+END $$;
+
+
+-- Read path for the hot set. SELECT * is expanded when the view is created: migrations
+-- that add bulk_property_records columns must recreate it.
+DROP VIEW IF EXISTS current_bulk_properties;
+
+CREATE VIEW current_bulk_properties AS
+SELECT *
+FROM bulk_property_records
+WHERE is_current;
+
+ANALYZE bulk_property_records;
+
+COMMENT ON COLUMN bulk_property_records.is_current IS 'Row belongs to its market''s current snapshot (hot partition); inserted TRUE by BulkDataManager, otherwise changed only by swap_current_property_snapshot()';
+COMMENT ON VIEW current_bulk_properties IS 'Current snapshot of bulk_property_records (hot partitions) - default read path';
+
+-- Usage:
+-- SELECT * FROM swap_current_property_snapshot('<snapshot uuid>');
+-- SELECT create_bulk_property_partitions('<market uuid>', 'ocala_fl');
+-- SELECT * FROM current_bulk_properties WHERE parcel_id = canonical_parcel_id(:parcel_id);
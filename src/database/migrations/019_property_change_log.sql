@@ -0,0 +1,794 @@
+-- Migration 019: Snapshot delta feed (per-parcel change log between property snapshots)
+--
+-- Every property_appraiser reload re-inserted every parcel, so a weekly reload cost
+-- O(all parcels) and nothing recorded what actually changed between snapshots.
+--
+-- BulkDataManager._process_property_records now fingerprints each incoming row
+-- (row_fingerprint, MD5 over the row's source values) and compares it with the parcel's
+-- current row: unchanged parcels are not written at all, new and changed parcels are
+-- inserted into the new snapshot (straight into the hot partition, see 018), and parcels
+-- missing from the file are logged as 'removed'. swap_current_property_snapshot(), in the
+-- same transaction, then:
+--   1. diffs each new row against the parcel's previous current row into property_change_log
+--      (changed fields with old/new values, owner keys on both sides)
+--   2. retires the replaced / removed current rows (and promotes cold-loaded rows, if any)
+-- so a reload costs O(changed parcels): unchanged parcels are neither written nor moved.
+-- Loaders that insert a whole file without diffing it (the CAMA CSV loader) call the swap
+-- with p_full_snapshot => TRUE instead, which logs every current parcel missing from the
+-- snapshot as 'removed' and retires it.
+--
+-- The hot partitions therefore hold each parcel's latest version, whichever snapshot it
+-- came from: bulk_property_records.snapshot_id is the snapshot that last changed the
+-- parcel. The refresh functions below read the hot set (is_current) instead of one
+-- snapshot_id, and refresh_owner_portfolios takes its owner delta from the change log.
+--
+-- Rows loaded before this migration have no fingerprint, so the first reload after it
+-- rewrites every parcel once (the change log only records real differences).
+
+ALTER TABLE bulk_property_records ADD COLUMN IF NOT EXISTS row_fingerprint TEXT;
+
+-- current_bulk_properties (018) expanded SELECT * when it was created; re-expand it so the
+-- read path carries row_fingerprint. The column is appended, so OR REPLACE keeps dependents.
+CREATE OR REPLACE VIEW current_bulk_properties AS
+SELECT *
+FROM bulk_property_records
+WHERE is_current;
+
+CREATE TABLE IF NOT EXISTS property_change_log (
+    id BIGSERIAL PRIMARY KEY,
+    market_id UUID NOT NULL REFERENCES markets(id),
+    parcel_id TEXT NOT NULL,
+    change_type TEXT NOT NULL CHECK (change_type IN ('added', 'changed', 'removed')),
+    snapshot_id UUID NOT NULL REFERENCES bulk_data_snapshots(id),          -- Snapshot that made the change
+    previous_snapshot_id UUID REFERENCES bulk_data_snapshots(id),          -- Snapshot the old values come from
+    changed_fields TEXT[] NOT NULL DEFAULT '{}',                           -- 'changed' rows only
+    old_values JSONB,        -- Changed fields ('changed') or a summary of the row ('removed')
+    new_values JSONB,        -- Changed fields ('changed') or a summary of the row ('added')
+    owner_key_before TEXT,
+    owner_key_after TEXT,
+    changed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_property_change_log_snapshot ON property_change_log(market_id, snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_property_change_log_parcel ON property_change_log(market_id, parcel_id, changed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_property_change_log_owner_before ON property_change_log(owner_key_before, changed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_property_change_log_owner_after ON property_change_log(owner_key_after, changed_at DESC);
+
+ALTER TABLE owner_portfolio_refresh_state ADD COLUMN IF NOT EXISTS last_change_id BIGINT;
+
+
+-- Apply a completed property snapshot's delta to its market's hot partition.
+-- p_full_snapshot: the snapshot holds every parcel of the market, so current parcels it does
+-- not contain are removed (loaders that log their own 'removed' rows leave it FALSE).
+-- 018 created the one-argument form; drop it so calls with one argument stay unambiguous
+DROP FUNCTION IF EXISTS swap_current_property_snapshot(UUID);
+
+CREATE OR REPLACE FUNCTION swap_current_property_snapshot(
+    p_snapshot_id UUID,
+    p_full_snapshot BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE(rows_promoted INTEGER, rows_retired INTEGER) AS $$
+DECLARE
+    -- Bookkeeping and derived columns are not part of a parcel's change history
+    v_untracked CONSTANT TEXT[] := ARRAY[
+        'id', 'market_id', 'snapshot_id', 'is_current', 'row_fingerprint', 'property_id',
+        'created_at', 'updated_at', 'owner_key', 'geog', 'coordinates', 'grid_x', 'grid_y',
+        'feature_vector', 'sales_history', 'permit_history', 'trim_notice',
+        'qpublic_enriched_at', 'qpublic_enrichment_status'
+    ];
+    v_market_id UUID;
+    v_data_source TEXT;
+    v_initial BOOLEAN;
+    v_promoted INTEGER := 0;
+    v_retired INTEGER := 0;
+BEGIN
+    SELECT market_id, data_source
+    INTO v_market_id, v_data_source
+    FROM bulk_data_snapshots
+    WHERE id = p_snapshot_id;
+
+    -- Property snapshots only (a reload with no changes has no rows but is still current)
+    IF v_market_id IS NULL OR NOT (
+        v_data_source LIKE 'property_appraiser%'
+        OR EXISTS (
+            SELECT 1 FROM bulk_property_records
+            WHERE market_id = v_market_id AND snapshot_id = p_snapshot_id
+        )
+    ) THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    -- One swap per market at a time
+    PERFORM pg_advisory_xact_lock(hashtext('swap_current_property_snapshot:' || v_market_id::text));
+
+    -- A market's first snapshot is a load, not a change
+    v_initial := NOT EXISTS (
+        SELECT 1 FROM bulk_property_records
+        WHERE market_id = v_market_id AND is_current AND snapshot_id IS DISTINCT FROM p_snapshot_id
+    );
+
+    INSERT INTO property_change_log (
+        market_id, parcel_id, change_type, snapshot_id, previous_snapshot_id,
+        changed_fields, old_values, new_values, owner_key_before, owner_key_after
+    )
+    SELECT
+        v_market_id,
+        n.parcel_id,
+        CASE WHEN o.parcel_id IS NULL THEN 'added' ELSE 'changed' END,
+        p_snapshot_id,
+        o.snapshot_id,
+        COALESCE(d.changed_fields, '{}'),
+        d.old_values,
+        CASE WHEN o.parcel_id IS NULL THEN
+            jsonb_build_object(
+                'owner_name', n.owner_name, 'site_address', n.site_address,
+                'property_type', n.property_type, 'market_value', n.market_value,
+                'last_sale_date', n.last_sale_date, 'last_sale_price', n.last_sale_price
+            )
+        ELSE d.new_values END,
+        o.owner_key,
+        n.owner_key
+    FROM bulk_property_records n
+    LEFT JOIN bulk_property_records o
+      ON o.market_id = v_market_id
+     AND o.is_current
+     AND o.snapshot_id IS DISTINCT FROM p_snapshot_id
+     AND o.parcel_id = n.parcel_id
+    CROSS JOIN LATERAL (
+        SELECT to_jsonb(n) - v_untracked as new_row, to_jsonb(o) - v_untracked as old_row
+    ) r
+    LEFT JOIN LATERAL (
+        SELECT ARRAY_AGG(nv.key ORDER BY nv.key) as changed_fields,
+               jsonb_object_agg(nv.key, r.old_row -> nv.key) as old_values,
+               jsonb_object_agg(nv.key, nv.value) as new_values
+        FROM jsonb_each(r.new_row) nv
+        WHERE (r.old_row -> nv.key) IS DISTINCT FROM nv.value
+    ) d ON o.parcel_id IS NOT NULL
+    WHERE n.market_id = v_market_id
+      AND n.snapshot_id = p_snapshot_id
+      AND ((o.parcel_id IS NULL AND NOT v_initial) OR d.changed_fields IS NOT NULL);
+
+    -- Full snapshot: current parcels it does not contain were removed (an empty snapshot
+    -- removes nothing)
+    IF p_full_snapshot AND EXISTS (
+        SELECT 1 FROM bulk_property_records
+        WHERE market_id = v_market_id AND snapshot_id = p_snapshot_id
+    ) THEN
+        INSERT INTO property_change_log (
+            market_id, parcel_id, change_type, snapshot_id, previous_snapshot_id,
+            old_values, owner_key_before
+        )
+        SELECT
+            v_market_id,
+            o.parcel_id,
+            'removed',
+            p_snapshot_id,
+            o.snapshot_id,
+            jsonb_build_object(
+                'owner_name', o.owner_name, 'site_address', o.site_address,
+                'property_type', o.property_type, 'market_value', o.market_value,
+                'last_sale_date', o.last_sale_date, 'last_sale_price', o.last_sale_price
+            ),
+            o.owner_key
+        FROM bulk_property_records o
+        WHERE o.market_id = v_market_id
+          AND o.is_current
+          AND o.snapshot_id IS DISTINCT FROM p_snapshot_id
+          AND NOT EXISTS (
+              SELECT 1 FROM bulk_property_records n
+              WHERE n.market_id = v_market_id
+                AND n.snapshot_id = p_snapshot_id
+                AND n.parcel_id = o.parcel_id
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM property_change_log c
+              WHERE c.market_id = v_market_id
+                AND c.snapshot_id = p_snapshot_id
+                AND c.change_type = 'removed'
+                AND c.parcel_id = o.parcel_id
+          );
+    END IF;
+
+    -- Replaced and removed parcels leave the hot partition (and the comp vector index);
+    -- these are the only rows that move between partitions
+    UPDATE bulk_property_records o
+    SET is_current = FALSE,
+        feature_vector = NULL
+    WHERE o.market_id = v_market_id
+      AND o.is_current
+      AND o.snapshot_id IS DISTINCT FROM p_snapshot_id
+      AND o.parcel_id IN (
+          SELECT n.parcel_id
+          FROM bulk_property_records n
+          WHERE n.market_id = v_market_id
+            AND n.snapshot_id = p_snapshot_id
+          UNION
+          SELECT c.parcel_id
+          FROM property_change_log c
+          WHERE c.market_id = v_market_id
+            AND c.snapshot_id = p_snapshot_id
+            AND c.change_type = 'removed'
+      );
+
+    GET DIAGNOSTICS v_retired = ROW_COUNT;
+
+    -- Cold-loaded rows only (CSV loader); BulkDataManager inserts into the hot partition
+    UPDATE bulk_property_records
+    SET is_current = TRUE
+    WHERE market_id = v_market_id
+      AND snapshot_id = p_snapshot_id
+      AND NOT is_current;
+
+    SELECT COUNT(*)::int
+    INTO v_promoted
+    FROM bulk_property_records
+    WHERE market_id = v_market_id
+      AND snapshot_id = p_snapshot_id
+      AND is_current;
+
+    UPDATE bulk_data_snapshots
+    SET is_current = (id = p_snapshot_id)
+    WHERE market_id = v_market_id
+      AND data_source = v_data_source;
+
+    RETURN QUERY SELECT v_promoted, v_retired;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Derived tables read the hot set (a parcel's current row may come from an older snapshot)
+CREATE OR REPLACE FUNCTION refresh_market_stats_monthly(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_sales_months INTEGER DEFAULT 36
+)
+RETURNS TABLE(inventory_rows INTEGER, sales_rows INTEGER) AS $$
+DECLARE
+    v_month DATE := DATE_TRUNC('month', CURRENT_DATE)::date;
+    v_first_sales_month DATE := (DATE_TRUNC('month', CURRENT_DATE) - make_interval(months => p_sales_months))::date;
+    v_inventory_rows INTEGER := 0;
+    v_sales_rows INTEGER := 0;
+BEGIN
+    CREATE TEMP TABLE market_stats_source ON COMMIT DROP AS
+    SELECT
+        UPPER(TRIM(city)) as city,
+        COALESCE(NULLIF(TRIM(property_type), ''), 'UNKNOWN') as property_type,
+        market_value,
+        lot_size_acres,
+        DATE_TRUNC('month', last_sale_date)::date as sale_month,
+        last_sale_price
+    FROM bulk_property_records
+    WHERE market_id = p_market_id
+      AND is_current
+      AND city IS NOT NULL AND TRIM(city) != '';
+
+    -- Sales are recomputed for the whole horizon; inventory only for the current month so
+    -- earlier months keep the inventory of the snapshot that was current back then
+    UPDATE market_stats_monthly
+    SET sales_count = 0, sales_priced_count = 0, sales_price_sum = 0, sales_price_sketch = NULL
+    WHERE market_id = p_market_id;
+
+    UPDATE market_stats_monthly
+    SET inventory_count = 0, inventory_value_sum = 0, inventory_value_min = NULL,
+        inventory_value_max = NULL, inventory_value_sketch = NULL,
+        lot_size_sum = 0, lot_size_count = 0, inventory_as_of = NULL, snapshot_id = NULL
+    WHERE market_id = p_market_id AND month = v_month;
+
+    WITH groups AS (
+        SELECT city, property_type,
+               COUNT(*) as inventory_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               COALESCE(SUM(lot_size_acres), 0) as lot_size_sum,
+               COUNT(lot_size_acres) as lot_size_count
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY city, property_type
+    ),
+    buckets AS (
+        SELECT city, property_type, market_stats_price_bucket(market_value) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY 1, 2, 3
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        inventory_count, inventory_value_sum, inventory_value_min, inventory_value_max,
+        inventory_value_sketch, lot_size_sum, lot_size_count, inventory_as_of, snapshot_id,
+        refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, v_month,
+        g.inventory_count, g.value_sum, g.value_min, g.value_max,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        g.lot_size_sum, g.lot_size_count, NOW(), p_snapshot_id,
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        inventory_count = EXCLUDED.inventory_count,
+        inventory_value_sum = EXCLUDED.inventory_value_sum,
+        inventory_value_min = EXCLUDED.inventory_value_min,
+        inventory_value_max = EXCLUDED.inventory_value_max,
+        inventory_value_sketch = EXCLUDED.inventory_value_sketch,
+        lot_size_sum = EXCLUDED.lot_size_sum,
+        lot_size_count = EXCLUDED.lot_size_count,
+        inventory_as_of = EXCLUDED.inventory_as_of,
+        snapshot_id = EXCLUDED.snapshot_id,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_inventory_rows = ROW_COUNT;
+
+    WITH groups AS (
+        SELECT city, property_type, sale_month,
+               COUNT(*) as sales_count,
+               COUNT(last_sale_price) FILTER (WHERE last_sale_price > 0) as priced_count,
+               COALESCE(SUM(last_sale_price) FILTER (WHERE last_sale_price > 0), 0) as price_sum
+        FROM market_stats_source
+        WHERE market_value > 0
+          AND sale_month >= v_first_sales_month
+          AND sale_month <= v_month
+        GROUP BY city, property_type, sale_month
+    ),
+    buckets AS (
+        SELECT city, property_type, sale_month, market_stats_price_bucket(last_sale_price) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+          AND last_sale_price > 0
+          AND sale_month >= v_first_sales_month
+          AND sale_month <= v_month
+        GROUP BY 1, 2, 3, 4
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        sales_count, sales_priced_count, sales_price_sum, sales_price_sketch, refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, g.sale_month,
+        g.sales_count, g.priced_count, g.price_sum,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type
+                               AND b.sale_month = g.sale_month AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        sales_count = EXCLUDED.sales_count,
+        sales_priced_count = EXCLUDED.sales_priced_count,
+        sales_price_sum = EXCLUDED.sales_price_sum,
+        sales_price_sketch = EXCLUDED.sales_price_sketch,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_sales_rows = ROW_COUNT;
+
+    -- Rows left with neither inventory nor sales carry no information
+    DELETE FROM market_stats_monthly
+    WHERE market_id = p_market_id
+      AND inventory_as_of IS NULL
+      AND sales_count = 0;
+
+    DROP TABLE market_stats_source;
+
+    RETURN QUERY SELECT v_inventory_rows, v_sales_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION refresh_property_grid(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_base_meters NUMERIC DEFAULT 125,
+    p_levels INTEGER DEFAULT 6
+)
+RETURNS TABLE(parcels_gridded INTEGER, cells_written INTEGER) AS $$
+DECLARE
+    v_ref_lat DOUBLE PRECISION;
+    v_m_per_deg_lat CONSTANT DOUBLE PRECISION := 110574.0;
+    v_m_per_deg_lon DOUBLE PRECISION;
+    v_parcels INTEGER := 0;
+    v_cells INTEGER := 0;
+BEGIN
+    -- Reference latitude for the whole market (rounded so it is stable between snapshots)
+    SELECT ROUND(AVG(latitude)::numeric, 1)
+    INTO v_ref_lat
+    FROM bulk_property_records
+    WHERE market_id = p_market_id AND is_current AND latitude IS NOT NULL;
+
+    IF v_ref_lat IS NULL THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    v_m_per_deg_lon := 111320.0 * cos(radians(v_ref_lat));
+
+    UPDATE bulk_property_records
+    SET grid_x = FLOOR(longitude * v_m_per_deg_lon / p_base_meters)::int,
+        grid_y = FLOOR(latitude * v_m_per_deg_lat / p_base_meters)::int
+    WHERE market_id = p_market_id
+      AND is_current
+      AND latitude IS NOT NULL
+      AND longitude IS NOT NULL
+      AND (grid_x IS DISTINCT FROM FLOOR(longitude * v_m_per_deg_lon / p_base_meters)::int
+           OR grid_y IS DISTINCT FROM FLOOR(latitude * v_m_per_deg_lat / p_base_meters)::int);
+
+    GET DIAGNOSTICS v_parcels = ROW_COUNT;
+
+    DELETE FROM property_grid_rollups WHERE market_id = p_market_id;
+
+    WITH cells AS (
+        SELECT
+            UPPER(TRIM(bp.city)) as city,
+            lvl.level,
+            bp.grid_x >> lvl.level as cell_x,
+            bp.grid_y >> lvl.level as cell_y,
+            COALESCE(NULLIF(TRIM(bp.property_type), ''), 'UNKNOWN') as property_type,
+            bp.parcel_id, bp.market_value, bp.latitude, bp.longitude
+        FROM bulk_property_records bp
+        CROSS JOIN generate_series(0, p_levels - 1) AS lvl(level)
+        WHERE bp.market_id = p_market_id
+          AND bp.is_current
+          AND bp.grid_x IS NOT NULL
+          AND bp.city IS NOT NULL AND TRIM(bp.city) != ''
+          AND bp.market_value > 0
+    ),
+    type_cells AS (
+        SELECT city, level, cell_x, cell_y, property_type,
+               COUNT(*) as type_count,
+               SUM(market_value) as type_value_sum
+        FROM cells
+        GROUP BY city, level, cell_x, cell_y, property_type
+    ),
+    type_rollups AS (
+        SELECT city, level, cell_x, cell_y,
+               jsonb_object_agg(property_type, jsonb_build_object('count', type_count, 'value_sum', type_value_sum)) as type_counts,
+               (ARRAY_AGG(property_type ORDER BY type_count DESC, property_type))[1] as dominant_type,
+               MAX(type_count) as dominant_count
+        FROM type_cells
+        GROUP BY city, level, cell_x, cell_y
+    ),
+    cell_rollups AS (
+        SELECT city, level, cell_x, cell_y,
+               COUNT(*) as property_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               MIN(latitude) as min_lat, MAX(latitude) as max_lat,
+               MIN(longitude) as min_lon, MAX(longitude) as max_lon,
+               (ARRAY_AGG(parcel_id ORDER BY market_value DESC, parcel_id))[1:25] as sample_parcel_ids
+        FROM cells
+        GROUP BY city, level, cell_x, cell_y
+    )
+    INSERT INTO property_grid_rollups (
+        market_id, city, resolution_level, cell_x, cell_y, cell_size_meters,
+        center_lat, center_lon, min_lat, max_lat, min_lon, max_lon,
+        property_count, value_sum, value_min, value_max,
+        type_counts, dominant_type, dominant_count, sample_parcel_ids,
+        snapshot_id, refreshed_at
+    )
+    SELECT
+        p_market_id, c.city, c.level, c.cell_x, c.cell_y, p_base_meters * (1 << c.level),
+        (c.cell_y + 0.5) * p_base_meters * (1 << c.level) / v_m_per_deg_lat,
+        (c.cell_x + 0.5) * p_base_meters * (1 << c.level) / v_m_per_deg_lon,
+        c.min_lat, c.max_lat, c.min_lon, c.max_lon,
+        c.property_count, c.value_sum, c.value_min, c.value_max,
+        t.type_counts, t.dominant_type, t.dominant_count, c.sample_parcel_ids,
+        p_snapshot_id, NOW()
+    FROM cell_rollups c
+    JOIN type_rollups t USING (city, level, cell_x, cell_y);
+
+    GET DIAGNOSTICS v_cells = ROW_COUNT;
+
+    RETURN QUERY SELECT v_parcels, v_cells;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION refresh_owner_portfolios(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_full BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE(owners_changed INTEGER, rows_written INTEGER, rebuilt BOOLEAN) AS $$
+DECLARE
+    v_previous_snapshot_id UUID;
+    v_last_change_id BIGINT;
+    v_max_change_id BIGINT;
+    v_full BOOLEAN := p_full;
+    v_owners INTEGER := 0;
+    v_rows INTEGER := 0;
+BEGIN
+    SELECT s.snapshot_id, s.last_change_id INTO v_previous_snapshot_id, v_last_change_id
+    FROM owner_portfolio_refresh_state s
+    WHERE s.market_id = p_market_id;
+
+    SELECT COALESCE(MAX(c.id), 0) INTO v_max_change_id
+    FROM property_change_log c
+    WHERE c.market_id = p_market_id;
+
+    IF v_previous_snapshot_id IS NULL OR v_last_change_id IS NULL THEN
+        v_full := TRUE;
+    ELSIF v_previous_snapshot_id = p_snapshot_id AND NOT v_full THEN
+        RETURN QUERY SELECT 0, 0, FALSE;
+        RETURN;
+    END IF;
+
+    DROP TABLE IF EXISTS owner_portfolio_changed;
+    CREATE TEMP TABLE owner_portfolio_changed (owner_key TEXT PRIMARY KEY) ON COMMIT DROP;
+
+    IF v_full THEN
+        INSERT INTO owner_portfolio_changed
+        SELECT DISTINCT bp.owner_key
+        FROM bulk_property_records bp
+        WHERE bp.market_id = p_market_id
+          AND bp.is_current
+          AND bp.owner_key NOT IN ('', 'UNKNOWN');
+
+        DELETE FROM owner_portfolio_rollups WHERE market_id = p_market_id;
+    ELSE
+        -- Change log delta: owners on either side of any parcel added, removed or with a
+        -- changed rollup input since the last refresh
+        INSERT INTO owner_portfolio_changed
+        SELECT DISTINCT k.owner_key
+        FROM property_change_log c
+        CROSS JOIN LATERAL (VALUES (c.owner_key_before), (c.owner_key_after)) AS k(owner_key)
+        WHERE c.market_id = p_market_id
+          AND c.id > v_last_change_id
+          AND (c.change_type != 'changed'
+               OR c.changed_fields && ARRAY['owner_name', 'city', 'property_type', 'market_value',
+                                            'lot_size_acres', 'last_sale_date'])
+          AND k.owner_key NOT IN ('', 'UNKNOWN');
+
+        DELETE FROM owner_portfolio_rollups r
+        USING owner_portfolio_changed ch
+        WHERE r.market_id = p_market_id
+          AND r.owner_key = ch.owner_key;
+    END IF;
+
+    SELECT COUNT(*) INTO v_owners FROM owner_portfolio_changed;
+
+    WITH source AS (
+        SELECT
+            bp.owner_key,
+            bp.owner_name,
+            COALESCE(NULLIF(UPPER(TRIM(bp.city)), ''), 'UNKNOWN') as city,
+            COALESCE(NULLIF(TRIM(bp.property_type), ''), 'UNKNOWN') as property_type,
+            bp.market_value,
+            bp.lot_size_acres,
+            bp.last_sale_date,
+            EXTRACT(YEAR FROM bp.last_sale_date)::int as sale_year
+        FROM bulk_property_records bp
+        JOIN owner_portfolio_changed ch ON ch.owner_key = bp.owner_key
+        WHERE bp.market_id = p_market_id
+          AND bp.is_current
+          AND bp.market_value > 0
+    ),
+    year_counts AS (
+        SELECT owner_key, city, property_type, sale_year, COUNT(*) as sales
+        FROM source
+        WHERE sale_year IS NOT NULL
+        GROUP BY GROUPING SETS (
+            (owner_key, sale_year),
+            (owner_key, city, sale_year),
+            (owner_key, property_type, sale_year),
+            (owner_key, city, property_type, sale_year)
+        )
+    ),
+    year_rollups AS (
+        SELECT owner_key, COALESCE(city, '') as city, COALESCE(property_type, '') as property_type,
+               jsonb_object_agg(sale_year::text, sales) as acquisitions_by_year
+        FROM year_counts
+        GROUP BY owner_key, COALESCE(city, ''), COALESCE(property_type, '')
+    ),
+    rollups AS (
+        SELECT
+            owner_key,
+            COALESCE(city, '') as city,
+            COALESCE(property_type, '') as property_type,
+            MIN(owner_name) as owner_name,
+            COUNT(*) as property_count,
+            SUM(market_value) as total_value,
+            MIN(market_value) as min_value,
+            MAX(market_value) as max_value,
+            SUM(lot_size_acres) as total_lot_size_acres,
+            MIN(last_sale_date) as first_acquisition,
+            MAX(last_sale_date) as last_acquisition
+        FROM source
+        GROUP BY GROUPING SETS (
+            (owner_key),
+            (owner_key, city),
+            (owner_key, property_type),
+            (owner_key, city, property_type)
+        )
+    )
+    INSERT INTO owner_portfolio_rollups (
+        market_id, owner_key, city, property_type, owner_name,
+        property_count, total_value, min_value, max_value, total_lot_size_acres,
+        first_acquisition, last_acquisition, acquisitions_by_year,
+        snapshot_id, refreshed_at
+    )
+    SELECT
+        p_market_id, r.owner_key, r.city, r.property_type, r.owner_name,
+        r.property_count, r.total_value, r.min_value, r.max_value, r.total_lot_size_acres,
+        r.first_acquisition, r.last_acquisition, COALESCE(y.acquisitions_by_year, '{}'::jsonb),
+        p_snapshot_id, NOW()
+    FROM rollups r
+    LEFT JOIN year_rollups y USING (owner_key, city, property_type);
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- Breakdowns from the finer grains just written
+    UPDATE owner_portfolio_rollups r
+    SET type_breakdown = (
+            SELECT jsonb_object_agg(f.property_type, f.property_count)
+            FROM owner_portfolio_rollups f
+            WHERE f.market_id = r.market_id
+              AND f.owner_key = r.owner_key
+              AND f.city = r.city
+              AND f.property_type != ''
+        )
+    FROM owner_portfolio_changed ch
+    WHERE r.market_id = p_market_id
+      AND r.owner_key = ch.owner_key
+      AND r.property_type = '';
+
+    UPDATE owner_portfolio_rollups r
+    SET city_breakdown = (
+            SELECT jsonb_object_agg(f.city, f.property_count)
+            FROM owner_portfolio_rollups f
+            WHERE f.market_id = r.market_id
+              AND f.owner_key = r.owner_key
+              AND f.property_type = r.property_type
+              AND f.city != ''
+        )
+    FROM owner_portfolio_changed ch
+    WHERE r.market_id = p_market_id
+      AND r.owner_key = ch.owner_key
+      AND r.city = '';
+
+    INSERT INTO owner_portfolio_refresh_state (market_id, snapshot_id, last_change_id, owners_refreshed, full_rebuild, refreshed_at)
+    VALUES (p_market_id, p_snapshot_id, v_max_change_id, v_owners, v_full, NOW())
+    ON CONFLICT (market_id) DO UPDATE SET
+        snapshot_id = EXCLUDED.snapshot_id,
+        last_change_id = EXCLUDED.last_change_id,
+        owners_refreshed = EXCLUDED.owners_refreshed,
+        full_rebuild = EXCLUDED.full_rebuild,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    RETURN QUERY SELECT v_owners, v_rows, v_full;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION refresh_property_feature_vectors(
+    p_market_id UUID,
+    p_snapshot_id UUID
+)
+RETURNS TABLE(vectors_written INTEGER, vectors_cleared INTEGER) AS $$
+DECLARE
+    v_written INTEGER := 0;
+    v_cleared INTEGER := 0;
+BEGIN
+    -- Per-market scaling from the snapshot
+    INSERT INTO property_feature_scaling (
+        market_id, snapshot_id, cities, reference_latitude,
+        means, stddevs, weights, neighborhood_values, refreshed_at
+    )
+    SELECT
+        p_market_id,
+        p_snapshot_id,
+        s.cities,
+        s.ref_lat,
+        ARRAY[s.value_mean, s.sqft_mean, s.beds_mean, s.baths_mean, s.year_mean, s.lot_mean,
+              s.lon_mean * 111320.0 * cos(radians(s.ref_lat)), s.lat_mean * 110574.0,
+              0, 0, s.value_mean],
+        ARRAY[s.value_sd, s.sqft_sd, s.beds_sd, s.baths_sd, s.year_sd, s.lot_sd,
+              2000, 2000, 1, 1, s.value_sd],
+        ARRAY[2.0, 1.5, 1.0, 1.0, 1.0, 1.0, 1.5, 1.5, 0.5, 0.5, 1.0]::float8[],
+        COALESCE(n.neighborhood_values, '{}'::jsonb),
+        NOW()
+    FROM (
+        SELECT
+            ARRAY_AGG(DISTINCT UPPER(TRIM(city))) FILTER (WHERE city IS NOT NULL AND TRIM(city) != '') as cities,
+            ROUND(AVG(latitude)::numeric, 1)::float8 as ref_lat,
+            AVG(ln(market_value::float8)) as value_mean,
+            STDDEV_SAMP(ln(market_value::float8)) as value_sd,
+            AVG(ln(square_feet::float8)) FILTER (WHERE square_feet > 0) as sqft_mean,
+            STDDEV_SAMP(ln(square_feet::float8)) FILTER (WHERE square_feet > 0) as sqft_sd,
+            AVG(bedrooms::float8) as beds_mean,
+            STDDEV_SAMP(bedrooms::float8) as beds_sd,
+            AVG(bathrooms::float8) as baths_mean,
+            STDDEV_SAMP(bathrooms::float8) as baths_sd,
+            AVG(year_built::float8) FILTER (WHERE year_built > 1800) as year_mean,
+            STDDEV_SAMP(year_built::float8) FILTER (WHERE year_built > 1800) as year_sd,
+            AVG(ln(lot_size_acres::float8)) FILTER (WHERE lot_size_acres > 0) as lot_mean,
+            STDDEV_SAMP(ln(lot_size_acres::float8)) FILTER (WHERE lot_size_acres > 0) as lot_sd,
+            AVG(latitude::float8) as lat_mean,
+            AVG(longitude::float8) as lon_mean
+        FROM bulk_property_records
+        WHERE market_id = p_market_id
+          AND is_current
+          AND market_value > 0
+    ) s
+    CROSS JOIN (
+        SELECT jsonb_object_agg(neighborhood, median_ln_value) as neighborhood_values
+        FROM (
+            SELECT UPPER(TRIM(neighborhood_desc)) as neighborhood,
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ln(market_value::float8)) as median_ln_value
+            FROM bulk_property_records
+            WHERE market_id = p_market_id
+              AND is_current
+              AND market_value > 0
+              AND neighborhood_desc IS NOT NULL AND TRIM(neighborhood_desc) != ''
+            GROUP BY UPPER(TRIM(neighborhood_desc))
+        ) nbhd
+    ) n
+    WHERE s.ref_lat IS NOT NULL
+    ON CONFLICT (market_id) DO UPDATE SET
+        snapshot_id = EXCLUDED.snapshot_id,
+        cities = EXCLUDED.cities,
+        reference_latitude = EXCLUDED.reference_latitude,
+        means = EXCLUDED.means,
+        stddevs = EXCLUDED.stddevs,
+        weights = EXCLUDED.weights,
+        neighborhood_values = EXCLUDED.neighborhood_values,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    UPDATE bulk_property_records bp
+    SET feature_vector = property_feature_vector(
+            s, bp.market_value, bp.square_feet, bp.bedrooms, bp.bathrooms, bp.year_built,
+            bp.lot_size_acres, bp.latitude, bp.longitude, bp.has_pool, bp.has_garage,
+            bp.neighborhood_desc
+        )
+    FROM property_feature_scaling s
+    WHERE s.market_id = p_market_id
+      AND bp.market_id = p_market_id
+      AND bp.is_current
+      AND bp.market_value > 0;
+
+    GET DIAGNOSTICS v_written = ROW_COUNT;
+
+    -- Retired rows lose their vector in swap_current_property_snapshot(); here only current
+    -- parcels that no longer have a market value drop out of the index
+    UPDATE bulk_property_records
+    SET feature_vector = NULL
+    WHERE market_id = p_market_id
+      AND is_current
+      AND NOT market_value > 0
+      AND feature_vector IS NOT NULL;
+
+    GET DIAGNOSTICS v_cleared = ROW_COUNT;
+
+    UPDATE property_feature_scaling
+    SET vectors_built = v_written
+    WHERE market_id = p_market_id;
+
+    RETURN QUERY SELECT v_written, v_cleared;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON COLUMN bulk_property_records.row_fingerprint IS 'MD5 of the row''s source values (BulkDataManager._row_fingerprint) - unchanged parcels are not reloaded';
+COMMENT ON COLUMN bulk_property_records.snapshot_id IS 'Snapshot that last changed this parcel (unchanged parcels are carried over, migration 019)';
+COMMENT ON TABLE property_change_log IS 'Per-parcel deltas between property snapshots: added / changed (fields, old/new values) / removed';
+
+-- Usage:
+-- SELECT parcel_id, change_type, changed_fields, old_values, new_values
+-- FROM property_change_log
+-- WHERE market_id = :market_id AND snapshot_id = :snapshot_id;
+--
+-- SELECT * FROM property_change_log
+-- WHERE owner_key_after = normalize_owner_key(:owner_name) AND changed_at >= NOW() - INTERVAL '180 days';
@@ -0,0 +1,554 @@
+-- Migration 020: Incremental refresh of derived tables after snapshot completion
+--
+-- The tables derived from bulk_property_records (market_stats_monthly,
+-- property_grid_rollups, owner_portfolio_rollups, feature vectors, parcel_owner_components,
+-- entity_market_properties) were rebuilt for the whole market after every property sync,
+-- or - for entity_market_properties - only when someone ran a script by hand.
+--
+-- src/services/derived_refresh.py (DerivedTableRefresher) now runs from
+-- BulkDataManager._mark_completed and DataIngestionService.ingest_batch. It reads the
+-- property_change_log entries each table has not seen yet, maps them to the keys the table
+-- is built on and refreshes only those keys:
+--
+--   market_stats_monthly       city          refresh_market_stats_monthly(..., p_cities)
+--   property_grid_rollups      city          refresh_property_grid(..., p_cities)
+--   owner_portfolio_rollups    owner_key     refresh_owner_portfolios() (incremental since 015)
+--   feature vectors            parcel_id     refresh_property_feature_vectors(..., p_parcel_ids)
+--   parcel_owner_components    market        full rebuild, only when owners / cities changed
+--   entity_market_properties   entity_key    refresh_entity_market_properties(..., p_entity_keys)
+--
+-- Every refresh is timed and recorded: derived_refresh_state holds each table's position
+-- in the change log and its latest metrics, derived_refresh_log one row per refresh.
+-- staleness_ms is the time from the oldest change a refresh applied to the refresh
+-- finishing; derived_table_staleness shows what is still pending.
+
+CREATE TABLE IF NOT EXISTS derived_refresh_state (
+    table_name TEXT NOT NULL,
+    market_id UUID NOT NULL REFERENCES markets(id),
+
+    last_change_id BIGINT,                      -- property_change_log.id the table reflects
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+
+    -- Latest refresh
+    refreshed_at TIMESTAMP,
+    duration_ms INTEGER,
+    keys_refreshed INTEGER,                     -- NULL = whole market
+    rows_written INTEGER,
+    full_rebuild BOOLEAN,
+    staleness_ms BIGINT,
+    last_error TEXT,                            -- Set when the latest refresh failed (position not advanced)
+
+    PRIMARY KEY (table_name, market_id)
+);
+
+CREATE TABLE IF NOT EXISTS derived_refresh_log (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    market_id UUID NOT NULL REFERENCES markets(id),
+    trigger TEXT NOT NULL,                      -- 'snapshot', 'ingestion', 'manual'
+    snapshot_id UUID,
+
+    changes_seen INTEGER NOT NULL DEFAULT 0,
+    keys_refreshed INTEGER,
+    rows_written INTEGER,
+    full_rebuild BOOLEAN NOT NULL DEFAULT FALSE,
+    duration_ms INTEGER NOT NULL,
+    staleness_ms BIGINT,
+    error TEXT,
+
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_derived_refresh_log_table
+    ON derived_refresh_log(table_name, market_id, refreshed_at DESC);
+
+-- Changes each derived table has not applied yet
+CREATE OR REPLACE VIEW derived_table_staleness AS
+SELECT
+    s.table_name,
+    s.market_id,
+    s.refreshed_at,
+    s.duration_ms,
+    s.staleness_ms,
+    s.last_error,
+    pending.changes as pending_changes,
+    (EXTRACT(EPOCH FROM NOW() - pending.oldest_changed_at) * 1000)::BIGINT as pending_age_ms
+FROM derived_refresh_state s
+CROSS JOIN LATERAL (
+    SELECT COUNT(*) as changes, MIN(c.changed_at) as oldest_changed_at
+    FROM property_change_log c
+    WHERE c.market_id = s.market_id
+      AND c.id > COALESCE(s.last_change_id, 0)
+) pending;
+
+
+-- Keyed variants of the 019 refresh functions: NULL keys keep the whole-market behaviour
+DROP FUNCTION IF EXISTS refresh_market_stats_monthly(UUID, UUID, INTEGER);
+
+CREATE OR REPLACE FUNCTION refresh_market_stats_monthly(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_sales_months INTEGER DEFAULT 36,
+    p_cities TEXT[] DEFAULT NULL
+)
+RETURNS TABLE(inventory_rows INTEGER, sales_rows INTEGER) AS $$
+DECLARE
+    v_month DATE := DATE_TRUNC('month', CURRENT_DATE)::date;
+    v_first_sales_month DATE := (DATE_TRUNC('month', CURRENT_DATE) - make_interval(months => p_sales_months))::date;
+    v_inventory_rows INTEGER := 0;
+    v_sales_rows INTEGER := 0;
+BEGIN
+    CREATE TEMP TABLE market_stats_source ON COMMIT DROP AS
+    SELECT
+        UPPER(TRIM(city)) as city,
+        COALESCE(NULLIF(TRIM(property_type), ''), 'UNKNOWN') as property_type,
+        market_value,
+        lot_size_acres,
+        DATE_TRUNC('month', last_sale_date)::date as sale_month,
+        last_sale_price
+    FROM bulk_property_records
+    WHERE market_id = p_market_id
+      AND is_current
+      AND city IS NOT NULL AND TRIM(city) != ''
+      AND (p_cities IS NULL OR UPPER(TRIM(city)) = ANY(p_cities));
+
+    -- Sales are recomputed for the whole horizon; inventory only for the current month so
+    -- earlier months keep the inventory of the snapshot that was current back then. With
+    -- p_cities only those cities' rows are reset and rebuilt.
+    UPDATE market_stats_monthly
+    SET sales_count = 0, sales_priced_count = 0, sales_price_sum = 0, sales_price_sketch = NULL
+    WHERE market_id = p_market_id
+      AND (p_cities IS NULL OR city = ANY(p_cities));
+
+    UPDATE market_stats_monthly
+    SET inventory_count = 0, inventory_value_sum = 0, inventory_value_min = NULL,
+        inventory_value_max = NULL, inventory_value_sketch = NULL,
+        lot_size_sum = 0, lot_size_count = 0, inventory_as_of = NULL, snapshot_id = NULL
+    WHERE market_id = p_market_id AND month = v_month
+      AND (p_cities IS NULL OR city = ANY(p_cities));
+
+    WITH groups AS (
+        SELECT city, property_type,
+               COUNT(*) as inventory_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               COALESCE(SUM(lot_size_acres), 0) as lot_size_sum,
+               COUNT(lot_size_acres) as lot_size_count
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY city, property_type
+    ),
+    buckets AS (
+        SELECT city, property_type, market_stats_price_bucket(market_value) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY 1, 2, 3
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        inventory_count, inventory_value_sum, inventory_value_min, inventory_value_max,
+        inventory_value_sketch, lot_size_sum, lot_size_count, inventory_as_of, snapshot_id,
+        refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, v_month,
+        g.inventory_count, g.value_sum, g.value_min, g.value_max,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        g.lot_size_sum, g.lot_size_count, NOW(), p_snapshot_id,
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        inventory_count = EXCLUDED.inventory_count,
+        inventory_value_sum = EXCLUDED.inventory_value_sum,
+        inventory_value_min = EXCLUDED.inventory_value_min,
+        inventory_value_max = EXCLUDED.inventory_value_max,
+        inventory_value_sketch = EXCLUDED.inventory_value_sketch,
+        lot_size_sum = EXCLUDED.lot_size_sum,
+        lot_size_count = EXCLUDED.lot_size_count,
+        inventory_as_of = EXCLUDED.inventory_as_of,
+        snapshot_id = EXCLUDED.snapshot_id,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_inventory_rows = ROW_COUNT;
+
+    WITH groups AS (
+        SELECT city, property_type, sale_month,
+               COUNT(*) as sales_count,
+               COUNT(last_sale_price) FILTER (WHERE last_sale_price > 0) as priced_count,
+               COALESCE(SUM(last_sale_price) FILTER (WHERE last_sale_price > 0), 0) as price_sum
+        FROM market_stats_source
+        WHERE market_value > 0
+          AND sale_month >= v_first_sales_month
+          AND sale_month <= v_month
+        GROUP BY city, property_type, sale_month
+    ),
+    buckets AS (
+        SELECT city, property_type, sale_month, market_stats_price_bucket(last_sale_price) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+          AND last_sale_price > 0
+          AND sale_month >= v_first_sales_month
+          AND sale_month <= v_month
+        GROUP BY 1, 2, 3, 4
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        sales_count, sales_priced_count, sales_price_sum, sales_price_sketch, refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, g.sale_month,
+        g.sales_count, g.priced_count, g.price_sum,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type
+                               AND b.sale_month = g.sale_month AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        sales_count = EXCLUDED.sales_count,
+        sales_priced_count = EXCLUDED.sales_priced_count,
+        sales_price_sum = EXCLUDED.sales_price_sum,
+        sales_price_sketch = EXCLUDED.sales_price_sketch,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_sales_rows = ROW_COUNT;
+
+    -- Rows left with neither inventory nor sales carry no information
+    DELETE FROM market_stats_monthly
+    WHERE market_id = p_market_id
+      AND (p_cities IS NULL OR city = ANY(p_cities))
+      AND inventory_as_of IS NULL
+      AND sales_count = 0;
+
+    DROP TABLE market_stats_source;
+
+    RETURN QUERY SELECT v_inventory_rows, v_sales_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP FUNCTION IF EXISTS refresh_property_grid(UUID, UUID, NUMERIC, INTEGER);
+
+CREATE OR REPLACE FUNCTION refresh_property_grid(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_base_meters NUMERIC DEFAULT 125,
+    p_levels INTEGER DEFAULT 6,
+    p_cities TEXT[] DEFAULT NULL
+)
+RETURNS TABLE(parcels_gridded INTEGER, cells_written INTEGER) AS $$
+DECLARE
+    v_ref_lat DOUBLE PRECISION;
+    v_m_per_deg_lat CONSTANT DOUBLE PRECISION := 110574.0;
+    v_m_per_deg_lon DOUBLE PRECISION;
+    v_parcels INTEGER := 0;
+    v_cells INTEGER := 0;
+BEGIN
+    -- Reference latitude for the whole market (rounded so it is stable between snapshots),
+    -- also when only some cities are rebuilt, so cell coordinates stay comparable
+    SELECT ROUND(AVG(latitude)::numeric, 1)
+    INTO v_ref_lat
+    FROM bulk_property_records
+    WHERE market_id = p_market_id AND is_current AND latitude IS NOT NULL;
+
+    IF v_ref_lat IS NULL THEN
+        RETURN QUERY SELECT 0, 0;
+        RETURN;
+    END IF;
+
+    v_m_per_deg_lon := 111320.0 * cos(radians(v_ref_lat));
+
+    UPDATE bulk_property_records
+    SET grid_x = FLOOR(longitude * v_m_per_deg_lon / p_base_meters)::int,
+        grid_y = FLOOR(latitude * v_m_per_deg_lat / p_base_meters)::int
+    WHERE market_id = p_market_id
+      AND is_current
+      AND latitude IS NOT NULL
+      AND longitude IS NOT NULL
+      AND (p_cities IS NULL OR UPPER(TRIM(city)) = ANY(p_cities))
+      AND (grid_x IS DISTINCT FROM FLOOR(longitude * v_m_per_deg_lon / p_base_meters)::int
+           OR grid_y IS DISTINCT FROM FLOOR(latitude * v_m_per_deg_lat / p_base_meters)::int);
+
+    GET DIAGNOSTICS v_parcels = ROW_COUNT;
+
+    DELETE FROM property_grid_rollups
+    WHERE market_id = p_market_id
+      AND (p_cities IS NULL OR city = ANY(p_cities));
+
+    WITH cells AS (
+        SELECT
+            UPPER(TRIM(bp.city)) as city,
+            lvl.level,
+            bp.grid_x >> lvl.level as cell_x,
+            bp.grid_y >> lvl.level as cell_y,
+            COALESCE(NULLIF(TRIM(bp.property_type), ''), 'UNKNOWN') as property_type,
+            bp.parcel_id, bp.market_value, bp.latitude, bp.longitude
+        FROM bulk_property_records bp
+        CROSS JOIN generate_series(0, p_levels - 1) AS lvl(level)
+        WHERE bp.market_id = p_market_id
+          AND bp.is_current
+          AND bp.grid_x IS NOT NULL
+          AND bp.city IS NOT NULL AND TRIM(bp.city) != ''
+          AND bp.market_value > 0
+          AND (p_cities IS NULL OR UPPER(TRIM(bp.city)) = ANY(p_cities))
+    ),
+    type_cells AS (
+        SELECT city, level, cell_x, cell_y, property_type,
+               COUNT(*) as type_count,
+               SUM(market_value) as type_value_sum
+        FROM cells
+        GROUP BY city, level, cell_x, cell_y, property_type
+    ),
+    type_rollups AS (
+        SELECT city, level, cell_x, cell_y,
+               jsonb_object_agg(property_type, jsonb_build_object('count', type_count, 'value_sum', type_value_sum)) as type_counts,
+               (ARRAY_AGG(property_type ORDER BY type_count DESC, property_type))[1] as dominant_type,
+               MAX(type_count) as dominant_count
+        FROM type_cells
+        GROUP BY city, level, cell_x, cell_y
+    ),
+    cell_rollups AS (
+        SELECT city, level, cell_x, cell_y,
+               COUNT(*) as property_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               MIN(latitude) as min_lat, MAX(latitude) as max_lat,
+               MIN(longitude) as min_lon, MAX(longitude) as max_lon,
+               (ARRAY_AGG(parcel_id ORDER BY market_value DESC, parcel_id))[1:25] as sample_parcel_ids
+        FROM cells
+        GROUP BY city, level, cell_x, cell_y
+    )
+    INSERT INTO property_grid_rollups (
+        market_id, city, resolution_level, cell_x, cell_y, cell_size_meters,
+        center_lat, center_lon, min_lat, max_lat, min_lon, max_lon,
+        property_count, value_sum, value_min, value_max,
+        type_counts, dominant_type, dominant_count, sample_parcel_ids,
+        snapshot_id, refreshed_at
+    )
+    SELECT
+        p_market_id, c.city, c.level, c.cell_x, c.cell_y, p_base_meters * (1 << c.level),
+        (c.cell_y + 0.5) * p_base_meters * (1 << c.level) / v_m_per_deg_lat,
+        (c.cell_x + 0.5) * p_base_meters * (1 << c.level) / v_m_per_deg_lon,
+        c.min_lat, c.max_lat, c.min_lon, c.max_lon,
+        c.property_count, c.value_sum, c.value_min, c.value_max,
+        t.type_counts, t.dominant_type, t.dominant_count, c.sample_parcel_ids,
+        p_snapshot_id, NOW()
+    FROM cell_rollups c
+    JOIN type_rollups t USING (city, level, cell_x, cell_y);
+
+    GET DIAGNOSTICS v_cells = ROW_COUNT;
+
+    RETURN QUERY SELECT v_parcels, v_cells;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP FUNCTION IF EXISTS refresh_property_feature_vectors(UUID, UUID);
+
+CREATE OR REPLACE FUNCTION refresh_property_feature_vectors(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_parcel_ids TEXT[] DEFAULT NULL,
+    p_rescale_fraction DOUBLE PRECISION DEFAULT 0.05
+)
+RETURNS TABLE(vectors_written INTEGER, vectors_cleared INTEGER, rescaled BOOLEAN) AS $$
+DECLARE
+    v_keyed BOOLEAN;
+    v_written INTEGER := 0;
+    v_cleared INTEGER := 0;
+BEGIN
+    -- A few changed parcels are re-vectorized with the market's existing scaling; a larger
+    -- share (or no scaling yet) rescales the market and rebuilds every vector, since the
+    -- means / stddevs drift once enough of the market has changed
+    v_keyed := p_parcel_ids IS NOT NULL AND EXISTS (
+        SELECT 1 FROM property_feature_scaling s
+        WHERE s.market_id = p_market_id
+          AND cardinality(p_parcel_ids) <= s.vectors_built * p_rescale_fraction
+    );
+
+    IF NOT v_keyed THEN
+        -- Per-market scaling from the snapshot
+        INSERT INTO property_feature_scaling (
+            market_id, snapshot_id, cities, reference_latitude,
+            means, stddevs, weights, neighborhood_values, refreshed_at
+        )
+        SELECT
+            p_market_id,
+            p_snapshot_id,
+            s.cities,
+            s.ref_lat,
+            ARRAY[s.value_mean, s.sqft_mean, s.beds_mean, s.baths_mean, s.year_mean, s.lot_mean,
+                  s.lon_mean * 111320.0 * cos(radians(s.ref_lat)), s.lat_mean * 110574.0,
+                  0, 0, s.value_mean],
+            ARRAY[s.value_sd, s.sqft_sd, s.beds_sd, s.baths_sd, s.year_sd, s.lot_sd,
+                  2000, 2000, 1, 1, s.value_sd],
+            ARRAY[2.0, 1.5, 1.0, 1.0, 1.0, 1.0, 1.5, 1.5, 0.5, 0.5, 1.0]::float8[],
+            COALESCE(n.neighborhood_values, '{}'::jsonb),
+            NOW()
+        FROM (
+            SELECT
+                ARRAY_AGG(DISTINCT UPPER(TRIM(city))) FILTER (WHERE city IS NOT NULL AND TRIM(city) != '') as cities,
+                ROUND(AVG(latitude)::numeric, 1)::float8 as ref_lat,
+                AVG(ln(market_value::float8)) as value_mean,
+                STDDEV_SAMP(ln(market_value::float8)) as value_sd,
+                AVG(ln(square_feet::float8)) FILTER (WHERE square_feet > 0) as sqft_mean,
+                STDDEV_SAMP(ln(square_feet::float8)) FILTER (WHERE square_feet > 0) as sqft_sd,
+                AVG(bedrooms::float8) as beds_mean,
+                STDDEV_SAMP(bedrooms::float8) as beds_sd,
+                AVG(bathrooms::float8) as baths_mean,
+                STDDEV_SAMP(bathrooms::float8) as baths_sd,
+                AVG(year_built::float8) FILTER (WHERE year_built > 1800) as year_mean,
+                STDDEV_SAMP(year_built::float8) FILTER (WHERE year_built > 1800) as year_sd,
+                AVG(ln(lot_size_acres::float8)) FILTER (WHERE lot_size_acres > 0) as lot_mean,
+                STDDEV_SAMP(ln(lot_size_acres::float8)) FILTER (WHERE lot_size_acres > 0) as lot_sd,
+                AVG(latitude::float8) as lat_mean,
+                AVG(longitude::float8) as lon_mean
+            FROM bulk_property_records
+            WHERE market_id = p_market_id
+              AND is_current
+              AND market_value > 0
+        ) s
+        CROSS JOIN (
+            SELECT jsonb_object_agg(neighborhood, median_ln_value) as neighborhood_values
+            FROM (
+                SELECT UPPER(TRIM(neighborhood_desc)) as neighborhood,
+                       PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ln(market_value::float8)) as median_ln_value
+                FROM bulk_property_records
+                WHERE market_id = p_market_id
+                  AND is_current
+                  AND market_value > 0
+                  AND neighborhood_desc IS NOT NULL AND TRIM(neighborhood_desc) != ''
+                GROUP BY UPPER(TRIM(neighborhood_desc))
+            ) nbhd
+        ) n
+        WHERE s.ref_lat IS NOT NULL
+        ON CONFLICT (market_id) DO UPDATE SET
+            snapshot_id = EXCLUDED.snapshot_id,
+            cities = EXCLUDED.cities,
+            reference_latitude = EXCLUDED.reference_latitude,
+            means = EXCLUDED.means,
+            stddevs = EXCLUDED.stddevs,
+            weights = EXCLUDED.weights,
+            neighborhood_values = EXCLUDED.neighborhood_values,
+            refreshed_at = EXCLUDED.refreshed_at;
+
+        IF NOT FOUND THEN
+            RETURN QUERY SELECT 0, 0, FALSE;
+            RETURN;
+        END IF;
+    END IF;
+
+    UPDATE bulk_property_records bp
+    SET feature_vector = property_feature_vector(
+            s, bp.market_value, bp.square_feet, bp.bedrooms, bp.bathrooms, bp.year_built,
+            bp.lot_size_acres, bp.latitude, bp.longitude, bp.has_pool, bp.has_garage,
+            bp.neighborhood_desc
+        )
+    FROM property_feature_scaling s
+    WHERE s.market_id = p_market_id
+      AND bp.market_id = p_market_id
+      AND bp.is_current
+      AND bp.market_value > 0
+      AND (NOT v_keyed OR bp.parcel_id = ANY(p_parcel_ids));
+
+    GET DIAGNOSTICS v_written = ROW_COUNT;
+
+    -- Retired rows lose their vector in swap_current_property_snapshot(); here only current
+    -- parcels that no longer have a market value drop out of the index
+    UPDATE bulk_property_records
+    SET feature_vector = NULL
+    WHERE market_id = p_market_id
+      AND is_current
+      AND NOT market_value > 0
+      AND feature_vector IS NOT NULL
+      AND (NOT v_keyed OR parcel_id = ANY(p_parcel_ids));
+
+    GET DIAGNOSTICS v_cleared = ROW_COUNT;
+
+    IF NOT v_keyed THEN
+        UPDATE property_feature_scaling
+        SET vectors_built = v_written
+        WHERE market_id = p_market_id;
+    END IF;
+
+    RETURN QUERY SELECT v_written, v_cleared, NOT v_keyed;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Entity portfolios per market (was scripts/populate_entity_market_properties.py only).
+-- Properties link to entities through owner_key = entity_key; p_entity_keys limits the
+-- rebuild to those entities.
+CREATE OR REPLACE FUNCTION refresh_entity_market_properties(
+    p_market_id UUID,
+    p_entity_keys TEXT[] DEFAULT NULL
+)
+RETURNS TABLE(rows_deleted INTEGER, rows_written INTEGER) AS $$
+DECLARE
+    v_deleted INTEGER := 0;
+    v_written INTEGER := 0;
+BEGIN
+    DELETE FROM entity_market_properties emp
+    USING entities e
+    WHERE emp.market_id = p_market_id
+      AND e.id = emp.entity_id
+      AND (p_entity_keys IS NULL OR e.entity_key = ANY(p_entity_keys));
+
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    INSERT INTO entity_market_properties (
+        entity_id, market_id, total_properties, total_value, property_ids,
+        first_activity_date, last_activity_date
+    )
+    SELECT
+        e.id,
+        p_market_id,
+        COUNT(*)::INTEGER,
+        COALESCE(SUM(bp.market_value), 0)::DECIMAL(15,2),
+        ARRAY_AGG(bp.id),
+        MIN(bp.last_sale_date),
+        MAX(bp.last_sale_date)
+    FROM current_bulk_properties bp
+    JOIN entities e ON e.entity_key = bp.owner_key
+    WHERE bp.market_id = p_market_id
+      AND (p_entity_keys IS NULL OR bp.owner_key = ANY(p_entity_keys))
+    GROUP BY e.id
+    ON CONFLICT (entity_id, market_id) DO UPDATE SET
+        total_properties = EXCLUDED.total_properties,
+        total_value = EXCLUDED.total_value,
+        property_ids = EXCLUDED.property_ids,
+        first_activity_date = EXCLUDED.first_activity_date,
+        last_activity_date = EXCLUDED.last_activity_date,
+        updated_at = NOW();
+
+    GET DIAGNOSTICS v_written = ROW_COUNT;
+
+    RETURN QUERY SELECT v_deleted, v_written;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON TABLE derived_refresh_state IS 'Per derived table and market: change log position and latest refresh metrics (src/services/derived_refresh.py)';
+COMMENT ON TABLE derived_refresh_log IS 'One row per derived table refresh: trigger, keys, rows, duration, staleness';
+COMMENT ON VIEW derived_table_staleness IS 'Changes each derived table has not applied yet';
+
+-- Usage:
+-- SELECT * FROM derived_table_staleness WHERE market_id = :market_id;
+--
+-- SELECT table_name, trigger, keys_refreshed, rows_written, duration_ms, staleness_ms
+-- FROM derived_refresh_log
+-- WHERE market_id = :market_id
+-- ORDER BY refreshed_at DESC LIMIT 20;
+--
+-- SELECT * FROM refresh_market_stats_monthly(:market_id, :snapshot_id, 36, ARRAY['GAINESVILLE']);
+-- SELECT * FROM refresh_entity_market_properties(:market_id, ARRAY[normalize_owner_key('D R HORTON INC')]);
@@ -0,0 +1,247 @@
+-- Migration 021: Normalized sales history (property_sales)
+--
+-- Sales were only reachable as each parcel's last_sale_date / last_sale_price (plus the
+-- qPublic sales_history JSONB of enriched parcels), so market trends saw one sale per
+-- parcel and any multi-period or repeat-sales question meant unnesting JSONB across the
+-- whole table.
+--
+-- property_sales holds one row per recorded sale. The CAMA loader
+-- (PropertyAppraiserScraper._parse_and_join_cama_files) now keeps every Sales.txt row per
+-- parcel, and BulkDataManager._process_property_records rewrites the sales of each added or
+-- changed parcel (a new sale changes the parcel's last sale); the first Sales.txt load of
+-- a market writes every parcel's sales. Until then each current parcel's last sale is
+-- backfilled below.
+--
+-- city / property_type are the parcel's (normalized like market_stats_monthly) when the
+-- sale was loaded, so window queries are index range scans on (city, sale_date) without
+-- a join:
+--   analyze_market_trends     12m / 6m / 3m / 1m sales periods
+--   market_stats_monthly      monthly sales counts and price sketches (all sales)
+
+CREATE TABLE IF NOT EXISTS property_sales (
+    id BIGSERIAL PRIMARY KEY,
+    market_id UUID NOT NULL REFERENCES markets(id),
+    parcel_id TEXT NOT NULL,                    -- canonical_parcel_id()
+
+    sale_date DATE NOT NULL,
+    sale_price NUMERIC,
+    sale_qualified TEXT,
+    sale_type_vac_imp TEXT,
+    sale_book TEXT NOT NULL DEFAULT '',         -- '' when unknown (part of the sale key)
+    sale_page TEXT NOT NULL DEFAULT '',
+
+    -- Parcel attributes when the sale was loaded
+    city TEXT,                                  -- UPPER(TRIM(city))
+    property_type TEXT,                         -- 'UNKNOWN' when missing
+
+    source TEXT NOT NULL,                       -- 'cama_sales' (Sales.txt), 'last_sale' (parcel row only)
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    UNIQUE (market_id, parcel_id, sale_date, sale_book, sale_page)
+);
+
+-- Trend windows: WHERE city = :city AND sale_date > :start
+CREATE INDEX IF NOT EXISTS idx_property_sales_city_date
+    ON property_sales(city, sale_date DESC) INCLUDE (property_type, sale_price);
+
+-- Monthly cube refresh: WHERE market_id = :market_id AND sale_date >= :first_month
+CREATE INDEX IF NOT EXISTS idx_property_sales_market_date ON property_sales(market_id, sale_date);
+
+-- Repeat sales / a parcel's history: the unique key (market_id, parcel_id, sale_date, ...)
+
+
+-- Until a market's first Sales.txt load: each current parcel's last sale
+INSERT INTO property_sales (
+    market_id, parcel_id, sale_date, sale_price, sale_qualified, sale_type_vac_imp,
+    sale_book, sale_page, city, property_type, source, snapshot_id
+)
+SELECT
+    market_id,
+    parcel_id,
+    last_sale_date,
+    last_sale_price,
+    sale_qualified,
+    sale_type_vac_imp,
+    COALESCE(TRIM(sale_book), ''),
+    COALESCE(TRIM(sale_page), ''),
+    NULLIF(UPPER(TRIM(city)), ''),
+    COALESCE(NULLIF(TRIM(property_type), ''), 'UNKNOWN'),
+    'last_sale',
+    snapshot_id
+FROM current_bulk_properties
+WHERE last_sale_date IS NOT NULL
+ON CONFLICT (market_id, parcel_id, sale_date, sale_book, sale_page) DO NOTHING;
+
+ANALYZE property_sales;
+
+
+-- Monthly cube: sales now come from property_sales (signature unchanged since 020)
+CREATE OR REPLACE FUNCTION refresh_market_stats_monthly(
+    p_market_id UUID,
+    p_snapshot_id UUID,
+    p_sales_months INTEGER DEFAULT 36,
+    p_cities TEXT[] DEFAULT NULL
+)
+RETURNS TABLE(inventory_rows INTEGER, sales_rows INTEGER) AS $$
+DECLARE
+    v_month DATE := DATE_TRUNC('month', CURRENT_DATE)::date;
+    v_first_sales_month DATE := (DATE_TRUNC('month', CURRENT_DATE) - make_interval(months => p_sales_months))::date;
+    v_inventory_rows INTEGER := 0;
+    v_sales_rows INTEGER := 0;
+BEGIN
+    CREATE TEMP TABLE market_stats_source ON COMMIT DROP AS
+    SELECT
+        UPPER(TRIM(city)) as city,
+        COALESCE(NULLIF(TRIM(property_type), ''), 'UNKNOWN') as property_type,
+        market_value,
+        lot_size_acres
+    FROM bulk_property_records
+    WHERE market_id = p_market_id
+      AND is_current
+      AND city IS NOT NULL AND TRIM(city) != ''
+      AND (p_cities IS NULL OR UPPER(TRIM(city)) = ANY(p_cities));
+
+    -- Sales are recomputed for the whole horizon; inventory only for the current month so
+    -- earlier months keep the inventory of the snapshot that was current back then. With
+    -- p_cities only those cities' rows are reset and rebuilt.
+    UPDATE market_stats_monthly
+    SET sales_count = 0, sales_priced_count = 0, sales_price_sum = 0, sales_price_sketch = NULL
+    WHERE market_id = p_market_id
+      AND (p_cities IS NULL OR city = ANY(p_cities));
+
+    UPDATE market_stats_monthly
+    SET inventory_count = 0, inventory_value_sum = 0, inventory_value_min = NULL,
+        inventory_value_max = NULL, inventory_value_sketch = NULL,
+        lot_size_sum = 0, lot_size_count = 0, inventory_as_of = NULL, snapshot_id = NULL
+    WHERE market_id = p_market_id AND month = v_month
+      AND (p_cities IS NULL OR city = ANY(p_cities));
+
+    WITH groups AS (
+        SELECT city, property_type,
+               COUNT(*) as inventory_count,
+               SUM(market_value) as value_sum,
+               MIN(market_value) as value_min,
+               MAX(market_value) as value_max,
+               COALESCE(SUM(lot_size_acres), 0) as lot_size_sum,
+               COUNT(lot_size_acres) as lot_size_count
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY city, property_type
+    ),
+    buckets AS (
+        SELECT city, property_type, market_stats_price_bucket(market_value) as bucket, COUNT(*) as n
+        FROM market_stats_source
+        WHERE market_value > 0
+        GROUP BY 1, 2, 3
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        inventory_count, inventory_value_sum, inventory_value_min, inventory_value_max,
+        inventory_value_sketch, lot_size_sum, lot_size_count, inventory_as_of, snapshot_id,
+        refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, v_month,
+        g.inventory_count, g.value_sum, g.value_min, g.value_max,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        g.lot_size_sum, g.lot_size_count, NOW(), p_snapshot_id,
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        inventory_count = EXCLUDED.inventory_count,
+        inventory_value_sum = EXCLUDED.inventory_value_sum,
+        inventory_value_min = EXCLUDED.inventory_value_min,
+        inventory_value_max = EXCLUDED.inventory_value_max,
+        inventory_value_sketch = EXCLUDED.inventory_value_sketch,
+        lot_size_sum = EXCLUDED.lot_size_sum,
+        lot_size_count = EXCLUDED.lot_size_count,
+        inventory_as_of = EXCLUDED.inventory_as_of,
+        snapshot_id = EXCLUDED.snapshot_id,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_inventory_rows = ROW_COUNT;
+
+    -- Every recorded sale (property_sales), not only each parcel's last one
+    WITH sales AS (
+        SELECT city, property_type, DATE_TRUNC('month', sale_date)::date as sale_month, sale_price
+        FROM property_sales
+        WHERE market_id = p_market_id
+          AND city IS NOT NULL
+          AND sale_date >= v_first_sales_month
+          AND sale_date < v_month + INTERVAL '1 month'
+          AND (p_cities IS NULL OR city = ANY(p_cities))
+    ),
+    groups AS (
+        SELECT city, property_type, sale_month,
+               COUNT(*) as sales_count,
+               COUNT(sale_price) FILTER (WHERE sale_price > 0) as priced_count,
+               COALESCE(SUM(sale_price) FILTER (WHERE sale_price > 0), 0) as price_sum
+        FROM sales
+        GROUP BY city, property_type, sale_month
+    ),
+    buckets AS (
+        SELECT city, property_type, sale_month, market_stats_price_bucket(sale_price) as bucket, COUNT(*) as n
+        FROM sales
+        WHERE sale_price > 0
+        GROUP BY 1, 2, 3, 4
+    )
+    INSERT INTO market_stats_monthly (
+        market_id, city, property_type, month,
+        sales_count, sales_priced_count, sales_price_sum, sales_price_sketch, refreshed_at
+    )
+    SELECT
+        p_market_id, g.city, g.property_type, g.sale_month,
+        g.sales_count, g.priced_count, g.price_sum,
+        ARRAY(
+            SELECT COALESCE(b.n, 0)::int
+            FROM generate_series(0, 251) AS s(bucket)
+            LEFT JOIN buckets b ON b.city = g.city AND b.property_type = g.property_type
+                               AND b.sale_month = g.sale_month AND b.bucket = s.bucket
+            ORDER BY s.bucket
+        ),
+        NOW()
+    FROM groups g
+    ON CONFLICT (market_id, city, property_type, month) DO UPDATE SET
+        sales_count = EXCLUDED.sales_count,
+        sales_priced_count = EXCLUDED.sales_priced_count,
+        sales_price_sum = EXCLUDED.sales_price_sum,
+        sales_price_sketch = EXCLUDED.sales_price_sketch,
+        refreshed_at = NOW();
+
+    GET DIAGNOSTICS v_sales_rows = ROW_COUNT;
+
+    -- Rows left with neither inventory nor sales carry no information
+    DELETE FROM market_stats_monthly
+    WHERE market_id = p_market_id
+      AND (p_cities IS NULL OR city = ANY(p_cities))
+      AND inventory_as_of IS NULL
+      AND sales_count = 0;
+
+    DROP TABLE market_stats_source;
+
+    RETURN QUERY SELECT v_inventory_rows, v_sales_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON TABLE property_sales IS 'One row per recorded sale (CAMA Sales.txt; last sale only until a market''s first Sales.txt load)';
+COMMENT ON COLUMN property_sales.city IS 'Parcel city when the sale was loaded, UPPER(TRIM()) - trend windows filter on (city, sale_date)';
+
+-- Usage:
+-- SELECT COUNT(*), PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sale_price)
+-- FROM property_sales
+-- WHERE city = 'GAINESVILLE' AND sale_date > CURRENT_DATE - INTERVAL '3 months' AND sale_price > 0;
+--
+-- Repeat sales:
+-- SELECT parcel_id, sale_date, sale_price,
+--        LAG(sale_date) OVER w as previous_sale_date, LAG(sale_price) OVER w as previous_sale_price
+-- FROM property_sales
+-- WHERE market_id = :market_id
+-- WINDOW w AS (PARTITION BY parcel_id ORDER BY sale_date);
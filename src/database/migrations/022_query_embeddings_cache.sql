@@ -0,0 +1,37 @@
+-- Migration 022: Persistent query-embedding cache for the RAG Lambda
+--
+-- search_ordinances embedded every query with Bedrock Titan, although the Regulatory
+-- specialist asks near-identical zoning questions many times per analysis. The RAG Lambda
+-- now looks query embeddings up in two levels before calling Bedrock:
+--   1. an in-container LRU (QUERY_EMBEDDING_CACHE_SIZE entries)
+--   2. this table, shared by all containers
+--
+-- Same pattern as embeddings_cache (content hash -> vector + model version); that table
+-- is sized for 1536-dim document vectors, query vectors are Titan v2 1024-dim.
+-- content_hash = sha256 of model id, dimensions and the normalized query text
+-- (lowercase, whitespace collapsed, trailing punctuation dropped).
+--
+-- Eviction: rows not used for 90 days are deleted by a sample of the Lambda's writes
+-- (idx_query_embeddings_cache_last_used_at keeps that a short range scan). Hits update
+-- last_used_at and hit_count at most once an hour per row, so hit_count counts the hours
+-- in which a query was used, not every lookup.
+
+CREATE TABLE IF NOT EXISTS query_embeddings_cache (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    content_hash TEXT UNIQUE NOT NULL,
+    embedding vector(1024) NOT NULL,            -- amazon.titan-embed-text-v2:0
+    model_version TEXT NOT NULL,
+    content_preview TEXT,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_query_embeddings_cache_last_used_at ON query_embeddings_cache(last_used_at);
+
+COMMENT ON TABLE query_embeddings_cache IS 'Search query embeddings by normalized text + model (RAG Lambda level-2 cache)';
+
+-- Usage:
+-- SELECT model_version, COUNT(*), SUM(hit_count), MAX(last_used_at)
+-- FROM query_embeddings_cache
+-- GROUP BY model_version;
@@ -0,0 +1,196 @@
+-- Migration 023: Canonical ordinance jurisdictions with per-jurisdiction HNSW indexes
+--
+-- search_ordinances filtered with LOWER(city) LIKE LOWER('%jurisdiction%') next to an
+-- HNSW ORDER BY. The leading wildcard rules out any index on city, and the filter is
+-- applied after the HNSW scan: the index hands back its ef_search nearest chunks from all
+-- 9 jurisdictions and the filter keeps the few from the requested one, so small cities
+-- returned fewer than max_results (often none).
+--
+-- Each chunk now carries a canonical jurisdiction id, and every jurisdiction has its own
+-- partial HNSW index:
+--
+--   ordinance_embeddings.jurisdiction_id    canonical_jurisdiction_id(city, state)
+--                                           'Gainesville', 'FL'    -> gainesville_fl
+--                                           'Alachua County', 'FL' -> alachua_county_fl
+--   idx_ordinance_embedding_hnsw_<id>       USING hnsw (embedding) WHERE jurisdiction_id = '<id>'
+--                                           (ids too long for a 63-byte name: <id prefix>_<md5 prefix>)
+--   ordinance_jurisdictions                 one row per jurisdiction (city, chunks, index)
+--
+-- Callers resolve the user's jurisdiction to an id up front with
+-- resolve_ordinance_jurisdiction() (RAG Lambda, OrdinanceRAG: one matching rule) and filter with jurisdiction_id = '<id>' as a literal, which the planner matches to the
+-- partial index: the whole HNSW graph belongs to that jurisdiction, so a filtered search
+-- returns k results at the same speed as an unfiltered one. Unfiltered searches keep
+-- idx_ordinance_embedding_hnsw.
+--
+-- ordinance_embeddings is created by scripts/load_embeddings_to_db.py, which calls
+-- sync_ordinance_jurisdictions() after every load so new cities get their id and index.
+
+CREATE OR REPLACE FUNCTION canonical_jurisdiction_id(p_city TEXT, p_state TEXT)
+RETURNS TEXT AS $$
+    SELECT NULLIF(btrim(regexp_replace(lower(p_city), '[^a-z0-9]+', '_', 'g'), '_'), '')
+           || '_' || lower(btrim(p_state));
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+
+-- Partial HNSW index name for a jurisdiction. Postgres truncates identifiers to 63 bytes, so
+-- long ids keep a 25-character prefix plus 8 hex digits of their md5 (ids are [a-z0-9_]):
+-- the stored name is the name the index really has, and ids sharing a prefix do not collide.
+CREATE OR REPLACE FUNCTION ordinance_jurisdiction_index_name(p_jurisdiction_id TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN octet_length('idx_ordinance_embedding_hnsw_' || p_jurisdiction_id) <= 63
+            THEN 'idx_ordinance_embedding_hnsw_' || p_jurisdiction_id
+        ELSE 'idx_ordinance_embedding_hnsw_' || left(p_jurisdiction_id, 25) || '_' || left(md5(p_jurisdiction_id), 8)
+    END;
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+
+CREATE TABLE IF NOT EXISTS ordinance_jurisdictions (
+    jurisdiction_id TEXT PRIMARY KEY,            -- canonical_jurisdiction_id(city, state)
+    city TEXT NOT NULL,
+    state TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    index_name TEXT NOT NULL,                    -- partial HNSW index for this jurisdiction
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+
+-- Registry id for a user-supplied jurisdiction: an id itself ('gainesville_fl'), or a city
+-- name ('Gainesville', 'City of Gainesville', 'Alachua (city)', 'Alachua County') in
+-- p_state, or in any state when p_state is NULL. The exact form wins over the name with
+-- 'City of' / '(city)' stripped; NULL when nothing or more than one jurisdiction matches.
+CREATE OR REPLACE FUNCTION resolve_ordinance_jurisdiction(p_name TEXT, p_state TEXT DEFAULT NULL)
+RETURNS TEXT AS $$
+    WITH name AS (
+        SELECT NULLIF(btrim(regexp_replace(lower(p_name), '[^a-z0-9]+', '_', 'g'), '_'), '') as slug,
+               regexp_replace(p_name, '^\s*city\s+of\s+|\s*\(?\s*\ycity\y\s*\)?\s*$', '', 'gi') as bare
+    ),
+    candidates AS (
+        SELECT j.jurisdiction_id,
+               CASE
+                   WHEN j.jurisdiction_id = n.slug THEN 0
+                   WHEN j.jurisdiction_id = canonical_jurisdiction_id(p_name, j.state) THEN 1
+                   ELSE 2
+               END as priority
+        FROM ordinance_jurisdictions j
+        CROSS JOIN name n
+        WHERE j.jurisdiction_id = n.slug
+           OR ((p_state IS NULL OR lower(j.state) = lower(btrim(p_state)))
+               AND j.jurisdiction_id IN (canonical_jurisdiction_id(p_name, j.state),
+                                         canonical_jurisdiction_id(n.bare, j.state)))
+    ),
+    best AS (
+        SELECT jurisdiction_id
+        FROM candidates
+        WHERE priority = (SELECT MIN(priority) FROM candidates)
+    )
+    SELECT jurisdiction_id
+    FROM best
+    WHERE (SELECT COUNT(*) FROM best) = 1;
+$$ LANGUAGE SQL STABLE;
+
+
+-- Assign jurisdiction ids, refresh ordinance_jurisdictions and create the partial HNSW
+-- index of every jurisdiction that does not have one yet (indexes of jurisdictions that
+-- no longer have chunks are dropped).
+CREATE OR REPLACE FUNCTION sync_ordinance_jurisdictions()
+RETURNS TABLE(jurisdictions INTEGER, indexes_created INTEGER, indexes_dropped INTEGER) AS $$
+DECLARE
+    v_jurisdiction RECORD;
+    v_created INTEGER := 0;
+    v_dropped INTEGER := 0;
+BEGIN
+    UPDATE ordinance_embeddings
+    SET jurisdiction_id = canonical_jurisdiction_id(city, state)
+    WHERE jurisdiction_id IS DISTINCT FROM canonical_jurisdiction_id(city, state);
+
+    FOR v_jurisdiction IN
+        DELETE FROM ordinance_jurisdictions j
+        WHERE NOT EXISTS (
+            SELECT 1 FROM ordinance_embeddings o WHERE o.jurisdiction_id = j.jurisdiction_id
+        )
+        RETURNING j.index_name
+    LOOP
+        EXECUTE format('DROP INDEX IF EXISTS %I', v_jurisdiction.index_name);
+        v_dropped := v_dropped + 1;
+    END LOOP;
+
+    -- Names stored before ordinance_jurisdiction_index_name() (over 63 bytes, so the index got
+    -- a truncated name): drop that index and rebuild it under the new name below
+    FOR v_jurisdiction IN
+        SELECT j.jurisdiction_id, j.index_name
+        FROM ordinance_jurisdictions j
+        WHERE j.index_name <> ordinance_jurisdiction_index_name(j.jurisdiction_id)
+    LOOP
+        EXECUTE format('DROP INDEX IF EXISTS %I', v_jurisdiction.index_name);
+        UPDATE ordinance_jurisdictions
+        SET index_name = ordinance_jurisdiction_index_name(jurisdiction_id)
+        WHERE jurisdiction_id = v_jurisdiction.jurisdiction_id;
+    END LOOP;
+
+    INSERT INTO ordinance_jurisdictions (jurisdiction_id, city, state, chunk_count, index_name, updated_at)
+    SELECT
+        jurisdiction_id,
+        MIN(city),
+        MIN(state),
+        COUNT(*),
+        ordinance_jurisdiction_index_name(jurisdiction_id),
+        NOW()
+    FROM ordinance_embeddings
+    WHERE jurisdiction_id IS NOT NULL
+    GROUP BY jurisdiction_id
+    ON CONFLICT (jurisdiction_id) DO UPDATE SET
+        city = EXCLUDED.city,
+        state = EXCLUDED.state,
+        chunk_count = EXCLUDED.chunk_count,
+        updated_at = EXCLUDED.updated_at;
+
+    FOR v_jurisdiction IN
+        SELECT j.jurisdiction_id, j.index_name
+        FROM ordinance_jurisdictions j
+        WHERE to_regclass(j.index_name) IS NULL
+    LOOP
+        EXECUTE format(
+            'CREATE INDEX %I ON ordinance_embeddings USING hnsw (embedding vector_cosine_ops) WHERE jurisdiction_id = %L',
+            v_jurisdiction.index_name, v_jurisdiction.jurisdiction_id
+        );
+        v_created := v_created + 1;
+    END LOOP;
+
+    IF v_created > 0 THEN
+        ANALYZE ordinance_embeddings;
+    END IF;
+
+    RETURN QUERY SELECT (SELECT COUNT(*)::INTEGER FROM ordinance_jurisdictions), v_created, v_dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DO $$
+DECLARE
+    v_sync RECORD;
+BEGIN
+    IF to_regclass('ordinance_embeddings') IS NULL THEN
+        RAISE NOTICE 'ordinance_embeddings not loaded yet - scripts/load_embeddings_to_db.py syncs jurisdictions after loading';
+        RETURN;
+    END IF;
+
+    ALTER TABLE ordinance_embeddings ADD COLUMN IF NOT EXISTS jurisdiction_id TEXT;
+    CREATE INDEX IF NOT EXISTS idx_ordinance_jurisdiction_id ON ordinance_embeddings(jurisdiction_id);
+
+    SELECT * INTO v_sync FROM sync_ordinance_jurisdictions();
+    RAISE NOTICE '% ordinance jurisdictions, % partial HNSW indexes created', v_sync.jurisdictions, v_sync.indexes_created;
+END $$;
+
+COMMENT ON FUNCTION canonical_jurisdiction_id(TEXT, TEXT) IS 'Ordinance jurisdiction id: city slug + state (Gainesville, FL -> gainesville_fl)';
+COMMENT ON FUNCTION resolve_ordinance_jurisdiction(TEXT, TEXT) IS 'Registry jurisdiction id for a city name or id (NULL when unknown or ambiguous)';
+COMMENT ON FUNCTION ordinance_jurisdiction_index_name(TEXT) IS 'Partial HNSW index name of a jurisdiction, kept within the 63-byte identifier limit';
+COMMENT ON TABLE ordinance_jurisdictions IS 'Jurisdictions with ordinance chunks and their partial HNSW index (sync_ordinance_jurisdictions)';
+
+-- Usage:
+-- SELECT * FROM sync_ordinance_jurisdictions();
+-- SELECT jurisdiction_id, city, chunk_count FROM ordinance_jurisdictions ORDER BY city;
+-- SELECT resolve_ordinance_jurisdiction('City of Gainesville', 'FL');
+-- SELECT chunk_text FROM ordinance_embeddings
+-- WHERE jurisdiction_id = 'gainesville_fl'
+-- ORDER BY embedding <=> CAST(:query_embedding AS vector) LIMIT 5;
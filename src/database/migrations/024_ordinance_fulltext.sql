@@ -0,0 +1,41 @@
+-- Migration 024: Full-text search column for hybrid ordinance retrieval
+--
+-- Ordinance questions often hinge on exact tokens - zoning districts ("RSF-1"), terms
+-- ("setback"), section numbers ("30-4.21") - that cosine similarity over embeddings
+-- ranks poorly, so the agent re-asked and paid for another embedding and search each time.
+--
+-- chunk_tsv is the english tsvector of chunk_text (generated, so the loader needs no
+-- change to keep it current) with a GIN index. search_ordinances(mode='hybrid') and
+-- OrdinanceRAG.search(mode='hybrid') take the top candidates of both retrievals in one
+-- statement and fuse them with reciprocal rank fusion:
+--
+--   ann       ORDER BY embedding <=> query LIMIT candidates     HNSW (per jurisdiction, 023)
+--   lexical   WHERE chunk_tsv @@ query terms (any), ts_rank_cd   idx_ordinance_chunk_tsv
+--   score     1 / (60 + ann_rank) + 1 / (60 + lexical_rank)
+--
+-- ordinance_embeddings is created by scripts/load_embeddings_to_db.py, which creates the
+-- same column and index for new databases.
+
+DO $$
+BEGIN
+    IF to_regclass('ordinance_embeddings') IS NULL THEN
+        RAISE NOTICE 'ordinance_embeddings not loaded yet - scripts/load_embeddings_to_db.py creates chunk_tsv';
+        RETURN;
+    END IF;
+
+    ALTER TABLE ordinance_embeddings
+        ADD COLUMN IF NOT EXISTS chunk_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED;
+
+    CREATE INDEX IF NOT EXISTS idx_ordinance_chunk_tsv ON ordinance_embeddings USING gin (chunk_tsv);
+
+    ANALYZE ordinance_embeddings;
+
+    COMMENT ON COLUMN ordinance_embeddings.chunk_tsv IS 'to_tsvector(''english'', chunk_text) - lexical half of hybrid search';
+END $$;
+
+-- Usage:
+-- SELECT chunk_text, ts_rank_cd(chunk_tsv, q) AS rank
+-- FROM ordinance_embeddings, to_tsquery('english', 'rsf-1 & setback') q
+-- WHERE chunk_tsv @@ q
+-- ORDER BY rank DESC LIMIT 10;
@@ -13,11 +13,11 @@ from datetime import datetime, date
 from typing import Optional, List
 from uuid import UUID, uuid4
 
-from geoalchemy2 import Geometry
+from geoalchemy2 import Geography, Geometry
 from sqlalchemy import (
     Boolean, Column, Float, Integer, String, Text, TIMESTAMP, Date,
     ForeignKey, CheckConstraint, Index, UniqueConstraint, PrimaryKeyConstraint, ARRAY,
-    text, Numeric
+    text, Numeric, Computed
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
 from sqlalchemy.orm import declarative_base, relationship
@@ -74,6 +74,7 @@ class Entity(Base):
     entity_type = Column(Text, nullable=False, index=True)
     name = Column(Text, nullable=False)
     canonical_name = Column(Text, index=True)
+    entity_key = Column(Text, Computed("normalize_owner_key(COALESCE(canonical_name, name))", persisted=True))
 
     # Definitive identifiers
     sunbiz_document_number = Column(Text, unique=True, index=True)
@@ -119,6 +120,8 @@ class Entity(Base):
             name='ck_confidence_score_range'
         ),
         Index('idx_entities_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('idx_entities_entity_key', 'entity_key'),
+        Index('idx_entities_entity_key_trgm', 'entity_key', postgresql_using='gin', postgresql_ops={'entity_key': 'gin_trgm_ops'}),
     )
 
 
@@ -503,12 +506,13 @@ class BulkDataSnapshot(Base):
 
 
 class BulkPropertyRecord(Base):
-    """CAMA property records enriched with qPublic - partitioned by market"""
+    """CAMA property records enriched with qPublic - partitioned by market, then current/history"""
     __tablename__ = 'bulk_property_records'
 
     id = Column(PG_UUID(as_uuid=True), default=uuid4)
     market_id = Column(PG_UUID(as_uuid=True), ForeignKey('markets.id'), nullable=False, index=True)
     snapshot_id = Column(PG_UUID(as_uuid=True), ForeignKey('bulk_data_snapshots.id'), index=True)
+    is_current = Column(Boolean, nullable=False, default=False)  # Hot partition (migration 018)
 
     # Identifiers
     parcel_id = Column(Text, nullable=False, index=True)
@@ -516,6 +520,7 @@ class BulkPropertyRecord(Base):
 
     # CAMA fields
     owner_name = Column(Text)
+    owner_key = Column(Text, Computed("normalize_owner_key(owner_name)", persisted=True))  # Indexed owner matching key (migration 014)
     mailing_address = Column(Text)
     site_address = Column(Text)
     property_type = Column(Text)
@@ -531,6 +536,11 @@ class BulkPropertyRecord(Base):
     coordinates = Column(Geometry('POINT', srid=4326))
     latitude = Column(Numeric(10, 8))
     longitude = Column(Numeric(11, 8))
+    geog = Column(Geography('POINT', srid=4326), Computed("parcel_point_geog(latitude, longitude)", persisted=True))  # Generated point for indexed spatial queries (migration 010)
+    grid_x = Column(Integer)  # 125 m grid cell column, level k = grid_x >> k (migration 012)
+    grid_y = Column(Integer)  # 125 m grid cell row (migration 012)
+    feature_vector = Column(Vector(11))  # Comp similarity features, current snapshot only (migration 016)
+    row_fingerprint = Column(Text)  # MD5 of source values - unchanged parcels are not reloaded (migration 019)
     sales_history = Column(JSONB, default=[])
     permit_history = Column(JSONB, default=[])
     trim_notice = Column(JSONB)
@@ -553,8 +563,13 @@ class BulkPropertyRecord(Base):
     updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
-        PrimaryKeyConstraint('id', 'market_id'),
-        UniqueConstraint('parcel_id', 'market_id', 'snapshot_id', name='uq_bulk_property_parcel_market_snapshot'),
+        PrimaryKeyConstraint('id', 'market_id', 'is_current'),
+        UniqueConstraint('parcel_id', 'market_id', 'snapshot_id', 'is_current', name='bulk_property_records_parcel_snapshot_key'),
+        CheckConstraint('parcel_id = canonical_parcel_id(parcel_id)', name='bulk_property_records_parcel_id_canonical'),
+        Index('idx_bulk_property_records_owner_key', 'owner_key'),
+        Index('idx_bulk_property_records_owner_key_trgm', 'owner_key', postgresql_using='gin', postgresql_ops={'owner_key': 'gin_trgm_ops'}),
+        Index('idx_bulk_property_records_feature_vector', 'feature_vector', postgresql_using='hnsw',
+              postgresql_with={'m': 16, 'ef_construction': 64}, postgresql_ops={'feature_vector': 'vector_l2_ops'}),
         {'schema': None},
     )
 
@@ -675,6 +690,21 @@ class EmbeddingCache(Base):
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
 
 
+class QueryEmbeddingCache(Base):
+    """Search query vectors by normalized query text + model (RAG Lambda, migration 022)"""
+    __tablename__ = 'query_embeddings_cache'
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
+    content_hash = Column(Text, unique=True, nullable=False)
+    embedding = Column(Vector(1024), nullable=False)  # Bedrock Titan Embed Text v2
+    model_version = Column(Text, nullable=False)
+    content_preview = Column(Text)
+    hit_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+    last_used_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow, index=True)
+
+
 class LLMCache(Base):
     """LLM response caching to reduce API costs"""
     __tablename__ = 'llm_cache'
@@ -21,6 +21,31 @@ CREATE EXTENSION IF NOT EXISTS "vector";
 CREATE EXTENSION IF NOT EXISTS "pg_trgm";  -- For fuzzy text matching
 CREATE EXTENSION IF NOT EXISTS "fuzzystrmatch";  -- For phonetic matching
 
+-- Owner/entity matching key: uppercase alphanumerics only (migration 014)
+CREATE OR REPLACE FUNCTION normalize_owner_key(p_name TEXT)
+RETURNS TEXT AS $$
+    SELECT regexp_replace(UPPER(COALESCE(p_name, '')), '[^A-Z0-9]', '', 'g');
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+-- Parcel point as geography, NULL for missing/out-of-range coordinates (migration 010)
+CREATE OR REPLACE FUNCTION parcel_point_geog(p_latitude NUMERIC, p_longitude NUMERIC)
+RETURNS GEOGRAPHY AS $$
+    SELECT CASE
+        WHEN p_latitude BETWEEN -90 AND 90 AND p_longitude BETWEEN -180 AND 180
+        THEN ST_SetSRID(ST_MakePoint(p_longitude, p_latitude), 4326)::geography
+    END;
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+-- Parcel ID canonical form, mirrors src/utils/parcel_ids.py (migration 017)
+CREATE OR REPLACE FUNCTION canonical_parcel_id(p_parcel_id TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN c.parcel_id IN ('', 'NULL', 'NONE', 'N/A', 'NAN') THEN NULL ELSE c.parcel_id END
+    FROM (
+        SELECT UPPER(btrim(regexp_replace(replace(p_parcel_id, U&'\FEFF', ''), '[[:space:]' || U&'\00A0' || ']+', ' ', 'g')))
+            as parcel_id
+    ) c;
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
 -- ============================================================================
 -- GLOBAL LAYER: Cross-Market Tables
 -- ============================================================================
@@ -67,6 +92,7 @@ CREATE TABLE entities (
     entity_type TEXT NOT NULL CHECK (entity_type IN ('person', 'llc', 'corporation', 'partnership', 'government', 'unknown')),
     name TEXT NOT NULL,
     canonical_name TEXT,  -- Normalized version for matching
+    entity_key TEXT GENERATED ALWAYS AS (normalize_owner_key(COALESCE(canonical_name, name))) STORED,  -- Matches bulk_property_records.owner_key
 
     -- Definitive identifiers (when available)
     sunbiz_document_number TEXT UNIQUE,  -- Florida LLC/Corp document number
@@ -108,6 +134,8 @@ CREATE INDEX idx_entities_canonical_name ON entities(canonical_name);
 CREATE INDEX idx_entities_sunbiz_document_number ON entities(sunbiz_document_number) WHERE sunbiz_document_number IS NOT NULL;
 CREATE INDEX idx_entities_active_markets ON entities USING GIN(active_markets);
 CREATE INDEX idx_entities_name_trgm ON entities USING GIN(name gin_trgm_ops);  -- For fuzzy name search
+CREATE INDEX idx_entities_entity_key ON entities(entity_key);
+CREATE INDEX idx_entities_entity_key_trgm ON entities USING GIN(entity_key gin_trgm_ops);
 
 -- Entity Relationships - GLOBAL
 -- Relationships between entities (e.g., LLC owns property, person owns LLC)
@@ -490,11 +518,14 @@ CREATE INDEX idx_bulk_data_snapshots_market_id ON bulk_data_snapshots(market_id)
 CREATE INDEX idx_bulk_data_snapshots_data_source ON bulk_data_snapshots(data_source);
 CREATE INDEX idx_bulk_data_snapshots_is_current ON bulk_data_snapshots(is_current) WHERE is_current = TRUE;
 
--- Bulk Property Records (CAMA + qPublic enrichment) - PARTITIONED
+-- Bulk Property Records (CAMA + qPublic enrichment) - PARTITIONED by market, then by
+-- is_current: each market has a hot partition holding its current snapshot and a cold
+-- partition holding the rest (create_bulk_property_partitions, migration 018)
 CREATE TABLE bulk_property_records (
     id UUID DEFAULT gen_random_uuid(),
     market_id UUID NOT NULL REFERENCES markets(id),
-    snapshot_id UUID REFERENCES bulk_data_snapshots(id),
+    snapshot_id UUID REFERENCES bulk_data_snapshots(id),  -- Snapshot that last changed the parcel
+    is_current BOOLEAN NOT NULL DEFAULT FALSE,  -- Inserted TRUE by BulkDataManager; retired by swap_current_property_snapshot()
 
     -- Identifiers
     parcel_id TEXT NOT NULL,
@@ -502,6 +533,7 @@ CREATE TABLE bulk_property_records (
 
     -- CAMA fields (Property Appraiser)
     owner_name TEXT,
+    owner_key TEXT GENERATED ALWAYS AS (normalize_owner_key(owner_name)) STORED,  -- Indexed owner matching key
     mailing_address TEXT,
     site_address TEXT,
     property_type TEXT,
@@ -517,6 +549,11 @@ CREATE TABLE bulk_property_records (
     coordinates GEOMETRY(POINT, 4326),
     latitude DECIMAL(10, 8),
     longitude DECIMAL(11, 8),
+    geog GEOGRAPHY(POINT, 4326) GENERATED ALWAYS AS (parcel_point_geog(latitude, longitude)) STORED,  -- Indexed radius/KNN searches (migration 010)
+    grid_x INTEGER,  -- 125 m grid cell (see refresh_property_grid, migration 012)
+    grid_y INTEGER,
+    feature_vector vector(11),  -- Comp similarity features (see refresh_property_feature_vectors, migration 016)
+    row_fingerprint TEXT,  -- MD5 of source values; unchanged parcels are not reloaded (migration 019)
     sales_history JSONB DEFAULT '[]',  -- Array of past sales
     permit_history JSONB DEFAULT '[]',  -- Permits from qPublic
     trim_notice JSONB,  -- TRIM valuation info
@@ -528,14 +565,23 @@ CREATE TABLE bulk_property_records (
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW(),
 
-    PRIMARY KEY (id, market_id),
-    UNIQUE (parcel_id, market_id, snapshot_id)
+    CONSTRAINT bulk_property_records_pkey PRIMARY KEY (id, market_id, is_current),
+    CONSTRAINT bulk_property_records_parcel_snapshot_key UNIQUE (parcel_id, market_id, snapshot_id, is_current),
+    CONSTRAINT bulk_property_records_parcel_id_canonical CHECK (parcel_id = canonical_parcel_id(parcel_id))
 ) PARTITION BY LIST (market_id);
 
 CREATE INDEX idx_bulk_property_records_market_id ON bulk_property_records(market_id);
 CREATE INDEX idx_bulk_property_records_parcel_id ON bulk_property_records(parcel_id);
 CREATE INDEX idx_bulk_property_records_snapshot_id ON bulk_property_records(snapshot_id);
 CREATE INDEX idx_bulk_property_records_coordinates ON bulk_property_records USING GIST(coordinates);
+CREATE INDEX idx_bulk_property_records_geog ON bulk_property_records USING GIST(geog);
+CREATE INDEX idx_bulk_property_records_owner_key ON bulk_property_records(owner_key);
+CREATE INDEX idx_bulk_property_records_owner_key_trgm ON bulk_property_records USING GIN(owner_key gin_trgm_ops);
+CREATE INDEX idx_bulk_property_records_feature_vector ON bulk_property_records USING hnsw(feature_vector vector_l2_ops) WITH (m = 16, ef_construction = 64);
+
+-- Current snapshot only (hot partitions) - default read path
+CREATE VIEW current_bulk_properties AS
+SELECT * FROM bulk_property_records WHERE is_current;
 
 -- Bulk LLC Records (Sunbiz SFTP monthly dump) - NOT PARTITIONED (statewide)
 CREATE TABLE bulk_llc_records (
@@ -647,6 +693,20 @@ CREATE TABLE embeddings_cache (
 CREATE INDEX idx_embeddings_cache_content_hash ON embeddings_cache(content_hash);
 CREATE INDEX idx_embeddings_cache_embedding ON embeddings_cache USING ivfflat(embedding vector_cosine_ops);
 
+-- Query Embeddings Cache (RAG Lambda: search query vectors by normalized text + model)
+CREATE TABLE query_embeddings_cache (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    content_hash TEXT UNIQUE NOT NULL,
+    embedding vector(1024) NOT NULL,  -- Bedrock Titan Embed Text v2
+    model_version TEXT NOT NULL,
+    content_preview TEXT,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_query_embeddings_cache_last_used_at ON query_embeddings_cache(last_used_at);
+
 -- LLM Cache (Reduce API costs by caching responses)
 CREATE TABLE llm_cache (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -678,6 +738,21 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Hot/cold bulk_property_records partitions for a market
+CREATE OR REPLACE FUNCTION create_bulk_property_partitions(p_market_id UUID, p_market_code TEXT)
+RETURNS VOID AS $$
+DECLARE
+    v_partition TEXT := 'bulk_property_records_' || p_market_code;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF bulk_property_records FOR VALUES IN (%L) PARTITION BY LIST (is_current)',
+        v_partition, p_market_id
+    );
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (TRUE)', v_partition || '_current', v_partition);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (FALSE)', v_partition || '_history', v_partition);
+END;
+$$ LANGUAGE plpgsql;
+
 -- Apply updated_at trigger to relevant tables
 CREATE TRIGGER update_markets_updated_at BEFORE UPDATE ON markets
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
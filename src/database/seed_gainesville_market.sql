@@ -49,8 +49,8 @@ BEGIN
     -- Create partition for news_articles
     EXECUTE format('CREATE TABLE news_articles_gainesville_fl PARTITION OF news_articles FOR VALUES IN (%L)', gainesville_market_id);
 
-    -- Create partition for bulk_property_records
-    EXECUTE format('CREATE TABLE bulk_property_records_gainesville_fl PARTITION OF bulk_property_records FOR VALUES IN (%L)', gainesville_market_id);
+    -- Create partition for bulk_property_records (hot/cold sub-partitions by is_current)
+    PERFORM create_bulk_property_partitions(gainesville_market_id, 'gainesville_fl');
 
     RAISE NOTICE 'Gainesville market created with ID: %', gainesville_market_id;
     RAISE NOTICE 'All 7 partitions created successfully for Gainesville';
@@ -77,6 +77,10 @@ class ComparableSalesAnalyzer:
         """
         Find comparable properties that recently sold
 
+        Comps are the subject's nearest neighbours by feature vector (value, size, rooms,
+        age, lot, location, features, neighbourhood), scored with the same
+        property_similarity_score() as the find_comparable_properties tool.
+
         Args:
             subject_property_id: Property to find comps for
             property_type: Filter by property type (or use subject's type)
@@ -89,7 +93,7 @@ class ComparableSalesAnalyzer:
         Returns:
             Dict with:
             - subject: Subject property details
-            - comparable_sales: List of comp properties
+            - comparable_sales: List of comp properties, most similar first
             - search_parameters: What filters were used
             - comps_found: Count of comps found
         """
@@ -112,6 +116,12 @@ class ComparableSalesAnalyzer:
         if not property_type:
             property_type = subject.get('property_type')
 
+        if not subject.get('feature_vector'):
+            return {
+                'error': 'Subject property has no feature vector (not in the current snapshot, or vectors not built yet)',
+                'subject_property_id': subject_property_id
+            }
+
         # Calculate size range (±30% by default)
         subject_size = subject.get('lot_size_acres')
         if subject_size:
@@ -124,66 +134,72 @@ class ComparableSalesAnalyzer:
         # Calculate cutoff date
         cutoff_date = datetime.now() - timedelta(days=max_age_days)
 
-        # Get nearby properties with recent sales
-        # Note: LocationAnalyzer fetches limit*3 properties before distance filtering
-        # So limit=500 means it will fetch 1500 properties to filter from
-        nearby = await self.location_analyzer.find_nearby_properties(
-            target_property_id=subject_property_id,
-            radius_miles=max_distance_miles,
-            property_type=property_type,
-            limit=500  # Get plenty to filter from (fetches 1500 before distance filtering)
-        )
+        # Nearest neighbours in feature-vector space (HNSW index, migration 016), filtered to
+        # recent sales of the same type within the radius - one query instead of a radius
+        # search plus a lookup per candidate
+        where_clauses = [
+            "bp.feature_vector IS NOT NULL",
+            "bp.id != :subject_id",
+            "bp.property_type = :property_type",
+            "bp.last_sale_date >= :cutoff_date",
+            "bp.last_sale_price > 0"
+        ]
+        params = {
+            'subject_id': subject_property_id,
+            'subject_vector': subject['feature_vector'],
+            'property_type': property_type,
+            'cutoff_date': cutoff_date.date(),
+            'subject_lat': subject.get('latitude'),
+            'subject_lon': subject.get('longitude'),
+            'max_comps': max_comps
+        }
 
-        if 'error' in nearby:
-            return {
-                'error': 'Could not find nearby properties',
-                'details': nearby['error']
-            }
+        if subject.get('latitude') and subject.get('longitude'):
+            where_clauses.append(
+                "ST_DWithin(bp.geog, ST_SetSRID(ST_MakePoint(:subject_lon, :subject_lat), 4326)::geography, :max_distance_meters)"
+            )
+            params['max_distance_meters'] = max_distance_miles * 1609.344
 
-        # Filter for recent sales and similar size
-        comps = []
-        for prop in nearby.get('properties', []):
-            # Must have recent sale data
-            if not prop.get('property_id'):
-                continue
+        if min_size and max_size:
+            where_clauses.append("(bp.lot_size_acres IS NULL OR bp.lot_size_acres BETWEEN :min_size AND :max_size)")
+            params.update({'min_size': min_size, 'max_size': max_size})
 
-            # Get full details with sale data
-            details_query = text("""
+        # Relaxed-order ANN output is re-sorted by exact distance outside the materialized scan
+        query = text(f"""
+            WITH nearest AS MATERIALIZED (
                 SELECT
-                    id, parcel_id, site_address, property_type,
-                    market_value, lot_size_acres,
-                    last_sale_date, last_sale_price,
-                    latitude, longitude
-                FROM bulk_property_records
-                WHERE id = :property_id
-                  AND last_sale_date IS NOT NULL
-                  AND last_sale_date >= :cutoff_date
-                  AND last_sale_price IS NOT NULL
-                  AND last_sale_price > 0
-            """)
-
-            result = await self.session.execute(details_query, {
-                'property_id': prop['property_id'],
-                'cutoff_date': cutoff_date.date()
-            })
-            row = result.fetchone()
+                    bp.id, bp.parcel_id, bp.site_address, bp.property_type,
+                    bp.market_value, bp.lot_size_acres,
+                    bp.last_sale_date, bp.last_sale_price,
+                    bp.latitude, bp.longitude,
+                    ST_Distance(bp.geog, ST_SetSRID(ST_MakePoint(:subject_lon, :subject_lat), 4326)::geography) / 1609.344 as distance_miles,
+                    bp.feature_vector <-> CAST(:subject_vector AS vector) as vector_distance
+                FROM current_bulk_properties bp
+                WHERE {' AND '.join(where_clauses)}
+                ORDER BY bp.feature_vector <-> CAST(:subject_vector AS vector)
+                LIMIT :max_comps
+            )
+            SELECT *, property_similarity_score(vector_distance) as similarity_score
+            FROM nearest
+            ORDER BY vector_distance, parcel_id
+        """)
 
-            if not row:
-                continue
+        # Filtered HNSW scan: widen the candidate list and (pgvector >= 0.8) keep scanning
+        # until :max_comps rows pass the filters - for this transaction only
+        await self.session.execute(text("""
+            SELECT set_config('hnsw.ef_search', '200', true),
+                   (SELECT set_config(name, 'relaxed_order', true)
+                    FROM pg_settings
+                    WHERE name = 'hnsw.iterative_scan')
+        """))
+        result = await self.session.execute(query, params)
 
-            # Check size similarity
+        comps = []
+        for row in result:
             comp_size = float(row[5]) if row[5] else None
-            if min_size and max_size and comp_size:
-                if comp_size < min_size or comp_size > max_size:
-                    continue  # Too different in size
-
-            # Calculate sale age
             sale_date = row[6]
             days_since_sale = (datetime.now().date() - sale_date).days if sale_date else None
 
-            # Calculate distance
-            distance = prop.get('distance_miles', 0)
-
             comps.append({
                 'property_id': str(row[0]),
                 'parcel_id': row[1],
@@ -194,19 +210,15 @@ class ComparableSalesAnalyzer:
                 'sale_date': sale_date.isoformat() if sale_date else None,
                 'sale_price': float(row[7]) if row[7] else None,
                 'days_since_sale': days_since_sale,
-                'distance_miles': distance,
+                'distance_miles': round(float(row[10]), 2) if row[10] is not None else 0,
                 'latitude': float(row[8]) if row[8] else None,
                 'longitude': float(row[9]) if row[9] else None,
                 'size_difference_pct': round(((comp_size - subject_size) / subject_size * 100), 1) if (subject_size and comp_size) else None,
-                'price_per_acre': round(float(row[7]) / comp_size, 2) if (row[7] and comp_size and comp_size > 0) else None
+                'price_per_acre': round(float(row[7]) / comp_size, 2) if (row[7] and comp_size and comp_size > 0) else None,
+                'vector_distance': round(float(row[11]), 4),
+                'similarity_score': float(row[12])
             })
 
-        # Sort by relevance: closer and more recent are better
-        comps.sort(key=lambda x: (x['distance_miles'] * 0.6 + (x['days_since_sale'] / 365) * 0.4))
-
-        # Limit to requested max
-        comps = comps[:max_comps]
-
         logger.info(
             "comparable_sales_found",
             count=len(comps),
@@ -237,7 +249,8 @@ class ComparableSalesAnalyzer:
                 'max_age_days': max_age_days,
                 'size_tolerance': size_tolerance,
                 'property_type_filter': property_type,
-                'cutoff_date': cutoff_date.date().isoformat()
+                'cutoff_date': cutoff_date.date().isoformat(),
+                'ranking': 'feature-vector similarity (property_similarity_score)'
             },
             'meets_minimum': len(comps) >= min_comps
         }
@@ -533,8 +546,9 @@ class ComparableSalesAnalyzer:
             SELECT
                 id, parcel_id, site_address, property_type,
                 market_value, lot_size_acres,
-                latitude, longitude
-            FROM bulk_property_records
+                latitude, longitude,
+                feature_vector::text
+            FROM current_bulk_properties
             WHERE id = :property_id
         """)
 
@@ -552,5 +566,6 @@ class ComparableSalesAnalyzer:
             'market_value': float(row[4]) if row[4] else None,
             'lot_size_acres': float(row[5]) if row[5] else None,
             'latitude': float(row[6]) if row[6] else None,
-            'longitude': float(row[7]) if row[7] else None
+            'longitude': float(row[7]) if row[7] else None,
+            'feature_vector': row[8]
         }
@@ -381,8 +381,8 @@ class EntityAnalyzer:
                 COUNT(*) as count,
                 AVG(bp.market_value) as avg_value,
                 COUNT(CASE WHEN bp.last_sale_date >= :recent_date THEN 1 END) as recent_count
-            FROM bulk_property_records bp
-            JOIN entities e ON e.name = bp.owner_name
+            FROM current_bulk_properties bp
+            JOIN entities e ON e.entity_key = bp.owner_key
             WHERE e.id = :entity_id
             {market_filter}
             GROUP BY bp.property_type
@@ -405,8 +405,8 @@ class EntityAnalyzer:
                 DATE_TRUNC('year', bp.last_sale_date) as year,
                 COUNT(*) as acquisitions,
                 SUM(bp.last_sale_price) as total_invested
-            FROM bulk_property_records bp
-            JOIN entities e ON e.name = bp.owner_name
+            FROM current_bulk_properties bp
+            JOIN entities e ON e.entity_key = bp.owner_key
             WHERE e.id = :entity_id
               AND bp.last_sale_date IS NOT NULL
             {market_filter}
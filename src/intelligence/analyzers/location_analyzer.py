@@ -195,7 +195,7 @@ class LocationAnalyzer:
                 p.latitude,
                 p.longitude,
                 p.owner_name
-            FROM bulk_property_records p
+            FROM current_bulk_properties p
             WHERE p.latitude IS NOT NULL
               AND p.longitude IS NOT NULL
               AND p.latitude BETWEEN :lat_min AND :lat_max
@@ -373,7 +373,7 @@ class LocationAnalyzer:
                     END) as recent_permit_count,
                     p.last_sale_date,
                     p.last_sale_price
-                FROM bulk_property_records p
+                FROM current_bulk_properties p
                 LEFT JOIN permits perm ON perm.property_id = p.id
                 WHERE p.market_id = :market_id
                   AND p.latitude IS NOT NULL
@@ -437,7 +437,7 @@ class LocationAnalyzer:
                 # Get active investors in area
                 investor_query = text("""
                     SELECT DISTINCT e.entity_name, COUNT(*) as property_count
-                    FROM bulk_property_records p
+                    FROM current_bulk_properties p
                     JOIN entities e ON p.owner_entity_id = e.id
                     WHERE p.market_id = :market_id
                       AND p.latitude IS NOT NULL
@@ -595,7 +595,7 @@ class LocationAnalyzer:
             SELECT
                 COUNT(DISTINCT p.id) FILTER (WHERE p.last_sale_date >= :cutoff_date) as recent_sales,
                 COUNT(DISTINCT perm.id) FILTER (WHERE perm.issued_date >= :cutoff_date) as recent_permits
-            FROM bulk_property_records p
+            FROM current_bulk_properties p
             LEFT JOIN permits perm ON perm.property_id = p.id
             WHERE p.id IN ({placeholders})
         """)
@@ -622,7 +622,7 @@ class LocationAnalyzer:
         """Get latitude/longitude for a property"""
         query = text("""
             SELECT latitude, longitude
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE id = :property_id
               AND latitude IS NOT NULL
               AND longitude IS NOT NULL
@@ -278,7 +278,7 @@ class MarketAnalyzer:
                 SUM(square_feet) as total_sqft,
                 AVG(square_feet) as avg_sqft,
                 COUNT(CASE WHEN last_sale_date >= NOW() - INTERVAL '365 days' THEN 1 END) as sales_last_year
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
         """)
 
@@ -312,7 +312,7 @@ class MarketAnalyzer:
                 COUNT(*) as count,
                 AVG(market_value) as avg_value,
                 SUM(market_value) as total_value
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
               AND property_type IS NOT NULL
             GROUP BY property_type
@@ -339,7 +339,7 @@ class MarketAnalyzer:
         query = text(f"""
             SELECT
                 {', '.join(percentile_queries)}
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
               AND market_value IS NOT NULL
               AND market_value > 0
@@ -373,7 +373,7 @@ class MarketAnalyzer:
                 AVG(last_sale_price) as avg_sale_price,
                 SUM(last_sale_price) as total_volume,
                 AVG(market_value) as avg_current_value
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
               AND last_sale_date >= :recent_date
               AND last_sale_price IS NOT NULL
@@ -428,7 +428,7 @@ class MarketAnalyzer:
                 COUNT(CASE WHEN bp.last_sale_date >= :recent_date THEN 1 END) as recent_acquisitions
             FROM entities e
             JOIN entity_market_properties emp ON emp.entity_id = e.id
-            JOIN bulk_property_records bp ON bp.owner_name = e.name
+            JOIN current_bulk_properties bp ON bp.owner_key = e.entity_key
             WHERE emp.market_id = :market_id
               AND emp.total_properties >= 2
             GROUP BY e.id, e.name, e.entity_type, emp.total_properties
@@ -457,7 +457,7 @@ class MarketAnalyzer:
             SELECT
                 COUNT(DISTINCT e.id) as total_investors,
                 SUM(emp.total_properties) as properties_by_investors,
-                (SELECT COUNT(*) FROM bulk_property_records WHERE market_id = :market_id) as total_properties
+                (SELECT COUNT(*) FROM current_bulk_properties WHERE market_id = :market_id) as total_properties
             FROM entities e
             JOIN entity_market_properties emp ON emp.entity_id = e.id
             WHERE emp.market_id = :market_id
@@ -520,9 +520,9 @@ class MarketAnalyzer:
                 bp.latitude,
                 bp.longitude,
                 bp.last_sale_date
-            FROM bulk_property_records bp
+            FROM current_bulk_properties bp
             WHERE bp.market_id = :market_id
-              AND bp.owner_name = :entity_name
+              AND bp.owner_key = normalize_owner_key(:entity_name)
               AND bp.last_sale_date >= :recent_date
               AND bp.latitude IS NOT NULL
               AND bp.longitude IS NOT NULL
@@ -633,7 +633,7 @@ class MarketAnalyzer:
                 DATE_TRUNC('month', last_sale_date) as month,
                 COUNT(*) as sales_count,
                 AVG(last_sale_price) as avg_price
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
               AND last_sale_date >= :recent_date
               AND last_sale_price IS NOT NULL
@@ -661,7 +661,7 @@ class MarketAnalyzer:
                 COUNT(*) as total_properties,
                 COUNT(CASE WHEN last_sale_date >= :recent_date THEN 1 END) as recent_sales,
                 AVG(market_value) as avg_value
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
               AND city IS NOT NULL
             GROUP BY city
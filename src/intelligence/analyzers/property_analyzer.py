@@ -20,6 +20,8 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
+from ...utils.parcel_ids import canonical_parcel_id
+
 logger = structlog.get_logger(__name__)
 
 
@@ -182,7 +184,7 @@ class PropertyAnalyzer:
             identifier = property_id
         else:
             where_clause = "WHERE parcel_id = :identifier"
-            identifier = parcel_id
+            identifier = canonical_parcel_id(parcel_id)
 
         query = text(f"""
             SELECT
@@ -219,7 +221,7 @@ class PropertyAnalyzer:
                 trim_notice,
                 created_at,
                 updated_at
-            FROM bulk_property_records
+            FROM current_bulk_properties
             {where_clause}
             LIMIT 1
         """)
@@ -315,7 +317,7 @@ class PropertyAnalyzer:
             FROM entities e
             LEFT JOIN entity_market_properties emp ON emp.entity_id = e.id
                 AND emp.market_id = :market_id
-            WHERE e.name = :owner_name
+            WHERE e.entity_key = normalize_owner_key(:owner_name)
             LIMIT 1
         """)
 
@@ -393,7 +395,7 @@ class PropertyAnalyzer:
                 AVG(square_feet) as avg_sqft,
                 COUNT(CASE WHEN last_sale_date >= :recent_date THEN 1 END) as recent_sales,
                 AVG(CASE WHEN last_sale_date >= :recent_date THEN last_sale_price END) as avg_recent_price
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE market_id = :market_id
               AND id != :property_id
               AND latitude BETWEEN :min_lat AND :max_lat
@@ -543,7 +545,7 @@ class PropertyAnalyzer:
                         COUNT(CASE WHEN status = 'Issued' THEN 1 END) as active_permits,
                         SUM(project_value) as total_value
                     FROM permits p
-                    JOIN bulk_property_records bpr ON bpr.parcel_id = p.parcel_id AND bpr.market_id = p.market_id
+                    JOIN current_bulk_properties bpr ON bpr.parcel_id = p.parcel_id AND bpr.market_id = p.market_id
                     WHERE p.market_id = :market_id
                       AND bpr.latitude BETWEEN :min_lat AND :max_lat
                       AND bpr.longitude BETWEEN :min_lon AND :max_lon
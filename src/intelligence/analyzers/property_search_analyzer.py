@@ -139,8 +139,8 @@ class PropertySearchAnalyzer:
 
         # Exclude owner
         if exclude_owner:
-            where_clauses.append("owner_name NOT ILIKE :exclude_owner")
-            params['exclude_owner'] = f'%{exclude_owner}%'
+            where_clauses.append("owner_key NOT LIKE '%' || normalize_owner_key(:exclude_owner) || '%'")
+            params['exclude_owner'] = exclude_owner
 
         # Geographic filter
         if near_lat and near_lng and radius_miles:
@@ -182,7 +182,7 @@ class PropertySearchAnalyzer:
                 last_sale_price,
                 total_permits,
                 building_details
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE {where_clause}
             ORDER BY market_value / NULLIF(lot_size_acres, 0)
             LIMIT :limit
@@ -256,8 +256,8 @@ class PropertySearchAnalyzer:
                    entity_name=entity_name,
                    property_type=property_type)
 
-        where_clauses = ["owner_name ILIKE :entity_name"]
-        params = {'entity_name': f'%{entity_name}%', 'limit': limit}
+        where_clauses = ["owner_key LIKE '%' || normalize_owner_key(:entity_name) || '%'"]
+        params = {'entity_name': entity_name, 'limit': limit}
 
         if property_type:
             where_clauses.append("property_type ILIKE :property_type")
@@ -279,7 +279,7 @@ class PropertySearchAnalyzer:
                 last_sale_price,
                 year_built,
                 total_permits
-            FROM bulk_property_records
+            FROM current_bulk_properties
             WHERE {where_clause}
             ORDER BY last_sale_date DESC NULLS LAST
             LIMIT :limit
@@ -154,6 +154,10 @@ class GISScraper:
             shp_file = shp_files[0]
             gdf = gpd.read_file(shp_file)
 
+            # County shapefiles ship in State Plane; features are lon/lat like the GeoJSON layers
+            if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+                gdf = gdf.to_crs(epsg=4326)
+
             result = []
             for i, (idx, row) in enumerate(gdf.iterrows()):
                 if limit and i >= limit:
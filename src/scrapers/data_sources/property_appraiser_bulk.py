@@ -18,9 +18,21 @@ from bs4 import BeautifulSoup
 import structlog
 
 from ...config.schemas import MarketConfig
+from ...utils.parcel_ids import canonical_parcel_id
 
 logger = structlog.get_logger(__name__)
 
+# Sales.txt column names per sale field (lowercased; first non-empty wins). _map_fields uses
+# the same lists for last_sale_*, so the sale ordering and the mapped sales agree.
+SALE_FIELD_ALIASES = {
+    'sale_date': ['sale_date', 'last_sale_date', 'saledate', 'or_date'],
+    'sale_price': ['sale_price', 'last_sale_price', 'saleprice', 'or_value'],
+    'sale_qualified': ['sale_qualified', 'qualified', 'qual'],
+    'sale_type_vac_imp': ['sale_vac_imp', 'vac_imp', 'vacant_improved'],
+    'sale_book': ['sale_book', 'book', 'or_book'],
+    'sale_page': ['sale_page', 'page', 'or_page'],
+}
+
 
 class PropertyRecord:
     """Comprehensive property record model with all 99 CAMA fields."""
@@ -108,6 +120,11 @@ class PropertyRecord:
         self.sale_type_vac_imp = data.get('sale_type_vac_imp', '')
         self.sale_book = data.get('sale_book', '')
         self.sale_page = data.get('sale_page', '')
+        # Every Sales.txt row for the parcel, most recent first (property_sales, migration 021)
+        self.sales = [
+            dict(sale, sale_price=self._parse_float(sale.get('sale_price')))
+            for sale in data.get('sales') or []
+        ]
 
         # Tax exemptions
         # Match CSV: default to 0.0 when no exemptions (not None)
@@ -246,6 +263,7 @@ class PropertyRecord:
             'sale_type_vac_imp': self.sale_type_vac_imp,
             'sale_book': self.sale_book,
             'sale_page': self.sale_page,
+            'sales': self.sales,
 
             # Tax exemptions
             'total_exemption_amount': self.total_exemption_amount,
@@ -564,7 +582,7 @@ class PropertyAppraiserScraper:
                         if parcel:
                             lookup_tables['owners'][parcel] = row
 
-            # Sales (get most recent sale per parcel)
+            # Sales (every sale per parcel, most recent first - the first one fills last_sale_*)
             if cama_files.get('sales'):
                 logger.info("loading_sales_data")
                 lookup_tables['sales'] = {}
@@ -572,8 +590,10 @@ class PropertyAppraiserScraper:
                     reader = csv.DictReader(f, delimiter='\t')
                     for row in reader:
                         parcel = row.get('Parcel', '').strip()
-                        if parcel and parcel not in lookup_tables['sales']:
-                            lookup_tables['sales'][parcel] = row
+                        if parcel:
+                            lookup_tables['sales'].setdefault(parcel, []).append(row)
+                for sales in lookup_tables['sales'].values():
+                    sales.sort(key=self._sale_sort_key, reverse=True)
 
             # HistoryRE (get LATEST tax year per parcel - contains assessed/market values)
             if cama_files.get('history'):
@@ -672,8 +692,9 @@ class PropertyAppraiserScraper:
                     if parcel in lookup_tables.get('owners', {}):
                         row.update(lookup_tables['owners'][parcel])
 
-                    if parcel in lookup_tables.get('sales', {}):
-                        row.update(lookup_tables['sales'][parcel])
+                    sales = lookup_tables.get('sales', {}).get(parcel, [])
+                    if sales:
+                        row.update(sales[0])
 
                     if parcel in lookup_tables.get('history', {}):
                         row.update(lookup_tables['history'][parcel])
@@ -701,6 +722,7 @@ class PropertyAppraiserScraper:
                         row.update(lookup_tables['exemptions_agg'][parcel])
 
                     data = self._map_fields(row)
+                    data['sales'] = [self._map_sale(sale) for sale in sales]
 
                     # FALLBACK: Use oldest_improvement_year for year_built if empty (matches CSV logic)
                     if not data.get('year_built') and data.get('oldest_improvement_year'):
@@ -831,12 +853,12 @@ class PropertyAppraiserScraper:
             'valuation_year': ['hist_tax_year', 'tax_year', 'valuation_year', 'year'],
 
             # Sales info (from Sales.txt)
-            'last_sale_date': ['sale_date', 'last_sale_date', 'saledate', 'or_date'],
-            'last_sale_price': ['sale_price', 'last_sale_price', 'saleprice', 'or_value'],
-            'sale_qualified': ['sale_qualified', 'qualified', 'qual'],
-            'sale_type_vac_imp': ['sale_vac_imp', 'vac_imp', 'vacant_improved'],
-            'sale_book': ['sale_book', 'book', 'or_book'],
-            'sale_page': ['sale_page', 'page', 'or_page'],
+            'last_sale_date': SALE_FIELD_ALIASES['sale_date'],
+            'last_sale_price': SALE_FIELD_ALIASES['sale_price'],
+            'sale_qualified': SALE_FIELD_ALIASES['sale_qualified'],
+            'sale_type_vac_imp': SALE_FIELD_ALIASES['sale_type_vac_imp'],
+            'sale_book': SALE_FIELD_ALIASES['sale_book'],
+            'sale_page': SALE_FIELD_ALIASES['sale_page'],
 
             # Legal description (from Legals.txt)
             'legal_description': ['legal_desc', 'legal_description', 'legal'],
@@ -879,6 +901,9 @@ class PropertyAppraiserScraper:
             if field not in mapped_data:
                 mapped_data[field] = None
 
+        # One spelling per parcel, so lookups can use indexed equality (migration 017)
+        mapped_data['parcel_id'] = canonical_parcel_id(mapped_data['parcel_id'])
+
         # Build complete mailing address from components (Owners.txt has separate city/state/zip)
         if mapped_data.get('owner_address'):
             # Check if we have city/state/zip to append
@@ -908,6 +933,34 @@ class PropertyAppraiserScraper:
 
         return mapped_data
 
+    @staticmethod
+    def _sale_field(row_lower: Dict, field: str) -> Optional[str]:
+        """First non-empty Sales.txt column for a sale field (SALE_FIELD_ALIASES)"""
+        for name in SALE_FIELD_ALIASES[field]:
+            value = row_lower.get(name)
+            if value is not None and value != '':
+                return value
+        return None
+
+    @classmethod
+    def _sale_sort_key(cls, row: Dict) -> datetime:
+        """Sales.txt row ordering by sale date (rows without a readable date sort oldest)"""
+        row_lower = {k.lower().strip(): v.strip() if isinstance(v, str) else v for k, v in row.items() if k}
+        value = cls._sale_field(row_lower, 'sale_date') or ''
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                return datetime.strptime(value, '%m/%d/%Y')
+            except ValueError:
+                return datetime.min
+
+    @classmethod
+    def _map_sale(cls, row: Dict) -> Dict:
+        """One Sales.txt row as a property_sales record (same columns as the last_sale_* fields)"""
+        row_lower = {k.lower().strip(): v.strip() if isinstance(v, str) else v for k, v in row.items() if k}
+        return {field: cls._sale_field(row_lower, field) for field in SALE_FIELD_ALIASES}
+
     def _aggregate_improvements(self, file_path: Path) -> Dict[str, Dict]:
         """
         Aggregate ImprvDetails.txt data per parcel.
@@ -1213,7 +1266,7 @@ class PropertyAppraiserScraper:
             # Create lookup by parcel (use first geometry for each parcel to avoid duplicates)
             gis_lookup = {}
             for idx, row in gdf_wgs84.iterrows():
-                parcel = str(row.get('Name', '')).strip()
+                parcel = canonical_parcel_id(row.get('Name'))
                 if parcel and parcel not in gis_lookup:  # Take first geometry only
                     gis_lookup[parcel] = {
                         'latitude': round(row['latitude'], 8),
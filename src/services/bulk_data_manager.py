@@ -28,9 +28,14 @@ from ..database import DatabaseManager
 from ..scrapers.data_sources.sunbiz import SunbizScraper
 from ..scrapers.data_sources.property_appraiser_bulk import PropertyAppraiserScraper
 from ..scrapers.data_sources.gis_shapefile_downloader import GISScraper
+from .parcel_adjacency import ParcelAdjacencyBuilder, feature_parcel_id
+from .derived_refresh import DerivedTableRefresher
+from ..utils.parcel_ids import canonical_parcel_id
 
 logger = structlog.get_logger(__name__)
 
+SALES_BATCH_SIZE = 5000
+
 
 class BulkSnapshot:
     """Represents a bulk data snapshot metadata record"""
@@ -102,6 +107,7 @@ class BulkDataManager:
         # GIS (monthly)
         if self.gis_scraper:
             await self.sync_gis(force_update=force_update)
+            await self.sync_parcel_adjacency(force_update=force_update)
 
         logger.info("bulk_sync_completed")
 
@@ -231,18 +237,21 @@ class BulkDataManager:
             await self._mark_processing(session, snapshot['id'])
             await session.commit()
 
-        # Process records
-        stats = await self._process_property_records(property_records, snapshot)
-
-        # Mark completed
+        # Load the delta into the hot partition, then mark completed, retire the rows it
+        # replaces and refresh the derived tables for what changed (market cube, grid rollups,
+        # owner portfolios, comp feature vectors, owner components, entity portfolios) - one
+        # transaction, so readers never see a parcel's old and new row together
         async with self.db_manager.async_session_maker() as session:
+            stats = await self._process_property_records(session, property_records, snapshot)
             await self._mark_completed(session, snapshot['id'], stats)
             await session.commit()
 
         logger.info("property_sync_completed",
                    snapshot_id=snapshot['id'],
                    added=stats['added'],
-                   updated=stats['updated'])
+                   updated=stats['updated'],
+                   unchanged=stats['unchanged'],
+                   removed=stats['removed'])
 
         return snapshot
 
@@ -339,6 +348,78 @@ class BulkDataManager:
         return snapshot
 
 
+    async def sync_parcel_adjacency(self, force_update: bool = False) -> Optional[BulkSnapshot]:
+        """
+        Rebuild the parcel adjacency graph from the GIS parcels layer.
+
+        Independent of the (disabled) bulk_gis_parcels load: polygons are only used to derive
+        parcel_adjacency, then same-owner components are refreshed from the latest
+        property snapshot.
+        """
+        logger.info("adjacency_sync_started")
+
+        features = self.gis_scraper.fetch_layer('parcels')
+
+        if not features:
+            logger.error("adjacency_fetch_failed")
+            return None
+
+        builder = ParcelAdjacencyBuilder()
+        polygons = builder.load_polygons(features)
+
+        # MD5 over the parcel polygons (parcel_id + WKT), independent of attribute churn
+        md5 = hashlib.md5()
+        for parcel_id in sorted(polygons):
+            md5.update(parcel_id.encode())
+            md5.update(polygons[parcel_id].wkt.encode())
+        md5_hash = md5.hexdigest()
+
+        source_name = f"{self.config.market.name.lower()}_adjacency"
+
+        async with self.db_manager.async_session_maker() as session:
+            changed, prev_snapshot = await self._check_if_changed(
+                session,
+                source_type='gis_parcels',
+                source_name=source_name,
+                md5_hash=md5_hash
+            )
+
+            if not changed and not force_update:
+                logger.info("adjacency_unchanged", md5=md5_hash[:16])
+                return prev_snapshot
+
+            snapshot = await self._create_snapshot(
+                session,
+                source_type='gis_parcels',
+                source_name=source_name,
+                file_url=self.gis_scraper.shapefile_urls.get('parcels', ''),
+                md5_hash=md5_hash,
+                file_size=len(polygons),
+                is_initial_load=(prev_snapshot is None)
+            )
+
+            await self._mark_processing(session, snapshot['id'])
+            await session.commit()
+
+        edges = builder.build_edges(polygons)
+
+        market_id = CurrentMarket.get_id()
+        async with self.db_manager.async_session_maker() as session:
+            rows = await builder.write_edges(session, market_id, edges, snapshot['id'])
+            components = await builder.refresh_owner_components(session, market_id)
+            stats = {'total': len(polygons), 'added': rows, 'updated': 0, 'unchanged': 0}
+            await self._mark_completed(session, snapshot['id'], stats)
+            await session.commit()
+
+        logger.info("adjacency_sync_completed",
+                   snapshot_id=snapshot['id'],
+                   parcels=len(polygons),
+                   edges=len(edges),
+                   components=components['components'])
+
+        return snapshot
+
+
     async def sync_zoning(self, layer_name: str = 'zoning', force_update: bool = False) -> Optional[BulkSnapshot]:
         """Sync zoning GIS layer - DISABLED for schema v2 (no zoning tables yet)"""
         logger.warning("zoning_sync_disabled",
@@ -506,237 +587,405 @@ class BulkDataManager:
 
     async def _process_property_records(
         self,
+        session: AsyncSession,
         property_records: List,
         snapshot: BulkSnapshot
     ) -> Dict[str, int]:
-        """Upsert property records into bulk table - Schema v2 compatible"""
-        added, updated = 0, 0
+        """
+        Load new and changed parcels into the snapshot - Schema v2 compatible.
+
+        Each row is fingerprinted and compared with the parcel's current row: unchanged
+        parcels are skipped, parcels absent from the file are logged as removed. New rows
+        go straight into the hot partition (is_current); the diff and the retirement of the
+        rows they replace happen in _mark_completed (migrations 018/019). Runs in the
+        caller's transaction, which must call _mark_completed before committing.
+
+        Sales of new and changed parcels (a new sale changes the parcel) are written to
+        property_sales; the market's first load with Sales.txt rows writes every parcel's
+        sales (migration 021).
+        """
+        added, updated, unchanged = 0, 0, 0
 
         # Get current market_id from CurrentMarket
         market_id = CurrentMarket.get_id()
 
-        async with self.db_manager.async_session_maker() as session:
-            for prop in property_records:
-                sale_date = self._parse_date(prop.last_sale_date)
-
-                # Comprehensive 99-field insert
-                await session.execute(text("""
-                    INSERT INTO bulk_property_records (
-                        id, market_id, parcel_id, snapshot_id,
-                        -- Owner (5 fields)
-                        owner_name, mailing_address, owner_city, owner_state, owner_zip,
-                        -- Location (11 fields)
-                        site_address, latitude, longitude, city, lot_size_acres,
-                        section, township, range_value, neighborhood_code, neighborhood_desc,
-                        subdivision_code, subdivision_desc,
-                        -- Classification (8 fields)
-                        property_type, use_code, land_use_code, land_use_desc,
-                        land_zoning_code, land_zoning_desc, land_type, land_sqft,
-                        -- Building primary (6 fields)
-                        year_built, effective_year_built, square_feet, stories,
-                        improvement_type, improvement_desc,
-                        -- Building attributes (9 fields)
-                        bedrooms, bathrooms, roof_type, wall_type, exterior_type,
-                        heat_type, ac_type, building_quality, building_condition,
-                        -- Aggregated structures (10 fields)
-                        total_improvement_sqft, total_improvement_count, improvement_types_list,
-                        oldest_improvement_year, newest_improvement_year,
-                        has_garage, has_porch, has_pool, has_fence, has_shed,
-                        -- Valuation (6 fields)
-                        market_value, assessed_value, taxable_value, land_value,
-                        improvement_value, valuation_year,
-                        -- Sales (6 fields)
-                        last_sale_date, last_sale_price, sale_qualified,
-                        sale_type_vac_imp, sale_book, sale_page,
-                        -- Exemptions (4 fields)
-                        total_exemption_amount, exemption_types_list, exemption_count,
-                        most_recent_exemption_year,
-                        -- Legal & Permits (2 fields)
-                        legal_description, total_permits,
-                        created_at, updated_at
-                    ) VALUES (
-                        gen_random_uuid(), :market_id, :parcel_id, :snapshot_id,
-                        :owner_name, :mailing_address, :owner_city, :owner_state, :owner_zip,
-                        :site_address, :latitude, :longitude, :city, :lot_size_acres,
-                        :section, :township, :range_value, :neighborhood_code, :neighborhood_desc,
-                        :subdivision_code, :subdivision_desc,
-                        :property_type, :use_code, :land_use_code, :land_use_desc,
-                        :land_zoning_code, :land_zoning_desc, :land_type, :land_sqft,
-                        :year_built, :effective_year_built, :square_feet, :stories,
-                        :improvement_type, :improvement_desc,
-                        :bedrooms, :bathrooms, :roof_type, :wall_type, :exterior_type,
-                        :heat_type, :ac_type, :building_quality, :building_condition,
-                        :total_improvement_sqft, :total_improvement_count, :improvement_types_list,
-                        :oldest_improvement_year, :newest_improvement_year,
-                        :has_garage, :has_porch, :has_pool, :has_fence, :has_shed,
-                        :market_value, :assessed_value, :taxable_value, :land_value,
-                        :improvement_value, :valuation_year,
-                        :last_sale_date, :last_sale_price, :sale_qualified,
-                        :sale_type_vac_imp, :sale_book, :sale_page,
-                        :total_exemption_amount, :exemption_types_list, :exemption_count,
-                        :most_recent_exemption_year,
-                        :legal_description, :total_permits,
-                        NOW(), NOW()
-                    )
-                    ON CONFLICT (parcel_id, market_id, snapshot_id) DO UPDATE SET
-                        updated_at = NOW(),
-                        owner_name = EXCLUDED.owner_name,
-                        mailing_address = EXCLUDED.mailing_address,
-                        owner_city = EXCLUDED.owner_city,
-                        owner_state = EXCLUDED.owner_state,
-                        owner_zip = EXCLUDED.owner_zip,
-                        site_address = EXCLUDED.site_address,
-                        latitude = EXCLUDED.latitude,
-                        longitude = EXCLUDED.longitude,
-                        city = EXCLUDED.city,
-                        lot_size_acres = EXCLUDED.lot_size_acres,
-                        section = EXCLUDED.section,
-                        township = EXCLUDED.township,
-                        range_value = EXCLUDED.range_value,
-                        neighborhood_code = EXCLUDED.neighborhood_code,
-                        neighborhood_desc = EXCLUDED.neighborhood_desc,
-                        subdivision_code = EXCLUDED.subdivision_code,
-                        subdivision_desc = EXCLUDED.subdivision_desc,
-                        property_type = EXCLUDED.property_type,
-                        use_code = EXCLUDED.use_code,
-                        land_use_code = EXCLUDED.land_use_code,
-                        land_use_desc = EXCLUDED.land_use_desc,
-                        land_zoning_code = EXCLUDED.land_zoning_code,
-                        land_zoning_desc = EXCLUDED.land_zoning_desc,
-                        land_type = EXCLUDED.land_type,
-                        land_sqft = EXCLUDED.land_sqft,
-                        year_built = EXCLUDED.year_built,
-                        effective_year_built = EXCLUDED.effective_year_built,
-                        square_feet = EXCLUDED.square_feet,
-                        stories = EXCLUDED.stories,
-                        improvement_type = EXCLUDED.improvement_type,
-                        improvement_desc = EXCLUDED.improvement_desc,
-                        bedrooms = EXCLUDED.bedrooms,
-                        bathrooms = EXCLUDED.bathrooms,
-                        roof_type = EXCLUDED.roof_type,
-                        wall_type = EXCLUDED.wall_type,
-                        exterior_type = EXCLUDED.exterior_type,
-                        heat_type = EXCLUDED.heat_type,
-                        ac_type = EXCLUDED.ac_type,
-                        building_quality = EXCLUDED.building_quality,
-                        building_condition = EXCLUDED.building_condition,
-                        total_improvement_sqft = EXCLUDED.total_improvement_sqft,
-                        total_improvement_count = EXCLUDED.total_improvement_count,
-                        improvement_types_list = EXCLUDED.improvement_types_list,
-                        oldest_improvement_year = EXCLUDED.oldest_improvement_year,
-                        newest_improvement_year = EXCLUDED.newest_improvement_year,
-                        has_garage = EXCLUDED.has_garage,
-                        has_porch = EXCLUDED.has_porch,
-                        has_pool = EXCLUDED.has_pool,
-                        has_fence = EXCLUDED.has_fence,
-                        has_shed = EXCLUDED.has_shed,
-                        market_value = EXCLUDED.market_value,
-                        assessed_value = EXCLUDED.assessed_value,
-                        taxable_value = EXCLUDED.taxable_value,
-                        land_value = EXCLUDED.land_value,
-                        improvement_value = EXCLUDED.improvement_value,
-                        valuation_year = EXCLUDED.valuation_year,
-                        last_sale_date = EXCLUDED.last_sale_date,
-                        last_sale_price = EXCLUDED.last_sale_price,
-                        sale_qualified = EXCLUDED.sale_qualified,
-                        sale_type_vac_imp = EXCLUDED.sale_type_vac_imp,
-                        sale_book = EXCLUDED.sale_book,
-                        sale_page = EXCLUDED.sale_page,
-                        total_exemption_amount = EXCLUDED.total_exemption_amount,
-                        exemption_types_list = EXCLUDED.exemption_types_list,
-                        exemption_count = EXCLUDED.exemption_count,
-                        most_recent_exemption_year = EXCLUDED.most_recent_exemption_year,
-                        legal_description = EXCLUDED.legal_description,
-                        total_permits = EXCLUDED.total_permits
-                """), {
-                    'market_id': str(market_id),
-                    'parcel_id': prop.parcel_id,
-                    'snapshot_id': str(snapshot['id']),
-                    # Owner
-                    'owner_name': prop.owner_name,
-                    'mailing_address': prop.owner_address,
-                    'owner_city': getattr(prop, 'owner_city', None),
-                    'owner_state': getattr(prop, 'owner_state', None),
-                    'owner_zip': getattr(prop, 'owner_zip', None),
-                    # Location
-                    'site_address': prop.property_address,
-                    'latitude': getattr(prop, 'latitude', None),
-                    'longitude': getattr(prop, 'longitude', None),
-                    'city': getattr(prop, 'city', None),
-                    'lot_size_acres': prop.lot_size_acres,
-                    'section': getattr(prop, 'section', None),
-                    'township': getattr(prop, 'township', None),
-                    'range_value': getattr(prop, 'range_value', None),
-                    'neighborhood_code': getattr(prop, 'neighborhood_code', None),
-                    'neighborhood_desc': getattr(prop, 'neighborhood_desc', None),
-                    'subdivision_code': getattr(prop, 'subdivision_code', None),
-                    'subdivision_desc': getattr(prop, 'subdivision_desc', None),
-                    # Classification
-                    'property_type': getattr(prop, 'property_type', None),
-                    'use_code': getattr(prop, 'use_code', None),
-                    'land_use_code': getattr(prop, 'land_use_code', None),
-                    'land_use_desc': getattr(prop, 'land_use_desc', None),
-                    'land_zoning_code': getattr(prop, 'land_zoning_code', None),
-                    'land_zoning_desc': getattr(prop, 'land_zoning_desc', None),
-                    'land_type': getattr(prop, 'land_type', None),
-                    'land_sqft': getattr(prop, 'land_sqft', None),
-                    # Building primary
-                    'year_built': prop.year_built,
-                    'effective_year_built': getattr(prop, 'effective_year_built', None),
-                    'square_feet': prop.square_footage,
-                    'stories': getattr(prop, 'stories', None),
-                    'improvement_type': getattr(prop, 'improvement_type', None),
-                    'improvement_desc': getattr(prop, 'improvement_desc', None),
-                    # Building attributes
-                    'bedrooms': prop.bedrooms,
-                    'bathrooms': prop.bathrooms,
-                    'roof_type': getattr(prop, 'roof_type', None),
-                    'wall_type': getattr(prop, 'wall_type', None),
-                    'exterior_type': getattr(prop, 'exterior_type', None),
-                    'heat_type': getattr(prop, 'heat_type', None),
-                    'ac_type': getattr(prop, 'ac_type', None),
-                    'building_quality': getattr(prop, 'building_quality', None),
-                    'building_condition': getattr(prop, 'building_condition', None),
-                    # Aggregated structures
-                    'total_improvement_sqft': getattr(prop, 'total_improvement_sqft', None),
-                    'total_improvement_count': getattr(prop, 'total_improvement_count', None),
-                    'improvement_types_list': getattr(prop, 'improvement_types_list', None),
-                    'oldest_improvement_year': getattr(prop, 'oldest_improvement_year', None),
-                    'newest_improvement_year': getattr(prop, 'newest_improvement_year', None),
-                    'has_garage': getattr(prop, 'has_garage', None),
-                    'has_porch': getattr(prop, 'has_porch', None),
-                    'has_pool': getattr(prop, 'has_pool', None),
-                    'has_fence': getattr(prop, 'has_fence', None),
-                    'has_shed': getattr(prop, 'has_shed', None),
-                    # Valuation
-                    'market_value': prop.market_value,
-                    'assessed_value': prop.assessed_value,
-                    'taxable_value': getattr(prop, 'taxable_value', None),
-                    'land_value': prop.land_value,
-                    'improvement_value': getattr(prop, 'improvement_value', None),
-                    'valuation_year': getattr(prop, 'valuation_year', None),
-                    # Sales
-                    'last_sale_date': sale_date,
-                    'last_sale_price': prop.last_sale_price,
-                    'sale_qualified': getattr(prop, 'sale_qualified', None),
-                    'sale_type_vac_imp': getattr(prop, 'sale_type_vac_imp', None),
-                    'sale_book': getattr(prop, 'sale_book', None),
-                    'sale_page': getattr(prop, 'sale_page', None),
-                    # Exemptions
-                    'total_exemption_amount': getattr(prop, 'total_exemption_amount', None),
-                    'exemption_types_list': getattr(prop, 'exemption_types_list', None),
-                    'exemption_count': getattr(prop, 'exemption_count', None),
-                    'most_recent_exemption_year': getattr(prop, 'most_recent_exemption_year', None),
-                    # Legal & Permits
-                    'legal_description': getattr(prop, 'legal_description', None),
-                    'total_permits': getattr(prop, 'total_permits', None),
-                })
+        result = await session.execute(text("""
+            SELECT parcel_id, row_fingerprint
+            FROM current_bulk_properties
+            WHERE market_id = :market_id
+        """), {'market_id': str(market_id)})
+        current_fingerprints = dict(result.all())
+        seen = set()
 
+        result = await session.execute(text("""
+            SELECT NOT EXISTS (
+                SELECT 1 FROM property_sales WHERE market_id = :market_id AND source = 'cama_sales'
+            )
+        """), {'market_id': str(market_id)})
+        backfill_sales = result.scalar()
+        sales_parcels, sales_rows = [], []
+
+        for prop in property_records:
+            # Scrapers already canonicalize; this guards records built elsewhere (migration 017 CHECK)
+            parcel_id = canonical_parcel_id(prop.parcel_id)
+            if not parcel_id:
+                continue
+
+            sale_date = self._parse_date(prop.last_sale_date)
+            latitude = getattr(prop, 'latitude', None)
+            longitude = getattr(prop, 'longitude', None)
+
+            values = {
+                'parcel_id': parcel_id,
+                # Owner
+                'owner_name': prop.owner_name,
+                'mailing_address': prop.owner_address,
+                'owner_city': getattr(prop, 'owner_city', None),
+                'owner_state': getattr(prop, 'owner_state', None),
+                'owner_zip': getattr(prop, 'owner_zip', None),
+                # Location
+                'site_address': prop.property_address,
+                'latitude': latitude,
+                'longitude': longitude,
+                'city': getattr(prop, 'city', None),
+                'lot_size_acres': prop.lot_size_acres,
+                'section': getattr(prop, 'section', None),
+                'township': getattr(prop, 'township', None),
+                'range_value': getattr(prop, 'range_value', None),
+                'neighborhood_code': getattr(prop, 'neighborhood_code', None),
+                'neighborhood_desc': getattr(prop, 'neighborhood_desc', None),
+                'subdivision_code': getattr(prop, 'subdivision_code', None),
+                'subdivision_desc': getattr(prop, 'subdivision_desc', None),
+                # Classification
+                'property_type': getattr(prop, 'property_type', None),
+                'use_code': getattr(prop, 'use_code', None),
+                'land_use_code': getattr(prop, 'land_use_code', None),
+                'land_use_desc': getattr(prop, 'land_use_desc', None),
+                'land_zoning_code': getattr(prop, 'land_zoning_code', None),
+                'land_zoning_desc': getattr(prop, 'land_zoning_desc', None),
+                'land_type': getattr(prop, 'land_type', None),
+                'land_sqft': getattr(prop, 'land_sqft', None),
+                # Building primary
+                'year_built': prop.year_built,
+                'effective_year_built': getattr(prop, 'effective_year_built', None),
+                'square_feet': prop.square_footage,
+                'stories': getattr(prop, 'stories', None),
+                'improvement_type': getattr(prop, 'improvement_type', None),
+                'improvement_desc': getattr(prop, 'improvement_desc', None),
+                # Building attributes
+                'bedrooms': prop.bedrooms,
+                'bathrooms': prop.bathrooms,
+                'roof_type': getattr(prop, 'roof_type', None),
+                'wall_type': getattr(prop, 'wall_type', None),
+                'exterior_type': getattr(prop, 'exterior_type', None),
+                'heat_type': getattr(prop, 'heat_type', None),
+                'ac_type': getattr(prop, 'ac_type', None),
+                'building_quality': getattr(prop, 'building_quality', None),
+                'building_condition': getattr(prop, 'building_condition', None),
+                # Aggregated structures
+                'total_improvement_sqft': getattr(prop, 'total_improvement_sqft', None),
+                'total_improvement_count': getattr(prop, 'total_improvement_count', None),
+                'improvement_types_list': getattr(prop, 'improvement_types_list', None),
+                'oldest_improvement_year': getattr(prop, 'oldest_improvement_year', None),
+                'newest_improvement_year': getattr(prop, 'newest_improvement_year', None),
+                'has_garage': getattr(prop, 'has_garage', None),
+                'has_porch': getattr(prop, 'has_porch', None),
+                'has_pool': getattr(prop, 'has_pool', None),
+                'has_fence': getattr(prop, 'has_fence', None),
+                'has_shed': getattr(prop, 'has_shed', None),
+                # Valuation
+                'market_value': prop.market_value,
+                'assessed_value': prop.assessed_value,
+                'taxable_value': getattr(prop, 'taxable_value', None),
+                'land_value': prop.land_value,
+                'improvement_value': getattr(prop, 'improvement_value', None),
+                'valuation_year': getattr(prop, 'valuation_year', None),
+                # Sales
+                'last_sale_date': sale_date,
+                'last_sale_price': prop.last_sale_price,
+                'sale_qualified': getattr(prop, 'sale_qualified', None),
+                'sale_type_vac_imp': getattr(prop, 'sale_type_vac_imp', None),
+                'sale_book': getattr(prop, 'sale_book', None),
+                'sale_page': getattr(prop, 'sale_page', None),
+                # Exemptions
+                'total_exemption_amount': getattr(prop, 'total_exemption_amount', None),
+                'exemption_types_list': getattr(prop, 'exemption_types_list', None),
+                'exemption_count': getattr(prop, 'exemption_count', None),
+                'most_recent_exemption_year': getattr(prop, 'most_recent_exemption_year', None),
+                # Legal & Permits
+                'legal_description': getattr(prop, 'legal_description', None),
+                'total_permits': getattr(prop, 'total_permits', None),
+            }
+
+            seen.add(parcel_id)
+            fingerprint = self._row_fingerprint(values)
+            sales = getattr(prop, 'sales', None)
+            if current_fingerprints.get(parcel_id) != fingerprint or (backfill_sales and sales):
+                if sales:
+                    sales_parcels.append(parcel_id)
+                sales_rows.extend(self._sale_rows(values, sales))
+
+            if current_fingerprints.get(parcel_id) == fingerprint:
+                unchanged += 1
+                continue
+
+            # Comprehensive 99-field insert
+            await session.execute(text("""
+                INSERT INTO bulk_property_records (
+                    id, market_id, parcel_id, snapshot_id, is_current,
+                    -- Owner (5 fields)
+                    owner_name, mailing_address, owner_city, owner_state, owner_zip,
+                    -- Location (11 fields)
+                    site_address, latitude, longitude, city, lot_size_acres,
+                    section, township, range_value, neighborhood_code, neighborhood_desc,
+                    subdivision_code, subdivision_desc,
+                    -- Classification (8 fields)
+                    property_type, use_code, land_use_code, land_use_desc,
+                    land_zoning_code, land_zoning_desc, land_type, land_sqft,
+                    -- Building primary (6 fields)
+                    year_built, effective_year_built, square_feet, stories,
+                    improvement_type, improvement_desc,
+                    -- Building attributes (9 fields)
+                    bedrooms, bathrooms, roof_type, wall_type, exterior_type,
+                    heat_type, ac_type, building_quality, building_condition,
+                    -- Aggregated structures (10 fields)
+                    total_improvement_sqft, total_improvement_count, improvement_types_list,
+                    oldest_improvement_year, newest_improvement_year,
+                    has_garage, has_porch, has_pool, has_fence, has_shed,
+                    -- Valuation (6 fields)
+                    market_value, assessed_value, taxable_value, land_value,
+                    improvement_value, valuation_year,
+                    -- Sales (6 fields)
+                    last_sale_date, last_sale_price, sale_qualified,
+                    sale_type_vac_imp, sale_book, sale_page,
+                    -- Exemptions (4 fields)
+                    total_exemption_amount, exemption_types_list, exemption_count,
+                    most_recent_exemption_year,
+                    -- Legal & Permits (2 fields)
+                    legal_description, total_permits,
+                    row_fingerprint, created_at, updated_at
+                ) VALUES (
+                    gen_random_uuid(), :market_id, :parcel_id, :snapshot_id, TRUE,
+                    :owner_name, :mailing_address, :owner_city, :owner_state, :owner_zip,
+                    :site_address, :latitude, :longitude, :city, :lot_size_acres,
+                    :section, :township, :range_value, :neighborhood_code, :neighborhood_desc,
+                    :subdivision_code, :subdivision_desc,
+                    :property_type, :use_code, :land_use_code, :land_use_desc,
+                    :land_zoning_code, :land_zoning_desc, :land_type, :land_sqft,
+                    :year_built, :effective_year_built, :square_feet, :stories,
+                    :improvement_type, :improvement_desc,
+                    :bedrooms, :bathrooms, :roof_type, :wall_type, :exterior_type,
+                    :heat_type, :ac_type, :building_quality, :building_condition,
+                    :total_improvement_sqft, :total_improvement_count, :improvement_types_list,
+                    :oldest_improvement_year, :newest_improvement_year,
+                    :has_garage, :has_porch, :has_pool, :has_fence, :has_shed,
+                    :market_value, :assessed_value, :taxable_value, :land_value,
+                    :improvement_value, :valuation_year,
+                    :last_sale_date, :last_sale_price, :sale_qualified,
+                    :sale_type_vac_imp, :sale_book, :sale_page,
+                    :total_exemption_amount, :exemption_types_list, :exemption_count,
+                    :most_recent_exemption_year,
+                    :legal_description, :total_permits,
+                    :row_fingerprint, NOW(), NOW()
+                )
+                ON CONFLICT (parcel_id, market_id, snapshot_id, is_current) DO UPDATE SET
+                    updated_at = NOW(),
+                    row_fingerprint = EXCLUDED.row_fingerprint,
+                    owner_name = EXCLUDED.owner_name,
+                    mailing_address = EXCLUDED.mailing_address,
+                    owner_city = EXCLUDED.owner_city,
+                    owner_state = EXCLUDED.owner_state,
+                    owner_zip = EXCLUDED.owner_zip,
+                    site_address = EXCLUDED.site_address,
+                    latitude = EXCLUDED.latitude,
+                    longitude = EXCLUDED.longitude,
+                    city = EXCLUDED.city,
+                    lot_size_acres = EXCLUDED.lot_size_acres,
+                    section = EXCLUDED.section,
+                    township = EXCLUDED.township,
+                    range_value = EXCLUDED.range_value,
+                    neighborhood_code = EXCLUDED.neighborhood_code,
+                    neighborhood_desc = EXCLUDED.neighborhood_desc,
+                    subdivision_code = EXCLUDED.subdivision_code,
+                    subdivision_desc = EXCLUDED.subdivision_desc,
+                    property_type = EXCLUDED.property_type,
+                    use_code = EXCLUDED.use_code,
+                    land_use_code = EXCLUDED.land_use_code,
+                    land_use_desc = EXCLUDED.land_use_desc,
+                    land_zoning_code = EXCLUDED.land_zoning_code,
+                    land_zoning_desc = EXCLUDED.land_zoning_desc,
+                    land_type = EXCLUDED.land_type,
+                    land_sqft = EXCLUDED.land_sqft,
+                    year_built = EXCLUDED.year_built,
+                    effective_year_built = EXCLUDED.effective_year_built,
+                    square_feet = EXCLUDED.square_feet,
+                    stories = EXCLUDED.stories,
+                    improvement_type = EXCLUDED.improvement_type,
+                    improvement_desc = EXCLUDED.improvement_desc,
+                    bedrooms = EXCLUDED.bedrooms,
+                    bathrooms = EXCLUDED.bathrooms,
+                    roof_type = EXCLUDED.roof_type,
+                    wall_type = EXCLUDED.wall_type,
+                    exterior_type = EXCLUDED.exterior_type,
+                    heat_type = EXCLUDED.heat_type,
+                    ac_type = EXCLUDED.ac_type,
+                    building_quality = EXCLUDED.building_quality,
+                    building_condition = EXCLUDED.building_condition,
+                    total_improvement_sqft = EXCLUDED.total_improvement_sqft,
+                    total_improvement_count = EXCLUDED.total_improvement_count,
+                    improvement_types_list = EXCLUDED.improvement_types_list,
+                    oldest_improvement_year = EXCLUDED.oldest_improvement_year,
+                    newest_improvement_year = EXCLUDED.newest_improvement_year,
+                    has_garage = EXCLUDED.has_garage,
+                    has_porch = EXCLUDED.has_porch,
+                    has_pool = EXCLUDED.has_pool,
+                    has_fence = EXCLUDED.has_fence,
+                    has_shed = EXCLUDED.has_shed,
+                    market_value = EXCLUDED.market_value,
+                    assessed_value = EXCLUDED.assessed_value,
+                    taxable_value = EXCLUDED.taxable_value,
+                    land_value = EXCLUDED.land_value,
+                    improvement_value = EXCLUDED.improvement_value,
+                    valuation_year = EXCLUDED.valuation_year,
+                    last_sale_date = EXCLUDED.last_sale_date,
+                    last_sale_price = EXCLUDED.last_sale_price,
+                    sale_qualified = EXCLUDED.sale_qualified,
+                    sale_type_vac_imp = EXCLUDED.sale_type_vac_imp,
+                    sale_book = EXCLUDED.sale_book,
+                    sale_page = EXCLUDED.sale_page,
+                    total_exemption_amount = EXCLUDED.total_exemption_amount,
+                    exemption_types_list = EXCLUDED.exemption_types_list,
+                    exemption_count = EXCLUDED.exemption_count,
+                    most_recent_exemption_year = EXCLUDED.most_recent_exemption_year,
+                    legal_description = EXCLUDED.legal_description,
+                    total_permits = EXCLUDED.total_permits
+            """), dict(
+                values,
+                market_id=str(market_id),
+                snapshot_id=str(snapshot['id']),
+                row_fingerprint=fingerprint
+            ))
+
+            if parcel_id in current_fingerprints:
+                updated += 1
+            else:
                 added += 1
 
-            await session.commit()
+        await self._write_property_sales(session, market_id, snapshot['id'], sales_parcels, sales_rows)
+
+        # Parcels that dropped out of the file leave the hot set with the swap
+        removed = [parcel_id for parcel_id in current_fingerprints if parcel_id not in seen] if seen else []
+        if removed:
+            await session.execute(text("""
+                INSERT INTO property_change_log (
+                    market_id, parcel_id, change_type, snapshot_id, previous_snapshot_id,
+                    old_values, owner_key_before
+                )
+                SELECT
+                    market_id, parcel_id, 'removed', :snapshot_id, snapshot_id,
+                    jsonb_build_object(
+                        'owner_name', owner_name, 'site_address', site_address,
+                        'property_type', property_type, 'market_value', market_value,
+                        'last_sale_date', last_sale_date, 'last_sale_price', last_sale_price
+                    ),
+                    owner_key
+                FROM current_bulk_properties
+                WHERE market_id = :market_id
+                  AND parcel_id = ANY(:parcel_ids)
+            """), {'market_id': str(market_id), 'snapshot_id': str(snapshot['id']), 'parcel_ids': removed})
+
+        logger.info("property_delta_computed",
+                   snapshot_id=str(snapshot['id']),
+                   added=added,
+                   updated=updated,
+                   unchanged=unchanged,
+                   removed=len(removed),
+                   sales_written=len(sales_rows))
 
-        return {'total': len(property_records), 'added': added, 'updated': updated, 'unchanged': 0}
+        return {
+            'total': len(property_records),
+            'added': added,
+            'updated': updated,
+            'unchanged': unchanged,
+            'removed': len(removed)
+        }
+
+    @staticmethod
+    def _row_fingerprint(values: Dict) -> str:
+        """MD5 over a property row's source values - equal fingerprints mean an unchanged parcel"""
+        payload = json.dumps(values, sort_keys=True, default=str)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+    def _sale_rows(self, values: Dict, sales: Optional[List[Dict]]) -> List[Dict]:
+        """property_sales rows for one parcel: its Sales.txt rows, else its last sale"""
+        source = 'cama_sales'
+        if not sales:
+            source = 'last_sale'
+            sales = [{
+                'sale_date': values['last_sale_date'],
+                'sale_price': values['last_sale_price'],
+                'sale_qualified': values['sale_qualified'],
+                'sale_type_vac_imp': values['sale_type_vac_imp'],
+                'sale_book': values['sale_book'],
+                'sale_page': values['sale_page'],
+            }]
+
+        city = str(values['city'] or '').strip().upper() or None
+        property_type = str(values['property_type'] or '').strip() or 'UNKNOWN'
+
+        rows = []
+        for sale in sales:
+            sale_date = sale['sale_date']
+            if not isinstance(sale_date, date):
+                sale_date = self._parse_date(sale_date)
+            if not sale_date:
+                continue
+            rows.append({
+                'parcel_id': values['parcel_id'],
+                'sale_date': sale_date,
+                'sale_price': sale.get('sale_price'),
+                'sale_qualified': sale.get('sale_qualified') or None,
+                'sale_type_vac_imp': sale.get('sale_type_vac_imp') or None,
+                'sale_book': str(sale.get('sale_book') or '').strip(),
+                'sale_page': str(sale.get('sale_page') or '').strip(),
+                'city': city,
+                'property_type': property_type,
+                'source': source
+            })
+        return rows
+
+    async def _write_property_sales(
+        self,
+        session: AsyncSession,
+        market_id: str,
+        snapshot_id: uuid4,
+        parcel_ids: List[str],
+        rows: List[Dict]
+    ):
+        """
+        Replace the sales of parcels loaded with Sales.txt rows (corrections and city
+        changes follow the file) and add last-sale-only rows for the rest.
+        """
+        for start in range(0, len(parcel_ids), SALES_BATCH_SIZE):
+            await session.execute(text("""
+                DELETE FROM property_sales
+                WHERE market_id = :market_id
+                  AND parcel_id = ANY(:parcel_ids)
+            """), {'market_id': str(market_id), 'parcel_ids': parcel_ids[start:start + SALES_BATCH_SIZE]})
+
+        insert = text("""
+            INSERT INTO property_sales (
+                market_id, parcel_id, sale_date, sale_price, sale_qualified, sale_type_vac_imp,
+                sale_book, sale_page, city, property_type, source, snapshot_id
+            ) VALUES (
+                :market_id, :parcel_id, :sale_date, :sale_price, :sale_qualified, :sale_type_vac_imp,
+                :sale_book, :sale_page, :city, :property_type, :source, :snapshot_id
+            )
+            ON CONFLICT (market_id, parcel_id, sale_date, sale_book, sale_page) DO NOTHING
+        """)
+        params = [dict(row, market_id=str(market_id), snapshot_id=str(snapshot_id)) for row in rows]
+        for start in range(0, len(params), SALES_BATCH_SIZE):
+            await session.execute(insert, params[start:start + SALES_BATCH_SIZE])
 
 
     async def _process_gis_features(
@@ -772,14 +1021,8 @@ class BulkDataManager:
             for feature in features:
                 feature_dict = feature.to_dict()
 
-                # Extract parcel ID with fallbacks
-                parcel_id = (
-                    feature_dict.get('Name') or
-                    feature_dict.get('PARCEL_ID') or
-                    feature_dict.get('parcelid') or
-                    feature_dict.get('PIN') or
-                    str(feature_dict.get('Prop_ID')) if feature_dict.get('Prop_ID') else None
-                )
+                # Extract canonical parcel ID with fallbacks
+                parcel_id = feature_parcel_id(feature_dict)
 
                 # Skip parcels without valid ID
                 if not parcel_id or parcel_id == '0':
@@ -1043,7 +1286,16 @@ class BulkDataManager:
         snapshot_id: uuid4,
         stats: Dict[str, int]
     ):
-        """Mark snapshot as completed with stats - Schema V2 compatible (no SQL function)"""
+        """
+        Mark snapshot as completed with stats and make it current.
+
+        A property snapshot's rows are already in the hot partition (same transaction);
+        the swap retires the current rows they replace or that were removed, together with
+        the status change (migrations 018/019). Other sources are a no-op swap.
+
+        When the swap changed the hot set, the derived tables are refreshed for the changed
+        parcels in the same transaction (DerivedTableRefresher, migration 020).
+        """
         await session.execute(text("""
             UPDATE bulk_data_snapshots
             SET status = 'completed',
@@ -1062,6 +1314,22 @@ class BulkDataManager:
             'unchanged': stats.get('unchanged', 0)
         })
 
+        started = datetime.now()
+        result = await session.execute(text("""
+            SELECT rows_promoted, rows_retired
+            FROM swap_current_property_snapshot(:snapshot_id)
+        """), {'snapshot_id': str(snapshot_id)})
+        rows_promoted, rows_retired = result.one()
+
+        if rows_promoted or rows_retired:
+            logger.info("current_property_snapshot_swapped",
+                       snapshot_id=str(snapshot_id),
+                       rows_promoted=rows_promoted,
+                       rows_retired=rows_retired,
+                       duration_ms=int((datetime.now() - started).total_seconds() * 1000))
+
+            await DerivedTableRefresher().refresh_after_snapshot(session, CurrentMarket.get_id(), str(snapshot_id))
+
 
     def _calculate_md5(self, file_path: Path) -> str:
         """Calculate MD5 hash of file"""
@@ -24,6 +24,7 @@ from sqlalchemy import select, text
 from .entity_resolution import EntityResolver
 from .sunbiz_enrichment import SunbizEnrichmentService
 from .relationship_builder import RelationshipBuilder
+from .derived_refresh import DerivedTableRefresher
 
 from ..database import (
     RawFact,
@@ -39,6 +40,10 @@ from ..config import CurrentMarket
 
 logger = logging.getLogger(__name__)
 
+# Domain object attributes that link to entities (entity_market_properties is refreshed
+# for these after a batch)
+ENTITY_LINK_ATTRIBUTES = ('entity_id', 'owner_entity_id', 'applicant_entity_id', 'contractor_entity_id')
+
 
 class DataIngestionService:
     """Universal data ingestion pipeline for all scrapers"""
@@ -170,7 +175,12 @@ class DataIngestionService:
         market_id: Optional[str] = None,
         scraped_at: Optional[datetime] = None
     ) -> Dict[str, Any]:
-        """Ingest multiple records in batch"""
+        """
+        Ingest multiple records in batch
+
+        Entities the batch created or linked get their entity_market_properties refreshed
+        at the end, in the caller's transaction (committed with the batch).
+        """
         results = {
             'total': len(raw_contents),
             'ingested': 0,
@@ -178,6 +188,7 @@ class DataIngestionService:
             'errors': 0,
             'raw_fact_ids': []
         }
+        entity_ids = set()
 
         for raw_content in raw_contents:
             try:
@@ -196,11 +207,20 @@ class DataIngestionService:
                 else:
                     results['ingested'] += 1
                     results['raw_fact_ids'].append(str(result['raw_fact_id']))
+                    for obj in result['domain_objects']:
+                        for attr in ENTITY_LINK_ATTRIBUTES:
+                            if getattr(obj, attr, None):
+                                entity_ids.add(str(getattr(obj, attr)))
 
             except Exception as e:
                 results['errors'] += 1
                 logger.error(f"Batch ingestion error: {e}", exc_info=True)
 
+        if entity_ids:
+            await DerivedTableRefresher().refresh_entities(
+                db_session, market_id or CurrentMarket.get_id(), entity_ids
+            )
+
         logger.info(f"Batch complete: {results['ingested']} ingested, {results['duplicates']} duplicates, {results['errors']} errors")
         return results
 
@@ -744,7 +764,7 @@ class DataIngestionService:
                     bathrooms,
                     land_value,
                     use_code
-                FROM bulk_property_records
+                FROM current_bulk_properties
                 WHERE parcel_id = :parcel_id
                 LIMIT 1
             """), {'parcel_id': parcel_id})
@@ -1218,7 +1238,7 @@ class DataIngestionService:
             result = await db_session.execute(
                 text("""
                     SELECT parcel_id
-                    FROM bulk_property_records
+                    FROM current_bulk_properties
                     WHERE UPPER(site_address) = :address
                     LIMIT 1
                 """),
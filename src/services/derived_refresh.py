@@ -0,0 +1,429 @@
+"""
+Derived Table Refresh
+
+Keeps the tables derived from the property snapshots and entities in step with the data,
+refreshing only what a change touched instead of rebuilding every market after every
+load (migration 020).
+
+Triggers:
+- BulkDataManager._mark_completed, after a property snapshot is swapped in
+- DataIngestionService.ingest_batch, for the entities a batch created or linked
+- scripts (populate_entity_market_properties.py, run_entity_resolution.py): full rebuild
+
+Each table declares the key it is built on and the source fields it depends on. New
+property_change_log entries are mapped to keys on both sides of the change (old row and
+new row - a parcel moving between cities touches both), and only those keys are rebuilt:
+
+    table                      key          depends on
+    market_stats_monthly       city         city, type, value, lot size, last sale
+    property_grid_rollups      city         city, type, value, coordinates
+    owner_portfolio_rollups    owner_key    owner, city, type, value, lot size, last sale
+    property_feature_vectors   parcel_id    the comp features
+    parcel_owner_components    (market)     owner, city
+    entity_market_properties   owner_key    owner, value, last sale
+
+A table with no state yet (first run) is rebuilt for the whole market. Each refresh runs
+in a savepoint: a failure is logged and recorded in derived_refresh_state.last_error
+without losing the snapshot, and the table's change log position is not advanced, so the
+next trigger retries the same changes.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .parcel_adjacency import ParcelAdjacencyBuilder
+
+logger = structlog.get_logger(__name__)
+
+
+class DerivedTable(NamedTuple):
+    """A derived table, the key it is refreshed by and the source fields it reads"""
+    name: str
+    key: Optional[str]            # SQL over property row alias {r}; None = whole market
+    fields: Tuple[str, ...]       # property_change_log.changed_fields that affect it
+
+
+DERIVED_TABLES = (
+    DerivedTable(
+        'market_stats_monthly', 'UPPER(TRIM({r}.city))',
+        ('city', 'property_type', 'market_value', 'lot_size_acres', 'last_sale_date', 'last_sale_price')
+    ),
+    DerivedTable(
+        'property_grid_rollups', 'UPPER(TRIM({r}.city))',
+        ('city', 'property_type', 'market_value', 'latitude', 'longitude')
+    ),
+    DerivedTable(
+        'owner_portfolio_rollups', '{r}.owner_key',
+        ('owner_name', 'city', 'property_type', 'market_value', 'lot_size_acres', 'last_sale_date')
+    ),
+    DerivedTable(
+        'property_feature_vectors', '{r}.parcel_id',
+        ('market_value', 'square_feet', 'bedrooms', 'bathrooms', 'year_built', 'lot_size_acres',
+         'latitude', 'longitude', 'has_pool', 'has_garage', 'neighborhood_desc', 'city')
+    ),
+    DerivedTable(
+        'parcel_owner_components', None,
+        ('owner_name', 'city')
+    ),
+    DerivedTable(
+        'entity_market_properties', '{r}.owner_key',
+        ('owner_name', 'market_value', 'last_sale_date')
+    ),
+)
+
+# Change log entries a table has not applied: additions and removals always count,
+# changes only when one of the table's fields changed
+PENDING_FILTER = """
+    c.market_id = :market_id
+    AND c.id > :after_id
+    AND c.id <= :through_id
+    AND (c.change_type != 'changed' OR c.changed_fields && CAST(:fields AS TEXT[]))
+"""
+
+
+class DerivedTableRefresher:
+    """Refreshes derived tables for the keys touched by new changes and records metrics"""
+
+    def __init__(self, tables: Iterable[DerivedTable] = DERIVED_TABLES):
+        self.tables = {table.name: table for table in tables}
+
+    async def refresh_after_snapshot(
+        self,
+        session: AsyncSession,
+        market_id: str,
+        snapshot_id: str,
+        trigger: str = 'snapshot'
+    ) -> Dict[str, Dict]:
+        """
+        Bring every derived table of a market up to the end of the change log.
+
+        Runs in the caller's transaction (after swap_current_property_snapshot), so the
+        derived tables commit together with the snapshot they reflect.
+        """
+        result = await session.execute(text("""
+            SELECT COALESCE(MAX(id), 0) FROM property_change_log WHERE market_id = :market_id
+        """), {'market_id': str(market_id)})
+        through_id = result.scalar()
+
+        result = await session.execute(text("""
+            SELECT table_name, last_change_id
+            FROM derived_refresh_state
+            WHERE market_id = :market_id
+        """), {'market_id': str(market_id)})
+        positions = {row.table_name: row.last_change_id for row in result}
+
+        refreshed = {}
+        for table in self.tables.values():
+            after_id = positions.get(table.name)
+
+            if after_id is None:
+                # Never refreshed: whole market
+                changes, oldest_change = None, None
+            else:
+                changes, oldest_change = await self._pending(session, table, market_id, after_id, through_id)
+                if not changes:
+                    # Nothing it depends on changed: it already reflects the whole range
+                    await session.execute(text("""
+                        UPDATE derived_refresh_state
+                        SET last_change_id = :through_id
+                        WHERE table_name = :table_name AND market_id = :market_id
+                    """), {'through_id': through_id, 'table_name': table.name, 'market_id': str(market_id)})
+                    continue
+
+            keys = None
+            if after_id is not None and table.key is not None:
+                keys = await self._affected_keys(session, table, market_id, after_id, through_id)
+
+            refreshed[table.name] = await self._run(
+                session, table, market_id, snapshot_id, keys,
+                trigger=trigger,
+                changes=changes or 0,
+                oldest_change=oldest_change,
+                through_id=through_id
+            )
+
+        return refreshed
+
+    async def refresh_entities(
+        self,
+        session: AsyncSession,
+        market_id: str,
+        entity_ids: Iterable[str],
+        trigger: str = 'ingestion'
+    ) -> Optional[Dict]:
+        """Refresh entity_market_properties for entities an ingestion batch created or linked"""
+        entity_ids = sorted({str(entity_id) for entity_id in entity_ids if entity_id})
+        if not entity_ids:
+            return None
+
+        result = await session.execute(text("""
+            SELECT DISTINCT entity_key
+            FROM entities
+            WHERE id = ANY(CAST(:entity_ids AS UUID[]))
+              AND entity_key IS NOT NULL AND entity_key != ''
+        """), {'entity_ids': entity_ids})
+        keys = [row[0] for row in result]
+        if not keys:
+            return None
+
+        return await self._run(
+            session, self.tables['entity_market_properties'], market_id, None, keys,
+            trigger=trigger,
+            changes=len(entity_ids),
+            oldest_change=None,
+            through_id=None
+        )
+
+    async def rebuild(
+        self,
+        session: AsyncSession,
+        market_id: str,
+        table_names: Optional[Iterable[str]] = None,
+        snapshot_id: Optional[str] = None,
+        trigger: str = 'manual'
+    ) -> Dict[str, Dict]:
+        """Rebuild the given derived tables (default: all) for a whole market"""
+        result = await session.execute(text("""
+            SELECT COALESCE(MAX(id), 0) FROM property_change_log WHERE market_id = :market_id
+        """), {'market_id': str(market_id)})
+        through_id = result.scalar()
+
+        refreshed = {}
+        for name in table_names or self.tables:
+            refreshed[name] = await self._run(
+                session, self.tables[name], market_id, snapshot_id, None,
+                trigger=trigger,
+                changes=0,
+                oldest_change=None,
+                through_id=through_id
+            )
+        return refreshed
+
+    async def _pending(
+        self,
+        session: AsyncSession,
+        table: DerivedTable,
+        market_id: str,
+        after_id: int,
+        through_id: int
+    ) -> Tuple[int, Optional[datetime]]:
+        """Number of unapplied changes that affect the table, and when the oldest happened"""
+        result = await session.execute(text(f"""
+            SELECT COUNT(*), MIN(c.changed_at)
+            FROM property_change_log c
+            WHERE {PENDING_FILTER}
+        """), {
+            'market_id': str(market_id),
+            'after_id': after_id,
+            'through_id': through_id,
+            'fields': list(table.fields)
+        })
+        return tuple(result.one())
+
+    async def _affected_keys(
+        self,
+        session: AsyncSession,
+        table: DerivedTable,
+        market_id: str,
+        after_id: int,
+        through_id: int
+    ) -> List[str]:
+        """Table keys of the old and new rows of every unapplied change"""
+        result = await session.execute(text(f"""
+            SELECT DISTINCT k.key
+            FROM property_change_log c
+            LEFT JOIN bulk_property_records o
+              ON o.market_id = c.market_id
+             AND o.parcel_id = c.parcel_id
+             AND o.snapshot_id = c.previous_snapshot_id
+             AND NOT o.is_current
+            LEFT JOIN current_bulk_properties n
+              ON n.market_id = c.market_id
+             AND n.parcel_id = c.parcel_id
+            CROSS JOIN LATERAL (VALUES ({table.key.format(r='o')}), ({table.key.format(r='n')})) AS k(key)
+            WHERE {PENDING_FILTER}
+              AND k.key IS NOT NULL
+        """), {
+            'market_id': str(market_id),
+            'after_id': after_id,
+            'through_id': through_id,
+            'fields': list(table.fields)
+        })
+        return [row[0] for row in result]
+
+    async def _run(
+        self,
+        session: AsyncSession,
+        table: DerivedTable,
+        market_id: str,
+        snapshot_id: Optional[str],
+        keys: Optional[List[str]],
+        trigger: str,
+        changes: int,
+        oldest_change: Optional[datetime],
+        through_id: Optional[int]
+    ) -> Dict:
+        """Refresh one table in a savepoint, then record timing and staleness"""
+        started = datetime.now()
+        stats = {
+            'keys_refreshed': None if keys is None else len(keys),
+            'rows_written': None,
+            'full_rebuild': keys is None,
+            'duration_ms': None,
+            'staleness_ms': None,
+            'error': None
+        }
+
+        try:
+            async with session.begin_nested():
+                rows_written, full_rebuild = await self._refresh(session, table.name, market_id, snapshot_id, keys)
+            stats['rows_written'] = rows_written
+            stats['full_rebuild'] = full_rebuild
+        except Exception as e:
+            stats['error'] = str(e)
+            logger.error("derived_table_refresh_failed",
+                        table=table.name,
+                        market_id=str(market_id),
+                        error=str(e))
+
+        stats['duration_ms'] = int((datetime.now() - started).total_seconds() * 1000)
+        stats['staleness_ms'] = await self._record(
+            session, table.name, market_id, snapshot_id, trigger, changes, oldest_change, stats,
+            None if stats['error'] else through_id
+        )
+
+        if not stats['error']:
+            logger.info("derived_table_refreshed",
+                       table=table.name,
+                       trigger=trigger,
+                       changes=changes,
+                       **{k: v for k, v in stats.items() if k != 'error'})
+        return stats
+
+    async def _refresh(
+        self,
+        session: AsyncSession,
+        name: str,
+        market_id: str,
+        snapshot_id: Optional[str],
+        keys: Optional[List[str]]
+    ) -> Tuple[int, bool]:
+        """Run one table's refresh; returns (rows written, whether it rebuilt the whole market)"""
+        params = {'market_id': str(market_id), 'snapshot_id': str(snapshot_id) if snapshot_id else None, 'keys': keys}
+
+        if name == 'market_stats_monthly':
+            result = await session.execute(text("""
+                SELECT inventory_rows, sales_rows
+                FROM refresh_market_stats_monthly(:market_id, :snapshot_id, 36, CAST(:keys AS TEXT[]))
+            """), params)
+            inventory_rows, sales_rows = result.one()
+            return inventory_rows + sales_rows, keys is None
+
+        if name == 'property_grid_rollups':
+            result = await session.execute(text("""
+                SELECT parcels_gridded, cells_written
+                FROM refresh_property_grid(:market_id, :snapshot_id, 125, 6, CAST(:keys AS TEXT[]))
+            """), params)
+            parcels_gridded, cells_written = result.one()
+            return cells_written, keys is None
+
+        if name == 'owner_portfolio_rollups':
+            # Takes its owner delta from the change log itself (migration 019)
+            result = await session.execute(text("""
+                SELECT owners_changed, rows_written, rebuilt
+                FROM refresh_owner_portfolios(:market_id, :snapshot_id, :full)
+            """), dict(params, full=keys is None))
+            owners_changed, rows_written, rebuilt = result.one()
+            return rows_written, rebuilt
+
+        if name == 'property_feature_vectors':
+            result = await session.execute(text("""
+                SELECT vectors_written, vectors_cleared, rescaled
+                FROM refresh_property_feature_vectors(:market_id, :snapshot_id, CAST(:keys AS TEXT[]))
+            """), params)
+            vectors_written, vectors_cleared, rescaled = result.one()
+            return vectors_written + vectors_cleared, rescaled
+
+        if name == 'parcel_owner_components':
+            stats = await ParcelAdjacencyBuilder().refresh_owner_components(session, market_id, snapshot_id)
+            return stats['parcels'], True
+
+        if name == 'entity_market_properties':
+            result = await session.execute(text("""
+                SELECT rows_deleted, rows_written
+                FROM refresh_entity_market_properties(:market_id, CAST(:keys AS TEXT[]))
+            """), params)
+            rows_deleted, rows_written = result.one()
+            return rows_written, keys is None
+
+        raise ValueError(f"Unknown derived table: {name}")
+
+    async def _record(
+        self,
+        session: AsyncSession,
+        name: str,
+        market_id: str,
+        snapshot_id: Optional[str],
+        trigger: str,
+        changes: int,
+        oldest_change: Optional[datetime],
+        stats: Dict,
+        through_id: Optional[int]
+    ) -> Optional[int]:
+        """
+        Append to derived_refresh_log and update derived_refresh_state; returns staleness_ms.
+
+        Staleness (oldest applied change -> refresh done) is measured on the database
+        clock, the one property_change_log.changed_at was written with.
+        """
+        params = {
+            'table_name': name,
+            'market_id': str(market_id),
+            'trigger': trigger,
+            'snapshot_id': str(snapshot_id) if snapshot_id else None,
+            'changes': changes,
+            'through_id': through_id,
+            'oldest_change': oldest_change,
+            **stats
+        }
+
+        result = await session.execute(text("""
+            INSERT INTO derived_refresh_log (
+                table_name, market_id, trigger, snapshot_id, changes_seen, keys_refreshed,
+                rows_written, full_rebuild, duration_ms, staleness_ms, error
+            ) VALUES (
+                :table_name, :market_id, :trigger, :snapshot_id, :changes, :keys_refreshed,
+                :rows_written, :full_rebuild, :duration_ms,
+                (EXTRACT(EPOCH FROM clock_timestamp()::timestamp - CAST(:oldest_change AS TIMESTAMP)) * 1000)::BIGINT,
+                :error
+            )
+            RETURNING staleness_ms
+        """), params)
+        params['staleness_ms'] = result.scalar()
+
+        # A failed refresh keeps its position; an entity refresh (no position) keeps the
+        # table's change log position as is
+        await session.execute(text("""
+            INSERT INTO derived_refresh_state (
+                table_name, market_id, last_change_id, snapshot_id, refreshed_at, duration_ms,
+                keys_refreshed, rows_written, full_rebuild, staleness_ms, last_error
+            ) VALUES (
+                :table_name, :market_id, :through_id, :snapshot_id, NOW(), :duration_ms,
+                :keys_refreshed, :rows_written, :full_rebuild, :staleness_ms, :error
+            )
+            ON CONFLICT (table_name, market_id) DO UPDATE SET
+                last_change_id = COALESCE(EXCLUDED.last_change_id, derived_refresh_state.last_change_id),
+                snapshot_id = COALESCE(EXCLUDED.snapshot_id, derived_refresh_state.snapshot_id),
+                refreshed_at = EXCLUDED.refreshed_at,
+                duration_ms = EXCLUDED.duration_ms,
+                keys_refreshed = EXCLUDED.keys_refreshed,
+                rows_written = EXCLUDED.rows_written,
+                full_rebuild = EXCLUDED.full_rebuild,
+                staleness_ms = EXCLUDED.staleness_ms,
+                last_error = EXCLUDED.last_error
+        """), params)
+
+        return params['staleness_ms']
@@ -2,13 +2,17 @@
 Municipal Ordinance RAG Search Service
 
 Semantic search over municipal ordinances using pgvector.
-Supports location filtering (city-specific or county-wide).
+Supports location filtering (city-specific or county-wide): the city is resolved to a
+canonical jurisdiction id first, so the search runs on that jurisdiction's partial HNSW
+index (migration 023). mode='hybrid' adds full-text retrieval on chunk_tsv and fuses both
+rankings with reciprocal rank fusion (migration 024).
 
 NOTE: torch and transformers are imported lazily to avoid import errors
 in environments where they're not installed (like venv_src for agent).
 """
 
 import json
+import re
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import structlog
@@ -17,6 +21,177 @@ from sqlalchemy import text
 
 logger = structlog.get_logger(__name__)
 
+# ordinance_jurisdictions.jurisdiction_id form; ids are inlined into the search SQL
+JURISDICTION_ID_PATTERN = re.compile(r'^[a-z0-9_]+$')
+
+SEARCH_MODES = ('vector', 'hybrid')
+HYBRID_CANDIDATES = 40      # per retrieval; hnsw.ef_search default
+RRF_K = 60
+
+def _jurisdiction_filter(jurisdiction_id: Optional[str]) -> str:
+    """AND clause for a registry jurisdiction id (inlined for its partial HNSW index)"""
+    if not jurisdiction_id:
+        return ''
+    if not JURISDICTION_ID_PATTERN.match(jurisdiction_id):
+        raise ValueError(f"Invalid jurisdiction id: {jurisdiction_id}")
+    return f"AND o.jurisdiction_id = '{jurisdiction_id}'"
+
+
+def build_search_sql(jurisdiction_id: Optional[str] = None, min_relevance: bool = False) -> str:
+    """
+    Nearest-neighbour search SQL for OrdinanceRAG.search
+
+    The inner query is the form the HNSW index can drive: ORDER BY the distance operator
+    against the query vector, LIMIT top_k. Relevance (1 - distance) and the min_relevance
+    threshold are applied to those rows afterwards; a threshold inside the inner query
+    would force an exact scan over every chunk. The query vector is bound once and cast
+    once in the CTE.
+
+    Args:
+        jurisdiction_id: Registry id to filter on (inlined so the planner can use the
+            jurisdiction's partial HNSW index)
+        min_relevance: Whether to apply the :min_relevance threshold
+
+    Returns:
+        SQL with :query_embedding, :state, :top_k (and :min_relevance) parameters
+    """
+    return f"""
+        WITH query_vector AS (
+            SELECT CAST(:query_embedding AS vector) AS embedding
+        ),
+        nearest AS (
+            SELECT
+                o.id,
+                o.ordinance_file,
+                o.city,
+                o.state,
+                o.chunk_number,
+                o.chunk_text,
+                o.chunk_chars,
+                o.chunk_words,
+                o.content_hash,
+                o.file_modified_timestamp,
+                o.scraped_date,
+                o.metadata,
+                o.embedding <=> q.embedding AS distance
+            FROM ordinance_embeddings o
+            CROSS JOIN query_vector q
+            WHERE o.state = :state
+            {_jurisdiction_filter(jurisdiction_id)}
+            ORDER BY o.embedding <=> q.embedding
+            LIMIT :top_k
+        )
+        SELECT
+            id,
+            ordinance_file,
+            city,
+            state,
+            chunk_number,
+            chunk_text,
+            chunk_chars,
+            chunk_words,
+            content_hash,
+            file_modified_timestamp,
+            scraped_date,
+            metadata,
+            1 - distance AS relevance_score
+        FROM nearest
+        {'WHERE 1 - distance >= :min_relevance' if min_relevance else ''}
+        ORDER BY distance
+    """
+
+
+def build_hybrid_search_sql(jurisdiction_id: Optional[str] = None, min_relevance: bool = False) -> str:
+    """
+    Hybrid (vector + full-text) search SQL for OrdinanceRAG.search(mode='hybrid')
+
+    Takes the :candidates nearest chunks (HNSW, as in build_search_sql) and the
+    :candidates best full-text matches on chunk_tsv (query terms ORed, ranked by
+    ts_rank_cd), and fuses the two rankings with reciprocal rank fusion:
+    1 / (:rrf_k + vector rank) + 1 / (:rrf_k + lexical rank). One round trip.
+
+    Args:
+        jurisdiction_id: Registry id to filter both retrievals on
+        min_relevance: Whether vector candidates must reach :min_relevance (full-text
+            matches are kept regardless - they are there for what embeddings miss)
+
+    Returns:
+        SQL with :query_embedding, :query_text, :state, :candidates, :rrf_k, :top_k
+        (and :min_relevance) parameters
+    """
+    jurisdiction_filter = _jurisdiction_filter(jurisdiction_id)
+
+    # query_vector is referenced twice: NOT MATERIALIZED keeps it a parameter expression
+    # the HNSW index can order by
+    return f"""
+        WITH query_vector AS NOT MATERIALIZED (
+            SELECT CAST(:query_embedding AS vector) AS embedding
+        ),
+        query_terms AS (
+            SELECT string_agg(quote_literal(lexeme), ' | ')::tsquery AS tsq
+            FROM unnest(tsvector_to_array(to_tsvector('english', :query_text))) AS lexeme
+        ),
+        ann AS (
+            SELECT id, distance, ROW_NUMBER() OVER (ORDER BY distance) AS ann_rank
+            FROM (
+                SELECT o.id, o.embedding <=> q.embedding AS distance
+                FROM ordinance_embeddings o
+                CROSS JOIN query_vector q
+                WHERE o.state = :state
+                {jurisdiction_filter}
+                ORDER BY o.embedding <=> q.embedding
+                LIMIT :candidates
+            ) nearest
+            {'WHERE 1 - distance >= :min_relevance' if min_relevance else ''}
+        ),
+        lexical AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC, id) AS lexical_rank
+            FROM (
+                SELECT o.id, ts_rank_cd(o.chunk_tsv, t.tsq) AS rank
+                FROM ordinance_embeddings o
+                CROSS JOIN query_terms t
+                WHERE o.chunk_tsv @@ t.tsq
+                AND o.state = :state
+                {jurisdiction_filter}
+                ORDER BY rank DESC
+                LIMIT :candidates
+            ) matches
+        ),
+        fused AS (
+            SELECT
+                COALESCE(a.id, l.id) AS id,
+                a.distance,
+                a.ann_rank,
+                l.lexical_rank,
+                (COALESCE(1.0 / (:rrf_k + a.ann_rank), 0) + COALESCE(1.0 / (:rrf_k + l.lexical_rank), 0))::float8 AS rrf_score
+            FROM ann a
+            FULL OUTER JOIN lexical l ON l.id = a.id
+            ORDER BY rrf_score DESC
+            LIMIT :top_k
+        )
+        SELECT
+            o.id,
+            o.ordinance_file,
+            o.city,
+            o.state,
+            o.chunk_number,
+            o.chunk_text,
+            o.chunk_chars,
+            o.chunk_words,
+            o.content_hash,
+            o.file_modified_timestamp,
+            o.scraped_date,
+            o.metadata,
+            1 - COALESCE(f.distance, o.embedding <=> q.embedding) AS relevance_score,
+            f.rrf_score,
+            f.ann_rank,
+            f.lexical_rank
+        FROM fused f
+        JOIN ordinance_embeddings o ON o.id = f.id
+        CROSS JOIN query_vector q
+        ORDER BY f.rrf_score DESC
+    """
+
 
 class OrdinanceRAG:
     """
@@ -113,10 +288,11 @@ class OrdinanceRAG:
         city: Optional[str] = None,
         state: str = "FL",
         top_k: int = 5,
-        min_relevance: float = 0.0
+        min_relevance: float = 0.0,
+        mode: str = "vector"
     ) -> List[Dict[str, Any]]:
         """
-        Search ordinances semantically
+        Search ordinances semantically (or hybrid semantic + full-text)
 
         Args:
             session: Database session
@@ -124,10 +300,15 @@ class OrdinanceRAG:
             city: Optional city filter (e.g., "Gainesville")
             state: State filter (default: "FL")
             top_k: Number of results to return
-            min_relevance: Minimum cosine similarity score (0-1)
+            min_relevance: Minimum cosine similarity score (0-1), applied to the
+                top_k nearest chunks (fewer results when some score below it); in
+                hybrid mode, to the vector candidates only
+            mode: "vector" (cosine similarity) or "hybrid" (cosine + full-text with
+                reciprocal rank fusion, for exact tokens like "RSF-1" or "30-4.21")
 
         Returns:
-            List of matching ordinance chunks with metadata
+            List of matching ordinance chunks with metadata (hybrid results also carry
+            rrf_score and matched_by)
 
         Example:
             results = await rag.search(
@@ -143,56 +324,43 @@ class OrdinanceRAG:
             query=query[:100],
             city=city,
             state=state,
-            top_k=top_k
+            top_k=top_k,
+            mode=mode
         )
 
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode} (expected one of {SEARCH_MODES})")
+
+        # Resolve the city up front: the filter must be a literal for the planner to use
+        # the jurisdiction's partial HNSW index
+        jurisdiction_id = None
+        if city:
+            jurisdiction_id = await self.resolve_jurisdiction(session, city, state)
+            if not jurisdiction_id:
+                logger.warning("ordinance_jurisdiction_unknown", city=city, state=state)
+                return []
+
         # Embed query
         query_embedding = self._embed_query(query)
         embedding_str = '[' + ','.join(str(x) for x in query_embedding) + ']'
 
-        # Build SQL with optional city filter
-        sql_parts = ["""
-            SELECT
-                id,
-                ordinance_file,
-                city,
-                state,
-                chunk_number,
-                chunk_text,
-                chunk_chars,
-                chunk_words,
-                content_hash,
-                file_modified_timestamp,
-                scraped_date,
-                metadata,
-                1 - (embedding <=> CAST(:query_embedding AS vector)) AS relevance_score
-            FROM ordinance_embeddings
-            WHERE state = :state
-        """]
-
         params = {
             'query_embedding': embedding_str,
             'state': state,
             'top_k': top_k
         }
-
-        # Add city filter if specified
-        if city:
-            sql_parts.append("AND city = :city")
-            params['city'] = city
-
-        # Add relevance threshold if specified
         if min_relevance > 0:
-            sql_parts.append("AND 1 - (embedding <=> CAST(:query_embedding AS vector)) >= :min_relevance")
             params['min_relevance'] = min_relevance
 
-        # Order by relevance and limit
-        sql_parts.append("""
-            ORDER BY relevance_score DESC
-            LIMIT :top_k
-        """)
-
-        sql = text(' '.join(sql_parts))
+        if mode == 'hybrid':
+            params.update({
+                'query_text': query,
+                'candidates': max(HYBRID_CANDIDATES, top_k),
+                'rrf_k': RRF_K
+            })
+            sql = text(build_hybrid_search_sql(jurisdiction_id, min_relevance > 0))
+        else:
+            sql = text(build_search_sql(jurisdiction_id, min_relevance > 0))
 
         # Execute query
         result = await session.execute(sql, params)
@@ -201,7 +369,7 @@ class OrdinanceRAG:
         # Format results
         results = []
         for row in rows:
-            results.append({
+            item = {
                 'id': str(row[0]),
                 'ordinance_file': row[1],
                 'city': row[2],
@@ -215,7 +383,11 @@ class OrdinanceRAG:
                 'scraped_date': row[10],
                 'metadata': row[11] if row[11] else {},
                 'relevance_score': float(row[12])
-            })
+            }
+            if mode == 'hybrid':
+                item['rrf_score'] = float(row[13])
+                item['matched_by'] = [name for name, rank in (('vector', row[14]), ('lexical', row[15])) if rank]
+            results.append(item)
 
         logger.info(
             "search_complete",
@@ -225,6 +397,36 @@ class OrdinanceRAG:
 
         return results
 
+    async def resolve_jurisdiction(
+        self,
+        session: AsyncSession,
+        city: str,
+        state: Optional[str] = "FL"
+    ) -> Optional[str]:
+        """
+        Canonical jurisdiction id for a city name (or an id itself)
+
+        Args:
+            session: Database session
+            city: City name ("Gainesville", "City of Gainesville", "Alachua County") or id
+                ("gainesville_fl")
+            state: State of the city (None matches any state)
+
+        Returns:
+            jurisdiction_id, or None when no ordinances are loaded for it
+        """
+
+        # Same rule as the RAG Lambda (resolve_ordinance_jurisdiction, migration 023)
+        result = await session.execute(
+            text("SELECT resolve_ordinance_jurisdiction(:city, :state)"),
+            {'city': city, 'state': state}
+        )
+        jurisdiction_id = result.scalar()
+
+        if jurisdiction_id and JURISDICTION_ID_PATTERN.match(jurisdiction_id):
+            return jurisdiction_id
+        return None
+
     async def get_available_cities(
         self,
         session: AsyncSession,
@@ -238,14 +440,13 @@ class OrdinanceRAG:
             state: State filter
 
         Returns:
-            List of cities with chunk counts
+            List of cities with chunk counts and jurisdiction ids
         """
 
         sql = text("""
-            SELECT city, COUNT(*) as chunk_count
-            FROM ordinance_embeddings
+            SELECT city, chunk_count, jurisdiction_id
+            FROM ordinance_jurisdictions
             WHERE state = :state
-            GROUP BY city
             ORDER BY chunk_count DESC
         """)
 
@@ -253,7 +454,7 @@ class OrdinanceRAG:
         rows = result.fetchall()
 
         return [
-            {'city': row[0], 'chunk_count': row[1]}
+            {'city': row[0], 'chunk_count': row[1], 'jurisdiction_id': row[2]}
             for row in rows
         ]
 
@@ -0,0 +1,323 @@
+"""
+Parcel Adjacency Graph
+
+Builds the parcel adjacency graph used for assemblage detection from the county parcel
+polygons (GISScraper.fetch_layer('parcels')), and the same-owner connected components
+on top of it.
+
+Workflow:
+1. Project parcel polygons (lon/lat) to local metres
+2. STRtree pass: every pair of polygons within the tolerance becomes an edge
+   (shared_edge / corner / near, with shared boundary length and gap)
+3. Write parcel_adjacency (both directions)
+4. After each property snapshot: union-find over same-owner edges -> parcel_owner_components
+
+Adjacency only changes when the GIS layer changes; components are rebuilt whenever
+ownership changes (property appraiser snapshot).
+"""
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..utils.parcel_ids import canonical_parcel_id
+
+logger = structlog.get_logger(__name__)
+
+# Equirectangular metres per degree (longitude is scaled by cos(reference latitude))
+METERS_PER_DEGREE_LAT = 110574.0
+METERS_PER_DEGREE_LON = 111320.0
+
+# Relations that make two parcels contiguous for assemblage purposes
+CONTIGUOUS_RELATIONS = ('shared_edge', 'corner')
+
+INSERT_BATCH_SIZE = 5000
+
+
+def feature_parcel_id(feature_dict: Dict) -> Optional[str]:
+    """Canonical parcel ID from a GIS parcels feature (same fallbacks as the GIS loader)"""
+    for key in ('Name', 'PARCEL_ID', 'parcelid', 'PIN', 'Prop_ID'):
+        parcel_id = canonical_parcel_id(feature_dict.get(key))
+        if parcel_id:
+            return parcel_id
+    return None
+
+
+class ParcelAdjacencyBuilder:
+    """
+    Builds parcel_adjacency from parcel polygons and parcel_owner_components from it.
+
+    Tolerances are in metres:
+    - tolerance_meters: polygons closer than this are neighbours (digitizing slivers)
+    - min_shared_meters: common boundary needed to count as a shared edge
+    """
+
+    def __init__(self, tolerance_meters: float = 1.5, min_shared_meters: float = 1.0):
+        self.tolerance_meters = tolerance_meters
+        self.min_shared_meters = min_shared_meters
+
+    # ==================== ADJACENCY ====================
+
+    def load_polygons(self, features: Iterable) -> Dict[str, object]:
+        """
+        Parcel polygons keyed by parcel ID, projected to local metres.
+
+        Multiple features with the same parcel ID (multi-part parcels) are unioned.
+        """
+        from shapely import transform, wkt
+        from shapely.geometry import shape
+        from shapely.geometry.base import BaseGeometry
+        from shapely.ops import unary_union
+
+        parts = defaultdict(list)
+        skipped = 0
+
+        for feature in features:
+            feature_dict = feature.to_dict() if hasattr(feature, 'to_dict') else feature
+            parcel_id = feature_parcel_id(feature_dict)
+            geom_data = feature_dict.get('geometry')
+
+            if not parcel_id or parcel_id == '0' or not geom_data:
+                skipped += 1
+                continue
+
+            try:
+                if isinstance(geom_data, BaseGeometry):
+                    geom = geom_data
+                elif isinstance(geom_data, dict):
+                    geom = shape(geom_data)
+                else:
+                    geom = wkt.loads(geom_data)
+            except Exception as e:
+                logger.warning("adjacency_geometry_invalid", parcel_id=parcel_id, error=str(e))
+                skipped += 1
+                continue
+
+            if geom.is_empty:
+                skipped += 1
+                continue
+            if not geom.is_valid:
+                geom = geom.buffer(0)
+            parts[parcel_id].append(geom)
+
+        if not parts:
+            return {}
+
+        polygons = {pid: geoms[0] if len(geoms) == 1 else unary_union(geoms) for pid, geoms in parts.items()}
+
+        # Local equirectangular projection around the layer's mean latitude
+        latitudes = [g.centroid.y for g in polygons.values()]
+        ref_lat = sum(latitudes) / len(latitudes)
+        if abs(ref_lat) > 90:
+            raise ValueError("Parcel geometries are not in lon/lat (EPSG:4326)")
+        scale = (METERS_PER_DEGREE_LON * math.cos(math.radians(ref_lat)), METERS_PER_DEGREE_LAT)
+
+        projected = {pid: transform(geom, lambda coords: coords * scale) for pid, geom in polygons.items()}
+
+        logger.info("adjacency_polygons_loaded",
+                   parcels=len(projected),
+                   skipped=skipped,
+                   reference_latitude=round(ref_lat, 4))
+        return projected
+
+    def build_edges(self, polygons: Dict[str, object]) -> List[Tuple[str, str, str, float, float]]:
+        """
+        Neighbouring parcel pairs as (parcel_id, neighbor_parcel_id, relation, shared_m, gap_m).
+
+        One STRtree over all polygons; each polygon is probed with its tolerance buffer,
+        so the pass is O(n log n) instead of comparing every pair. Each pair appears once.
+        """
+        from shapely import STRtree
+
+        parcel_ids = list(polygons)
+        geoms = [polygons[pid] for pid in parcel_ids]
+        tree = STRtree(geoms)
+
+        probes = [g.buffer(self.tolerance_meters) for g in geoms]
+        left, right = tree.query(probes, predicate='intersects')
+
+        edges = []
+        for i, j in zip(left.tolist(), right.tolist()):
+            if i >= j:
+                continue
+
+            a, b = geoms[i], geoms[j]
+            gap = a.distance(b)
+            if gap > self.tolerance_meters:
+                continue
+
+            # Length of a's boundary lying within tolerance of b
+            shared = a.boundary.intersection(probes[j]).length
+
+            if shared >= self.min_shared_meters:
+                relation = 'shared_edge'
+            elif gap <= 0.05:
+                relation = 'corner'
+            else:
+                relation = 'near'
+
+            edges.append((parcel_ids[i], parcel_ids[j], relation, round(shared, 2), round(gap, 2)))
+
+        logger.info("adjacency_edges_built",
+                   parcels=len(parcel_ids),
+                   edges=len(edges),
+                   shared_edge=sum(1 for e in edges if e[2] == 'shared_edge'))
+        return edges
+
+    async def write_edges(
+        self,
+        session: AsyncSession,
+        market_id: str,
+        edges: List[Tuple[str, str, str, float, float]],
+        snapshot_id: Optional[str] = None
+    ) -> int:
+        """Replace the market's adjacency with these edges (stored in both directions)"""
+        await session.execute(text("""
+            DELETE FROM parcel_adjacency WHERE market_id = :market_id
+        """), {'market_id': str(market_id)})
+
+        insert = text("""
+            INSERT INTO parcel_adjacency (
+                market_id, parcel_id, neighbor_parcel_id, relation,
+                shared_boundary_meters, gap_meters, snapshot_id, built_at
+            ) VALUES (
+                :market_id, :parcel_id, :neighbor_parcel_id, :relation,
+                :shared, :gap, :snapshot_id, NOW()
+            )
+            ON CONFLICT (market_id, parcel_id, neighbor_parcel_id) DO NOTHING
+        """)
+
+        rows = []
+        for parcel_id, neighbor_id, relation, shared, gap in edges:
+            for a, b in ((parcel_id, neighbor_id), (neighbor_id, parcel_id)):
+                rows.append({
+                    'market_id': str(market_id),
+                    'parcel_id': a,
+                    'neighbor_parcel_id': b,
+                    'relation': relation,
+                    'shared': shared,
+                    'gap': gap,
+                    'snapshot_id': str(snapshot_id) if snapshot_id else None
+                })
+
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            await session.execute(insert, rows[start:start + INSERT_BATCH_SIZE])
+
+        return len(rows)
+
+    # ==================== OWNER COMPONENTS ====================
+
+    async def refresh_owner_components(
+        self,
+        session: AsyncSession,
+        market_id: str,
+        property_snapshot_id: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Rebuild parcel_owner_components for a market from the adjacency graph.
+
+        Ownership comes from the market's current property rows; the given property snapshot
+        (default: latest completed property_appraiser snapshot of the market) is recorded
+        as the one the components reflect. Components of a single parcel are not stored.
+        """
+        if property_snapshot_id is None:
+            result = await session.execute(text("""
+                SELECT id
+                FROM bulk_data_snapshots
+                WHERE market_id = :market_id
+                  AND data_source LIKE 'property_appraiser%'
+                  AND status = 'completed'
+                ORDER BY processing_completed_at DESC NULLS LAST
+                LIMIT 1
+            """), {'market_id': str(market_id)})
+            row = result.fetchone()
+            if not row:
+                logger.info("owner_components_skipped", reason="no completed property snapshot")
+                return {'parcels': 0, 'components': 0}
+            property_snapshot_id = row[0]
+
+        result = await session.execute(text("""
+            SELECT parcel_id, owner_key, owner_name, UPPER(TRIM(city)) as city
+            FROM current_bulk_properties
+            WHERE market_id = :market_id
+              AND owner_key NOT IN ('', 'UNKNOWN')
+        """), {'market_id': str(market_id)})
+
+        owners = {
+            parcel_id: (key, owner_name, city)
+            for parcel_id, key, owner_name, city in result
+        }
+
+        result = await session.execute(text("""
+            SELECT parcel_id, neighbor_parcel_id
+            FROM parcel_adjacency
+            WHERE market_id = :market_id
+              AND relation = ANY(:relations)
+              AND parcel_id < neighbor_parcel_id
+        """), {'market_id': str(market_id), 'relations': list(CONTIGUOUS_RELATIONS)})
+
+        # Union-find over edges whose endpoints share an owner key
+        parent = {}
+
+        def find(x: str) -> str:
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        for parcel_id, neighbor_id in result:
+            a, b = owners.get(parcel_id), owners.get(neighbor_id)
+            if not a or not b or a[0] != b[0]:
+                continue
+            parent.setdefault(parcel_id, parcel_id)
+            parent.setdefault(neighbor_id, neighbor_id)
+            root_a, root_b = find(parcel_id), find(neighbor_id)
+            if root_a != root_b:
+                # Smallest parcel_id is the root, so component ids are stable between runs
+                if root_b < root_a:
+                    root_a, root_b = root_b, root_a
+                parent[root_b] = root_a
+
+        members = defaultdict(list)
+        for parcel_id in parent:
+            members[find(parcel_id)].append(parcel_id)
+
+        await session.execute(text("""
+            DELETE FROM parcel_owner_components WHERE market_id = :market_id
+        """), {'market_id': str(market_id)})
+
+        rows = []
+        for component_id, parcel_ids in members.items():
+            if len(parcel_ids) < 2:
+                continue
+            for parcel_id in parcel_ids:
+                key, owner_name, city = owners[parcel_id]
+                rows.append({
+                    'market_id': str(market_id),
+                    'parcel_id': parcel_id,
+                    'component_id': component_id,
+                    'owner_key': key,
+                    'owner_name': owner_name,
+                    'city': city,
+                    'component_size': len(parcel_ids),
+                    'snapshot_id': str(property_snapshot_id)
+                })
+
+        insert = text("""
+            INSERT INTO parcel_owner_components (
+                market_id, parcel_id, component_id, owner_key, owner_name, city,
+                component_size, property_snapshot_id, refreshed_at
+            ) VALUES (
+                :market_id, :parcel_id, :component_id, :owner_key, :owner_name, :city,
+                :component_size, :snapshot_id, NOW()
+            )
+        """)
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            await session.execute(insert, rows[start:start + INSERT_BATCH_SIZE])
+
+        stats = {'parcels': len(rows), 'components': sum(1 for p in members.values() if len(p) >= 2)}
+        logger.info("owner_components_refreshed", **stats)
+        return stats
@@ -20,7 +20,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
 from database import DatabaseManager
-from database.models import BulkPropertyRecord, BulkDataSnapshot
+from database.models import BulkPropertyRecord
 from scrapers.data_sources.qpublic_scraper import QPublicBrowserScraperFast
 
 logger = structlog.get_logger(__name__)
@@ -60,33 +60,26 @@ class QPublicEnrichmentService:
         - Missing square_footage (NULL)
 
         Args:
-            snapshot_id: Specific snapshot to check (None = latest)
+            snapshot_id: Specific snapshot to check (None = current rows of every parcel)
             limit: Maximum parcels to return
 
         Returns:
             List of parcel IDs needing enrichment
         """
         async with self.db.async_session_maker() as session:
-            # Get latest snapshot if not specified
+            # Unchanged parcels keep the row of the snapshot that last changed them, so the
+            # latest snapshot alone is not the full parcel set - default to the current rows
             if snapshot_id is None:
-                snapshot_result = await session.execute(
-                    select(BulkDataSnapshot.id)
-                    .filter(BulkDataSnapshot.data_source.like('property_appraiser%'))
-                    .order_by(BulkDataSnapshot.snapshot_date.desc())
-                    .limit(1)
-                )
-                snapshot_row = snapshot_result.first()
-                if not snapshot_row:
-                    logger.error("No property appraiser snapshots found")
-                    return []
-                snapshot_id = snapshot_row[0]
+                snapshot_filter = BulkPropertyRecord.is_current.is_(True)
+            else:
+                snapshot_filter = BulkPropertyRecord.snapshot_id == snapshot_id
 
             # Find properties with missing critical data
             query = (
                 select(BulkPropertyRecord.parcel_id)
                 .filter(
                     and_(
-                        BulkPropertyRecord.snapshot_id == snapshot_id,
+                        snapshot_filter,
                         or_(
                             BulkPropertyRecord.market_value.is_(None),
                             BulkPropertyRecord.market_value == 0,
@@ -112,7 +105,7 @@ class QPublicEnrichmentService:
     async def enrich_property(
         self,
         parcel_id: str,
-        snapshot_id: int,
+        snapshot_id: Optional[int],
         session: AsyncSession
     ) -> bool:
         """
@@ -120,7 +113,7 @@ class QPublicEnrichmentService:
 
         Args:
             parcel_id: Parcel ID to enrich
-            snapshot_id: Snapshot ID to update
+            snapshot_id: Snapshot ID to update (None = the parcel's current row)
             session: Database session
 
         Returns:
@@ -220,7 +213,8 @@ class QPublicEnrichmentService:
             .where(
                 and_(
                     BulkPropertyRecord.parcel_id == parcel_id,
-                    BulkPropertyRecord.snapshot_id == snapshot_id
+                    BulkPropertyRecord.is_current.is_(True) if snapshot_id is None
+                    else BulkPropertyRecord.snapshot_id == snapshot_id
                 )
             )
             .values(**update_data)
@@ -251,27 +245,12 @@ class QPublicEnrichmentService:
 
         Args:
             parcel_ids: List of parcel IDs to enrich
-            snapshot_id: Snapshot ID to update (None = latest)
+            snapshot_id: Snapshot ID to update (None = each parcel's current row)
             batch_size: Number of properties to process in parallel
 
         Returns:
             Dict with success/failure counts
         """
-        # Get snapshot ID if not provided
-        if snapshot_id is None:
-            async with self.db.async_session_maker() as session:
-                snapshot_result = await session.execute(
-                    select(BulkDataSnapshot.id)
-                    .filter(BulkDataSnapshot.data_source.like('property_appraiser%'))
-                    .order_by(BulkDataSnapshot.snapshot_date.desc())
-                    .limit(1)
-                )
-                snapshot_row = snapshot_result.first()
-                if not snapshot_row:
-                    logger.error("No property appraiser snapshots found")
-                    return {"success": 0, "failed": 0, "total": 0}
-                snapshot_id = snapshot_row[0]
-
         logger.info("Starting qPublic batch enrichment",
                    parcel_count=len(parcel_ids),
                    snapshot_id=snapshot_id)
@@ -332,24 +311,12 @@ class QPublicEnrichmentService:
             Dict with success/failure counts
         """
         async with self.db.async_session_maker() as session:
-            # Get latest snapshot
-            snapshot_result = await session.execute(
-                select(BulkDataSnapshot.id)
-                .filter(BulkDataSnapshot.source_type == 'property_appraiser')
-                .order_by(BulkDataSnapshot.created_at.desc())
-                .limit(1)
-            )
-            snapshot_row = snapshot_result.first()
-            if not snapshot_row:
-                return {"success": 0, "failed": 0, "total": 0}
-            snapshot_id = snapshot_row[0]
-
             # Find properties with NULL addresses
             query = (
                 select(BulkPropertyRecord.parcel_id)
                 .filter(
                     and_(
-                        BulkPropertyRecord.snapshot_id == snapshot_id,
+                        BulkPropertyRecord.is_current.is_(True),
                         BulkPropertyRecord.site_address.is_(None)     # FIXED: was property_address
                     )
                 )
@@ -362,7 +329,7 @@ class QPublicEnrichmentService:
         logger.info("Found properties missing addresses",
                    count=len(parcel_ids))
 
-        return await self.enrich_batch(parcel_ids, snapshot_id)
+        return await self.enrich_batch(parcel_ids)
 
     async def enrich_missing_values(
         self,
@@ -380,24 +347,12 @@ class QPublicEnrichmentService:
             Dict with success/failure counts
         """
         async with self.db.async_session_maker() as session:
-            # Get latest snapshot
-            snapshot_result = await session.execute(
-                select(BulkDataSnapshot.id)
-                .filter(BulkDataSnapshot.source_type == 'property_appraiser')
-                .order_by(BulkDataSnapshot.created_at.desc())
-                .limit(1)
-            )
-            snapshot_row = snapshot_result.first()
-            if not snapshot_row:
-                return {"success": 0, "failed": 0, "total": 0}
-            snapshot_id = snapshot_row[0]
-
             # Find properties with NULL or $0 market values
             query = (
                 select(BulkPropertyRecord.parcel_id)
                 .filter(
                     and_(
-                        BulkPropertyRecord.snapshot_id == snapshot_id,
+                        BulkPropertyRecord.is_current.is_(True),
                         or_(
                             BulkPropertyRecord.market_value.is_(None),
                             BulkPropertyRecord.market_value == 0
@@ -413,7 +368,7 @@ class QPublicEnrichmentService:
         logger.info("Found properties missing market values",
                    count=len(parcel_ids))
 
-        return await self.enrich_batch(parcel_ids, snapshot_id)
+        return await self.enrich_batch(parcel_ids)
 
     async def cleanup(self):
         """Close browser and cleanup resources."""
@@ -444,18 +399,8 @@ async def main():
             test_parcel = "17757-003-004"
 
             async with db.async_session_maker() as session:
-                # Get latest snapshot
-                snapshot_result = await session.execute(
-                    select(BulkDataSnapshot.id)
-                    .filter(BulkDataSnapshot.data_source.like('property_appraiser%'))
-                    .order_by(BulkDataSnapshot.snapshot_date.desc())
-                    .limit(1)
-                )
-                snapshot_row = snapshot_result.first()
-                if snapshot_row:
-                    snapshot_id = snapshot_row[0]
-                    success = await service.enrich_property(test_parcel, snapshot_id, session)
-                    print(f"Test enrichment: {'SUCCESS' if success else 'FAILED'}")
+                success = await service.enrich_property(test_parcel, None, session)
+                print(f"Test enrichment: {'SUCCESS' if success else 'FAILED'}")
 
         else:
             # Run full enrichment
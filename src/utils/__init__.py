@@ -1,5 +1,6 @@
 """Utility modules for Dominion"""
 
 from .address_matcher import AddressMatcher, get_address_matcher
+from .parcel_ids import canonical_parcel_id
 
-__all__ = ['AddressMatcher', 'get_address_matcher']
+__all__ = ['AddressMatcher', 'get_address_matcher', 'canonical_parcel_id']
@@ -0,0 +1,41 @@
+"""
+Parcel ID Canonicalization
+
+One spelling per parcel, applied wherever parcel IDs enter the database (CAMA bulk load,
+CSV loader, GIS parcels) so lookups can use plain indexed equality instead of
+TRIM(parcel_id) = TRIM(:parcel_id).
+
+Canonical form: byte-order marks dropped, surrounding whitespace stripped, internal
+whitespace runs collapsed to one space, uppercase. Numeric IDs read as floats by pandas
+("6043001000.0") become their integer text. Must stay in step with the SQL function
+canonical_parcel_id() (migration 017), which enforces the same form on
+bulk_property_records.parcel_id.
+
+This file is the only copy: the CDK app (infrastructure/app.py) copies it into the Lambda
+shared layer at synth time, which is where the Intelligence Lambda imports it from.
+"""
+
+import re
+from typing import Any, Optional
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Placeholder values some exports use for a missing parcel
+_MISSING = {'', 'NULL', 'NONE', 'N/A', 'NAN'}
+
+
+def canonical_parcel_id(value: Any) -> Optional[str]:
+    """Canonical parcel ID, or None when the value is missing/blank"""
+    if value is None:
+        return None
+
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        if value.is_integer():
+            value = int(value)
+
+    parcel_id = _WHITESPACE.sub(' ', str(value).replace('\ufeff', '')).strip().upper()
+    if parcel_id in _MISSING:
+        return None
+    return parcel_id